@@ -1,5 +1,6 @@
 #!/usr/bin/env bash
 # Install complete LAIA AI stack
+# Usage: sudo bash install-ai-stack.sh [--minimal] [--reset] [model-id...]
 set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 
@@ -13,14 +14,13 @@ if [[ $FREE_GB -lt 10 ]]; then
     echo "⚠️  Only ${FREE_GB}GB free disk space. Models need 4-20GB. Consider --minimal."
 fi
 
-echo "1/3 Installing Ollama..."
-bash "$SCRIPT_DIR/install-ollama.sh"
-
-echo "2/3 Installing AI models..."
-bash "$SCRIPT_DIR/install-models.sh"
-
-echo "3/3 Installing OpenWebUI..."
-bash "$SCRIPT_DIR/install-openwebui.sh"
+# Steps run as a dependency graph (gui/laia_common/installdag.py): the Ollama
+# install and the OpenWebUI venv side by side, then the model pulls and the
+# OpenWebUI service. Finished steps are checkpointed, so after a failure
+# running this again resumes where it stopped (--reset starts over).
+# Per-step output and timings also go to /var/log/laia-ai-stack.log.
+LAIA_ROOT="$(cd "$SCRIPT_DIR/../.." && pwd)"
+PYTHONPATH="$LAIA_ROOT/gui" python3 -m laia_common.installdag ai-stack "$@"
 
 echo ""
 echo "✅ AI stack installed!"
@@ -1,12 +1,19 @@
 #!/usr/bin/env bash
 # Install AI models based on system RAM
-# Usage: bash install-models.sh [--all] [--minimal] [model-id...]
+# Usage: bash install-models.sh [--all] [--minimal] [--print] [--no-list] [model-id...]
+#   --print    list the models that would be installed and exit
+#   --no-list  skip the final `ollama list` (one step of install-ai-stack.sh)
 set -euo pipefail
 
 log()  { echo -e "\033[0;32m[Models]\033[0m $*"; }
 warn() { echo -e "\033[1;33m[WARN]\033[0m $*"; }
 err()  { echo -e "\033[0;31m[ERROR]\033[0m $*"; }
 
+# --print answers on stdout; the log lines go to stderr then
+if [[ " $* " == *" --print "* ]]; then
+    exec 3>&1 1>&2
+fi
+
 # Detect available RAM in GB
 RAM_GB=$(awk '/MemTotal/ {printf "%.0f", $2/1024/1024}' /proc/meminfo)
 log "Detected RAM: ${RAM_GB}GB"
@@ -28,11 +35,15 @@ fi
 
 # Parse arguments
 INSTALL_ALL=false
+PRINT_ONLY=false
+LIST=true
 MODELS_TO_INSTALL=()
 for arg in "$@"; do
     case "$arg" in
         --all) INSTALL_ALL=true;;
         --minimal) MODELS_TO_INSTALL=("gemma3:1b");;
+        --print) PRINT_ONLY=true;;
+        --no-list) LIST=false;;
         *) MODELS_TO_INSTALL+=("$arg");;
     esac
 done
@@ -41,6 +52,11 @@ if [[ ${#MODELS_TO_INSTALL[@]} -eq 0 ]]; then
     MODELS_TO_INSTALL=("${DEFAULT_MODELS[@]}")
 fi
 
+if $PRINT_ONLY; then
+    printf '%s\n' "${MODELS_TO_INSTALL[@]}" >&3
+    exit 0
+fi
+
 # Ensure Ollama is running
 if ! curl -sf http://127.0.0.1:11434/api/tags &>/dev/null; then
     log "Starting Ollama..."
@@ -48,20 +64,45 @@ if ! curl -sf http://127.0.0.1:11434/api/tags &>/dev/null; then
     sleep 3
 fi
 
+# Prefer a LAIA model mirror on the LAN (see gui/laia_common/mirror.py):
+# each model is downloaded from the internet once per site
+LAIA_ROOT="$(cd "$(dirname "$0")/../.." && pwd)"
+mirror() { PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.mirror "$@"; }
+# LAIA_MIRROR set (even empty) means the caller already looked, e.g. install-ai-stack.sh
+if [[ -n "${LAIA_MIRROR+x}" ]]; then
+    MIRROR="$LAIA_MIRROR"
+else
+    MIRROR="$(mirror find 2>/dev/null || true)"   # mirror.url; broadcast only if opted in
+fi
+if [[ -n "$MIRROR" ]]; then
+    log "Using LAN model mirror: $MIRROR"
+fi
+
 # Install models
 TOTAL=${#MODELS_TO_INSTALL[@]}
+FAILED=0
 log "Installing $TOTAL model(s)..."
 for i in "${!MODELS_TO_INSTALL[@]}"; do
     model="${MODELS_TO_INSTALL[$i]}"
     log "[$((i+1))/$TOTAL] Pulling $model..."
-    if ollama pull "$model"; then
+    if [[ -n "$MIRROR" ]] && mirror pull --mirror "$MIRROR" "$model"; then
+        log "✅ $model installed from the LAN mirror"
+    elif ollama pull "$model"; then
         log "✅ $model installed"
     else
         warn "Failed to install $model — skipping"
+        FAILED=$((FAILED + 1))
     fi
 done
 
 # List installed models
-log ""
-log "Installed models:"
-ollama list
+if $LIST; then
+    log ""
+    log "Installed models:"
+    ollama list
+fi
+
+# Nothing installed at all is a failure (a re-run of the stack retries it)
+if [[ $FAILED -gt 0 && $FAILED -eq $TOTAL ]]; then
+    exit 1
+fi
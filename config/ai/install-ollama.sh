@@ -38,3 +38,5 @@ if [[ -f "$OLLAMA_SERVICE" ]]; then
 fi
 
 log "Ollama service running on http://127.0.0.1:11434"
+log "Shared LAN server? Tune parallelism with: laia-config → Local Models → Tune Ollama"
+log "  (or: sudo PYTHONPATH=/usr/local/lib/laia/gui python3 -m laia_common.ollama_tuner tune)"
@@ -1,29 +1,42 @@
 #!/usr/bin/env bash
 # Install OpenWebUI — web interface for Ollama
 # Runs as a local service, accessible at http://localhost:3000
+# Usage: bash install-openwebui.sh [venv|service|all]
+#   venv     Python environment only (needs no Ollama; runs beside install-ollama.sh)
+#   service  systemd unit + data dir, once Ollama and the venv are in place
 set -euo pipefail
 
+PHASE="${1:-all}"
+case "$PHASE" in
+    venv|service|all) ;;
+    *) echo "Usage: $0 [venv|service|all]" >&2; exit 2;;
+esac
+
 log() { echo "[OpenWebUI] $*"; }
 
-log "Installing OpenWebUI..."
+VENV_DIR="/opt/laia/openwebui"
 
-# Check Python
-if ! command -v python3 &>/dev/null; then
-    apt-get install -y python3 python3-pip python3-venv
-fi
+install_venv() {
+    log "Installing OpenWebUI..."
 
-# Create virtual environment
-VENV_DIR="/opt/laia/openwebui"
-python3 -m venv "$VENV_DIR"
-source "$VENV_DIR/bin/activate"
+    # Check Python
+    if ! command -v python3 &>/dev/null; then
+        apt-get install -y python3 python3-pip python3-venv
+    fi
 
-# Install OpenWebUI
-pip install open-webui
+    # Create virtual environment
+    python3 -m venv "$VENV_DIR"
+    source "$VENV_DIR/bin/activate"
 
-log "✅ OpenWebUI installed"
+    # Install OpenWebUI
+    pip install open-webui
 
-# Create systemd service
-cat > /etc/systemd/system/laia-openwebui.service << 'EOF'
+    log "✅ OpenWebUI installed"
+}
+
+install_service() {
+    # Create systemd service
+    cat > /etc/systemd/system/laia-openwebui.service << 'EOF'
 [Unit]
 Description=LAIA OpenWebUI
 After=network.target ollama.service
@@ -49,13 +62,21 @@ ReadWritePaths=/var/lib/laia/openwebui
 WantedBy=multi-user.target
 EOF
 
-# Create dedicated user and data dir
-useradd -r -s /bin/false laia-webui 2>/dev/null || true
-mkdir -p /var/lib/laia/openwebui
-chown laia-webui:laia-webui /var/lib/laia/openwebui
+    # Create dedicated user and data dir
+    useradd -r -s /bin/false laia-webui 2>/dev/null || true
+    mkdir -p /var/lib/laia/openwebui
+    chown laia-webui:laia-webui /var/lib/laia/openwebui
+
+    systemctl daemon-reload
+    systemctl enable laia-openwebui
+    systemctl start laia-openwebui
 
-systemctl daemon-reload
-systemctl enable laia-openwebui
-systemctl start laia-openwebui
+    log "✅ OpenWebUI running at http://127.0.0.1:3000"
+}
 
-log "✅ OpenWebUI running at http://127.0.0.1:3000"
+if [[ "$PHASE" != service ]]; then
+    install_venv
+fi
+if [[ "$PHASE" != venv ]]; then
+    install_service
+fi
@@ -20,6 +20,7 @@ echo "Installing Python GTK3 dependencies..."
 apt-get install -y -qq \
     python3-gi \
     python3-gi-cairo \
+    python3-yaml \
     gir1.2-gtk-3.0 \
     gir1.2-notify-0.7 \
     gir1.2-glib-2.0
@@ -32,6 +33,11 @@ mkdir -p "$INSTALL_DIR"
 cp "$SCRIPT_DIR/main.py" "$INSTALL_DIR/main.py"
 chmod 755 "$INSTALL_DIR/main.py"
 
+# Shared helpers (imported from ../laia_common)
+rm -rf "$(dirname "$INSTALL_DIR")/laia_common"
+cp -r "$SCRIPT_DIR/../laia_common" "$(dirname "$INSTALL_DIR")/laia_common"
+find "$(dirname "$INSTALL_DIR")/laia_common" -name '__pycache__' -prune -exec rm -rf {} +
+
 # Create desktop entry for application menu
 cat > /usr/share/applications/laia-config.desktop << 'EOF'
 [Desktop Entry]
@@ -58,6 +64,75 @@ EOF
 chmod 755 /usr/local/bin/laia-config
 
 echo "✅ Launcher created: /usr/local/bin/laia-config"
+
+# Loopback AI gateway — a per-user service, since it reads ~/.laia/api_keys.env
+mkdir -p /usr/lib/systemd/user
+cat > /usr/lib/systemd/user/laia-gateway.service << 'EOF'
+[Unit]
+Description=LAIA local OpenAI-compatible gateway (127.0.0.1:11500)
+
+[Service]
+Type=simple
+Environment="PYTHONPATH=/usr/local/lib/laia/gui"
+ExecStart=/usr/bin/python3 -m laia_common.gateway
+Restart=on-failure
+RestartSec=5s
+NoNewPrivileges=true
+
+[Install]
+WantedBy=default.target
+EOF
+
+echo "✅ Gateway unit installed — enable with: systemctl --user enable --now laia-gateway"
+
+# Memory guard: steps the local model down a tier under memory pressure
+cat > /usr/lib/systemd/user/laia-memguard.service << 'EOF'
+[Unit]
+Description=LAIA memory guard for the local Ollama model
+After=ollama.service
+
+[Service]
+Type=simple
+Environment="PYTHONPATH=/usr/local/lib/laia/gui"
+ExecStart=/usr/bin/python3 -m laia_common.memguard watch
+Restart=on-failure
+RestartSec=10s
+Nice=5
+NoNewPrivileges=true
+
+[Install]
+WantedBy=default.target
+EOF
+
+echo "✅ Memory guard unit installed — enable with: systemctl --user enable --now laia-memguard"
+
+# Status history probes (sparklines in the Status tab) while the GUI is closed
+cat > /usr/lib/systemd/user/laia-history.service << 'EOF'
+[Unit]
+Description=Record LAIA status probes in ~/.laia/history
+
+[Service]
+Type=oneshot
+Environment="PYTHONPATH=/usr/local/lib/laia/gui"
+ExecStart=/usr/bin/python3 -m laia_common.history probe
+Nice=10
+NoNewPrivileges=true
+EOF
+
+cat > /usr/lib/systemd/user/laia-history.timer << 'EOF'
+[Unit]
+Description=Record LAIA status probes every minute
+
+[Timer]
+OnBootSec=1min
+OnUnitActiveSec=1min
+AccuracySec=10s
+
+[Install]
+WantedBy=timers.target
+EOF
+
+echo "✅ History timer installed — enable with: systemctl --user enable --now laia-history.timer"
 echo ""
 echo "=== Installation Complete ==="
 echo ""
@@ -71,3 +146,5 @@ echo "  1. Open LAIA Security Configurator"
 echo "  2. Review settings in the 'OpenClaw' tab"
 echo "  3. Check 'System' tab — ensure AppArmor and fail2ban are active"
 echo "  4. Run the security audit to see your score"
+echo "  5. Optional: systemctl --user enable --now laia-gateway, then point apps at"
+echo "     http://127.0.0.1:11500/v1 with model \"auto\""
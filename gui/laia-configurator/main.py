@@ -8,6 +8,8 @@ Features:
 - View and change OpenClaw security settings with risk warnings
 - Check status of system security services
 - Run security audits (lynis)
+- Follow live logs of the LAIA services (openclaw, ollama, fail2ban, apparmor)
+- See which local AI models use the disk, and remove ones not used recently
 - Every dangerous setting change shows a confirmation dialog
 
 Requirements:
@@ -17,21 +19,40 @@ Usage:
     python3 main.py
     # or after install.sh:
     laia-config
+    # profile UI stalls (Chrome trace JSON in ~/.laia/traces/):
+    LAIA_TRACE=1 laia-config
 """
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('Notify', '0.7')
-from gi.repository import Gtk, GLib, Notify, Gdk
+gi.require_version('PangoCairo', '1.0')
+from gi.repository import Gtk, GLib, GObject, Notify, Gdk, Pango, PangoCairo
 import json
 import os
+import re
 import subprocess
+import sys
 import threading
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from laia_common import (  # noqa: E402
+    aiconfig, apparmor, envfile, fleet, gguf, history, keycheck, lanpool, logbuffer, memguard,
+    netscan, ollama_store, ollama_tuner, providers, respcache, settings, trace,
+)
+
 OPENCLAW_CONFIG = Path.home() / ".openclaw" / "openclaw.json"
 LAIA_CONFIG_DIR = Path("/etc/laia")
 VERSION = "1.0.0"
 
+# Status tab history: (archive, label), and how often the open tab probes
+HISTORY_RANGES = (("raw", "Last hour"), ("minute", "Last 7 days"), ("hour", "Last 12 weeks"))
+HISTORY_PROBE_SECONDS = 60
+
+# The network exposure scan reads /proc only, so the Status tab repeats it often
+NETSCAN_SECONDS = 2
+
 # Risk warnings shown before each setting change
 WARNINGS = {
     "exec.ask": {
@@ -106,6 +127,151 @@ CSS = b"""
 """
 
 
+class VirtualLogView(Gtk.Box):
+    """Log list that only renders the rows currently on screen.
+
+    Rows come from a FilteredIndex over a LogRingBuffer; the scrollbar's
+    adjustment is measured in rows, so 100k+ lines cost no more to draw
+    than one screenful.
+    """
+
+    PRIORITY_COLORS = {
+        0: (0.78, 0.16, 0.16), 1: (0.78, 0.16, 0.16),
+        2: (0.78, 0.16, 0.16), 3: (0.78, 0.16, 0.16),
+        4: (0.96, 0.50, 0.09),
+    }
+
+    def __init__(self, buffer, index):
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL)
+        self.buffer = buffer
+        self.index = index
+        self.follow = True
+        self._updating = False
+
+        self.adjustment = Gtk.Adjustment(value=0, lower=0, upper=0,
+                                         step_increment=1, page_increment=10, page_size=1)
+        self.adjustment.connect("value-changed", self._on_value_changed)
+
+        self.area = Gtk.DrawingArea()
+        self.area.set_hexpand(True)
+        self.area.set_vexpand(True)
+        self.area.add_events(Gdk.EventMask.SCROLL_MASK | Gdk.EventMask.SMOOTH_SCROLL_MASK)
+        self.area.connect("draw", self._on_draw)
+        self.area.connect("scroll-event", self._on_scroll)
+        self.area.connect("size-allocate", lambda w, a: self.refresh())
+
+        self._layout = self.area.create_pango_layout("")
+        self._layout.set_font_description(Pango.FontDescription("Monospace 9"))
+        self._layout.set_ellipsize(Pango.EllipsizeMode.END)
+        self._layout.set_text("Xg", -1)
+        self._row_height = max(1, self._layout.get_pixel_size()[1])
+
+        self.pack_start(self.area, True, True, 0)
+        self.pack_start(Gtk.Scrollbar(orientation=Gtk.Orientation.VERTICAL,
+                                      adjustment=self.adjustment), False, False, 0)
+
+    def refresh(self, dropped=0):
+        """Re-sync the scrollbar with the index after rows were added/removed."""
+        rows = len(self.index)
+        page = max(1, self.area.get_allocated_height() // self._row_height)
+        if self.follow:
+            value = max(0, rows - page)
+        else:
+            value = min(max(0, self.adjustment.get_value() - dropped), max(0, rows - page))
+        self._updating = True
+        self.adjustment.configure(value, 0, rows, 1, page, page)
+        self._updating = False
+        self.area.queue_draw()
+
+    def _on_value_changed(self, adj):
+        if not self._updating:
+            self.follow = adj.get_value() >= adj.get_upper() - adj.get_page_size() - 0.5
+        self.area.queue_draw()
+
+    def _on_scroll(self, area, event):
+        ok, _, dy = event.get_scroll_deltas()
+        if not ok:
+            dy = {Gdk.ScrollDirection.UP: -1, Gdk.ScrollDirection.DOWN: 1}.get(event.direction, 0)
+        self.adjustment.set_value(self.adjustment.get_value() + dy * 3)
+        return True
+
+    def _on_draw(self, area, cr):
+        width = area.get_allocated_width()
+        height = area.get_allocated_height()
+        style = area.get_style_context()
+        Gtk.render_background(style, cr, 0, 0, width, height)
+        fg = style.get_color(Gtk.StateFlags.NORMAL)
+
+        self._layout.set_width(max(1, width - 8) * Pango.SCALE)
+        seqs = self.index.seqs
+        first = int(self.adjustment.get_value())
+        last = min(len(seqs), first + height // self._row_height + 1)
+        for row in range(first, last):
+            entry = self.buffer.get(seqs[row])
+            if entry is None:
+                continue
+            priority, text = entry
+            r, g, b = self.PRIORITY_COLORS.get(priority, (fg.red, fg.green, fg.blue))
+            cr.set_source_rgb(r, g, b)
+            cr.move_to(4, (row - first) * self._row_height)
+            self._layout.set_text(text, -1)
+            PangoCairo.show_layout(cr, self._layout)
+        return False
+
+
+class Sparkline(Gtk.DrawingArea):
+    """Min/max band plus mean line for one metric's history.
+
+    Points are (ts, mean, min, max) from MetricHistory.series; gaps in
+    the timestamps (machine off, probes not running) break the line.
+    """
+
+    def __init__(self, width=220, height=28):
+        super().__init__()
+        self.set_size_request(width, height)
+        self.points = []
+        self.step = 1
+        self.span = (0, 1)
+        self.connect("draw", self._on_draw)
+
+    def set_points(self, points, step, start, end):
+        self.points, self.step, self.span = points, step, (start, end)
+        self.queue_draw()
+
+    def _on_draw(self, area, cr):
+        width = area.get_allocated_width()
+        height = area.get_allocated_height()
+        if not self.points:
+            return False
+        lo = min(p[2] for p in self.points)
+        hi = max(p[3] for p in self.points)
+        if hi - lo < 1e-9:
+            lo, hi = lo - 0.5, hi + 0.5
+        start, end = self.span
+        def x(ts):
+            return (ts - start) / max(1, end - start) * (width - 2) + 1
+        def y(v):
+            return height - 2 - (v - lo) / (hi - lo) * (height - 4)
+
+        fg = area.get_style_context().get_color(Gtk.StateFlags.NORMAL)
+        cr.set_source_rgba(0.18, 0.49, 0.20, 0.25)
+        for ts, _, pmin, pmax in self.points:
+            cr.rectangle(x(ts), y(pmax), max(1, x(ts + self.step) - x(ts)), max(1, y(pmin) - y(pmax)))
+        cr.fill()
+
+        cr.set_source_rgb(fg.red, fg.green, fg.blue)
+        cr.set_line_width(1.2)
+        prev = None
+        for ts, mean, _, _ in self.points:
+            if prev is not None and ts - prev <= self.step:
+                cr.line_to(x(ts), y(mean))
+            else:
+                cr.move_to(x(ts), y(mean))
+            prev = ts
+        cr.stroke()
+        return False
+
+
 class LaiaConfigurator(Gtk.Window):
     def __init__(self):
         super().__init__(title=f"LAIA Security Configurator v{VERSION}")
@@ -144,7 +310,11 @@ class LaiaConfigurator(Gtk.Window):
         notebook.append_page(self._build_openclaw_tab(), Gtk.Label(label="🔒 OpenClaw"))
         notebook.append_page(self._build_system_tab(),   Gtk.Label(label="🛡️ System"))
         notebook.append_page(self._build_status_tab(),   Gtk.Label(label="📊 Status"))
+        notebook.append_page(self._build_models_tab(),   Gtk.Label(label="💾 Models"))
+        self._logs_page = self._build_logs_tab()
+        notebook.append_page(self._logs_page,            Gtk.Label(label="📜 Logs"))
         notebook.append_page(self._build_about_tab(),    Gtk.Label(label="ℹ️ About"))
+        notebook.connect("switch-page", self._on_switch_page)
 
         # Bottom status bar
         bottom = Gtk.Box(spacing=8)
@@ -164,10 +334,17 @@ class LaiaConfigurator(Gtk.Window):
         save_btn.connect("clicked", self._on_save)
         bottom.pack_end(save_btn, False, False, 0)
 
+        fleet_btn = Gtk.Button(label="🖧 Fleet…")
+        fleet_btn.set_tooltip_text("Compare openclaw.json / config.yaml on every fleet host\n"
+                                   "with this machine's and push the ones that differ")
+        fleet_btn.connect("clicked", lambda b: self._on_fleet())
+        bottom.pack_end(fleet_btn, False, False, 0)
+
         sep = Gtk.Separator()
         vbox.pack_start(sep, False, False, 0)
         vbox.pack_start(bottom, False, False, 0)
 
+        self.connect("destroy", lambda w: self._log_follower.stop())
         self.connect("destroy", Gtk.main_quit)
         self._load_config()
 
@@ -188,17 +365,10 @@ class LaiaConfigurator(Gtk.Window):
         vbox.pack_start(title, False, False, 0)
 
         # Load current config
-        keys_file = Path.home() / ".laia" / "api_keys.env"
-        mode = "online"
-        provider = "groq"
-        
-        if keys_file.exists():
-            with open(keys_file) as f:
-                for line in f:
-                    if line.startswith("LAIA_MODE="):
-                        mode = line.split("=", 1)[1].strip()
-                    elif line.startswith("LAIA_PROVIDER="):
-                        provider = line.split("=", 1)[1].strip()
+        keys_file = envfile.KEYS_FILE
+        env = settings.env()
+        mode = env.get("LAIA_MODE", "online")
+        provider = env.get("LAIA_PROVIDER", "groq")
 
         # Mode selection
         mode_label = Gtk.Label(label="Current Mode:", xalign=0)
@@ -248,10 +418,277 @@ class LaiaConfigurator(Gtk.Window):
             ))
             vbox.pack_start(edit_btn, False, False, 0)
 
+            vbox.pack_start(Gtk.Separator(), False, False, 0)
+            vbox.pack_start(self._build_stored_keys_section(), False, False, 0)
+
+            vbox.pack_start(Gtk.Separator(), False, False, 0)
+            vbox.pack_start(self._build_cache_section(), False, False, 0)
+            # Cached results make re-showing the tab free; only stale keys hit the APIs
+            scrolled.connect("map", lambda w: self._validate_keys(force=False))
+        elif mode == "lan":
+            vbox.pack_start(self._build_lan_pool_section(), False, False, 0)
+            scrolled.connect("map", lambda w: self._refresh_lan_pool())
+
         vbox.pack_start(Gtk.Label(), True, True, 0)  # Filler
 
         return scrolled
 
+    def _build_stored_keys_section(self):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+
+        title = Gtk.Label(xalign=0)
+        title.set_markup("<b>Stored Keys</b>")
+        box.pack_start(title, False, False, 0)
+
+        try:
+            self._provider_specs = providers.load_providers()
+        except Exception as e:
+            self._provider_specs = {}
+            box.pack_start(Gtk.Label(label=f"⚠️ Could not read providers.yaml: {e}", xalign=0),
+                           False, False, 0)
+
+        # variable, provider name, masked key, status
+        self.keys_store = Gtk.ListStore(str, str, str, str)
+        tree = Gtk.TreeView(model=self.keys_store)
+        for col, heading in enumerate(["Variable", "Provider", "Key", "Status"]):
+            tree.append_column(Gtk.TreeViewColumn(heading, Gtk.CellRendererText(), text=col))
+        box.pack_start(tree, False, False, 0)
+
+        buttons = Gtk.Box(spacing=8)
+        add_btn = Gtk.Button(label="➕ Add Key")
+        add_btn.connect("clicked", lambda b: self._on_add_key())
+        buttons.pack_start(add_btn, False, False, 0)
+
+        validate_btn = Gtk.Button(label="🔄 Re-validate All")
+        validate_btn.set_tooltip_text("Check every stored key now, ignoring cached results")
+        validate_btn.connect("clicked", lambda b: self._validate_keys(force=True))
+        buttons.pack_start(validate_btn, False, False, 0)
+        box.pack_start(buttons, False, False, 0)
+
+        self._key_validation_running = False
+        return box
+
+    def _build_cache_section(self):
+        grid = Gtk.Grid(column_spacing=16, row_spacing=8)
+        grid.attach(self._section_label("Response Cache"), 0, 0, 2, 1)
+
+        lbl = Gtk.Label(label="Cache identical requests:", xalign=0)
+        lbl.set_tooltip_text(
+            "Answer repeated deterministic prompts from ~/.laia/cache instead of the API.\n"
+            "Saves free-tier quota; statistics are shown in the Status tab."
+        )
+        grid.attach(lbl, 0, 1, 1, 1)
+
+        config = settings.config()
+        self.cache_switch = Gtk.Switch()
+        self.cache_switch.set_halign(Gtk.Align.START)
+        self.cache_switch.set_active(bool((config.get("cache") or {}).get("enabled")))
+        self.cache_switch.connect("notify::active", self._on_cache_toggled)
+        grid.attach(self.cache_switch, 1, 1, 1, 1)
+
+        clear_btn = Gtk.Button(label="🗑 Clear Cache")
+        clear_btn.connect("clicked", lambda b: self._on_clear_cache())
+        grid.attach(clear_btn, 0, 2, 1, 1)
+        return grid
+
+    def _on_cache_toggled(self, switch, _):
+        try:
+            aiconfig.set_user_option("cache", "enabled", switch.get_active())
+            state = "enabled" if switch.get_active() else "disabled"
+            self.status_label.set_text(f"✅ Response cache {state}")
+        except OSError as e:
+            self.status_label.set_text(f"❌ Could not save cache setting: {e}")
+
+    def _on_clear_cache(self):
+        section = settings.config().get("cache") or {}
+        try:
+            respcache.ResponseCache(section.get("path", respcache.DEFAULT_PATH)).clear()
+            self.status_label.set_text("✅ Response cache cleared")
+        except Exception as e:
+            self.status_label.set_text(f"❌ Could not clear cache: {e}")
+
+    def _build_lan_pool_section(self):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        box.pack_start(self._section_label("LAN Ollama Pool"), False, False, 0)
+
+        help_lbl = Gtk.Label(
+            label="Requests go to a host that already has the model loaded, else the least busy one. "
+                  "A conversation stays on its host; hosts failing health checks are skipped.",
+            xalign=0,
+        )
+        help_lbl.set_line_wrap(True)
+        box.pack_start(help_lbl, False, False, 0)
+
+        # host, state, loaded models
+        self.lan_store = Gtk.ListStore(str, str, str)
+        self.lan_view = Gtk.TreeView(model=self.lan_store)
+        for col, heading in enumerate(["Host", "State", "Loaded models"]):
+            self.lan_view.append_column(Gtk.TreeViewColumn(heading, Gtk.CellRendererText(), text=col))
+        box.pack_start(self.lan_view, False, False, 0)
+
+        buttons = Gtk.Box(spacing=8)
+        self.lan_entry = Gtk.Entry()
+        self.lan_entry.set_placeholder_text("192.168.1.20 or 192.168.1.20:11434")
+        self.lan_entry.connect("activate", lambda e: self._on_add_lan_host())
+        buttons.pack_start(self.lan_entry, True, True, 0)
+        add_btn = Gtk.Button(label="➕ Add")
+        add_btn.connect("clicked", lambda b: self._on_add_lan_host())
+        buttons.pack_start(add_btn, False, False, 0)
+        remove_btn = Gtk.Button(label="➖ Remove")
+        remove_btn.connect("clicked", lambda b: self._on_remove_lan_host())
+        buttons.pack_start(remove_btn, False, False, 0)
+        check_btn = Gtk.Button(label="🔄 Check")
+        check_btn.connect("clicked", lambda b: self._refresh_lan_pool())
+        buttons.pack_start(check_btn, False, False, 0)
+        box.pack_start(buttons, False, False, 0)
+        return box
+
+    def _lan_hosts(self):
+        return lanpool.hosts_from_config(settings.config(), settings.env())
+
+    def _refresh_lan_pool(self):
+        """Health-check every pool host in a thread, then fill the table."""
+        hosts = self._lan_hosts()
+        self.lan_store.clear()
+        for host, port in hosts:
+            self.lan_store.append([lanpool.format_host(host, port), "Checking...", ""])
+
+        def run():
+            pool = lanpool.LanPool(hosts, fail_threshold=1)
+            pool.refresh()
+            GLib.idle_add(self._show_lan_pool, pool.snapshot())
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_lan_pool(self, snapshot):
+        self.lan_store.clear()
+        for entry in snapshot:
+            state = "✅ Healthy" if entry["healthy"] else f"❌ {entry['detail']}"
+            self.lan_store.append([entry["host"], state, ", ".join(entry["loaded"]) or "—"])
+        return False
+
+    def _save_lan_hosts(self, hosts):
+        try:
+            lanpool.save_hosts(hosts)
+        except OSError as e:
+            self.status_label.set_text(f"❌ Could not save LAN pool: {e}")
+            return False
+        self.status_label.set_text(
+            f"✅ LAN pool: {len(hosts)} host(s) — restart laia-gateway to apply")
+        self._refresh_lan_pool()
+        return True
+
+    def _on_add_lan_host(self):
+        text = self.lan_entry.get_text().strip()
+        if not text:
+            return
+        try:
+            host = lanpool.parse_host(text)
+        except ValueError:
+            self.status_label.set_text(f"❌ Not a host or host:port: {text}")
+            return
+        hosts = self._lan_hosts()
+        if host not in hosts:
+            hosts.append(host)
+        if self._save_lan_hosts(hosts):
+            self.lan_entry.set_text("")
+
+    def _on_remove_lan_host(self):
+        model, it = self.lan_view.get_selection().get_selected()
+        if it is None:
+            return
+        selected = lanpool.parse_host(model[it][0])
+        try:
+            stale = lanpool.remove_host(selected, settings.config(), settings.env())
+            if stale:
+                settings.update_env(remove=stale)
+        except (OSError, ValueError) as e:
+            self.status_label.set_text(f"❌ Could not save LAN pool: {e}")
+            return
+        hosts = self._lan_hosts()
+        self.status_label.set_text(
+            f"✅ LAN pool: {len(hosts)} host(s) — restart laia-gateway to apply")
+        self._refresh_lan_pool()
+
+    def _reload_key_rows(self, env):
+        self.keys_store.clear()
+        for spec, var, key in keycheck.stored_keys(self._provider_specs, env):
+            masked = f"{key[:4]}…{key[-4:]}" if len(key) > 12 else "••••"
+            self.keys_store.append([var, spec.name, masked, "Checking..."])
+
+    def _validate_keys(self, force=False):
+        """Validate all stored keys in parallel (cached results are reused unless forced)."""
+        if self._key_validation_running:
+            return
+        self._key_validation_running = True
+        env = settings.env()
+        self._reload_key_rows(env)
+        specs = self._provider_specs
+
+        def run():
+            try:
+                keycheck.validate_all(
+                    specs, env, force=force,
+                    on_result=lambda var, result: GLib.idle_add(self._set_key_status, var, result),
+                )
+            finally:
+                GLib.idle_add(setattr, self, "_key_validation_running", False)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _set_key_status(self, var, result):
+        labels = {
+            keycheck.STATUS_VALID: "✅ Valid",
+            keycheck.STATUS_INVALID: "❌ Invalid",
+            keycheck.STATUS_RATE_LIMITED: "⏱️ Rate limited",
+        }
+        text = labels.get(result["status"], f"⚠️ {result['detail']}")
+        if result["status"] == keycheck.STATUS_VALID:
+            text += f" ({result['latency_ms']} ms)"
+        if result.get("cached"):
+            text += " · cached"
+        for row in self.keys_store:
+            if row[0] == var:
+                row[3] = text
+        return False
+
+    def _on_add_key(self):
+        dialog = Gtk.Dialog(title="Add API Key", transient_for=self, flags=Gtk.DialogFlags.MODAL)
+        dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        dialog.add_button("Save", Gtk.ResponseType.OK)
+
+        combo = Gtk.ComboBoxText()
+        for pid, spec in self._provider_specs.items():
+            combo.append(pid, spec.name)
+        combo.set_active(0)
+        entry = Gtk.Entry()
+        entry.set_visibility(False)
+        entry.set_placeholder_text("Paste your API key here...")
+
+        content = dialog.get_content_area()
+        content.set_spacing(8)
+        content.set_border_width(10)
+        content.pack_start(combo, False, False, 0)
+        content.pack_start(entry, False, False, 0)
+        dialog.show_all()
+
+        response = dialog.run()
+        pid, key = combo.get_active_id(), entry.get_text().strip()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not pid or not key:
+            return
+
+        spec = self._provider_specs[pid]
+        env = settings.env()
+        var = spec.next_key_var(env)
+        try:
+            settings.update_env({var: key})
+        except OSError as e:
+            self.status_label.set_text(f"❌ Could not save key: {e}")
+            return
+        self.status_label.set_text(f"✅ Saved {spec.name} key as {var}")
+        self._validate_keys(force=False)
+
     def _test_ai_connection(self):
         """Test the current AI connection in a separate thread."""
         dialog = Gtk.MessageDialog(
@@ -436,6 +873,32 @@ class LaiaConfigurator(Gtk.Window):
         grid.attach(Gtk.Separator(), 0, row, 2, 1)
         row += 1
 
+        # LAIA's own AppArmor profiles (read from securityfs)
+        grid.attach(self._section_label("LAIA AppArmor Profiles"), 0, row, 2, 1)
+        row += 1
+
+        self.apparmor_labels = {}
+        for name in apparmor.shipped_profiles():
+            lbl = Gtk.Label(label=f"{name}:", xalign=0)
+            status = Gtk.Label(label="Checking...", xalign=0)
+            status.set_line_wrap(True)
+            self.apparmor_labels[name] = status
+            grid.attach(lbl, 0, row, 1, 1)
+            grid.attach(status, 1, row, 1, 1)
+            row += 1
+
+        aa_btn = Gtk.Button(label="🔄 Refresh Profiles")
+        aa_btn.set_tooltip_text("Mode and staleness from /sys/kernel/security/apparmor,\n"
+                                "DENIED/ALLOWED counts from the last 24 h of the journal")
+        aa_btn.connect("clicked", lambda b: self._refresh_apparmor())
+        grid.attach(aa_btn, 0, row, 2, 1)
+        row += 1
+        self._apparmor_audit = apparmor.AuditCounter()
+        GLib.idle_add(self._refresh_apparmor)
+
+        grid.attach(Gtk.Separator(), 0, row, 2, 1)
+        row += 1
+
         # Security Audit
         grid.attach(self._section_label("Security Audit"), 0, row, 2, 1)
         row += 1
@@ -477,9 +940,417 @@ class LaiaConfigurator(Gtk.Window):
         refresh_btn.connect("clicked", lambda b: self._refresh_status())
         vbox.pack_start(refresh_btn, False, False, 0)
 
+        # What is really listening: LAIA ports off loopback, checked against ufw
+        vbox.pack_start(self._section_label("Network exposure"), False, False, 0)
+        self.exposure_label = Gtk.Label(xalign=0)
+        self.exposure_label.set_line_wrap(True)
+        self.exposure_label.set_selectable(True)
+        vbox.pack_start(self.exposure_label, False, False, 0)
+        self.netscanner = netscan.Scanner()
+        self.netscan_ports = netscan.laia_ports()
+        self._refresh_exposure(force=True)
+        GLib.timeout_add_seconds(NETSCAN_SECONDS, self._refresh_exposure)
+
+        # History: every probe goes into ~/.laia/history, drawn as sparklines
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        hbox.pack_start(self._section_label("History"), False, False, 0)
+        self.history_range = Gtk.ComboBoxText()
+        for archive, label in HISTORY_RANGES:
+            self.history_range.append(archive, label)
+        self.history_range.set_active_id("raw")
+        self.history_range.connect("changed", lambda c: self._show_history())
+        hbox.pack_end(self.history_range, False, False, 0)
+        vbox.pack_start(hbox, False, False, 0)
+
+        self.history_grid = Gtk.Grid(column_spacing=12, row_spacing=2)
+        self.history_rows = {}  # metric → (Sparkline, value label)
+        vbox.pack_start(self.history_grid, False, False, 0)
+
+        self.history_store = history.MetricHistory()
         GLib.idle_add(self._refresh_status)
+        GLib.timeout_add_seconds(HISTORY_PROBE_SECONDS, self._probe_history)
+        return vbox
+
+    # ------------------------------------------------------------------
+    # TAB: Local Models (Ollama disk usage)
+    # ------------------------------------------------------------------
+    def _build_models_tab(self):
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8, border_width=16)
+        vbox.pack_start(self._section_label("Local AI Models — Disk Usage"), False, False, 0)
+
+        help_lbl = Gtk.Label(
+            label="Unique = space freed by removing the model. Shared = layers also used by other models.",
+            xalign=0,
+        )
+        help_lbl.set_line_wrap(True)
+        vbox.pack_start(help_lbl, False, False, 0)
+
+        # name, total, unique, shared, last used, RAM needed, total bytes (sort key)
+        self.models_store = Gtk.ListStore(str, str, str, str, str, str, GLib.TYPE_INT64)
+        view = Gtk.TreeView(model=self.models_store)
+        view.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
+        for i, title in enumerate(("Model", "Size", "Unique", "Shared", "Last used", "RAM needed")):
+            column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+            column.set_resizable(True)
+            column.set_sort_column_id(6 if i == 1 else i)
+            view.append_column(column)
+        view.set_tooltip_text("RAM needed = weights + KV cache at the configured num_ctx,\n"
+                              "read from each model's GGUF header.")
+        self.models_view = view
+
+        sw = Gtk.ScrolledWindow()
+        sw.add(view)
+        sw.set_vexpand(True)
+        vbox.pack_start(sw, True, True, 0)
+
+        self.models_summary = Gtk.Label(label="", xalign=0)
+        vbox.pack_start(self.models_summary, False, False, 0)
+
+        buttons = Gtk.Box(spacing=8)
+        refresh_btn = Gtk.Button(label="🔄 Refresh")
+        refresh_btn.connect("clicked", lambda b: self._refresh_models())
+        buttons.pack_start(refresh_btn, False, False, 0)
+
+        remove_btn = Gtk.Button(label="🗑 Remove Selected")
+        remove_btn.connect("clicked", lambda b: self._on_remove_models(self._selected_models()))
+        buttons.pack_start(remove_btn, False, False, 0)
+
+        buttons.pack_start(Gtk.Label(label="Not used for"), False, False, 0)
+        self.prune_days = Gtk.SpinButton.new_with_range(7, 365, 1)
+        self.prune_days.set_value(60)
+        buttons.pack_start(self.prune_days, False, False, 0)
+        prune_btn = Gtk.Button(label="days: Select")
+        prune_btn.set_tooltip_text("Select models whose weights have not been read for that long")
+        prune_btn.connect("clicked", lambda b: self._select_stale_models())
+        buttons.pack_start(prune_btn, False, False, 0)
+
+        tune_btn = Gtk.Button(label="⚡ Tune Ollama…")
+        tune_btn.set_tooltip_text("Load-test Ollama at increasing parallelism and keep the\n"
+                                  "settings at the throughput/latency knee (systemd drop-in)")
+        tune_btn.connect("clicked", lambda b: self._on_tune_ollama())
+        buttons.pack_end(tune_btn, False, False, 0)
+        vbox.pack_start(buttons, False, False, 0)
+
+        self._models_report = None
+        vbox.connect("map", lambda w: self._refresh_models() if self._models_report is None else None)
+        return vbox
+
+    def _refresh_models(self):
+        self.models_summary.set_text("Scanning Ollama model store...")
+
+        def run():
+            try:
+                report = ollama_store.analyze()
+            except Exception as e:
+                GLib.idle_add(self.models_summary.set_text, f"⚠️ {e}")
+                return
+            num_ctx, kv_type = aiconfig.local_context(settings.config())
+            try:
+                mem_total, mem_available = gguf.read_meminfo()
+            except OSError:
+                mem_total = mem_available = 0
+            fits = {}
+            for m in report.models:
+                mem = gguf.model_fit(m.name, num_ctx, kv_type, report.store)
+                fits[m.name] = gguf.fit_text(mem, mem_total, mem_available) if mem else "—"
+            GLib.idle_add(self._show_models, report, fits)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_models(self, report, fits):
+        self._models_report = report
+        size = ollama_store.human_size
+        self.models_store.clear()
+        for m in report.models:
+            used = time.strftime("%Y-%m-%d", time.localtime(m.last_used)) if m.last_used else "—"
+            self.models_store.append([m.name, size(m.total), size(m.unique), size(m.shared),
+                                      used, fits.get(m.name, "—"), m.total])
+        summary = (f"{len(report.models)} models, {size(report.total_bytes)} on disk "
+                   f"(shared layers save {size(report.shared_savings)})")
+        if report.orphans:
+            summary += f" · {size(report.orphan_bytes)} in unreferenced blobs"
+        self.models_summary.set_text(summary)
+        return False
+
+    def _selected_models(self):
+        model, paths = self.models_view.get_selection().get_selected_rows()
+        return [model[path][0] for path in paths]
+
+    def _select_stale_models(self):
+        if self._models_report is None:
+            return
+        stale = {m.name for m in ollama_store.prune_candidates(
+            self._models_report, self.prune_days.get_value_as_int())}
+        selection = self.models_view.get_selection()
+        selection.unselect_all()
+        for row in self.models_store:
+            if row[0] in stale:
+                selection.select_iter(row.iter)
+        self.status_label.set_text(f"{len(stale)} model(s) not used for "
+                                   f"{self.prune_days.get_value_as_int()} days selected")
+
+    def _on_remove_models(self, names):
+        if not names:
+            self.status_label.set_text("Select one or more models first")
+            return
+        by_name = {m.name: m for m in self._models_report.models}
+        freed = sum(by_name[n].unique for n in names if n in by_name)
+        if not self._show_warning_dialog(
+            f"Remove {len(names)} model(s)?",
+            "\n".join(names) + f"\n\nFrees about {ollama_store.human_size(freed)}. "
+            "You can download them again later with 'ollama pull'.",
+        ):
+            return
+
+        def run():
+            errors = []
+            for name in names:
+                try:
+                    ollama_store.remove_model(name)
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+            msg = f"❌ {'; '.join(errors)}" if errors else f"✅ Removed {len(names)} model(s)"
+            GLib.idle_add(self.status_label.set_text, msg)
+            GLib.idle_add(self._refresh_models)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _on_tune_ollama(self):
+        current = ollama_tuner.read_dropin()
+        now = (f"Current: OLLAMA_NUM_PARALLEL={current.num_parallel}, "
+               f"OLLAMA_MAX_LOADED_MODELS={current.max_loaded_models}." if current
+               else "Ollama currently runs with its default settings.")
+        if not self._show_warning_dialog(
+            "Tune Ollama for concurrent users?",
+            f"{now}\n\nThe tuner restarts Ollama several times and keeps it busy for a few "
+            "minutes. Chats running now will be interrupted. The winning settings are "
+            f"written to {ollama_tuner.DROPIN_PATH}; if they turn out slower, the old ones stay.",
+        ):
+            return
+        gui_dir = str(Path(__file__).resolve().parent.parent)
+        self._run_streaming(["sudo", "env", f"PYTHONPATH={gui_dir}", sys.executable, "-u", "-m",
+                             "laia_common.ollama_tuner", "tune"], "Tune Ollama")
+
+    def _on_fleet(self):
+        opts = fleet.settings()
+        hosts = opts["hosts"]
+        if not hosts:
+            self.status_label.set_text("⚠️ No fleet hosts — add them to fleet.hosts in ~/.laia/config.yaml")
+            return
+        gui_dir = str(Path(__file__).resolve().parent.parent)
+        command = ["env", f"PYTHONPATH={gui_dir}", sys.executable, "-u", "-m", "laia_common.fleet"]
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            flags=Gtk.DialogFlags.MODAL,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.NONE,
+            text=f"Fleet of {len(hosts)} host(s)",
+        )
+        dialog.format_secondary_text(
+            "Show drift compares every host with the desired state in "
+            f"{opts['desired_dir']} and changes nothing.\n\n"
+            "Push makes this machine's openclaw.json and config.yaml the desired state and "
+            "copies them to every host whose copy differs (the old one is kept as .bak)."
+        )
+        dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        dialog.add_button("Show drift", Gtk.ResponseType.YES)
+        dialog.add_button("Push this machine's settings", Gtk.ResponseType.APPLY)
+        response = dialog.run()
+        dialog.destroy()
+        if response == Gtk.ResponseType.YES:
+            self._run_streaming(command + ["status"], "Fleet drift")
+        elif response == Gtk.ResponseType.APPLY:
+            self._run_streaming(command + ["push", "--snapshot"], "Fleet push")
+
+    def _run_streaming(self, argv, title):
+        """Like _run_command, for long jobs: output appears line by line.
+
+        Close stays disabled until the command exits, so a half-done job
+        (the tuner restoring its drop-in, say) is never cut off.
+        """
+        dialog = Gtk.Dialog(title=title, transient_for=self, flags=Gtk.DialogFlags.MODAL)
+        close = dialog.add_button("Close", Gtk.ResponseType.OK)
+        close.set_sensitive(False)
+        dialog.set_default_size(680, 450)
+        dialog.connect("delete-event", lambda d, e: not close.get_sensitive())
+
+        tv = Gtk.TextView()
+        tv.set_editable(False)
+        tv.set_monospace(True)
+        tv.set_wrap_mode(Gtk.WrapMode.WORD)
+        buf = tv.get_buffer()
+
+        sw = Gtk.ScrolledWindow()
+        sw.add(tv)
+        sw.set_vexpand(True)
+        sw.set_hexpand(True)
+        content = dialog.get_content_area()
+        content.set_spacing(8)
+        content.set_border_width(10)
+        content.pack_start(sw, True, True, 0)
+        dialog.show_all()
+
+        def append(text):
+            buf.insert(buf.get_end_iter(), text)
+            tv.scroll_to_iter(buf.get_end_iter(), 0.0, False, 0, 0)
+            return False
+
+        def done(code):
+            append(f"\n{'✅ Done' if code == 0 else f'Exited with status {code}'}\n")
+            close.set_sensitive(True)
+            return False
+
+        def run():
+            try:
+                proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        text=True, bufsize=1)
+            except OSError as e:
+                GLib.idle_add(append, f"Error running command: {e}\n")
+                GLib.idle_add(done, -1)
+                return
+            for line in proc.stdout:
+                GLib.idle_add(append, line)
+            GLib.idle_add(done, proc.wait())
+
+        threading.Thread(target=run, daemon=True).start()
+        dialog.run()
+        dialog.destroy()
+
+    # ------------------------------------------------------------------
+    # TAB: Live Logs
+    # ------------------------------------------------------------------
+    def _build_logs_tab(self):
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8, border_width=16)
+        units = ", ".join(logbuffer.LAIA_LOG_UNITS)
+        vbox.pack_start(Gtk.Label(label=f"Live journal for: {units}", xalign=0), False, False, 0)
+
+        toolbar = Gtk.Box(spacing=8)
+        self.log_filter_entry = Gtk.SearchEntry()
+        self.log_filter_entry.set_placeholder_text("Filter log lines...")
+        self.log_filter_entry.connect("search-changed", self._on_log_filter_changed)
+        toolbar.pack_start(self.log_filter_entry, True, True, 0)
+
+        self.log_regex_check = Gtk.CheckButton(label="Regex")
+        self.log_regex_check.set_tooltip_text("Treat the filter as a regular expression")
+        self.log_regex_check.connect("toggled", self._on_log_filter_changed)
+        toolbar.pack_start(self.log_regex_check, False, False, 0)
+
+        self.log_pause_btn = Gtk.ToggleButton(label="⏸ Pause")
+        self.log_pause_btn.connect("toggled", self._on_log_pause_toggled)
+        toolbar.pack_start(self.log_pause_btn, False, False, 0)
+
+        clear_btn = Gtk.Button(label="🗑 Clear")
+        clear_btn.connect("clicked", lambda b: self._clear_logs())
+        toolbar.pack_start(clear_btn, False, False, 0)
+        vbox.pack_start(toolbar, False, False, 0)
+
+        self.log_buffer = logbuffer.LogRingBuffer()
+        self.log_index = logbuffer.FilteredIndex()
+        # Lines received while paused; same memory cap as the main buffer
+        self._log_pending = logbuffer.LogRingBuffer(self.log_buffer.max_bytes)
+        self._log_scan_cancel = None
+
+        self.log_view = VirtualLogView(self.log_buffer, self.log_index)
+        frame = Gtk.Frame()
+        frame.add(self.log_view)
+        vbox.pack_start(frame, True, True, 0)
+
+        self.log_count_label = Gtk.Label(label="Waiting for log data...", xalign=0)
+        vbox.pack_start(self.log_count_label, False, False, 0)
+
+        self._log_follower = logbuffer.JournalFollower(
+            lambda batch: GLib.idle_add(self._on_log_batch, batch)
+        )
         return vbox
 
+    def _on_switch_page(self, notebook, page, page_num):
+        """Start following the journal the first time the Logs tab is shown."""
+        if page is self._logs_page and not self._log_follower.running:
+            try:
+                self._log_follower.start()
+            except FileNotFoundError:
+                self.log_count_label.set_text("N/A (journalctl not found)")
+
+    def _on_log_batch(self, entries):
+        if self.log_pause_btn.get_active():
+            self._log_pending.extend(entries)
+        else:
+            self._append_log_batch(entries)
+        return False
+
+    def _append_log_batch(self, entries):
+        first = self.log_buffer.extend(entries)
+        before = len(self.log_index)
+        self.log_index.drop_evicted(self.log_buffer.first_seq)
+        dropped = before - len(self.log_index)
+        self.log_index.add_batch(first, entries)
+        self.log_view.refresh(dropped)
+        self._update_log_count()
+
+    def _on_log_pause_toggled(self, button):
+        if button.get_active():
+            button.set_label("▶ Resume")
+            return
+        button.set_label("⏸ Pause")
+        _, entries = self._log_pending.snapshot()
+        self._log_pending.clear()
+        if entries:
+            self._append_log_batch(entries)
+
+    def _on_log_filter_changed(self, *_):
+        """Apply a new filter in a worker thread; the view keeps updating meanwhile."""
+        try:
+            flt = logbuffer.LogFilter(self.log_filter_entry.get_text(),
+                                      regex=self.log_regex_check.get_active())
+        except re.error as e:
+            self.log_count_label.set_text(f"⚠️ Invalid regex: {e}")
+            return
+
+        previous = self.log_index.filter
+        scanning = self._log_scan_cancel is not None
+        if scanning:
+            self._log_scan_cancel.set()
+        cancel = threading.Event()
+        self._log_scan_cancel = cancel
+
+        # Narrowing a complete result (e.g. typing more characters) only
+        # re-checks the current matches instead of the whole buffer.
+        refine_from = list(self.log_index.seqs) if flt.narrows(previous) and not scanning else None
+        self.log_index.filter = flt
+        first_seq, entries = self.log_buffer.snapshot()
+        upto = first_seq + len(entries)
+
+        def work():
+            if refine_from is not None:
+                seqs = logbuffer.refine(refine_from, first_seq, entries, flt, cancel)
+            else:
+                seqs = logbuffer.scan(first_seq, entries, flt, cancel)
+            if seqs is not None:
+                GLib.idle_add(self._on_log_scan_done, flt, seqs, upto)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _on_log_scan_done(self, flt, seqs, upto):
+        if flt is not self.log_index.filter:
+            return False  # Superseded by a newer filter
+        self._log_scan_cancel = None
+        self.log_index.replace(seqs, upto, self.log_buffer)
+        self.log_view.refresh()
+        self._update_log_count()
+        return False
+
+    def _clear_logs(self):
+        self.log_buffer.clear()
+        self.log_index.seqs = []
+        self.log_view.refresh()
+        self._update_log_count()
+
+    def _update_log_count(self):
+        mb = self.log_buffer.nbytes / (1024 * 1024)
+        self.log_count_label.set_text(
+            f"{len(self.log_index):,} of {len(self.log_buffer):,} lines shown — {mb:.1f} MB buffered"
+        )
+
     # ------------------------------------------------------------------
     # TAB: About
     # ------------------------------------------------------------------
@@ -574,7 +1445,7 @@ class LaiaConfigurator(Gtk.Window):
         """Load current config from OpenClaw config file."""
         try:
             if OPENCLAW_CONFIG.exists():
-                with open(OPENCLAW_CONFIG) as f:
+                with trace.span("read openclaw.json", "config"), open(OPENCLAW_CONFIG) as f:
                     config = json.load(f)
 
                 security = config.get("security", {})
@@ -614,7 +1485,7 @@ class LaiaConfigurator(Gtk.Window):
         try:
             # Load existing config or start fresh
             if OPENCLAW_CONFIG.exists():
-                with open(OPENCLAW_CONFIG) as f:
+                with trace.span("read openclaw.json", "config"), open(OPENCLAW_CONFIG) as f:
                     config = json.load(f)
             else:
                 config = {}
@@ -637,7 +1508,7 @@ class LaiaConfigurator(Gtk.Window):
             if OPENCLAW_CONFIG.exists():
                 OPENCLAW_CONFIG.rename(backup)
 
-            with open(OPENCLAW_CONFIG, "w") as f:
+            with trace.span("write openclaw.json", "config"), open(OPENCLAW_CONFIG, "w") as f:
                 json.dump(config, f, indent=2)
                 f.write("\n")
 
@@ -680,6 +1551,25 @@ class LaiaConfigurator(Gtk.Window):
             label.set_text(f"Error: {e}")
         return False  # Don't repeat
 
+    def _refresh_apparmor(self):
+        """Inspect LAIA's AppArmor profiles off the main thread."""
+        def run():
+            self._apparmor_audit.refresh()
+            try:
+                texts = {st.name: apparmor.describe(st)
+                         for st in apparmor.inspect(audit=self._apparmor_audit)}
+            except PermissionError:
+                texts = dict.fromkeys(self.apparmor_labels,
+                                      "⚠️ Needs root to read profiles — run: sudo laia-config")
+            except FileNotFoundError:
+                texts = dict.fromkeys(self.apparmor_labels, "❌ AppArmor not enabled in the kernel")
+            for name, text in texts.items():
+                if name in self.apparmor_labels:
+                    GLib.idle_add(self.apparmor_labels[name].set_text, text)
+
+        threading.Thread(target=run, daemon=True).start()
+        return False  # Don't repeat
+
     def _refresh_services(self):
         """Refresh all service status labels."""
         for svc, lbl in self.service_labels.items():
@@ -757,12 +1647,120 @@ class LaiaConfigurator(Gtk.Window):
                 lines.append(f"{name}:")
                 lines.append(f"  {output}\n")
 
+            lines.extend(self._cache_status_lines())
+            lines.extend(self._memguard_status_lines())
+
             text = "\n".join(lines)
             GLib.idle_add(self.status_text.get_buffer().set_text, text)
+            self._record_probes()
 
         threading.Thread(target=do_refresh, daemon=True).start()
         return False  # Don't repeat
 
+    def _refresh_exposure(self, force=False):
+        """Rescan listening sockets (a few ms, main thread) while the tab is shown."""
+        if not force and not self.exposure_label.get_mapped():
+            return True
+        try:
+            report = self.netscanner.scan(self.netscan_ports)
+        except OSError as e:
+            self.exposure_label.set_text(f"⚠️ Scan failed: {e}")
+            return True
+        lines = [netscan.describe(f) for f in report.findings]
+        if not lines:
+            ports = ", ".join(str(p) for p in sorted(self.netscan_ports))
+            lines.append(f"✅ LAIA services listen on loopback only (ports {ports})")
+        if report.findings and not report.ufw.readable and report.ufw.enabled:
+            lines.append("ufw rules are root-only here — run sudo laia-config for the full check")
+        self.exposure_label.set_text("\n".join(lines))
+        return True
+
+    def _record_probes(self):
+        """Run the history probes and store them (runs in a worker thread).
+
+        Only redraws while laia-history.timer is active: it already probes
+        every minute.
+        """
+        try:
+            if not history.timer_active():
+                self.history_store.record_many(history.probe_all(store=self.history_store))
+        except OSError as e:
+            GLib.idle_add(self.status_label.set_text, f"History not saved: {e}")
+        GLib.idle_add(self._show_history)
+
+    def _probe_history(self):
+        threading.Thread(target=self._record_probes, daemon=True).start()
+        return True  # keep probing while the window is open
+
+    def _show_history(self):
+        archive = self.history_range.get_active_id() or "raw"
+        step, slots = history.ARCHIVES[archive]
+        end = time.time()
+        start = end - step * slots
+        for metric in self.history_store.metrics():
+            points = self.history_store.series(metric, archive, now=end)
+            if metric not in self.history_rows:
+                row = len(self.history_rows)
+                spark = Sparkline()
+                value = Gtk.Label(xalign=0)
+                self.history_grid.attach(Gtk.Label(label=metric, xalign=0), 0, row, 1, 1)
+                self.history_grid.attach(spark, 1, row, 1, 1)
+                self.history_grid.attach(value, 2, row, 1, 1)
+                self.history_grid.show_all()
+                self.history_rows[metric] = (spark, value)
+            spark, value = self.history_rows[metric]
+            spark.set_points(points, step, start, end)
+            value.set_text(history.format_value(metric, points[-1][1]) if points else "—")
+        return False
+
+    def _cache_status_lines(self):
+        """Response cache counters per model (runs in the refresh thread)."""
+        section = settings.config().get("cache") or {}
+        path = Path(os.path.expanduser(str(section.get("path", respcache.DEFAULT_PATH))))
+        lines = [f"{'─'*40}", "Response cache:"]
+        if not section.get("enabled"):
+            lines.append("  disabled (enable in the AI Keys tab)\n")
+            return lines
+        if not path.exists():
+            lines.append("  enabled — no requests cached yet\n")
+            return lines
+        try:
+            cache = respcache.ResponseCache(path)
+            count, stored = cache.size()
+            lines.append(f"  {count} entries, {stored / 1024 / 1024:.1f} MB on disk")
+            for row in cache.stats():
+                total = row["hits"] + row["misses"]
+                rate = 100 * row["hits"] / total if total else 0
+                lines.append(
+                    f"  {row['provider']}/{row['model']}: {row['hits']} hits, "
+                    f"{row['misses']} misses ({rate:.0f}%), {row['bytes'] / 1024:.0f} KB served"
+                )
+        except Exception as e:
+            lines.append(f"  error: {e}")
+        lines.append("")
+        return lines
+
+    def _memguard_status_lines(self):
+        """Memory guard state and its recent model switches (runs in the refresh thread)."""
+        configured = (settings.config().get("local") or {}).get("model", "")
+        lines = [f"{'─'*40}", "Memory guard (local model):"]
+        try:
+            reader = memguard.ProcReader()
+            sample = reader.sample()
+            reader.close()
+            psi = f"{sample.some_avg10:.1f}%" if sample.some_avg10 is not None else "n/a"
+            lines.append(f"  pressure {psi}, {sample.available_mb} of {sample.total_mb} MB available")
+        except OSError as e:
+            lines.append(f"  error: {e}")
+        active = memguard.StateReader().model_for(configured)
+        lines.append(f"  serving {active}" + ("" if active == configured else f" instead of {configured}"))
+        entries = memguard.read_log(10)
+        if not entries:
+            lines.append("  no model switches recorded (systemctl --user status laia-memguard)")
+        lines.extend(f"  {memguard.describe(e)}" for e in entries)
+        lines.append("")
+        return lines
+
     def _on_apply_firewall(self, button):
         """Apply LAIA firewall rules."""
         script = Path(__file__).parent.parent.parent / "config" / "security" / "ufw-rules.sh"
@@ -776,6 +1774,7 @@ class LaiaConfigurator(Gtk.Window):
 
 
 def main():
+    trace.install(GLib, GObject)  # no-op unless LAIA_TRACE is set
     win = LaiaConfigurator()
     win.show_all()
     Gtk.main()
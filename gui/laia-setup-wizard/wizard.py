@@ -6,11 +6,19 @@ Online-free first, with local and LAN options.
 """
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, GLib
+from gi.repository import Gtk, GLib, GObject
 import subprocess
+import sys
 import threading
-import os
+import time
 import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from laia_common import (  # noqa: E402
+    USER_DIR, aiconfig, gguf, installdag, lanpool, mirror, ollama_store, providers, recommend,
+    settings, trace,
+)
 
 
 class SetupWizard(Gtk.Assistant):
@@ -70,18 +78,32 @@ class SetupWizard(Gtk.Assistant):
         title.set_xalign(0)
         box.pack_start(title, False, False, 0)
 
+        # Live measurements replace fixed speed claims; filled in by _measure_modes
+        status = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        self.measure_spinner = Gtk.Spinner()
+        status.pack_start(self.measure_spinner, False, False, 0)
+        self.measure_status = Gtk.Label(xalign=0)
+        self.measure_status.set_line_wrap(True)
+        status.pack_start(self.measure_status, True, True, 0)
+        box.pack_start(status, False, False, 0)
+
+        self.mode_page = box
+        self.mode_radios = {}
+        self.mode_results = {}
+        self._measured = False
+        self._mode_chosen = False  # True once the user picks a mode themselves
+        self._preselecting = False
+
         # Online Free
         online_box = self._create_mode_radio("Online Free", 
             "Free API keys (Groq, OpenRouter, etc.)\n"
-            "30 seconds to get running • No hardware needed\n"
-            "300+ tokens/sec with Groq (recommended)", 
+            "30 seconds to get running • No hardware needed",
             "online")
         box.pack_start(online_box, False, False, 0)
 
         # Local
         local_box = self._create_mode_radio("Local Inference",
             "Run Ollama models on this computer\n"
-            "5-10 minutes to set up • Requires 4GB+ RAM\n"
             "Fully private, works offline",
             "local")
         box.pack_start(local_box, False, False, 0)
@@ -89,11 +111,12 @@ class SetupWizard(Gtk.Assistant):
         # LAN Remote
         lan_box = self._create_mode_radio("LAN Remote",
             "Connect to Ollama on another machine\n"
-            "10 seconds to connect • Shares hardware with LAN\n"
             "Great for home labs and shared servers",
             "lan")
         box.pack_start(lan_box, False, False, 0)
 
+        self.connect("prepare", self._on_prepare)
+
         self.append_page(box)
         self.set_page_type(box, Gtk.AssistantPageType.CONTENT)
         self.set_page_title(box, "AI Mode")
@@ -105,18 +128,26 @@ class SetupWizard(Gtk.Assistant):
         
         box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12, border_width=12)
         
-        rb = Gtk.RadioButton(label=label)
+        group = next(iter(self.mode_radios.values()), None)
+        rb = Gtk.RadioButton.new_with_label_from_widget(group, label)
         rb.connect("toggled", self._on_mode_selected, mode_id)
         if mode_id == "online":
             rb.set_active(True)
             self.mode = "online"
+        self.mode_radios[mode_id] = rb
         box.pack_start(rb, False, False, 0)
         
+        text = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
         desc_label = Gtk.Label(label=description)
         desc_label.set_line_wrap(True)
         desc_label.set_xalign(0)
         desc_label.set_justify(Gtk.Justification.LEFT)
-        box.pack_start(desc_label, True, True, 0)
+        text.pack_start(desc_label, False, False, 0)
+        result_label = Gtk.Label(label="⏳ measuring…", xalign=0)
+        result_label.set_line_wrap(True)
+        self.mode_results[mode_id] = result_label
+        text.pack_start(result_label, False, False, 0)
+        box.pack_start(text, True, True, 0)
         
         frame.add(box)
         return frame
@@ -124,6 +155,57 @@ class SetupWizard(Gtk.Assistant):
     def _on_mode_selected(self, rb, mode):
         if rb.get_active():
             self.mode = mode
+            if not self._preselecting:
+                self._mode_chosen = True
+            self.set_page_complete(self.mode_page, True)
+
+    def _on_prepare(self, assistant, page):
+        if page is self.mode_page and not self._measured:
+            self._measured = True
+            self.measure_spinner.start()
+            self.measure_status.set_text(
+                f"Measuring this machine and network (up to {recommend.DEFAULT_TIMEOUT:.0f} s)…")
+            threading.Thread(target=self._measure_modes, daemon=True).start()
+
+    def _measure_modes(self):
+        """Time-boxed parallel measurement of every mode (worker thread)."""
+        try:
+            estimates = recommend.measure()
+        except Exception as e:
+            GLib.idle_add(self._show_measurements, [], f"Measurement failed: {e}")
+            return
+        GLib.idle_add(self._show_measurements, estimates, "")
+
+    def _show_measurements(self, estimates, error):
+        self.measure_spinner.stop()
+        best_per_mode = recommend.best_per_mode(estimates)
+        for mode, label in self.mode_results.items():
+            est = best_per_mode.get(mode)
+            label.set_text(recommend.describe(est) if est else "not measured")
+
+        best = recommend.recommend(estimates)
+        if best is None:
+            self.measure_status.set_text(error or "⚠️ No mode answered in time — choose manually.")
+        else:
+            self.measure_status.set_markup(
+                f"⭐ Fastest on this machine: <b>{GLib.markup_escape_text(best.mode)}</b> "
+                f"({GLib.markup_escape_text(best.target)}) — preselected below.")
+            self._apply_recommendation(best)
+        self.set_page_complete(self.mode_page, True)
+        return False
+
+    def _apply_recommendation(self, best):
+        """Preselect the winner, unless the user already picked a mode."""
+        if best.mode == "online" and best.target in self.provider_radios:
+            self.provider_radios[best.target].set_active(True)
+        elif best.mode == "lan" and not self.lan_host_entry.get_text():
+            host, _, port = best.target.rpartition(":")
+            self.lan_host_entry.set_text(host)
+            self.lan_port_entry.set_text(port)
+        if not self._mode_chosen:
+            self._preselecting = True
+            self.mode_radios[best.mode].set_active(True)
+            self._preselecting = False
 
     def _add_online_provider_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, border_width=20)
@@ -143,7 +225,8 @@ class SetupWizard(Gtk.Assistant):
 
         self.provider_radios = {}
         for provider_id, label, description in providers:
-            rb = Gtk.RadioButton(label=f"{label}\n  {description}")
+            group = next(iter(self.provider_radios.values()), None)
+            rb = Gtk.RadioButton.new_with_label_from_widget(group, f"{label}\n  {description}")
             rb.connect("toggled", self._on_provider_selected, provider_id)
             if provider_id == "groq":
                 rb.set_active(True)
@@ -240,6 +323,7 @@ class SetupWizard(Gtk.Assistant):
             cb.set_active(default)
             self._model_checks[model_id] = cb
             box.pack_start(cb, False, False, 0)
+        threading.Thread(target=self._estimate_model_fit, args=(models,), daemon=True).start()
 
         self.local_page = box
         self.append_page(box)
@@ -247,6 +331,23 @@ class SetupWizard(Gtk.Assistant):
         self.set_page_title(box, "Local Hardware")
         self.set_page_complete(box, True)
 
+    def _estimate_model_fit(self, models):
+        """Add RAM needs to the model labels: exact from the GGUF header if the
+        model is already downloaded, else the rough models.yaml figure."""
+        num_ctx, kv_type = aiconfig.local_context(settings.config())
+        ram_guess = aiconfig.catalog_ram_gb()
+        try:
+            mem_total, mem_available = gguf.read_meminfo()
+        except OSError:
+            mem_total = mem_available = self._ram_gb * 1024 ** 3
+        for model_id, label, _ in models:
+            mem = gguf.model_fit(model_id, num_ctx, kv_type)
+            if mem is not None:
+                label += f"  ({gguf.fit_text(mem, mem_total, mem_available)})"
+            elif model_id in ram_guess:
+                label += f"  (~{ram_guess[model_id]} GB, estimate)"
+            GLib.idle_add(self._model_checks[model_id].set_label, label)
+
     def _add_lan_remote_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, border_width=20)
 
@@ -256,7 +357,9 @@ class SetupWizard(Gtk.Assistant):
         box.pack_start(title, False, False, 0)
 
         desc = Gtk.Label()
-        desc.set_markup("Enter the IP address and port of your Ollama server:")
+        desc.set_markup("Enter the IP address and port of your Ollama server.\n"
+                        "<small>Several servers? Separate them with commas "
+                        "(192.168.1.10, 192.168.1.11:11435) — requests are spread over them.</small>")
         desc.set_line_wrap(True)
         desc.set_xalign(0)
         box.pack_start(desc, False, False, 0)
@@ -332,6 +435,7 @@ class SetupWizard(Gtk.Assistant):
 
     def _on_apply(self, assistant):
         self._update_summary()
+        self._selected_models = [m for m, cb in self._model_checks.items() if cb.get_active()]
         self._run_configuration()
 
     def _update_summary(self):
@@ -342,7 +446,10 @@ class SetupWizard(Gtk.Assistant):
             models_str = ", ".join(selected) if selected else "None"
             summary = f"<b>Mode:</b> Local Ollama\n<b>Models:</b> {models_str}"
         else:  # lan
-            summary = f"<b>Mode:</b> LAN Remote\n<b>Server:</b> {self.lan_host}:{self.lan_port}"
+            hosts = [lanpool.format_host(*lanpool.parse_host(h, self.lan_port))
+                     for h in (self.lan_host or "").split(",") if h.strip()]
+            label = "Servers" if len(hosts) > 1 else "Server"
+            summary = f"<b>Mode:</b> LAN Remote\n<b>{label}:</b> {', '.join(hosts) or 'not set'}"
 
         self.summary_label.set_markup(summary)
 
@@ -353,39 +460,90 @@ class SetupWizard(Gtk.Assistant):
 
     def _configure_async(self):
         try:
-            keys_file = os.path.expanduser("~/.laia/api_keys.env")
-            os.makedirs(os.path.dirname(keys_file), exist_ok=True)
-
             if self.mode == "online":
-                config = [
-                    "LAIA_MODE=online",
-                    f"LAIA_PROVIDER={self.provider}",
-                    f"LAIA_API_BASE=https://api.groq.com/openai/v1",
-                    f"GROQ_API_KEY={self.api_key}",
-                ]
+                spec = providers.load_providers()[self.provider]
+                config = providers.online_settings(spec, self.api_key)
+                if not self.api_key:
+                    # Keep a previously stored key rather than blanking it
+                    del config[spec.api_key_env]
             elif self.mode == "local":
-                config = ["LAIA_MODE=local"]
+                self._install_models(self._selected_models)
+                config = {"LAIA_MODE": "local"}
             else:
-                config = [
-                    "LAIA_MODE=lan",
-                    f"LAIA_LAN_HOST={self.lan_host}",
-                    f"LAIA_LAN_PORT={self.lan_port}",
-                ]
-
-            with open(keys_file, 'w') as f:
-                f.write("\n".join(config))
-            os.chmod(keys_file, 0o600)
+                hosts = [lanpool.parse_host(h, self.lan_port)
+                         for h in (self.lan_host or "").split(",") if h.strip()]
+                if not hosts:
+                    raise ValueError("no LAN server address given")
+                # Pool of one is a plain LAN host; older tools only read LAIA_LAN_HOST
+                lanpool.save_hosts(hosts if len(hosts) > 1 else [])
+                config = {
+                    "LAIA_MODE": "lan",
+                    "LAIA_LAN_HOST": hosts[0][0],
+                    "LAIA_LAN_PORT": hosts[0][1],
+                }
+
+            # Merge so keys stored for other providers are kept
+            settings.update_env(config)
 
             GLib.idle_add(lambda: self._update_progress(100, "Configuration complete!"))
         except Exception as e:
-            GLib.idle_add(lambda: self._update_progress(0, f"Error: {e}"))
+            GLib.idle_add(self._update_progress, 0, f"Error: {e}")
+
+    def _install_models(self, models):
+        """Download the models not installed yet: LAN mirror first, then the registry.
+
+        Each model is a step of an installdag run. Two download at once,
+        and a model that finished before an interrupted run is not fetched
+        again. Per-step progress goes to the progress page and to
+        ~/.laia/install.log.
+        """
+        missing = [m for m in models if ollama_store.model_weights_blob(m) is None]
+        if not missing:
+            return
+        found = {}
+
+        def discover(progress):
+            progress(0.0, "checking for a LAIA model mirror")
+            found["source"] = mirror.find_mirror()
+
+        def pull(name):
+            def run(progress):
+                source = found.get("source")
+                progress(0.0, f"from {f'LAN mirror {source}' if source else 'the internet'}")
+                origin = mirror.install_model(
+                    name, source,
+                    lambda done, total: progress(done / total if total else 0.0,
+                                                 f"{done >> 20} / {total >> 20} MB"))
+                progress(1.0, f"installed from the {origin}")
+            return run
+
+        steps = [installdag.Step("mirror", discover, weight=0.1, checkpoint=False)]
+        steps += [installdag.Step(name, pull(name), deps=("mirror",), group="pull",
+                                  check=lambda name=name: ollama_store.model_weights_blob(name) is not None)
+                  for name in missing]
+        last = [0.0]
+
+        def on_event(event):
+            now = time.monotonic()
+            if event.kind == "output" or (event.kind == "progress" and now - last[0] < 0.25):
+                return  # don't flood the main loop
+            last[0] = now
+            GLib.idle_add(self._update_progress, 5 + 90 * event.overall, installdag.describe(event))
+
+        runner = installdag.Runner(steps, USER_DIR / "install-state.json", limits={"pull": installdag.PULL_LIMIT},
+                                   on_event=on_event, log_path=USER_DIR / "install.log")
+        result = runner.run()
+        if not result.ok:
+            raise RuntimeError("; ".join(f"{name}: {error}" for name, error in result.errors.items()))
 
     def _update_progress(self, value, text):
         self.progress.set_fraction(value / 100.0)
         self.status_label.set_text(text)
+        return False
 
 
 def main():
+    trace.install(GLib, GObject)  # no-op unless LAIA_TRACE is set
     wizard = SetupWizard()
     wizard.show_all()
     Gtk.main()
@@ -0,0 +1,19 @@
+"""
+LAIA shared helpers
+Plain-Python building blocks used by the LAIA GUIs (laia-configurator,
+laia-setup-wizard) and their command-line companions.
+
+Nothing in this package imports GTK, so every module can be used from
+scripts and unit-tested on a headless machine. The GUIs put the parent
+directory on sys.path and import modules explicitly, e.g.:
+
+    from laia_common import logbuffer
+"""
+from pathlib import Path
+
+# Repository / install root (the directory that contains config/ and gui/)
+LAIA_ROOT = Path(__file__).resolve().parent.parent.parent
+CONFIG_DIR = LAIA_ROOT / "config"
+
+# Per-user state
+USER_DIR = Path.home() / ".laia"
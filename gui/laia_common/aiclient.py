@@ -0,0 +1,142 @@
+"""
+Minimal OpenAI-compatible chat client for LAIA tooling.
+
+Resolves the configured endpoint (online provider, local or LAN Ollama)
+from api_keys.env + config.yaml, and sends chat completions through the
+shared rate limiter and, when enabled, the local response cache.
+
+    python3 -m laia_common.aiclient "Reply with only: LAIA OK"
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+
+from laia_common import aiconfig, lanpool, providers, settings
+from laia_common.ratelimit import RateLimiter
+from laia_common.respcache import ResponseCache
+
+DEFAULT_TIMEOUT = 60
+
+
+class AIClientError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Endpoint:
+    provider: str  # provider id, or "local" / "lan"
+    api_base: str
+    headers: dict = field(default_factory=dict)
+    model: str = ""
+
+
+def resolve_endpoint(env=None, config=None, specs=None):
+    """Endpoint for the mode selected in api_keys.env (LAIA_MODE)."""
+    env = settings.env() if env is None else env
+    config = settings.config() if config is None else config
+    mode = env.get("LAIA_MODE") or config.get("mode", "online")
+
+    if mode == "local":
+        local = config.get("local") or {}
+        base = f"http://{local.get('host', '127.0.0.1')}:{local.get('port', 11434)}/v1"
+        # Not LAIA_MODEL: that is the online model and survives a switch to local mode
+        return Endpoint("local", base, model=env.get("LAIA_LOCAL_MODEL") or local.get("model", ""))
+    if mode == "lan":
+        lan = config.get("lan") or {}
+        # First host of the pool; the gateway spreads requests over all of them
+        hosts = lanpool.hosts_from_config(config, env)
+        host, port = hosts[0] if hosts else ("", lan.get("port", 11434))
+        return Endpoint("lan", f"http://{lanpool.format_host(host, port)}/v1",
+                        model=env.get("LAIA_LAN_MODEL") or lan.get("model", ""))
+
+    specs = providers.load_providers() if specs is None else specs
+    pid = env.get("LAIA_PROVIDER") or (config.get("online") or {}).get("provider", "groq")
+    spec = specs[pid]
+    key = env.get(spec.api_key_env, "")
+    return Endpoint(
+        pid,
+        env.get("LAIA_API_BASE") or spec.api_base,
+        headers=spec.auth_headers(key) if key else {},
+        model=env.get("LAIA_MODEL") or (config.get("online") or {}).get("model") or spec.default_model,
+    )
+
+
+def post_json(url, body, headers=None, timeout=DEFAULT_TIMEOUT):
+    data = json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, method="POST", headers={
+        "Content-Type": "application/json",
+        "User-Agent": "LAIA/1.0",
+        **(headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise AIClientError(f"HTTP {e.code}: {e.read(300).decode('utf-8', 'replace')}", e.code)
+    except (urllib.error.URLError, OSError) as e:
+        raise AIClientError(str(getattr(e, "reason", e)))
+
+
+def chat_completion(endpoint, body, cache=None, limiter=None, timeout=DEFAULT_TIMEOUT):
+    """POST /chat/completions; cached responses carry "laia_cache": "hit"."""
+    body = dict(body)
+    body.setdefault("model", endpoint.model)
+
+    use_cache = cache is not None and cache.cacheable(body)
+    if use_cache:
+        cached = cache.get(endpoint.provider, body)
+        if cached is not None:
+            return dict(cached, laia_cache="hit")
+
+    if limiter is not None and not limiter.acquire(endpoint.provider, time.time() + timeout):
+        raise AIClientError(f"Request budget for {endpoint.provider} used up", 429)
+    try:
+        response = post_json(f"{endpoint.api_base}/chat/completions", body,
+                             endpoint.headers, timeout)
+    except AIClientError as e:
+        if e.status == 429 and limiter is not None:
+            limiter.note_rate_limited(endpoint.provider)
+        raise
+
+    if use_cache:
+        cache.put(endpoint.provider, body, response)
+    return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-ask", description="Send one prompt to the configured AI")
+    parser.add_argument("prompt")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    args = parser.parse_args(argv)
+
+    config = aiconfig.load_ai_config()
+    endpoint = resolve_endpoint(config=config)
+    cache = None if args.no_cache else ResponseCache.from_config(config)
+    limiter = RateLimiter.from_providers(providers.load_providers())
+    body = {
+        "messages": [{"role": "user", "content": args.prompt}],
+        "temperature": args.temperature,
+        "max_tokens": args.max_tokens,
+    }
+    if args.model:
+        body["model"] = args.model
+    try:
+        response = chat_completion(endpoint, body, cache=cache, limiter=limiter)
+    except AIClientError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(response["choices"][0]["message"]["content"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Active AI configuration (config/ai/config.yaml).
+
+Small accessors over the YAML so callers do not each re-implement the
+defaults for mode, endpoints and the fallback chain. Settings changed from
+the GUIs are written to ~/.laia/config.yaml, which is merged over the
+system file, so a normal user never needs write access to config/.
+"""
+import os
+import tempfile
+
+import yaml
+
+from laia_common import CONFIG_DIR, USER_DIR, trace
+
+AI_CONFIG_FILE = CONFIG_DIR / "ai" / "config.yaml"
+MODELS_FILE = CONFIG_DIR / "ai" / "models.yaml"
+USER_AI_CONFIG = USER_DIR / "config.yaml"
+
+
+def _read_yaml(path):
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def _merge(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@trace.traced("config")
+def load_ai_config(path=AI_CONFIG_FILE, user_path=USER_AI_CONFIG):
+    """Return config.yaml with the user's overrides applied ({} if missing)."""
+    config = _read_yaml(path)
+    if user_path:
+        config = _merge(config, _read_yaml(user_path))
+    return config
+
+
+@trace.traced("config")
+def set_user_option(section, key, value, user_path=USER_AI_CONFIG):
+    """Persist section.key = value in the user override file."""
+    overrides = _read_yaml(user_path)
+    overrides.setdefault(section, {})[key] = value
+    user_path = os.fspath(user_path)
+    os.makedirs(os.path.dirname(user_path), mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(user_path))
+    with os.fdopen(fd, "w") as f:
+        yaml.safe_dump(overrides, f, default_flow_style=False, sort_keys=False)
+    os.replace(tmp, user_path)
+
+
+def fallback_chain(config):
+    """The `fallback_chain` entries, in order, skipping malformed ones."""
+    return [e for e in config.get("fallback_chain") or [] if isinstance(e, dict) and e.get("provider")]
+
+
+def local_context(config):
+    """(num_ctx, kv_cache_type) from the `local` section."""
+    local = config.get("local") or {}
+    return int(local.get("num_ctx", 4096)), local.get("kv_cache_type", "f16")
+
+
+def catalog_ram_gb(path=MODELS_FILE):
+    """{model id: ram_gb} from the models.yaml catalog (rough, hand-written)."""
+    catalog = (_read_yaml(path).get("local") or {}).get("catalog") or []
+    return {m["id"]: m["ram_gb"] for m in catalog if isinstance(m, dict) and "ram_gb" in m}
+
+
+def local_tiers(path=MODELS_FILE):
+    """{tier: [model ids]} from models.yaml, install_default before optional."""
+    tiers = (_read_yaml(path).get("local") or {}).get("tiers") or {}
+    return {name: list(t.get("install_default") or []) + list(t.get("optional") or [])
+            for name, t in tiers.items() if isinstance(t, dict)}
@@ -0,0 +1,252 @@
+"""
+Status of LAIA's own AppArmor profiles, read straight from securityfs.
+
+`systemctl is-active apparmor` only says the service ran. This module
+reads /sys/kernel/security/apparmor/profiles (no aa-status subprocess),
+matches the loaded profiles against the files shipped in
+config/security/apparmor/, and reports for each one:
+
+- mode: enforce / complain / kill, or not loaded
+- staleness: /etc/apparmor.d copy edited after it was loaded, or
+  different from the copy LAIA ships
+- DENIED / ALLOWED audit events in the last 24 h, counted from the
+  journal incrementally (a saved cursor means each refresh only reads
+  new records)
+
+Reading the profile list needs root on most kernels; without it the
+report says so instead of guessing.
+
+    sudo python3 -m laia_common.apparmor
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from laia_common import CONFIG_DIR, USER_DIR
+
+SECURITYFS = Path("/sys/kernel/security/apparmor")
+SHIPPED_DIR = CONFIG_DIR / "security" / "apparmor"
+INSTALLED_DIR = Path("/etc/apparmor.d")
+AUDIT_STATE_FILE = USER_DIR / "cache" / "apparmor_audit.json"
+
+AUDIT_WINDOW = 24 * 3600
+_BUCKET = 3600  # audit counts are kept per hour
+
+_PROFILE_RE = re.compile(r"^\s*profile\s+(\S+)", re.MULTILINE)
+_AUDIT_RE = re.compile(r'apparmor="(DENIED|ALLOWED)".*?profile="([^"]+)"')
+
+
+@dataclass
+class ProfileStatus:
+    name: str
+    source: Path                 # file in config/security/apparmor
+    mode: str = ""               # "" when not loaded
+    loaded_at: float = 0.0       # securityfs entry time, 0 if unknown
+    installed: Path = None       # /etc/apparmor.d copy, None if missing
+    stale: str = ""              # why the loaded policy may be out of date
+    denied: int = 0
+    allowed: int = 0
+
+    @property
+    def loaded(self):
+        return bool(self.mode)
+
+
+def read_loaded(securityfs=SECURITYFS):
+    """{profile name: mode} from securityfs; raises PermissionError without root."""
+    loaded = {}
+    with open(Path(securityfs) / "profiles") as f:
+        for line in f:
+            name, sep, mode = line.rstrip("\n").rpartition(" (")
+            if sep:
+                loaded[name] = mode.rstrip(")")
+    return loaded
+
+
+def load_times(securityfs=SECURITYFS):
+    """{profile name: time the kernel created its policy entry} where readable."""
+    times = {}
+    root = Path(securityfs) / "policy" / "profiles"
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return times
+    for entry in entries:
+        try:
+            name = (Path(entry.path) / "name").read_text().strip()
+            times[name] = entry.stat().st_mtime
+        except OSError:
+            continue
+    return times
+
+
+def shipped_profiles(directory=SHIPPED_DIR):
+    """{profile name: shipped file} for every `profile NAME` in LAIA's files."""
+    profiles = {}
+    for path in sorted(Path(directory).glob("*")):
+        if not path.is_file():
+            continue
+        for name in _PROFILE_RE.findall(path.read_text(errors="replace")):
+            profiles[name] = path
+    return profiles
+
+
+class AuditCounter:
+    """Hourly DENIED/ALLOWED counts per profile, fed from a journal cursor."""
+
+    def __init__(self, path=AUDIT_STATE_FILE, clock=time.time):
+        self.path = Path(path)
+        self.clock = clock
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault("cursor", None)
+        self.state.setdefault("buckets", {})  # profile → verdict → {hour: count}
+
+    def journal_command(self):
+        cmd = ["journalctl", "--output=json", "--no-pager", "_TRANSPORT=audit", "+", "_TRANSPORT=kernel"]
+        if self.state["cursor"]:
+            cmd.append(f"--after-cursor={self.state['cursor']}")
+        else:
+            cmd.append(f"--since=-{AUDIT_WINDOW // 3600}h")
+        return cmd
+
+    def add_records(self, records):
+        """Count apparmor= audit lines from journal JSON records."""
+        for record in records:
+            cursor = record.get("__CURSOR")
+            if cursor:
+                self.state["cursor"] = cursor
+            message = record.get("MESSAGE", "")
+            if isinstance(message, list):
+                message = bytes(message).decode("utf-8", "replace")
+            match = _AUDIT_RE.search(message)
+            if not match:
+                continue
+            verdict, profile = match.groups()
+            try:
+                ts = int(record.get("__REALTIME_TIMESTAMP", "0")) / 1e6
+            except ValueError:
+                ts = 0
+            hour = str(int(ts or self.clock()) // _BUCKET * _BUCKET)
+            buckets = self.state["buckets"].setdefault(profile, {}).setdefault(verdict, {})
+            buckets[hour] = buckets.get(hour, 0) + 1
+
+    def refresh(self, timeout=15):
+        """Read journal records since the saved cursor, then persist."""
+        try:
+            result = subprocess.run(self.journal_command(), capture_output=True, text=True,
+                                    timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        records = []
+        for line in result.stdout.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        self.add_records(records)
+        self.prune()
+        self.save()
+        return result.returncode == 0
+
+    def prune(self):
+        cutoff = self.clock() - AUDIT_WINDOW - _BUCKET
+        for verdicts in self.state["buckets"].values():
+            for hours in verdicts.values():
+                for hour in [h for h in hours if int(h) < cutoff]:
+                    del hours[hour]
+
+    def counts(self, profile):
+        """(denied, allowed) in the last AUDIT_WINDOW seconds, hats included."""
+        cutoff = self.clock() - AUDIT_WINDOW
+        totals = {"DENIED": 0, "ALLOWED": 0}
+        for name, verdicts in self.state["buckets"].items():
+            if name != profile and not name.startswith(profile + "//"):
+                continue
+            for verdict, hours in verdicts.items():
+                totals[verdict] = totals.get(verdict, 0) + sum(
+                    n for h, n in hours.items() if int(h) + _BUCKET > cutoff)
+        return totals["DENIED"], totals["ALLOWED"]
+
+    def save(self):
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+def _same_content(a, b):
+    try:
+        return Path(a).read_bytes() == Path(b).read_bytes()
+    except OSError:
+        return False
+
+
+def inspect(securityfs=SECURITYFS, shipped_dir=SHIPPED_DIR, installed_dir=INSTALLED_DIR,
+            audit=None):
+    """ProfileStatus for every LAIA profile; raises PermissionError without root."""
+    loaded = read_loaded(securityfs)
+    times = load_times(securityfs)
+    statuses = []
+    for name, source in shipped_profiles(shipped_dir).items():
+        status = ProfileStatus(name, source, mode=loaded.get(name, ""),
+                               loaded_at=times.get(name, 0.0))
+        installed = Path(installed_dir) / source.name
+        if installed.is_file():
+            status.installed = installed
+            if not _same_content(installed, source):
+                status.stale = "installed copy differs from LAIA's"
+            elif status.loaded_at and installed.stat().st_mtime > status.loaded_at:
+                status.stale = "edited since it was loaded"
+        if audit is not None:
+            status.denied, status.allowed = audit.counts(name)
+        statuses.append(status)
+    return statuses
+
+
+def describe(status):
+    """One-line summary for the GUI and CLI."""
+    if not status.installed:
+        state = "❌ not installed"
+    elif not status.loaded:
+        state = "❌ not loaded"
+    elif status.mode == "enforce":
+        state = "✅ enforce"
+    else:
+        state = f"⚠️ {status.mode}"
+    parts = [state]
+    if status.stale:
+        parts.append(f"⚠️ stale: {status.stale}")
+    parts.append(f"{status.denied} denied / {status.allowed} allowed (24 h)")
+    return " · ".join(parts)
+
+
+def main(argv=None):
+    audit = AuditCounter()
+    audit.refresh()
+    try:
+        statuses = inspect(audit=audit)
+    except PermissionError:
+        print("❌ Reading AppArmor profiles needs root: sudo python3 -m laia_common.apparmor",
+              file=sys.stderr)
+        return 1
+    except FileNotFoundError:
+        print("❌ AppArmor is not enabled in this kernel (no securityfs entry)", file=sys.stderr)
+        return 1
+    for status in statuses:
+        print(f"{status.name:12} {describe(status)}")
+    return 0 if all(s.loaded and not s.stale for s in statuses) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+~/.laia/api_keys.env reading and merge-writing.
+
+The file is a flat KEY=value list that the shell scripts `source`.
+update_env() rewrites only the keys it is given, keeps every other line
+(including keys for other providers and comments) and replaces the file
+atomically with 0600 permissions.
+"""
+import os
+import tempfile
+
+from laia_common import USER_DIR, trace
+
+KEYS_FILE = USER_DIR / "api_keys.env"
+
+
+def _parse_line(line):
+    line = line.strip()
+    if not line or line.startswith("#") or "=" not in line:
+        return None
+    if line.startswith("export "):
+        line = line[len("export "):].lstrip()
+    name, _, value = line.partition("=")
+    name = name.strip()
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1]
+    return name, value
+
+
+@trace.traced("config")
+def read_env(path=KEYS_FILE):
+    """Return {name: value} from an env file ({} if it does not exist)."""
+    env = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parsed = _parse_line(line)
+                if parsed:
+                    env[parsed[0]] = parsed[1]
+    except FileNotFoundError:
+        pass
+    return env
+
+
+@trace.traced("config")
+def update_env(path=KEYS_FILE, updates=None, remove=()):
+    """Merge updates into the env file, dropping names listed in remove."""
+    updates = dict(updates or {})
+    remove = set(remove)
+    try:
+        with open(path) as f:
+            old_lines = f.read().splitlines()
+    except FileNotFoundError:
+        old_lines = []
+
+    lines = []
+    for line in old_lines:
+        parsed = _parse_line(line)
+        if parsed is None:
+            lines.append(line)
+            continue
+        name = parsed[0]
+        if name in remove:
+            continue
+        if name in updates:
+            lines.append(f"{name}={updates.pop(name)}")
+        else:
+            lines.append(line)
+    lines.extend(f"{name}={value}" for name, value in updates.items())
+
+    path = os.fspath(path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".api_keys.", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,388 @@
+"""
+Fleet mode: keep the LAIA config of many machines in step.
+
+A desired-state directory (~/.laia/fleet by default) holds the managed
+files by name — `openclaw.json` and `config.yaml`, see config.yaml
+`fleet.files` for where each lives on a host. For every host in
+`fleet.hosts` the fleet runner
+
+1. hashes all managed files in one round trip (sha256 on the host, so
+   only digests cross the network),
+2. compares them with the desired copies, and
+3. on `push`, sends only the files that differ. Each one is written to a
+   temp file next to the target, the old file is kept as <name>.bak (as
+   the configurator's Save does), then it is moved into place and the new
+   digest is read back.
+
+Hosts are handled concurrently, at most `fleet.workers` at a time. How a
+host is reached is a pluggable transport:
+
+    user@host, ssh://user@host:2222   ssh (BatchMode, keys only)
+    docker:NAME, podman:NAME          exec into a container
+    local:/some/home                  this machine, with HOME=/some/home
+
+    python3 -m laia_common.fleet snapshot     # this host's files become the desired state
+    python3 -m laia_common.fleet status       # drift per host; exit 1 if any
+    python3 -m laia_common.fleet push
+"""
+import argparse
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import USER_DIR, aiconfig
+
+DESIRED_DIR = USER_DIR / "fleet"
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 20.0
+
+# Managed file → path on each host. config.yaml is the per-user override
+# layer (merged over config/ai/config.yaml), so pushing it needs no root.
+MANAGED_FILES = {
+    "openclaw.json": "~/.openclaw/openclaw.json",
+    "config.yaml": "~/.laia/config.yaml",
+}
+
+_MISSING = "-"
+_UNREADABLE = "!"
+
+
+class FleetError(Exception):
+    pass
+
+
+def _shell_path(path):
+    """Quote a host path for sh; a leading ~/ becomes "$HOME"/."""
+    if path.startswith("~/"):
+        return '"$HOME"/' + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# -- transports ----------------------------------------------------------------
+
+class Transport:
+    """Runs a sh script on one host. Subclasses only build the argv."""
+
+    def __init__(self, target, timeout=DEFAULT_TIMEOUT):
+        self.target = target
+        self.timeout = timeout
+
+    def argv(self, script):
+        raise NotImplementedError
+
+    def env(self):
+        return None
+
+    def run(self, script, data=b""):
+        try:
+            proc = subprocess.run(self.argv(script), input=data, capture_output=True,
+                                  timeout=self.timeout, env=self.env())
+        except subprocess.TimeoutExpired:
+            raise FleetError(f"timed out after {self.timeout:g} s")
+        except OSError as e:
+            raise FleetError(str(e))
+        if proc.returncode != 0:
+            detail = proc.stderr.decode(errors="replace").strip().splitlines()
+            raise FleetError(detail[-1] if detail else f"exit status {proc.returncode}")
+        return proc.stdout.decode(errors="replace")
+
+
+class SSHTransport(Transport):
+    def __init__(self, target, destination, port=None, timeout=DEFAULT_TIMEOUT):
+        super().__init__(target, timeout)
+        self.destination = destination
+        self.port = port
+
+    def argv(self, script):
+        argv = ["ssh", "-o", "BatchMode=yes", "-o", f"ConnectTimeout={int(self.timeout)}"]
+        if self.port:
+            argv += ["-p", str(self.port)]
+        # The remote login shell gets one string; run the script under sh regardless
+        return argv + [self.destination, "sh -c " + shlex.quote(script)]
+
+
+class ContainerTransport(Transport):
+    def __init__(self, target, engine, container, timeout=DEFAULT_TIMEOUT):
+        super().__init__(target, timeout)
+        self.engine = engine
+        self.container = container
+
+    def argv(self, script):
+        return [self.engine, "exec", "-i", self.container, "sh", "-c", script]
+
+
+class LocalTransport(Transport):
+    """This machine; with `home`, ~ paths land under that directory instead."""
+
+    def __init__(self, target, home=None, timeout=DEFAULT_TIMEOUT):
+        super().__init__(target, timeout)
+        self.home = home
+
+    def argv(self, script):
+        return ["sh", "-c", script]
+
+    def env(self):
+        return dict(os.environ, HOME=str(self.home)) if self.home else None
+
+
+def parse_target(text, timeout=DEFAULT_TIMEOUT):
+    """Host spec from fleet.hosts → Transport."""
+    text = str(text).strip()
+    scheme, sep, rest = text.partition(":")
+    if sep and scheme == "local":
+        return LocalTransport(text, os.path.expanduser(rest) or None, timeout)
+    if text == "local":
+        return LocalTransport(text, None, timeout)
+    if sep and scheme in ("docker", "podman") and rest:
+        return ContainerTransport(text, scheme, rest, timeout)
+    if text.startswith("ssh://"):
+        dest = text[len("ssh://"):].rstrip("/")
+        host, _, port = dest.rpartition(":") if dest.count(":") == 1 else (dest, "", "")
+        if port and not port.isdigit():
+            raise ValueError(f"bad port in {text}")
+        return SSHTransport(text, host or dest, int(port) if port else None, timeout)
+    if not text or any(c.isspace() for c in text):
+        raise ValueError(f"not a host: {text!r}")
+    return SSHTransport(text, text, None, timeout)
+
+
+# -- host operations -----------------------------------------------------------
+
+def remote_hashes(transport, paths):
+    """[digest, "-" if missing, "!" if unreadable] for each path, one round trip."""
+    if not paths:
+        return []
+    quoted = " ".join(_shell_path(p) for p in paths)
+    script = (
+        f"for f in {quoted}; do "
+        f"if [ ! -e \"$f\" ]; then echo {_MISSING}; "
+        "elif h=$(sha256sum < \"$f\" 2>/dev/null); then echo \"${h%% *}\"; "
+        f"else echo '{_UNREADABLE}'; fi; done"
+    )
+    lines = transport.run(script).split()
+    if len(lines) != len(paths):
+        raise FleetError(f"unexpected hash output: {' '.join(lines)[:80]}")
+    return lines
+
+
+def atomic_write(transport, path, data):
+    """Replace `path` on the host via temp file + mv; returns the new digest."""
+    f = _shell_path(path)
+    script = (
+        "set -e\n"
+        f"f={f}\n"
+        "mkdir -p \"$(dirname \"$f\")\"\n"
+        "tmp=$(mktemp \"$f.XXXXXX\")\n"
+        "trap 'rm -f \"$tmp\"' EXIT\n"
+        "cat > \"$tmp\"\n"
+        "if [ -f \"$f\" ]; then chmod --reference=\"$f\" \"$tmp\"; cp -p \"$f\" \"$f.bak\"; fi\n"
+        "mv -f \"$tmp\" \"$f\"\n"
+        "trap - EXIT\n"
+        "h=$(sha256sum < \"$f\")\n"
+        "echo \"${h%% *}\"\n"
+    )
+    return transport.run(script, data).strip()
+
+
+@dataclass
+class FileState:
+    name: str
+    path: str
+    desired: str           # digest of the desired copy
+    actual: str = ""       # digest on the host, "-" missing, "!" unreadable
+    pushed: bool = False
+    error: str = ""
+
+    @property
+    def status(self):
+        if self.error:
+            return "failed"
+        if self.pushed:
+            return "pushed"
+        if self.actual == self.desired:
+            return "in sync"
+        return {_MISSING: "missing", _UNREADABLE: "unreadable"}.get(self.actual, "drift")
+
+
+@dataclass
+class HostReport:
+    target: str
+    files: list = field(default_factory=list)
+    error: str = ""
+    elapsed_s: float = 0.0
+
+    @property
+    def drifted(self):
+        return [f for f in self.files if f.status in ("drift", "missing", "unreadable")]
+
+    @property
+    def failed(self):
+        return bool(self.error) or any(f.error for f in self.files)
+
+    @property
+    def pushed(self):
+        return [f for f in self.files if f.pushed]
+
+
+def sync_host(transport, desired, files=MANAGED_FILES, push=False):
+    """Compare (and with push, fix) one host. Never raises: errors go in the report."""
+    start = time.monotonic()
+    report = HostReport(transport.target)
+    names = [n for n in files if n in desired]
+    try:
+        actual = remote_hashes(transport, [files[n] for n in names])
+    except FleetError as e:
+        report.error = str(e)
+        report.elapsed_s = time.monotonic() - start
+        return report
+    for name, digest in zip(names, actual):
+        state = FileState(name, files[name], sha256(desired[name]), digest)
+        report.files.append(state)
+        if push and state.status != "in sync":
+            try:
+                written = atomic_write(transport, state.path, desired[name])
+            except FleetError as e:
+                state.error = str(e)
+                continue
+            if written == state.desired:
+                state.actual, state.pushed = written, True
+            else:
+                state.error = f"digest after write is {written[:12] or 'empty'}"
+    report.elapsed_s = time.monotonic() - start
+    return report
+
+
+def run_fleet(transports, desired, files=MANAGED_FILES, push=False, workers=DEFAULT_WORKERS,
+              on_report=None):
+    """sync_host on every host, `workers` at a time; reports in input order."""
+    reports = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(transports) or 1))) as pool:
+        futures = {pool.submit(sync_host, t, desired, files, push): i for i, t in enumerate(transports)}
+        for future in as_completed(futures):
+            report = future.result()
+            reports[futures[future]] = report
+            if on_report:
+                on_report(report)
+    return [reports[i] for i in range(len(transports))]
+
+
+# -- desired state -------------------------------------------------------------
+
+def settings(config=None):
+    config = aiconfig.load_ai_config() if config is None else config
+    fleet = config.get("fleet") or {}
+    return {
+        "hosts": [str(h) for h in fleet.get("hosts") or []],
+        "workers": int(fleet.get("workers", DEFAULT_WORKERS)),
+        "timeout": float(fleet.get("timeout_s", DEFAULT_TIMEOUT)),
+        "desired_dir": Path(os.path.expanduser(str(fleet.get("desired_dir") or DESIRED_DIR))),
+        "files": {**MANAGED_FILES, **(fleet.get("files") or {})},
+    }
+
+
+def load_desired(desired_dir, files=MANAGED_FILES):
+    """{name: bytes} of the managed files present in the desired-state dir."""
+    desired = {}
+    for name in files:
+        try:
+            desired[name] = (Path(desired_dir) / name).read_bytes()
+        except FileNotFoundError:
+            continue
+    return desired
+
+
+def snapshot(desired_dir, files=MANAGED_FILES):
+    """Copy this host's managed files into the desired-state dir; returns the names."""
+    desired_dir = Path(desired_dir)
+    desired_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+    copied = []
+    for name, path in files.items():
+        source = Path(os.path.expanduser(path))
+        if not source.is_file():
+            continue
+        fd, tmp = tempfile.mkstemp(dir=desired_dir)
+        with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+            shutil.copyfileobj(src, out)
+        os.replace(tmp, desired_dir / name)
+        copied.append(name)
+    return copied
+
+
+def describe(report):
+    took = f"({report.elapsed_s:.1f} s)"
+    if report.error:
+        return f"❌ {report.target}: {report.error} {took}"
+    failed = [f"{f.name}: {f.error}" for f in report.files if f.error]
+    if failed:
+        return f"❌ {report.target}: {'; '.join(failed)} {took}"
+    if report.pushed:
+        return f"✅ {report.target}: pushed {', '.join(f.name for f in report.pushed)} {took}"
+    if report.drifted:
+        return f"⚠️ {report.target}: {', '.join(f'{f.name} {f.status}' for f in report.drifted)} {took}"
+    return f"✅ {report.target}: in sync ({len(report.files)} files) {took}"
+
+
+def summary(reports):
+    failed = sum(r.failed for r in reports)
+    pushed = sum(bool(r.pushed) and not r.failed for r in reports)
+    drifted = sum(bool(r.drifted) and not r.failed for r in reports)
+    in_sync = len(reports) - failed - pushed - drifted
+    return (f"{len(reports)} host(s): {in_sync} in sync, {drifted} drifted, "
+            f"{pushed} pushed, {failed} failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-fleet", description="LAIA fleet config drift and push")
+    parser.add_argument("command", choices=["status", "push", "snapshot"])
+    parser.add_argument("--hosts", help="comma-separated hosts (default: config.yaml fleet.hosts)")
+    parser.add_argument("--desired", help="desired-state directory (default: fleet.desired_dir)")
+    parser.add_argument("--workers", type=int, help="hosts handled at once")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="take this host's files as the desired state first")
+    args = parser.parse_args(argv)
+
+    opts = settings()
+    desired_dir = Path(args.desired) if args.desired else opts["desired_dir"]
+    files = opts["files"]
+
+    if args.command == "snapshot" or args.snapshot:
+        copied = snapshot(desired_dir, files)
+        print(f"📋 Desired state in {desired_dir}: {', '.join(copied) or 'nothing to copy'}")
+        if args.command == "snapshot":
+            return 0
+
+    desired = load_desired(desired_dir, files)
+    if not desired:
+        print(f"❌ No desired state in {desired_dir} — run `snapshot` first", file=sys.stderr)
+        return 2
+    hosts = [h for h in args.hosts.split(",") if h.strip()] if args.hosts else opts["hosts"]
+    if not hosts:
+        print("❌ No hosts — set fleet.hosts in config.yaml or pass --hosts", file=sys.stderr)
+        return 2
+    try:
+        transports = [parse_target(h, opts["timeout"]) for h in hosts]
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    reports = run_fleet(transports, desired, files, push=args.command == "push",
+                        workers=args.workers or opts["workers"],
+                        on_report=lambda r: print(describe(r), flush=True))
+    print(summary(reports))
+    return 1 if any(r.failed or r.drifted for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+"""
+Loopback OpenAI-compatible gateway.
+
+Clients talk to one endpoint, http://127.0.0.1:11500/v1/chat/completions,
+and the gateway picks the upstream: the route for the configured mode
+first, then the `fallback_chain` from config.yaml. Routes are ordered by
+an EWMA of their latency, penalised by their recent error rate, and a
+route that keeps failing is taken out by a circuit breaker until its
+cool-down ends. Streaming (SSE) responses are relayed chunk by chunk
+without buffering, and upstream connections are kept alive in a pool.
+
+Send model "auto" (or omit it) to let the gateway choose; a model that
+matches one of the routes pins the request to those routes. LAN traffic
+is spread over the hosts of the LAN pool (lanpool.py); send the same
+X-LAIA-Session header (or OpenAI "user" field) to keep a conversation
+on one host. "local" requests follow the memory guard (memguard.py): while
+it has stepped down to a smaller model, that model is sent instead.
+
+    PYTHONPATH=/opt/laia/gui python3 -m laia_common.gateway
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from laia_common import aiclient, aiconfig, history, lanpool, memguard, providers, settings
+from laia_common.ratelimit import RateLimiter
+from laia_common.respcache import ResponseCache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 11500
+
+# Latency assumed for a route before it has been measured (ms)
+DEFAULT_LATENCY_MS = 500.0
+
+# Model names meaning "let the gateway choose"
+AUTO_MODELS = ("", "auto", "laia")
+
+_RETRYABLE = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# An upstream that fails with these is skipped for the next route. Not every
+# HTTPException is an OSError (BadStatusLine, LineTooLong, IncompleteRead).
+_UPSTREAM_ERRORS = (OSError, http.client.HTTPException)
+
+
+@dataclass
+class Route:
+    provider: str
+    api_base: str
+    model: str
+    headers: dict = field(default_factory=dict)
+    ewma_ms: float = DEFAULT_LATENCY_MS
+    error_rate: float = 0.0
+    failures: int = 0  # consecutive
+    open_until: float = 0.0
+    requests: int = 0
+    errors: int = 0
+
+    @property
+    def name(self):
+        return f"{self.provider}/{self.model}"
+
+
+class Router:
+    """Orders routes by measured latency and error rate; trips breakers."""
+
+    def __init__(self, routes, alpha=0.3, failure_threshold=3, cooldown=30.0,
+                 error_penalty=4.0, clock=time.monotonic):
+        self.routes = list(routes)
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.error_penalty = error_penalty
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def score(self, route):
+        return route.ewma_ms * (1 + self.error_penalty * route.error_rate)
+
+    def candidates(self, model=""):
+        """Return (routes to try in order, whether to substitute their model)."""
+        now = self.clock()
+        with self._lock:
+            pool = self.routes
+            override = model in AUTO_MODELS
+            if not override:
+                pinned = [r for r in self.routes if r.model == model]
+                pool = pinned or self.routes[:1]
+            ready = sorted((r for r in pool if r.open_until <= now), key=self.score)
+            for route in ready:
+                if route.failures >= self.failure_threshold:
+                    # Half-open: let this request probe it, keep others away
+                    route.open_until = now + self.cooldown
+            return ready, override
+
+    def record_success(self, route, latency_ms):
+        with self._lock:
+            route.requests += 1
+            route.ewma_ms += self.alpha * (latency_ms - route.ewma_ms)
+            route.error_rate *= 1 - self.alpha
+            route.failures = 0
+            route.open_until = 0.0
+
+    def record_failure(self, route):
+        with self._lock:
+            route.requests += 1
+            route.errors += 1
+            route.error_rate += self.alpha * (1 - route.error_rate)
+            route.failures += 1
+            if route.failures >= self.failure_threshold:
+                route.open_until = self.clock() + self.cooldown
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            return [{
+                "route": r.name,
+                "ewma_ms": round(r.ewma_ms, 1),
+                "error_rate": round(r.error_rate, 3),
+                "requests": r.requests,
+                "errors": r.errors,
+                "circuit": "open" if r.open_until > now else "closed",
+            } for r in sorted(self.routes, key=self.score)]
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections per upstream host."""
+
+    def __init__(self, max_idle=4, timeout=60):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(base_url):
+        parts = urlsplit(base_url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def request(self, base_url, path, body, headers):
+        """POST body to base_url + path; return (key, connection, response)."""
+        key = self._key(base_url)
+        full_path = urlsplit(base_url).path.rstrip("/") + path
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request("POST", full_path, body, headers)
+                return key, conn, conn.getresponse()
+            except _RETRYABLE:
+                conn.close()
+                if not reused:
+                    raise
+                # Idle connection was closed by the server; retry on a fresh one
+            except BaseException:
+                conn.close()
+                raise
+
+    def release(self, key, conn, response):
+        """Return conn to the pool if the response was fully consumed."""
+        if response.isclosed() and not response.will_close:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+
+class Gateway:
+    def __init__(self, router, pool=None, cache=None, limiter=None, lan_pool=None, memguard_state=None,
+                 history_store=None):
+        self.router = router
+        self.pool = pool or ConnectionPool()
+        self.cache = cache
+        self.limiter = limiter
+        self.lan_pool = lan_pool
+        self.memguard_state = memguard_state
+        self.history_store = history_store
+
+    def _record_history(self, route, ok, data=None, seconds=0.0):
+        """Status-tab samples from real traffic (the probes no longer run inference)."""
+        if self.history_store is None:
+            return
+        tokens = 0
+        if data:
+            try:
+                tokens = int((json.loads(data).get("usage") or {}).get("completion_tokens") or 0)
+            except (ValueError, TypeError, AttributeError):
+                pass
+        try:
+            self.history_store.record_many(history.traffic_samples(route.provider, ok, tokens, seconds))
+        except OSError:
+            pass
+
+    def handle_chat(self, handler, body):
+        requested = body.get("model") or ""
+        stream = bool(body.get("stream"))
+        cacheable = self.cache is not None and self.cache.cacheable(body)
+        if cacheable:
+            cached = self.cache.get("gateway", body)
+            if cached is not None:
+                handler.send_json(200, cached, {"X-LAIA-Cache": "hit"})
+                return
+
+        routes, override = self.router.candidates(requested)
+        # Requests of one conversation stay on one LAN host (its KV cache)
+        session = handler.headers.get("X-LAIA-Session") or body.get("user")
+        last_error = "no upstream configured"
+        for route in routes:
+            if self.limiter is not None and not self.limiter.try_acquire(route.provider)[0]:
+                last_error = f"{route.name}: request budget used up"
+                continue
+            api_base, lan_host = route.api_base, None
+            if route.provider == "lan" and self.lan_pool is not None:
+                lan_host = self.lan_pool.acquire(route.model, session)
+                if lan_host is None:
+                    last_error = f"{route.name}: no healthy LAN host"
+                    continue
+                api_base = lan_host.api_base
+            model = route.model
+            if route.provider == "local" and self.memguard_state is not None:
+                model = self.memguard_state.model_for(route.model)
+            payload = json.dumps(dict(body, model=model) if override or model != route.model
+                                 else body).encode()
+            headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream",
+                       "User-Agent": "LAIA-Gateway/1.0", **route.headers}
+            start = time.monotonic()
+            try:
+                key, conn, response = self.pool.request(api_base, "/chat/completions",
+                                                        payload, headers)
+            except _UPSTREAM_ERRORS as e:
+                self.router.record_failure(route)
+                self._record_history(route, False)
+                if lan_host is not None:
+                    self.lan_pool.release(lan_host, ok=False, detail=str(e))
+                last_error = f"{route.name}: {e}"
+                continue
+            latency_ms = (time.monotonic() - start) * 1000
+
+            if response.status == 429 or response.status >= 500:
+                try:
+                    response.read()
+                except _UPSTREAM_ERRORS:
+                    pass  # the connection is dropped by release()
+                self.pool.release(key, conn, response)
+                self.router.record_failure(route)
+                if response.status >= 500:
+                    self._record_history(route, False)  # 429 is our budget, not an outage
+                if lan_host is not None:
+                    self.lan_pool.release(lan_host, ok=False, detail=f"HTTP {response.status}")
+                if response.status == 429 and self.limiter is not None:
+                    self.limiter.note_rate_limited(route.provider, response.getheader("Retry-After"))
+                last_error = f"{route.name}: HTTP {response.status}"
+                continue
+
+            streaming = response.getheader("Content-Type", "").startswith("text/event-stream") or stream
+            if not streaming:
+                # Read the whole body first: a cut-off reply can still fail over
+                try:
+                    data = response.read()
+                except _UPSTREAM_ERRORS as e:
+                    conn.close()
+                    self.router.record_failure(route)
+                    self._record_history(route, False)
+                    if lan_host is not None:
+                        self.lan_pool.release(lan_host, ok=False, detail=str(e))
+                    last_error = f"{route.name}: {e!r}"
+                    continue
+
+            # Upstream answered (4xx here is the client's problem, not a fault)
+            error = None
+            try:
+                if streaming:
+                    error = self._relay_stream(handler, route, response)
+                else:
+                    handler.send_bytes(response.status, data, response.getheader("Content-Type"),
+                                       {"X-LAIA-Route": route.name})
+                    if cacheable and response.status == 200:
+                        try:
+                            self.cache.put("gateway", body, json.loads(data))
+                        except ValueError:
+                            pass
+            finally:
+                if lan_host is not None:
+                    self.lan_pool.release(lan_host, ok=error is None, detail=repr(error) if error else "")
+            if error is not None:
+                conn.close()
+                self.router.record_failure(route)
+                self._record_history(route, False)
+                return
+            self.router.record_success(route, latency_ms)
+            if response.status == 200:
+                self._record_history(route, True, None if streaming else data,
+                                     0.0 if streaming else time.monotonic() - start)
+            self.pool.release(key, conn, response)
+            return
+
+        handler.send_json(503, {"error": {"message": f"No upstream available ({last_error})",
+                                          "type": "laia_gateway_unavailable"}})
+
+    @staticmethod
+    def _relay_stream(handler, route, response):
+        """Relay chunk by chunk; returns the upstream error if it broke off, else None.
+
+        Once headers are sent there is no failing over: a broken upstream
+        ends the stream with an SSE error event instead.
+        """
+        handler.send_response(response.status)
+        handler.send_header("Content-Type", response.getheader("Content-Type", "text/event-stream"))
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.send_header("X-LAIA-Route", route.name)
+        handler.end_headers()
+        error = None
+        try:
+            while True:
+                try:
+                    chunk = response.read1(65536)
+                except _UPSTREAM_ERRORS as e:
+                    error = e
+                    message = json.dumps({"error": {"message": f"{route.name} broke off: {e!r}",
+                                                    "type": "laia_gateway_upstream_error"}})
+                    chunk = f"data: {message}\n\n".encode()
+                if not chunk:
+                    break
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                handler.wfile.flush()
+                if error is not None:
+                    break
+            handler.wfile.write(b"0\r\n\r\n")
+            handler.wfile.flush()
+        except OSError:
+            handler.close_connection = True  # client went away; upstream conn is dropped
+        return error
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LAIA-Gateway/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def send_bytes(self, status, data, content_type="application/json", extra=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type or "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, obj, extra=None):
+        self.send_bytes(status, json.dumps(obj).encode(), "application/json", extra)
+
+    def do_GET(self):
+        gateway = self.server.gateway
+        if self.path == "/health":
+            health = {"routes": gateway.router.snapshot()}
+            if gateway.lan_pool is not None:
+                health["lan_hosts"] = gateway.lan_pool.snapshot()
+            if gateway.memguard_state is not None:
+                health["memguard"] = gateway.memguard_state.state()
+            self.send_json(200, health)
+        elif self.path == "/v1/models":
+            models = [{"id": r.model, "object": "model", "owned_by": r.provider}
+                      for r in gateway.router.routes]
+            self.send_json(200, {"object": "list", "data": models})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length))
+            if not isinstance(body, dict):
+                raise ValueError("body must be a JSON object")
+        except ValueError as e:
+            self.send_json(400, {"error": {"message": f"invalid request: {e}"}})
+            return
+        self.server.gateway.handle_chat(self, body)
+
+
+class GatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, gateway, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+        super().__init__((host, port), GatewayHandler)
+        self.gateway = gateway
+        self.verbose = verbose
+
+
+def build_routes(config, env, specs):
+    """Routes for the configured mode followed by the fallback_chain."""
+    routes = []
+    seen = set()
+    hints = {(e["provider"], e.get("model")): e.get("latency_ms")
+             for e in aiconfig.fallback_chain(config)}
+
+    def add(endpoint):
+        if not endpoint.model or (endpoint.provider, endpoint.model) in seen:
+            return
+        if endpoint.provider == "lan" and "//:" in endpoint.api_base:
+            return  # LAN host not configured
+        seen.add((endpoint.provider, endpoint.model))
+        latency = hints.get((endpoint.provider, endpoint.model)) or DEFAULT_LATENCY_MS
+        routes.append(Route(endpoint.provider, endpoint.api_base, endpoint.model,
+                            dict(endpoint.headers), ewma_ms=float(latency)))
+
+    try:
+        add(aiclient.resolve_endpoint(env, config, specs))
+    except KeyError:
+        pass  # Unknown provider in api_keys.env; rely on the chain
+    for entry in aiconfig.fallback_chain(config):
+        provider, model = entry["provider"], entry.get("model", "")
+        if provider in ("local", "lan"):
+            add(aiclient.resolve_endpoint(dict(env, LAIA_MODE=provider, LAIA_LOCAL_MODEL=model,
+                                               LAIA_LAN_MODEL=model), config, specs))
+            continue
+        spec = specs.get(provider)
+        if spec is None or (entry.get("requires_key", True) and not env.get(spec.api_key_env)):
+            continue
+        key = env.get(spec.api_key_env)
+        add(aiclient.Endpoint(provider, spec.api_base,
+                              spec.auth_headers(key) if key else {}, model))
+    return routes
+
+
+def gateway_from_config(config=None, env=None, specs=None):
+    config = settings.config() if config is None else config
+    env = settings.env() if env is None else env
+    specs = providers.load_providers() if specs is None else specs
+    section = config.get("gateway") or {}
+    router = Router(
+        build_routes(config, env, specs),
+        alpha=float(section.get("ewma_alpha", 0.3)),
+        failure_threshold=int(section.get("breaker_failures", 3)),
+        cooldown=float(section.get("breaker_cooldown_s", 30)),
+    )
+    pool = ConnectionPool(timeout=float(section.get("request_timeout", 60)))
+    lan_pool = None
+    if any(r.provider == "lan" for r in router.routes):
+        lan_pool = lanpool.LanPool.from_config(config, env)
+        lan_pool.start(float((config.get("lan") or {}).get("health_interval_s",
+                                                            lanpool.DEFAULT_CHECK_INTERVAL)))
+    guard = memguard.StateReader() if any(r.provider == "local" for r in router.routes) else None
+    store = history.MetricHistory() if section.get("record_history", True) else None
+    return Gateway(router, pool, ResponseCache.from_config(config), RateLimiter.from_providers(specs),
+                   lan_pool, guard, store)
+
+
+def main(argv=None):
+    config = aiconfig.load_ai_config()
+    section = config.get("gateway") or {}
+    parser = argparse.ArgumentParser(prog="laia-gateway", description="LAIA loopback AI gateway")
+    parser.add_argument("--host", default=section.get("bind", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(section.get("port", DEFAULT_PORT)))
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    gateway = gateway_from_config(config)
+    if not gateway.router.routes:
+        print("❌ No usable upstream — run laia-setup-wizard first", file=sys.stderr)
+        return 1
+    server = GatewayServer(gateway, args.host, args.port, args.verbose)
+    print(f"LAIA gateway on http://{args.host}:{args.port}/v1 — routes: "
+          + ", ".join(r.name for r in gateway.router.routes))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+GGUF header reader and memory-fit estimates.
+
+Memory-maps a GGUF file (or the Ollama blob holding one) and parses only
+the header, metadata and tensor table — the tensor data, i.e. nearly all
+of a multi-GB file, is never touched. From that we compute the memory the
+weights take and the KV cache at a given context length, which replaces
+the hand-written `ram_gb` guesses in models.yaml when the model is on disk.
+
+    python3 -m laia_common.gguf gemma3:4b --num-ctx 8192
+"""
+import argparse
+import mmap
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import aiconfig, ollama_store
+
+GGUF_MAGIC = b"GGUF"
+DEFAULT_ALIGNMENT = 32
+DEFAULT_NUM_CTX = 4096
+
+# Arrays longer than this (token lists, merges) are skipped, not stored;
+# per-layer values (one entry per block) stay well below it
+MAX_STORED_ARRAY = 1024
+
+# Runtime buffers on top of weights + KV cache (compute graph, scratch)
+OVERHEAD_BYTES = 512 * 1024 * 1024
+
+# Bytes per KV cache element for Ollama's OLLAMA_KV_CACHE_TYPE values
+KV_CACHE_BYTES = {"f16": 2.0, "q8_0": 34 / 32, "q4_0": 18 / 32}
+
+# ggml tensor type → (elements per block, bytes per block)
+GGML_TYPES = {
+    0: (1, 4), 1: (1, 2), 2: (32, 18), 3: (32, 20), 6: (32, 22), 7: (32, 24),
+    8: (32, 34), 9: (32, 36), 10: (256, 84), 11: (256, 110), 12: (256, 144),
+    13: (256, 176), 14: (256, 210), 15: (256, 292), 16: (256, 66), 17: (256, 74),
+    18: (256, 98), 19: (256, 50), 20: (32, 18), 21: (256, 110), 22: (256, 82),
+    23: (256, 136), 24: (1, 1), 25: (1, 2), 26: (1, 4), 27: (1, 8), 28: (1, 8),
+    29: (256, 56), 30: (1, 2), 34: (256, 54), 35: (256, 66),
+}
+
+# general.file_type → the quantization name Ollama shows
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S",
+    15: "Q4_K_M", 16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS",
+    20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S",
+    25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S", 29: "IQ2_M",
+    30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+
+# Metadata value types: id → struct format (scalars); 8 = string, 9 = array
+_SCALARS = {0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i", 6: "<f",
+            7: "<?", 10: "<Q", 11: "<q", 12: "<d"}
+_STRING, _ARRAY = 8, 9
+
+
+class GGUFError(ValueError):
+    pass
+
+
+@dataclass
+class SkippedArray:
+    """A long metadata array (e.g. the vocabulary) that was not decoded."""
+    count: int
+
+
+@dataclass
+class GGUFInfo:
+    path: str
+    version: int
+    metadata: dict
+    n_params: int
+    weight_bytes: int  # tensor data, from the tensor table
+    tensor_types: dict = field(default_factory=dict)  # ggml type → tensor count
+
+    @property
+    def arch(self):
+        return self.metadata.get("general.architecture", "")
+
+    def arch_value(self, key, default=None):
+        return self.metadata.get(f"{self.arch}.{key}", default)
+
+    @property
+    def quantization(self):
+        file_type = self.metadata.get("general.file_type")
+        return FILE_TYPES.get(file_type, f"type {file_type}" if file_type is not None else "?")
+
+    @property
+    def context_length(self):
+        return self.arch_value("context_length", 0)
+
+
+class _Reader:
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def unpack(self, fmt):
+        try:
+            value, = struct.unpack_from(fmt, self.buf, self.pos)
+        except struct.error:
+            raise GGUFError("truncated GGUF header") from None
+        self.pos += struct.calcsize(fmt)
+        return value
+
+    def string(self):
+        n = self.unpack("<Q")
+        if self.pos + n > len(self.buf):
+            raise GGUFError("truncated GGUF string")
+        data = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return data.decode("utf-8", "replace")
+
+    def skip_string(self):
+        n = self.unpack("<Q")
+        self.pos += n
+
+    def value(self, vtype):
+        if vtype in _SCALARS:
+            return self.unpack(_SCALARS[vtype])
+        if vtype == _STRING:
+            return self.string()
+        if vtype == _ARRAY:
+            itype = self.unpack("<I")
+            count = self.unpack("<Q")
+            if count <= MAX_STORED_ARRAY:
+                return [self.value(itype) for _ in range(count)]
+            self.skip_array(itype, count)
+            return SkippedArray(count)
+        raise GGUFError(f"unknown GGUF value type {vtype}")
+
+    def skip_array(self, itype, count):
+        if itype in _SCALARS:
+            self.pos += struct.calcsize(_SCALARS[itype]) * count
+        elif itype == _STRING:
+            for _ in range(count):
+                self.skip_string()
+        else:
+            for _ in range(count):
+                self.value(itype)
+
+
+def read_gguf(path):
+    """Parse the header of a GGUF file without reading its tensor data."""
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise GGUFError(f"{path}: empty file") from None
+    try:
+        return _parse(path, buf)
+    finally:
+        buf.close()
+
+
+def _parse(path, buf):
+    r = _Reader(buf)
+    if buf[:4] != GGUF_MAGIC:
+        raise GGUFError(f"{path}: not a GGUF file")
+    r.pos = 4
+    version = r.unpack("<I")
+    if version not in (2, 3):
+        raise GGUFError(f"{path}: unsupported GGUF version {version}")
+    n_tensors = r.unpack("<Q")
+    n_kv = r.unpack("<Q")
+
+    metadata = {}
+    for _ in range(n_kv):
+        key = r.string()
+        metadata[key] = r.value(r.unpack("<I"))
+
+    n_params = 0
+    weight_bytes = 0
+    tensor_types = {}
+    for _ in range(n_tensors):
+        r.skip_string()  # tensor name
+        n_dims = r.unpack("<I")
+        elements = 1
+        for _ in range(n_dims):
+            elements *= r.unpack("<Q")
+        ttype = r.unpack("<I")
+        r.unpack("<Q")  # data offset
+        n_params += elements
+        tensor_types[ttype] = tensor_types.get(ttype, 0) + 1
+        block, size = GGML_TYPES.get(ttype, (0, 0))
+        if not block:
+            weight_bytes = -1  # unknown type; fall back to the file size below
+        elif weight_bytes >= 0:
+            weight_bytes += -(-elements // block) * size
+
+    if weight_bytes < 0:
+        alignment = metadata.get("general.alignment", DEFAULT_ALIGNMENT)
+        data_start = -(-r.pos // alignment) * alignment
+        weight_bytes = len(buf) - data_start
+
+    return GGUFInfo(str(path), version, metadata, n_params, weight_bytes, tensor_types)
+
+
+def kv_cache_bytes(info, num_ctx, kv_type="f16"):
+    """Memory for the K and V caches at `num_ctx` tokens (all layers)."""
+    n_layer = info.arch_value("block_count", 0)
+    n_embd = info.arch_value("embedding_length", 0)
+    n_head = info.arch_value("attention.head_count", 0)
+    n_head_kv = info.arch_value("attention.head_count_kv", n_head)
+    if not (n_layer and n_embd and n_head):
+        return 0
+    if isinstance(n_head, list):
+        n_head = max(n_head) or 1
+    head_dim = n_embd // n_head
+    key_len = info.arch_value("attention.key_length", head_dim)
+    value_len = info.arch_value("attention.value_length", head_dim)
+    # Some architectures store KV head counts per layer
+    heads_total = sum(n_head_kv) if isinstance(n_head_kv, list) else n_head_kv * n_layer
+    elements = num_ctx * heads_total * (key_len + value_len)
+    return int(elements * KV_CACHE_BYTES.get(kv_type, 2.0))
+
+
+@dataclass
+class MemoryEstimate:
+    weights: int
+    kv_cache: int
+    overhead: int
+    num_ctx: int
+
+    @property
+    def total(self):
+        return self.weights + self.kv_cache + self.overhead
+
+
+def estimate(info, num_ctx=DEFAULT_NUM_CTX, kv_type="f16"):
+    if info.context_length:
+        num_ctx = min(num_ctx, info.context_length)
+    return MemoryEstimate(info.weight_bytes, kv_cache_bytes(info, num_ctx, kv_type),
+                          OVERHEAD_BYTES, num_ctx)
+
+
+def read_meminfo(path="/proc/meminfo"):
+    """(MemTotal, MemAvailable) in bytes."""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                values[key] = int(rest.split()[0]) * 1024
+    return values.get("MemTotal", 0), values.get("MemAvailable", values.get("MemTotal", 0))
+
+
+def fit_verdict(required, total, available):
+    """"fits" (free RAM now), "tight" (only after closing apps) or "no"."""
+    if required <= available:
+        return "fits"
+    if required <= total * 0.9:
+        return "tight"
+    return "no"
+
+
+VERDICT_ICONS = {"fits": "✅", "tight": "⚠️", "no": "❌"}
+
+
+def model_fit(name, num_ctx=DEFAULT_NUM_CTX, kv_type="f16", store=None):
+    """MemoryEstimate for an installed Ollama model, or None if not on disk."""
+    path = ollama_store.model_weights_blob(name, store)
+    if path is None:
+        return None
+    try:
+        return estimate(read_gguf(path), num_ctx, kv_type)
+    except (OSError, GGUFError):
+        return None
+
+
+def fit_text(mem, total, available):
+    """Short label such as "✅ 3.2 GB at num_ctx=4096"."""
+    verdict = fit_verdict(mem.total, total, available)
+    return f"{VERDICT_ICONS[verdict]} {_gb(mem.total)} at num_ctx={mem.num_ctx}"
+
+
+def model_file(name_or_path, store=None):
+    """A GGUF path as given, or the weights blob of an Ollama model name."""
+    path = Path(name_or_path)
+    if path.is_file():
+        return path
+    return ollama_store.model_weights_blob(name_or_path, store)
+
+
+def _gb(n):
+    return f"{n / 1024 ** 3:.1f} GB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-gguf", description="Memory needed to run a model")
+    parser.add_argument("model", help="GGUF file or Ollama model name (e.g. gemma3:4b)")
+    num_ctx, kv_type = aiconfig.local_context(aiconfig.load_ai_config())
+    parser.add_argument("--num-ctx", type=int, default=num_ctx)
+    parser.add_argument("--kv-type", choices=sorted(KV_CACHE_BYTES), default=kv_type)
+    args = parser.parse_args(argv)
+
+    path = model_file(args.model)
+    if path is None:
+        print(f"❌ {args.model}: not a file and not an installed Ollama model", file=sys.stderr)
+        return 1
+    try:
+        info = read_gguf(path)
+    except (OSError, GGUFError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    mem = estimate(info, args.num_ctx, args.kv_type)
+    total, available = read_meminfo()
+    print(f"{args.model}: {info.arch}, {info.n_params / 1e9:.2f}B params, {info.quantization}")
+    print(f"  weights  {_gb(mem.weights)}")
+    print(f"  KV cache {_gb(mem.kv_cache)} at num_ctx={mem.num_ctx} ({args.kv_type})")
+    print(f"  total    {_gb(mem.total)} — RAM {_gb(total)}, available {_gb(available)}: "
+          f"{fit_verdict(mem.total, total, available)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
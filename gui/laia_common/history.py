@@ -0,0 +1,320 @@
+"""
+Round-robin history of status probes.
+
+Every probe result (service up/down, firewall on/off, provider latency,
+Ollama reachability) is a metric with its own fixed-size file under
+~/.laia/history/. Probes never run inference: tokens/sec comes from real
+requests through the gateway (traffic_samples). Each file holds three
+ring archives, updated together on every sample so no separate rollup
+job is needed:
+
+    raw     10 s slots, 1 hour
+    minute  1 min slots, 7 days
+    hour    1 h slots, 12 weeks
+
+A slot keeps sum/min/max/count, so rollups are exact averages and the
+extremes (a service that flapped for one probe) survive downsampling.
+Files never grow: ~450 KB per metric whatever the uptime.
+
+    python3 -m laia_common.history probe     # record one round of probes
+    python3 -m laia_common.history show service.ollama --archive minute
+"""
+import argparse
+import fcntl
+import json
+import os
+import re
+import struct
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from laia_common import USER_DIR
+
+HISTORY_DIR = USER_DIR / "history"
+
+# name → (slot seconds, slot count)
+ARCHIVES = {
+    "raw": (10, 360),
+    "minute": (60, 7 * 24 * 60),
+    "hour": (3600, 12 * 7 * 24),
+}
+
+MAGIC = b"LAIARRD1"
+_SLOT = struct.Struct("<qdddI")  # slot start, sum, min, max, count
+
+PROBED_SERVICES = ("apparmor", "fail2ban", "unattended-upgrades", "ufw", "ollama", "openclaw")
+UFW_CONF = Path("/etc/ufw/ufw.conf")
+TIMER_UNIT = "laia-history.timer"
+
+# A provider is probed at most this often, and not at all while the
+# gateway's own traffic keeps provider.<id>.up current
+PROVIDER_PROBE_SECONDS = 15 * 60
+
+
+def _layout():
+    offsets, pos = {}, len(MAGIC)
+    for name, (_, slots) in ARCHIVES.items():
+        offsets[name] = pos
+        pos += slots * _SLOT.size
+    return offsets, pos
+
+
+_OFFSETS, FILE_SIZE = _layout()
+
+
+def _filename(metric):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", metric) + ".rrd"
+
+
+class MetricHistory:
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = Path(directory)
+
+    def path(self, metric):
+        return self.directory / _filename(metric)
+
+    def _open(self, metric):
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(self.path(metric), os.O_RDWR | os.O_CREAT, 0o600)
+        f = os.fdopen(fd, "r+b")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        if f.read(len(MAGIC)) != MAGIC or os.fstat(fd).st_size != FILE_SIZE:
+            # New file, or written with a different layout: start over
+            f.seek(0)
+            f.truncate()
+            f.write(MAGIC)
+            f.truncate(FILE_SIZE)
+        return f
+
+    def record(self, metric, value, ts=None):
+        ts = time.time() if ts is None else ts
+        value = float(value)
+        with self._open(metric) as f:
+            for name, (step, slots) in ARCHIVES.items():
+                start = int(ts) // step * step
+                pos = _OFFSETS[name] + (start // step % slots) * _SLOT.size
+                f.seek(pos)
+                slot_start, total, lo, hi, count = _SLOT.unpack(f.read(_SLOT.size))
+                if slot_start != start or count == 0:
+                    total, lo, hi, count = value, value, value, 1
+                else:
+                    total, lo, hi, count = total + value, min(lo, value), max(hi, value), count + 1
+                f.seek(pos)
+                f.write(_SLOT.pack(start, total, lo, hi, count))
+
+    def record_many(self, samples, ts=None):
+        ts = time.time() if ts is None else ts
+        for metric, value in samples.items():
+            if value is not None:
+                self.record(metric, value, ts)
+
+    def series(self, metric, archive="raw", span=None, now=None):
+        """[(slot start, mean, min, max)] oldest first, over `span` seconds
+        (default: the archive's whole length)."""
+        step, slots = ARCHIVES[archive]
+        now = time.time() if now is None else now
+        wanted = slots if span is None else min(slots, max(1, int(span) // step + 1))
+        last = int(now) // step
+        first = last - wanted + 1
+        try:
+            f = open(self.path(metric), "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            if f.read(len(MAGIC)) != MAGIC:
+                return []
+            # At most two contiguous reads, since the range may wrap
+            chunks = []
+            index = first
+            while index <= last:
+                ring = index % slots
+                run = min(last - index + 1, slots - ring)
+                f.seek(_OFFSETS[archive] + ring * _SLOT.size)
+                chunks.append(f.read(run * _SLOT.size))
+                index += run
+        data = b"".join(chunks)
+        points = []
+        for i, (slot_start, total, lo, hi, count) in enumerate(_SLOT.iter_unpack(data)):
+            if count and slot_start == (first + i) * step:
+                points.append((slot_start, total / count, lo, hi))
+        return points
+
+    def metrics(self):
+        try:
+            return sorted(p.stem for p in self.directory.glob("*.rrd"))
+        except OSError:
+            return []
+
+    def disk_usage(self):
+        return sum(p.stat().st_size for p in self.directory.glob("*.rrd"))
+
+
+# -- probes ----------------------------------------------------------------
+
+def probe_services(services=PROBED_SERVICES):
+    """{service.<name>: 1.0 active / 0.0 otherwise} from one systemctl call."""
+    try:
+        result = subprocess.run(["systemctl", "is-active", *services],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    states = result.stdout.split()
+    if len(states) != len(services):
+        return {}
+    return {f"service.{svc}": 1.0 if state == "active" else 0.0
+            for svc, state in zip(services, states)}
+
+
+def probe_firewall(conf=UFW_CONF):
+    """firewall.ufw from ufw.conf (readable without root, unlike `ufw status`)."""
+    try:
+        text = Path(conf).read_text()
+    except OSError:
+        return {}
+    enabled = re.search(r"^\s*ENABLED\s*=\s*(\S+)", text, re.MULTILINE)
+    return {"firewall.ufw": 1.0 if enabled and enabled.group(1).lower() == "yes" else 0.0}
+
+
+def probe_provider(spec, key, limiter=None, check=None):
+    """provider.<id>.latency_ms for the active provider, within its rate budget."""
+    from laia_common import keycheck
+    if limiter is not None and not limiter.try_acquire(spec.id)[0]:
+        return {}
+    result = (check or keycheck.check_key)(spec, key)
+    if result["status"] != keycheck.STATUS_VALID:
+        return {f"provider.{spec.id}.up": 0.0}
+    return {f"provider.{spec.id}.up": 1.0, f"provider.{spec.id}.latency_ms": result["latency_ms"]}
+
+
+def _ollama_json(base, path, body=None, timeout=30):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base + path, data=data,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def probe_ollama(base="http://127.0.0.1:11434"):
+    """ollama.up, ollama.latency_ms and ollama.loaded_models.
+
+    Only /api/version and /api/ps are asked: neither runs the model nor
+    resets its keep_alive, so an idle model still unloads on time.
+    """
+    start = time.monotonic()
+    try:
+        _ollama_json(base, "/api/version", timeout=3)
+        latency_ms = (time.monotonic() - start) * 1000
+        loaded = _ollama_json(base, "/api/ps", timeout=3).get("models") or []
+    except (OSError, ValueError, urllib.error.URLError):
+        return {"ollama.up": 0.0}
+    return {"ollama.up": 1.0, "ollama.latency_ms": latency_ms,
+            "ollama.loaded_models": float(len(loaded))}
+
+
+def traffic_samples(provider, ok, completion_tokens=0, seconds=0.0):
+    """Samples for one request the gateway relayed, in place of synthetic probes."""
+    samples = {f"provider.{provider}.up": 1.0 if ok else 0.0}
+    if ok and completion_tokens and seconds > 0:
+        metric = "ollama.tokens_per_sec" if provider == "local" else f"provider.{provider}.tokens_per_sec"
+        samples[metric] = completion_tokens / seconds
+    return samples
+
+
+def provider_probe_due(store, provider, now=None):
+    """True unless provider.<id>.up was recorded in the last PROVIDER_PROBE_SECONDS."""
+    if store is None:
+        return True
+    return not store.series(f"provider.{provider}.up", "raw", span=PROVIDER_PROBE_SECONDS, now=now)
+
+
+def timer_active(unit=TIMER_UNIT):
+    """Whether the systemd user timer is already recording probes."""
+    try:
+        result = subprocess.run(["systemctl", "--user", "is-active", "--quiet", unit],
+                                capture_output=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+def probe_all(env=None, config=None, limiter=None, store=None):
+    """One round of every probe; {metric: value}.
+
+    With `store`, the provider is skipped if it was sampled recently.
+    """
+    from laia_common import providers, settings
+    from laia_common.ratelimit import RateLimiter
+    env = settings.env() if env is None else env
+    config = settings.config() if config is None else config
+
+    samples = {}
+    samples.update(probe_services())
+    samples.update(probe_firewall())
+
+    specs = providers.load_providers()
+    spec = specs.get(env.get("LAIA_PROVIDER") or (config.get("online") or {}).get("provider", ""))
+    if spec is not None and env.get(spec.api_key_env) and provider_probe_due(store, spec.id):
+        limiter = RateLimiter.from_providers(specs) if limiter is None else limiter
+        samples.update(probe_provider(spec, env[spec.api_key_env], limiter))
+
+    local = config.get("local") or {}
+    samples.update(probe_ollama(f"http://{local.get('host', '127.0.0.1')}:{local.get('port', 11434)}"))
+    return samples
+
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values):
+    """Text sparkline, for the CLI."""
+    if not values:
+        return ""
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1.0
+    return "".join(SPARK_CHARS[int((v - lo) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+
+def format_value(metric, value):
+    """Human reading of a metric's latest value."""
+    if metric.endswith(".latency_ms"):
+        return f"{value:.0f} ms"
+    if metric.endswith(".tokens_per_sec"):
+        return f"{value:.1f} tok/s"
+    if metric.startswith(("service.", "firewall.")) or metric.endswith(".up"):
+        return "up" if value >= 1 else "down" if value <= 0 else f"up {value:.0%}"
+    return f"{value:g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-history", description="LAIA status history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("probe", help="run all probes once and record the results")
+    show = sub.add_parser("show", help="print a metric as a sparkline")
+    show.add_argument("metric", nargs="?")
+    show.add_argument("--archive", choices=sorted(ARCHIVES), default="raw")
+    args = parser.parse_args(argv)
+
+    store = MetricHistory()
+    if args.command == "probe":
+        samples = probe_all(store=store)
+        store.record_many(samples)
+        for metric, value in sorted(samples.items()):
+            print(f"{metric:40} {value:.2f}")
+        return 0
+
+    for metric in [args.metric] if args.metric else store.metrics():
+        points = store.series(metric, args.archive)
+        means = [p[1] for p in points]
+        last = format_value(metric, means[-1]) if means else "-"
+        print(f"{metric:40} {sparkline(means[-60:]):60} {last}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
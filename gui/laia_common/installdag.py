@@ -0,0 +1,403 @@
+"""
+Checkpointed, parallel runner for install steps.
+
+An install is a list of steps with dependencies, e.g. the AI stack:
+
+    ollama ──────────┬──> openwebui-service
+    openwebui-venv ──┘
+    ollama ──> model gemma3:4b, model phi4-mini, ...   (2 pulls at a time)
+
+Steps whose dependencies are done run concurrently, up to `workers`.
+Steps can share a group (the model pulls share "pull") with a smaller
+limit of their own. Each finished step is recorded in a JSON state file
+together with a fingerprint of what it ran, so a re-run after a failure
+resumes where it stopped. A step can also have a `check` callable that
+tells whether its work is already there (the model is in the store);
+when it has one, the check decides and the checkpoint is not consulted,
+so work removed since the last run is done again.
+When a step fails, only the steps that depend on it are skipped;
+independent work still finishes.
+
+Progress and timings are reported as events: the wizard's progress page
+shows them, and the headless runner prints them and appends them to a
+log.
+
+    sudo python3 -m laia_common.installdag ai-stack             # Ollama + models + OpenWebUI
+    sudo python3 -m laia_common.installdag ai-stack --minimal
+    sudo python3 -m laia_common.installdag ai-stack --reset     # forget checkpoints
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from laia_common import CONFIG_DIR, USER_DIR, mirror
+
+AI_SCRIPTS = CONFIG_DIR / "ai"
+DEFAULT_WORKERS = 4
+PULL_LIMIT = 2          # concurrent model downloads; more only splits the bandwidth
+SYSTEM_STATE = Path("/var/lib/laia/ai-stack-install.json")
+SYSTEM_LOG = Path("/var/log/laia-ai-stack.log")
+
+
+class DagError(Exception):
+    pass
+
+
+class StepError(Exception):
+    pass
+
+
+@dataclass
+class Step:
+    name: str
+    run: object                     # argv list, or callable(progress) → progress(fraction, message="")
+    deps: tuple = ()
+    group: str = ""                 # steps of one group obey Runner(limits={group: n})
+    weight: float = 1.0             # share of the overall progress bar
+    check: object = None            # callable() → True when the work is already done (wins over the checkpoint)
+    checkpoint: bool = True         # False: run every time (discovery, probes)
+    description: str = ""
+
+    @property
+    def fingerprint(self):
+        """Changes when the step would do something different."""
+        h = hashlib.sha256(self.name.encode())
+        if isinstance(self.run, (list, tuple)):
+            for arg in self.run:
+                h.update(b"\0" + str(arg).encode())
+                if os.path.isfile(str(arg)):
+                    with open(arg, "rb") as f:
+                        h.update(hashlib.sha256(f.read()).digest())
+        return h.hexdigest()[:16]
+
+
+@dataclass
+class Event:
+    kind: str              # start, progress, output, done, cached, failed, blocked
+    step: str
+    message: str = ""
+    fraction: float = 0.0  # of this step
+    overall: float = 0.0   # of the whole run, by weight
+    elapsed_s: float = 0.0  # since the step started; its duration for done/failed
+
+
+@dataclass
+class RunResult:
+    status: dict = field(default_factory=dict)      # name → done, cached, failed, blocked
+    seconds: dict = field(default_factory=dict)     # name → duration of steps that ran
+    errors: dict = field(default_factory=dict)      # name → message
+    elapsed_s: float = 0.0
+
+    @property
+    def ok(self):
+        return all(s in ("done", "cached") for s in self.status.values())
+
+    @property
+    def failed(self):
+        return [n for n, s in self.status.items() if s == "failed"]
+
+
+def topo_order(steps):
+    """Step names with every dependency first; DagError on unknown names or cycles."""
+    by_name = {}
+    for step in steps:
+        if step.name in by_name:
+            raise DagError(f"duplicate step: {step.name}")
+        by_name[step.name] = step
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise DagError(f"dependency cycle: {' → '.join(path + [name])}")
+        state[name] = "visiting"
+        for dep in by_name[name].deps:
+            if dep not in by_name:
+                raise DagError(f"{name} depends on unknown step {dep}")
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for step in steps:
+        visit(step.name, [])
+    return order
+
+
+# -- checkpoints ---------------------------------------------------------------
+
+def read_state(path):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data.get("steps") or {} if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(path, steps):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".install-state-")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"version": 1, "steps": steps}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# -- runner --------------------------------------------------------------------
+
+class Runner:
+    def __init__(self, steps, state_path=None, workers=DEFAULT_WORKERS, limits=None, on_event=None,
+                 log_path=None, env=None):
+        self.steps = {s.name: s for s in steps}
+        self.order = topo_order(steps)
+        self.state_path = state_path
+        self.workers = max(1, workers)
+        self.limits = dict(limits or {})
+        self.on_event = on_event
+        self.log_path = log_path
+        self.env = env
+        self._lock = threading.Lock()
+        self._fractions = {}
+        self._finished_weight = 0.0
+        self._total_weight = sum(s.weight for s in steps) or 1.0
+        self._state = read_state(state_path) if state_path else {}
+
+    # -- reporting -------------------------------------------------------------
+
+    def _overall(self):
+        running = sum(self.steps[n].weight * f for n, f in self._fractions.items())
+        return min(1.0, (self._finished_weight + running) / self._total_weight)
+
+    def _emit(self, kind, name, message="", fraction=0.0, elapsed_s=0.0):
+        with self._lock:
+            if kind in ("done", "cached", "failed", "blocked"):
+                self._fractions.pop(name, None)
+                self._finished_weight += self.steps[name].weight
+            elif kind in ("start", "progress"):
+                self._fractions[name] = max(0.0, min(1.0, fraction))
+            event = Event(kind, name, message, fraction, self._overall(), elapsed_s)
+            if self.log_path:
+                self._log(event)
+            if self.on_event:
+                self.on_event(event)  # under the lock, so events arrive in order
+
+    def _log(self, event):
+        try:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(f"{datetime.now().isoformat(timespec='seconds')} {describe(event)}\n")
+        except OSError:
+            pass  # the log is a convenience; never fail the install over it
+
+    # -- execution -------------------------------------------------------------
+
+    def _already_done(self, step):
+        if step.check:
+            # The real state beats the checkpoint: a model pulled last time may be gone
+            try:
+                return "already present" if step.check() else None
+            except Exception:
+                return None
+        if step.checkpoint and self._state.get(step.name, {}).get("fingerprint") == step.fingerprint:
+            return "checkpoint"
+        return None
+
+    def _execute(self, step):
+        start = time.monotonic()
+        self._emit("start", step.name, step.description)
+
+        def progress(fraction, message=""):
+            self._emit("progress", step.name, message, fraction, time.monotonic() - start)
+
+        if callable(step.run):
+            step.run(progress)
+        else:
+            self._run_command(step, start)
+        return time.monotonic() - start
+
+    def _run_command(self, step, start):
+        try:
+            proc = subprocess.Popen([str(a) for a in step.run], stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, text=True, bufsize=1, env=self.env)
+        except OSError as e:
+            raise StepError(str(e))
+        last = ""
+        for line in proc.stdout:
+            line = line.rstrip()
+            if line:
+                last = line
+                self._emit("output", step.name, line, elapsed_s=time.monotonic() - start)
+        code = proc.wait()
+        if code != 0:
+            raise StepError(f"exit status {code}" + (f": {last}" if last else ""))
+
+    def _record(self, name, seconds):
+        if not (self.state_path and self.steps[name].checkpoint):
+            return
+        with self._lock:
+            self._state[name] = {"fingerprint": self.steps[name].fingerprint,
+                                 "finished": datetime.now().isoformat(timespec="seconds"),
+                                 "seconds": round(seconds, 1)}
+            write_state(self.state_path, self._state)
+
+    def _forget(self, name):
+        with self._lock:
+            if self.state_path and self._state.pop(name, None) is not None:
+                write_state(self.state_path, self._state)
+
+    def run(self):
+        result = RunResult()
+        start = time.monotonic()
+        pending = list(self.order)
+        running = {}          # future → name
+        group_use = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    step = self.steps[name]
+                    states = [result.status.get(d) for d in step.deps]
+                    if any(s in ("failed", "blocked") for s in states):
+                        pending.remove(name)
+                        result.status[name] = "blocked"
+                        bad = [d for d in step.deps if result.status[d] in ("failed", "blocked")]
+                        self._emit("blocked", name, f"needs {', '.join(bad)}")
+                        continue
+                    if not all(s in ("done", "cached") for s in states):
+                        continue
+                    why = self._already_done(step)
+                    if why:
+                        pending.remove(name)
+                        result.status[name] = "cached"
+                        self._emit("cached", name, why)
+                        continue
+                    if len(running) >= self.workers:
+                        continue
+                    if step.group and group_use.get(step.group, 0) >= self.limits.get(step.group, self.workers):
+                        continue
+                    pending.remove(name)
+                    group_use[step.group] = group_use.get(step.group, 0) + 1
+                    running[pool.submit(self._execute, step)] = name
+                if not running:
+                    continue  # cached/blocked steps may have unlocked others
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    step = self.steps[name]
+                    group_use[step.group] -= 1
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        result.status[name] = "failed"
+                        result.errors[name] = str(e) or type(e).__name__
+                        self._forget(name)
+                        self._emit("failed", name, result.errors[name])
+                        continue
+                    result.status[name] = "done"
+                    result.seconds[name] = seconds
+                    self._record(name, seconds)
+                    self._emit("done", name, elapsed_s=seconds)
+        result.elapsed_s = time.monotonic() - start
+        return result
+
+
+def describe(event):
+    if event.kind == "start":
+        return f"▶ {event.step}" + (f" — {event.message}" if event.message else "")
+    if event.kind == "progress":
+        pct = f" {event.fraction * 100:.0f}%" if event.fraction else ""
+        return f"… {event.step}{pct}" + (f" {event.message}" if event.message else "")
+    if event.kind == "output":
+        return f"  [{event.step}] {event.message}"
+    if event.kind == "done":
+        return f"✅ {event.step} ({event.elapsed_s:.1f} s)"
+    if event.kind == "cached":
+        return f"⏭ {event.step} ({event.message})"
+    if event.kind == "failed":
+        return f"❌ {event.step}: {event.message}"
+    return f"⏸ {event.step} skipped — {event.message}"
+
+
+def summary(result):
+    lines = []
+    for name, status in result.status.items():
+        took = f"{result.seconds[name]:7.1f} s" if name in result.seconds else " " * 9
+        lines.append(f"  {status:8} {took}  {name}" + (f" — {result.errors[name]}" if name in result.errors else ""))
+    return lines
+
+
+# -- the AI stack --------------------------------------------------------------
+
+def stack_models(script_dir=AI_SCRIPTS, args=()):
+    """The models install-models.sh would pull for these arguments (RAM-based defaults)."""
+    out = subprocess.run(["bash", str(Path(script_dir) / "install-models.sh"), "--print", *args],
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def ai_stack_steps(models, script_dir=AI_SCRIPTS):
+    script_dir = Path(script_dir)
+    steps = [
+        Step("ollama", ["bash", script_dir / "install-ollama.sh"], weight=2,
+             description="Ollama binary and service"),
+        Step("openwebui-venv", ["bash", script_dir / "install-openwebui.sh", "venv"], weight=3,
+             description="OpenWebUI Python environment"),
+        Step("openwebui-service", ["bash", script_dir / "install-openwebui.sh", "service"],
+             deps=("ollama", "openwebui-venv"), description="laia-openwebui.service"),
+    ]
+    for model in models:
+        steps.append(Step(f"model {model}", ["bash", script_dir / "install-models.sh", "--no-list", model],
+                          deps=("ollama",), group="pull", weight=4))
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-installdag", description="Parallel, resumable AI stack install")
+    parser.add_argument("target", choices=["ai-stack"])
+    parser.add_argument("models", nargs="*", help="models to pull (default: by RAM, see install-models.sh)")
+    parser.add_argument("--minimal", action="store_true", help="only the smallest model")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--state", help="checkpoint file")
+    parser.add_argument("--log", help="append events here")
+    parser.add_argument("--reset", action="store_true", help="forget checkpoints and start over")
+    args = parser.parse_args(argv)
+
+    root = os.geteuid() == 0
+    state = Path(args.state) if args.state else (SYSTEM_STATE if root else USER_DIR / "ai-stack-install.json")
+    log = Path(args.log) if args.log else (SYSTEM_LOG if root else USER_DIR / "ai-stack-install.log")
+    if args.reset and state.exists():
+        state.unlink()
+
+    try:
+        models = stack_models(AI_SCRIPTS, ["--minimal"] if args.minimal else args.models)
+        runner = Runner(ai_stack_steps(models), state, args.workers, {"pull": PULL_LIMIT},
+                        on_event=lambda e: print(describe(e), flush=True), log_path=log)
+    except (OSError, subprocess.CalledProcessError, DagError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    # Look for a LAN model mirror once instead of in every pull step
+    if "LAIA_MIRROR" not in os.environ:
+        os.environ["LAIA_MIRROR"] = mirror.find_mirror() or ""
+
+    result = runner.run()
+    print(f"\n{'✅' if result.ok else '❌'} {len(result.status)} steps in {result.elapsed_s:.0f} s:")
+    print("\n".join(summary(result)))
+    if not result.ok:
+        print(f"Fix the problem and run again; finished steps are skipped ({state})")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Concurrent validation of stored API keys.
+
+Every key in api_keys.env is checked against its provider with a cheap
+authenticated GET (`key_check_path`, /models by default), all providers in
+parallel. Each request first takes a token from the shared rate limiter
+(laia_common.ratelimit), so validation stays within the provider's
+declared rate_limit together with everything else on the host.
+
+Results are cached in ~/.laia/cache/key_checks.json, keyed by a hash of
+provider + key (never the key itself), so re-opening the AI Keys tab does
+not hit the APIs again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from laia_common import USER_DIR
+from laia_common.ratelimit import RateLimiter
+
+CACHE_FILE = USER_DIR / "cache" / "key_checks.json"
+
+# How long a cached result is trusted (seconds)
+VALID_TTL = 6 * 3600
+FAILED_TTL = 10 * 60
+
+# Longest we queue behind the rate limiter before reporting "rate limited"
+ACQUIRE_TIMEOUT = 30
+
+STATUS_VALID = "valid"
+STATUS_INVALID = "invalid"
+STATUS_RATE_LIMITED = "rate_limited"
+STATUS_ERROR = "error"
+
+
+def fingerprint(provider, key):
+    return hashlib.sha256(f"{provider}\0{key}".encode()).hexdigest()[:32]
+
+
+def check_key(spec, key, timeout=10):
+    """Check one key; return a result dict (status, detail, latency_ms, checked_at)."""
+    request = urllib.request.Request(
+        spec.api_base + spec.key_check_path,
+        headers={**spec.auth_headers(key), "User-Agent": "LAIA-Configurator/1.0"},
+    )
+    start = time.monotonic()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read(65536)
+        status, detail = STATUS_VALID, "OK"
+    except urllib.error.HTTPError as e:
+        if e.code in (401, 403):
+            status, detail = STATUS_INVALID, f"Rejected (HTTP {e.code})"
+        elif e.code == 429:
+            status, detail = STATUS_RATE_LIMITED, "Rate limited — try again later"
+        else:
+            status, detail = STATUS_ERROR, f"HTTP {e.code}"
+    except urllib.error.URLError as e:
+        status, detail = STATUS_ERROR, str(e.reason)
+    except OSError as e:
+        status, detail = STATUS_ERROR, str(e)
+    return {
+        "status": status,
+        "detail": detail,
+        "latency_ms": int((time.monotonic() - start) * 1000),
+        "checked_at": time.time(),
+    }
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(results, path=CACHE_FILE):
+    """Merge results into the cache file (atomic replace)."""
+    cache = load_cache(path)
+    cache.update(results)
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def is_fresh(result, now=None):
+    now = time.time() if now is None else now
+    ttl = VALID_TTL if result.get("status") in (STATUS_VALID, STATUS_INVALID) else FAILED_TTL
+    return now - result.get("checked_at", 0) < ttl
+
+
+def stored_keys(specs, env):
+    """[(spec, var, key)] for every non-empty provider key in env."""
+    found = []
+    for spec in specs.values():
+        for var in spec.key_vars(env):
+            if env[var]:
+                found.append((spec, var, env[var]))
+    return found
+
+
+def validate_all(specs, env, force=False, on_result=None, max_workers=8,
+                 cache_path=CACHE_FILE, check=check_key, limiter=None):
+    """Validate every stored key concurrently.
+
+    Returns {var: result}. Fresh cached results are reused unless force is
+    set; on_result(var, result) is called as each result becomes known
+    (from worker threads for live checks).
+    """
+    cache = load_cache(cache_path)
+    results = {}
+    pending = []
+    for spec, var, key in stored_keys(specs, env):
+        fp = fingerprint(spec.id, key)
+        cached = cache.get(fp)
+        if cached and not force and is_fresh(cached):
+            results[var] = dict(cached, cached=True)
+            if on_result:
+                on_result(var, results[var])
+        else:
+            pending.append((spec, var, key, fp))
+
+    if not pending:
+        return results
+
+    if limiter is None:
+        limiter = RateLimiter.from_providers(specs)
+    fresh = {}
+
+    def run(spec, var, key, fp):
+        if limiter.acquire(spec.id, deadline=time.time() + ACQUIRE_TIMEOUT):
+            result = dict(check(spec, key), provider=spec.id)
+            if result["status"] == STATUS_RATE_LIMITED:
+                limiter.note_rate_limited(spec.id)
+            fresh[fp] = result
+        else:
+            # Budget used up by other LAIA processes; not cached
+            result = {"status": STATUS_RATE_LIMITED, "detail": "Local request budget used up",
+                      "latency_ms": 0, "checked_at": time.time(), "provider": spec.id}
+        results[var] = result
+        if on_result:
+            on_result(var, result)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for future in [pool.submit(run, *item) for item in pending]:
+            future.result()
+
+    save_cache(fresh, cache_path)
+    return results
@@ -0,0 +1,292 @@
+"""
+Pool of LAN Ollama servers with load-aware routing.
+
+LAN mode used to point at one host. The pool takes every host listed in
+config.yaml `lan.hosts` (or the single `lan.host` / LAIA_LAN_HOST of
+older setups) and, for each request, picks:
+
+1. the host this session used last, if it is still healthy — Ollama
+   keeps the conversation's KV cache there;
+2. otherwise a healthy host that already has the model loaded (from
+   /api/ps) and a free parallel slot;
+3. then the host with the fewest requests in flight from this machine.
+
+A background health check polls /api/ps on every host; a host that fails
+it (or fails requests) `fail_threshold` times in a row is skipped until a
+check succeeds again. The gateway routes its "lan" traffic through the
+pool.
+
+    python3 -m laia_common.lanpool             # status of every host
+    python3 -m laia_common.lanpool add 192.168.1.20:11434
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from laia_common import aiconfig, settings
+
+DEFAULT_PORT = 11434
+DEFAULT_CHECK_INTERVAL = 15.0
+DEFAULT_STICKY_TTL = 600.0       # seconds a session stays on its host after its last request
+DEFAULT_MAX_PARALLEL = 4         # matches Ollama's OLLAMA_NUM_PARALLEL default
+
+
+def parse_host(text, default_port=DEFAULT_PORT):
+    """"host", "host:port" or "[v6]:port" → (host, port)."""
+    text = str(text).strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        port = rest.lstrip(":")
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+    return host, int(port) if port else int(default_port)
+
+
+def format_host(host, port):
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _base_name(model):
+    return model if ":" in model else f"{model}:latest"
+
+
+@dataclass
+class LanHost:
+    host: str
+    port: int = DEFAULT_PORT
+    healthy: bool = True         # optimistic until the first check
+    loaded: tuple = ()           # models in memory, from /api/ps
+    active: int = 0              # requests in flight through this pool
+    failures: int = 0            # consecutive
+    checked_at: float = 0.0
+    detail: str = ""
+
+    @property
+    def address(self):
+        return format_host(self.host, self.port)
+
+    @property
+    def api_base(self):
+        return f"http://{self.address}/v1"
+
+    def has_loaded(self, model):
+        return bool(model) and _base_name(model) in {_base_name(m) for m in self.loaded}
+
+
+def hosts_from_config(config, env=None):
+    """[(host, port)] for the pool, deduplicated, configured order kept.
+
+    `lan.hosts` wins when set; otherwise the single LAIA_LAN_HOST /
+    `lan.host` of older setups is a pool of one.
+    """
+    env = env or {}
+    lan = config.get("lan") or {}
+    port = int(env.get("LAIA_LAN_PORT") or lan.get("port") or DEFAULT_PORT)
+    entries = []
+    for entry in lan.get("hosts") or []:
+        if isinstance(entry, dict):
+            entry = format_host(str(entry.get("host", "")), entry.get("port", port))
+        entries.append(entry)
+    if not entries:
+        entries = [env.get("LAIA_LAN_HOST") or lan.get("host")]
+    hosts = []
+    for entry in entries:
+        if entry:
+            parsed = parse_host(entry, port)
+            if parsed[0] and parsed not in hosts:
+                hosts.append(parsed)
+    return hosts
+
+
+def save_hosts(hosts, user_path=aiconfig.USER_AI_CONFIG):
+    """Persist the pool ([(host, port)]) as lan.hosts in the user config."""
+    aiconfig.set_user_option("lan", "hosts", [format_host(h, p) for h, p in hosts], user_path)
+
+
+def remove_host(host, config, env, user_path=aiconfig.USER_AI_CONFIG):
+    """Take (host, port) out of the pool; returns api_keys.env keys to remove too.
+
+    An empty lan.hosts falls back to LAIA_LAN_HOST / lan.host, so a host
+    that came from there would come straight back: lan.host is cleared
+    here, and the caller drops the returned env keys.
+    """
+    lan = config.get("lan") or {}
+    port = int(env.get("LAIA_LAN_PORT") or lan.get("port") or DEFAULT_PORT)
+    save_hosts([h for h in hosts_from_config(config, env) if h != host], user_path)
+    if lan.get("host") and parse_host(str(lan["host"]), port) == host:
+        aiconfig.set_user_option("lan", "host", "", user_path)
+    if env.get("LAIA_LAN_HOST") and parse_host(env["LAIA_LAN_HOST"], port) == host:
+        return ["LAIA_LAN_HOST", "LAIA_LAN_PORT"]
+    return []
+
+
+class LanPool:
+    def __init__(self, hosts, sticky_ttl=DEFAULT_STICKY_TTL, max_parallel=DEFAULT_MAX_PARALLEL,
+                 fail_threshold=2, timeout=2.0, clock=time.monotonic):
+        self.hosts = [LanHost(h, p) for h, p in hosts]
+        self.sticky_ttl = sticky_ttl
+        self.max_parallel = max_parallel
+        self.fail_threshold = fail_threshold
+        self.timeout = timeout
+        self.clock = clock
+        self._sessions = {}  # session → (LanHost, expires)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, env=None):
+        lan = config.get("lan") or {}
+        return cls(hosts_from_config(config, env),
+                   sticky_ttl=float(lan.get("sticky_ttl_s", DEFAULT_STICKY_TTL)),
+                   max_parallel=int(lan.get("max_parallel", DEFAULT_MAX_PARALLEL)))
+
+    # -- health ------------------------------------------------------------
+
+    def check(self, host):
+        """Poll /api/ps on one host and update its state."""
+        url = f"http://{host.address}/api/ps"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                models = json.load(response).get("models") or []
+        except (OSError, ValueError, urllib.error.URLError) as e:
+            with self._lock:
+                self._note_failure(host, str(getattr(e, "reason", e)))
+                host.checked_at = self.clock()
+            return False
+        with self._lock:
+            host.loaded = tuple(m.get("name") or m.get("model", "") for m in models)
+            host.healthy, host.failures, host.detail = True, 0, ""
+            host.checked_at = self.clock()
+        return True
+
+    def refresh(self):
+        """Check every host in parallel."""
+        if not self.hosts:
+            return
+        with ThreadPoolExecutor(max_workers=min(16, len(self.hosts))) as pool:
+            list(pool.map(self.check, self.hosts))
+
+    def start(self, interval=DEFAULT_CHECK_INTERVAL):
+        """Health-check in a daemon thread until stop()."""
+        def loop():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(interval)
+        thread = threading.Thread(target=loop, name="lanpool-health", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _note_failure(self, host, detail):
+        host.failures += 1
+        host.detail = detail
+        if host.failures >= self.fail_threshold:
+            host.healthy = False
+
+    # -- routing -----------------------------------------------------------
+
+    def _rank(self, host, model, index):
+        warm = host.has_loaded(model) and host.active < self.max_parallel
+        return (not warm, host.active, index)
+
+    def acquire(self, model, session=None):
+        """Pick a host for one request and count it as in flight; None if all are down."""
+        now = self.clock()
+        with self._lock:
+            for key in [k for k, (_, expires) in self._sessions.items() if expires <= now]:
+                del self._sessions[key]
+            host = None
+            if session and session in self._sessions:
+                sticky = self._sessions[session][0]
+                host = sticky if sticky.healthy else None
+            if host is None:
+                healthy = [(h, i) for i, h in enumerate(self.hosts) if h.healthy]
+                if not healthy:
+                    return None
+                host = min(healthy, key=lambda hi: self._rank(hi[0], model, hi[1]))[0]
+            if session:
+                self._sessions[session] = (host, now + self.sticky_ttl)
+            host.active += 1
+            return host
+
+    def release(self, host, ok=True, detail=""):
+        with self._lock:
+            host.active = max(0, host.active - 1)
+            if ok:
+                host.failures = 0
+            else:
+                self._note_failure(host, detail or "request failed")
+
+    def snapshot(self):
+        with self._lock:
+            return [{
+                "host": h.address,
+                "healthy": h.healthy,
+                "loaded": list(h.loaded),
+                "active": h.active,
+                "detail": h.detail,
+            } for h in self.hosts]
+
+
+def describe(entry):
+    """One line per host for the CLI."""
+    state = "✅" if entry["healthy"] else f"❌ {entry['detail']}"
+    loaded = ", ".join(entry["loaded"]) or "no model loaded"
+    return f"{entry['host']:24} {state}  {loaded}  ({entry['active']} in flight)"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-lanpool", description="LAN Ollama pool")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("status", help="check every host (default)")
+    add = sub.add_parser("add", help="add a host to the pool")
+    add.add_argument("host", help="host or host:port")
+    remove = sub.add_parser("remove", help="remove a host from the pool")
+    remove.add_argument("host")
+    args = parser.parse_args(argv)
+
+    store = settings.shared()
+    config, env = store.config(), store.env()
+    hosts = hosts_from_config(config, env)
+    port = int(env.get("LAIA_LAN_PORT") or (config.get("lan") or {}).get("port") or DEFAULT_PORT)
+    if args.command in ("add", "remove"):
+        target = parse_host(args.host, port)
+        try:
+            if args.command == "add":
+                save_hosts(hosts + [target] if target not in hosts else hosts, store.user_config)
+            elif target not in hosts:
+                print(f"❌ {format_host(*target)} is not in the pool", file=sys.stderr)
+                return 1
+            else:
+                stale = remove_host(target, config, env, store.user_config)
+                if stale:
+                    store.update_env(remove=stale)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not save LAN pool: {e}", file=sys.stderr)
+            return 1
+        hosts = hosts_from_config(store.config(), store.env())
+        print(f"✅ LAN pool: {', '.join(format_host(*h) for h in hosts) or 'empty'}")
+        return 0
+
+    if not hosts:
+        print("❌ No LAN hosts configured (lan.hosts in ~/.laia/config.yaml)", file=sys.stderr)
+        return 1
+    pool = LanPool(hosts)
+    pool.refresh()
+    for entry in pool.snapshot():
+        print(describe(entry))
+    return 0 if any(h.healthy for h in pool.hosts) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,527 @@
+"""
+Multi-user load simulator for a shared Ollama / OpenWebUI server.
+
+Sizes a LAN server before a class of students sits down at it. Simulated
+users start conversations as a Poisson process at each offered rate
+(sessions per minute). Each conversation follows a profile: a number of
+turns, prompts of varied length, and an exponential think time between
+turns. The history grows with every reply, as it does in a real chat.
+Every reply is streamed, and the simulator records:
+
+- TTFT — time to the first token;
+- inter-token latency (ITL) — the gaps between streamed tokens;
+- queueing delay — time spent waiting for a slot. With Ollama's API
+  this is TTFT minus the server's own prompt_eval_duration. With
+  OpenAI-compatible endpoints it is the excess over the TTFT of an idle
+  server, measured first;
+- throughput — tokens/s over the step.
+
+Steps are reported as JSON and as a plot-ready CSV (one row per offered
+rate). Prompts are synthetic, so nothing personal is ever sent.
+
+    python3 -m laia_common.loadsim run --rates 2,5,10,20 --duration 120
+    python3 -m laia_common.loadsim run --api openai --url http://server:3000/api --api-key sk-...
+    python3 -m laia_common.loadsim stub --port 11999   # offline stand-in server
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+from laia_common import aiconfig
+from laia_common.ollama_tuner import percentile
+
+DEFAULT_RATES = (2, 5, 10, 20)      # sessions per minute
+DEFAULT_DURATION = 120.0            # seconds of arrivals per step
+DEFAULT_DRAIN = 300.0               # seconds to let running turns finish after a step
+DEFAULT_SLO_TTFT_MS = 3000
+CALIBRATION_REQUESTS = 3
+PERCENTILES = (50, 95, 99)
+
+_WORDS = (
+    "explain the difference between a process and a thread with an example why does my loop "
+    "never stop summarize this paragraph for a ten year old what is photosynthesis how do I "
+    "solve for x in a quadratic equation write a short poem about the sea translate into "
+    "spanish please list three causes of the french revolution check my grammar in this essay"
+).split()
+
+
+@dataclass
+class Profile:
+    name: str
+    weight: float = 1.0
+    turns: tuple = (1, 3)           # min, max turns per conversation
+    prompt_words: tuple = (10, 80)  # min, max words per user message
+    max_tokens: int = 200
+    think_s: float = 20.0           # mean think time between turns (exponential)
+
+
+PROFILES = [
+    Profile("chat", weight=0.6, turns=(2, 6), prompt_words=(8, 60), max_tokens=200, think_s=20),
+    Profile("homework", weight=0.3, turns=(1, 3), prompt_words=(150, 600), max_tokens=400, think_s=45),
+    Profile("code", weight=0.1, turns=(1, 4), prompt_words=(80, 300), max_tokens=500, think_s=30),
+]
+
+
+def load_profiles(path):
+    """Profiles from a YAML list of Profile fields."""
+    with open(path) as f:
+        entries = yaml.safe_load(f) or []
+    profiles = []
+    for entry in entries:
+        entry = dict(entry)
+        for key in ("turns", "prompt_words"):
+            if key in entry:
+                entry[key] = tuple(entry[key])
+        profiles.append(Profile(**entry))
+    if not profiles:
+        raise ValueError(f"no profiles in {path}")
+    return profiles
+
+
+def prompt_text(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(max(1, words)))
+
+
+# -- one streamed request ------------------------------------------------------
+
+@dataclass
+class RequestRecord:
+    profile: str
+    turn: int
+    prompt_words: int
+    started_s: float = 0.0          # since the step began
+    ttft_ms: float = 0.0
+    e2e_ms: float = 0.0
+    tokens: int = 0
+    itl_ms: list = field(default_factory=list)
+    prefill_ms: float = None        # server-reported (Ollama), else None
+    queue_ms: float = None
+    error: str = ""
+    text: str = ""
+
+
+class Target:
+    """Streams chat requests to Ollama (/api/chat) or an OpenAI-compatible base URL."""
+
+    def __init__(self, url, api="ollama", model="", api_key="", timeout=300):
+        self.url = url.rstrip("/")
+        self.api = api
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, messages, max_tokens):
+        if self.api == "ollama":
+            url = self.url + "/api/chat"
+            body = {"model": self.model, "messages": messages, "stream": True,
+                    "options": {"num_predict": max_tokens}}
+        else:
+            url = self.url + "/chat/completions"
+            body = {"model": self.model, "messages": messages, "stream": True, "max_tokens": max_tokens}
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers)
+
+    def chat(self, messages, max_tokens, record):
+        """Fill `record` from one streamed reply."""
+        start = time.perf_counter()
+        times, parts = [], []
+        try:
+            with urllib.request.urlopen(self._request(messages, max_tokens), timeout=self.timeout) as response:
+                for raw in response:
+                    chunk = self._parse(raw.decode("utf-8", "replace").strip(), record)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        times.append(time.perf_counter())
+                        parts.append(chunk)
+        except (OSError, ValueError, urllib.error.URLError) as e:
+            record.error = str(getattr(e, "reason", e))
+        end = time.perf_counter()
+        record.e2e_ms = (end - start) * 1000
+        record.ttft_ms = ((times[0] if times else end) - start) * 1000
+        record.itl_ms = [(b - a) * 1000 for a, b in zip(times, times[1:])]
+        record.tokens = record.tokens or len(times)
+        record.text = "".join(parts)
+        if not times and not record.error:
+            record.error = "empty reply"
+        return record
+
+    def _parse(self, line, record):
+        """Content of one stream line; "" for none, None at the end of the stream."""
+        if not line:
+            return ""
+        if self.api == "ollama":
+            data = json.loads(line)
+            if data.get("error"):
+                raise ValueError(data["error"])
+            if data.get("done"):
+                record.tokens = int(data.get("eval_count") or 0)
+                if data.get("prompt_eval_duration") is not None:
+                    record.prefill_ms = data["prompt_eval_duration"] / 1e6
+                return None
+            return (data.get("message") or {}).get("content", "")
+        if not line.startswith("data:"):
+            return ""
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return None
+        data = json.loads(payload)
+        if data.get("error"):
+            raise ValueError(data["error"])
+        choices = data.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+
+# -- one offered rate ----------------------------------------------------------
+
+@dataclass
+class StepResult:
+    rate_per_min: float
+    duration_s: float
+    sessions: int = 0
+    peak_active: int = 0
+    wall_s: float = 0.0
+    records: list = field(default_factory=list)
+
+    def summary(self):
+        ok = [r for r in self.records if not r.error]
+        tokens = sum(r.tokens for r in ok)
+        wall = self.wall_s or self.duration_s
+
+        def dist(values):
+            return {f"p{p}": round(percentile(values, p), 1) for p in PERCENTILES}
+
+        return {
+            "rate_per_min": self.rate_per_min,
+            "sessions": self.sessions,
+            "peak_active": self.peak_active,
+            "requests": len(self.records),
+            "errors": len(self.records) - len(ok),
+            "tokens": tokens,
+            "wall_s": round(wall, 2),
+            "tokens_per_sec": round(tokens / wall, 2) if wall else 0.0,
+            "requests_per_sec": round(len(ok) / wall, 3) if wall else 0.0,
+            "ttft_ms": dist([r.ttft_ms for r in ok]),
+            "itl_ms": dist([i for r in ok for i in r.itl_ms]),
+            "queue_ms": dist([r.queue_ms for r in ok if r.queue_ms is not None]),
+            "e2e_ms": dist([r.e2e_ms for r in ok]),
+        }
+
+
+class Simulator:
+    def __init__(self, target, profiles=None, seed=None, drain=DEFAULT_DRAIN):
+        self.target = target
+        self.profiles = list(profiles or PROFILES)
+        self.rng = random.Random(seed)
+        self.drain = drain
+        self.baseline_ttft_ms = None
+        self._lock = threading.Lock()
+
+    def calibrate(self, requests=CALIBRATION_REQUESTS):
+        """TTFT of an idle server: the zero point of the queueing estimate."""
+        samples = []
+        for i in range(requests):
+            record = self.target.chat([{"role": "user", "content": prompt_text(self.rng, 20)}], 8,
+                                      RequestRecord("calibration", i, 20))
+            if record.error:
+                raise RuntimeError(f"calibration request failed: {record.error}")
+            samples.append(record.ttft_ms)
+        self.baseline_ttft_ms = percentile(samples, 50)
+        return self.baseline_ttft_ms
+
+    def run_step(self, rate_per_min, duration, on_request=None):
+        """Poisson session arrivals for `duration` s; turns already running finish."""
+        step = StepResult(rate_per_min, duration)
+        active = [0]
+        finished = [0.0]
+        start = time.monotonic()
+        deadline = start + duration
+        stop = threading.Event()
+
+        def session(profile, rng):
+            with self._lock:
+                active[0] += 1
+                step.peak_active = max(step.peak_active, active[0])
+            try:
+                messages = []
+                for turn in range(rng.randint(*profile.turns)):
+                    if turn and stop.wait(rng.expovariate(1 / profile.think_s) if profile.think_s > 0 else 0):
+                        break
+                    if time.monotonic() >= deadline:
+                        break
+                    words = rng.randint(*profile.prompt_words)
+                    messages.append({"role": "user", "content": prompt_text(rng, words)})
+                    record = RequestRecord(profile.name, turn, words, time.monotonic() - start)
+                    self.target.chat(messages, profile.max_tokens, record)
+                    self._queue_delay(record)
+                    with self._lock:
+                        step.records.append(record)
+                        finished[0] = max(finished[0], time.monotonic())
+                    if on_request:
+                        on_request(record)
+                    if record.error:
+                        break
+                    messages.append({"role": "assistant", "content": record.text})
+            finally:
+                with self._lock:
+                    active[0] -= 1
+
+        threads = []
+        weights = [p.weight for p in self.profiles]
+        at = start
+        while rate_per_min > 0:
+            at += self.rng.expovariate(rate_per_min / 60)
+            if at >= deadline:
+                break
+            time.sleep(max(0.0, at - time.monotonic()))
+            profile = self.rng.choices(self.profiles, weights)[0]
+            thread = threading.Thread(target=session, args=(profile, random.Random(self.rng.random())),
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+        step.sessions = len(threads)
+        # No new turns after the deadline; wake sessions that are "thinking"
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        stop.set()
+        drain_until = time.monotonic() + self.drain
+        for thread in threads:
+            thread.join(max(0.0, drain_until - time.monotonic()))
+        step.wall_s = max(finished[0], deadline) - start
+        return step
+
+    def _queue_delay(self, record):
+        if record.error:
+            return
+        if record.prefill_ms is not None:
+            record.queue_ms = max(0.0, record.ttft_ms - record.prefill_ms)
+        elif self.baseline_ttft_ms is not None:
+            record.queue_ms = max(0.0, record.ttft_ms - self.baseline_ttft_ms)
+
+    def sweep(self, rates, duration, on_step=None, on_request=None):
+        if self.target.api != "ollama" and self.baseline_ttft_ms is None:
+            self.calibrate()
+        steps = []
+        for rate in rates:
+            step = self.run_step(rate, duration, on_request)
+            steps.append(step)
+            if on_step:
+                on_step(step)
+        return steps
+
+
+def sustainable_rate(summaries, slo_ttft_ms=DEFAULT_SLO_TTFT_MS):
+    """Highest offered rate whose p95 TTFT meets the SLO without errors (None if none)."""
+    best = None
+    for s in summaries:
+        if s["errors"] or not s["requests"] or s["ttft_ms"]["p95"] > slo_ttft_ms:
+            break
+        best = s
+    return best
+
+
+# -- output --------------------------------------------------------------------
+
+CSV_FIELDS = ["rate_per_min", "sessions", "peak_active", "requests", "errors", "tokens_per_sec",
+              "requests_per_sec"] + [f"{metric}_p{p}_ms" for metric in ("ttft", "itl", "queue", "e2e")
+                                     for p in PERCENTILES]
+
+
+def csv_row(summary):
+    row = {key: summary[key] for key in CSV_FIELDS if key in summary}
+    for metric in ("ttft", "itl", "queue", "e2e"):
+        for p in PERCENTILES:
+            row[f"{metric}_p{p}_ms"] = summary[f"{metric}_ms"][f"p{p}"]
+    return row
+
+
+def write_csv(path, summaries):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for summary in summaries:
+            writer.writerow(csv_row(summary))
+
+
+def report(target, profiles, summaries, baseline_ttft_ms=None):
+    return {
+        "target": {"url": target.url, "api": target.api, "model": target.model},
+        "baseline_ttft_ms": baseline_ttft_ms,
+        "profiles": [asdict(p) for p in profiles],
+        "steps": summaries,
+    }
+
+
+def describe(summary):
+    return (f"{summary['rate_per_min']:>6g}/min  {summary['sessions']:>4} sessions "
+            f"(peak {summary['peak_active']:>3})  {summary['tokens_per_sec']:>7.1f} tok/s  "
+            f"TTFT p50/p95/p99 {summary['ttft_ms']['p50']:.0f}/{summary['ttft_ms']['p95']:.0f}/"
+            f"{summary['ttft_ms']['p99']:.0f} ms  ITL p95 {summary['itl_ms']['p95']:.0f} ms  "
+            f"queue p95 {summary['queue_ms']['p95']:.0f} ms  errors {summary['errors']}")
+
+
+# -- offline stand-in ----------------------------------------------------------
+
+class StubServer(ThreadingHTTPServer):
+    """Streams fake replies on both APIs with a limited number of slots.
+
+    A request waits for one of `slots`, spends `prefill_ms_per_word` per
+    prompt word, then streams tokens every `token_ms`. Each token is
+    slowed by `contention` for every other busy slot, the way batched
+    decoding shares a GPU.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), slots=2, token_ms=5.0, prefill_ms_per_word=0.05,
+                 contention=0.5, max_reply_tokens=None):
+        super().__init__(address, _StubHandler)
+        self.slots = threading.Semaphore(slots)
+        self.token_ms = token_ms
+        self.prefill_ms_per_word = prefill_ms_per_word
+        self.contention = contention
+        self.max_reply_tokens = max_reply_tokens
+        self.busy = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        ollama = self.path.startswith("/api/chat")
+        if not ollama and not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        words = sum(len(str(m.get("content", "")).split()) for m in body.get("messages") or [])
+        limit = (body.get("options") or {}).get("num_predict") if ollama else body.get("max_tokens")
+        tokens = int(limit or 32)
+        if self.server.max_reply_tokens:
+            tokens = min(tokens, self.server.max_reply_tokens)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if ollama else "text/event-stream")
+        self.end_headers()
+        server = self.server
+        with server.slots:
+            with server.lock:
+                server.busy += 1
+            try:
+                prefill = words * server.prefill_ms_per_word / 1000
+                time.sleep(prefill)
+                for i in range(tokens):
+                    with server.lock:
+                        others = server.busy - 1
+                    time.sleep(server.token_ms * (1 + server.contention * others) / 1000)
+                    self._emit(ollama, f"tok{i} ")
+            finally:
+                with server.lock:
+                    server.busy -= 1
+        if ollama:
+            self._line(json.dumps({"done": True, "eval_count": tokens, "prompt_eval_count": words,
+                                   "prompt_eval_duration": int(prefill * 1e9)}))
+        else:
+            self._line("data: [DONE]\n")
+
+    def _emit(self, ollama, text):
+        if ollama:
+            self._line(json.dumps({"message": {"role": "assistant", "content": text}, "done": False}))
+        else:
+            self._line("data: " + json.dumps({"choices": [{"delta": {"content": text}}]}) + "\n")
+
+    def _line(self, text):
+        self.wfile.write(text.encode() + b"\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    config = aiconfig.load_ai_config()
+    local = config.get("local") or {}
+    parser = argparse.ArgumentParser(prog="laia-loadsim", description="Multi-user load simulator")
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("run", help="sweep offered rates against a server")
+    run.add_argument("--url", default=f"http://{local.get('host', '127.0.0.1')}:{local.get('port', 11434)}",
+                     help="Ollama base URL, or the OpenAI-compatible base (…/v1, OpenWebUI …/api)")
+    run.add_argument("--api", choices=["ollama", "openai"], default="ollama")
+    run.add_argument("--model", default=local.get("model", ""))
+    run.add_argument("--api-key", default="", help="bearer token (OpenWebUI, providers)")
+    run.add_argument("--rates", default=",".join(map(str, DEFAULT_RATES)),
+                     help="offered load steps, new conversations per minute (comma-separated)")
+    run.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of arrivals per step")
+    run.add_argument("--profiles", help="YAML list of conversation profiles")
+    run.add_argument("--seed", type=int)
+    run.add_argument("--slo-ttft-ms", type=float, default=DEFAULT_SLO_TTFT_MS)
+    run.add_argument("--json", help="write the full report here")
+    run.add_argument("--csv", help="write one row per step here (plot-ready)")
+    stub = sub.add_parser("stub", help="serve a fake Ollama/OpenAI endpoint for offline runs")
+    stub.add_argument("--port", type=int, default=0)
+    stub.add_argument("--slots", type=int, default=2)
+    stub.add_argument("--token-ms", type=float, default=25.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "stub":
+        server = StubServer(("127.0.0.1", args.port), slots=args.slots, token_ms=args.token_ms)
+        print(f"Stub server on {server.base} ({args.slots} slots, {args.token_ms:g} ms/token)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command != "run":
+        parser.print_help()
+        return 1
+
+    try:
+        profiles = load_profiles(args.profiles) if args.profiles else PROFILES
+        rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    except (OSError, ValueError, TypeError, yaml.YAMLError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.api == "ollama" and not args.model:
+        print("❌ No model: pass --model or set local.model in config.yaml", file=sys.stderr)
+        return 1
+
+    target = Target(args.url, args.api, args.model, args.api_key)
+    sim = Simulator(target, profiles, args.seed)
+    print(f"🧪 {target.url} ({target.api}, {target.model or 'default model'}): "
+          f"{len(rates)} step(s) × {args.duration:g} s", flush=True)
+    try:
+        steps = sim.sweep(rates, args.duration, on_step=lambda s: print(describe(s.summary()), flush=True))
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    summaries = [s.summary() for s in steps]
+    best = sustainable_rate(summaries, args.slo_ttft_ms)
+    if best:
+        print(f"✅ Sustains {best['rate_per_min']:g} conversations/min (peak {best['peak_active']} at once) "
+              f"with p95 TTFT ≤ {args.slo_ttft_ms:g} ms")
+    else:
+        print(f"⚠️ Even the lowest rate misses p95 TTFT ≤ {args.slo_ttft_ms:g} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report(target, profiles, summaries, sim.baseline_ttft_ms), f, indent=2)
+            f.write("\n")
+    if args.csv:
+        write_csv(args.csv, summaries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
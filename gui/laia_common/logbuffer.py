@@ -0,0 +1,308 @@
+"""
+Live journal log buffer for the configurator's Logs tab.
+
+- JournalFollower streams `journalctl -f -o json` for the LAIA units in a
+  background thread and hands over lines in batches.
+- LogRingBuffer keeps the most recent lines, capped by memory rather than
+  by line count, and addresses them by a monotonically increasing sequence
+  number so filtered views stay valid while old lines are evicted.
+- LogFilter / FilteredIndex implement incremental substring or regex
+  filtering. A full rescan works on a snapshot and can be cancelled, so it
+  runs off the GTK main thread; new batches are filtered as they arrive.
+"""
+import bisect
+import json
+import os
+import re
+import select
+import subprocess
+import sys
+import threading
+import time
+
+# Units shown in the Logs tab
+LAIA_LOG_UNITS = ("openclaw", "ollama", "fail2ban", "apparmor")
+
+# Default memory cap for the ring buffer (bytes)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough per-entry overhead of the (priority, text) tuple and list slot
+_ENTRY_OVERHEAD = 72
+
+# syslog priorities (journald PRIORITY field)
+PRIORITY_ERR = 3
+PRIORITY_WARNING = 4
+PRIORITY_INFO = 6
+
+
+class LogRingBuffer:
+    """Memory-capped buffer of (priority, text) entries addressed by seq.
+
+    Entries live in a plain list; when the byte budget is exceeded the
+    oldest entries are dropped in one slice, down to 7/8 of the cap, so
+    eviction cost is amortised over many appends.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = []
+        self._sizes = []
+        self._bytes = 0
+        self._base_seq = 0  # seq of self._entries[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def first_seq(self):
+        return self._base_seq
+
+    @property
+    def next_seq(self):
+        return self._base_seq + len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, seq):
+        """Return the (priority, text) entry for seq, or None if evicted."""
+        idx = seq - self._base_seq
+        if 0 <= idx < len(self._entries):
+            return self._entries[idx]
+        return None
+
+    def extend(self, entries):
+        """Append entries; return the first seq assigned to them."""
+        first = self.next_seq
+        for entry in entries:
+            size = sys.getsizeof(entry[1]) + _ENTRY_OVERHEAD
+            self._entries.append(entry)
+            self._sizes.append(size)
+            self._bytes += size
+        if self._bytes > self.max_bytes:
+            self._evict()
+        return first
+
+    def snapshot(self):
+        """Return (first_seq, entries) — a shallow copy safe to scan in a thread."""
+        return self._base_seq, list(self._entries)
+
+    def clear(self):
+        self._base_seq = self.next_seq
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def _evict(self):
+        target = self.max_bytes * 7 // 8
+        freed = 0
+        drop = 0
+        excess = self._bytes - target
+        while drop < len(self._sizes) and freed < excess:
+            freed += self._sizes[drop]
+            drop += 1
+        del self._entries[:drop]
+        del self._sizes[:drop]
+        self._bytes -= freed
+        self._base_seq += drop
+
+
+class LogFilter:
+    """Case-insensitive substring or regex match on a log line."""
+
+    def __init__(self, pattern="", regex=False):
+        self.pattern = pattern
+        self.regex = regex
+        if regex and pattern:
+            # Raises re.error on invalid input; callers show it to the user
+            self._match = re.compile(pattern, re.IGNORECASE).search
+        elif pattern:
+            needle = pattern.lower()
+            self._match = lambda text: needle in text.lower()
+        else:
+            self._match = None
+
+    @property
+    def empty(self):
+        return self._match is None
+
+    def matches(self, text):
+        return self._match is None or bool(self._match(text))
+
+    def narrows(self, previous):
+        """True if every line matching self also matches previous.
+
+        Used to refine the current result list instead of rescanning the
+        whole buffer while the user keeps typing a substring.
+        """
+        if previous is None:
+            return False
+        if previous.empty:
+            return True
+        if previous.regex or self.regex:
+            return False
+        return previous.pattern.lower() in self.pattern.lower()
+
+
+class FilteredIndex:
+    """Sorted list of seqs from a LogRingBuffer that match a LogFilter."""
+
+    def __init__(self, flt=None):
+        self.filter = flt or LogFilter()
+        self.seqs = []
+
+    def __len__(self):
+        return len(self.seqs)
+
+    def add_batch(self, first_seq, entries):
+        """Filter a freshly appended batch."""
+        match = self.filter.matches
+        self.seqs.extend(first_seq + i for i, (_, text) in enumerate(entries) if match(text))
+
+    def drop_evicted(self, first_seq):
+        """Forget seqs that the ring buffer has evicted."""
+        cut = bisect.bisect_left(self.seqs, first_seq)
+        if cut:
+            del self.seqs[:cut]
+
+    def replace(self, seqs, upto_seq, buffer):
+        """Install a rescan result computed up to upto_seq, then catch up."""
+        self.seqs = seqs
+        self.drop_evicted(buffer.first_seq)
+        start = max(upto_seq, buffer.first_seq)
+        tail = [buffer.get(s) for s in range(start, buffer.next_seq)]
+        self.add_batch(start, tail)
+
+
+def scan(first_seq, entries, flt, cancelled=None, chunk=4096):
+    """Return the seqs in entries that match flt.
+
+    Meant to run in a worker thread over LogRingBuffer.snapshot(); checks
+    the cancelled Event every chunk lines and returns None if it is set.
+    """
+    match = flt.matches
+    out = []
+    for start in range(0, len(entries), chunk):
+        if cancelled is not None and cancelled.is_set():
+            return None
+        block = entries[start:start + chunk]
+        base = first_seq + start
+        out.extend(base + i for i, (_, text) in enumerate(block) if match(text))
+    return out
+
+
+def refine(seqs, first_seq, entries, flt, cancelled=None, chunk=4096):
+    """Like scan(), but only re-checks the seqs of an earlier result."""
+    match = flt.matches
+    out = []
+    for start in range(0, len(seqs), chunk):
+        if cancelled is not None and cancelled.is_set():
+            return None
+        for seq in seqs[start:start + chunk]:
+            idx = seq - first_seq
+            if 0 <= idx < len(entries) and match(entries[idx][1]):
+                out.append(seq)
+    return out
+
+
+def format_journal_record(record):
+    """Turn one `journalctl -o json` record into (priority, text)."""
+    message = record.get("MESSAGE", "")
+    if isinstance(message, list):  # non-UTF-8 payloads arrive as byte arrays
+        message = bytes(message).decode("utf-8", "replace")
+    try:
+        ts = int(record.get("__REALTIME_TIMESTAMP", "0")) / 1e6
+        stamp = time.strftime("%b %d %H:%M:%S", time.localtime(ts))
+    except (TypeError, ValueError):
+        stamp = "-"
+    ident = (record.get("SYSLOG_IDENTIFIER")
+             or record.get("_SYSTEMD_UNIT", "").removesuffix(".service")
+             or "?")
+    pid = record.get("_PID")
+    source = f"{ident}[{pid}]" if pid else ident
+    try:
+        priority = int(record.get("PRIORITY", PRIORITY_INFO))
+    except (TypeError, ValueError):
+        priority = PRIORITY_INFO
+    return priority, f"{stamp} {source}: {message}"
+
+
+class JournalFollower:
+    """Follow the journal of the given units and deliver batches.
+
+    on_batch(list_of_entries) is called from the reader thread at most
+    every `interval` seconds; GUI callers should hop to the main loop
+    (GLib.idle_add) before touching widgets.
+    """
+
+    def __init__(self, on_batch, units=LAIA_LOG_UNITS, backlog=2000, interval=0.1):
+        self.on_batch = on_batch
+        self.units = units
+        self.backlog = backlog
+        self.interval = interval
+        self._proc = None
+        self._thread = None
+
+    def command(self):
+        cmd = ["journalctl", "--follow", "--output=json", f"--lines={self.backlog}"]
+        for unit in self.units:
+            cmd.append(f"--unit={unit}")
+        return cmd
+
+    def start(self):
+        if self._proc is not None:
+            return
+        self._proc = subprocess.Popen(
+            self.command(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    @property
+    def running(self):
+        return self._proc is not None
+
+    def _read(self):
+        # Raw reads + select so a partial batch is flushed once the journal
+        # goes quiet instead of waiting for the next line.
+        proc = self._proc
+        fd = proc.stdout.fileno()
+        pending = b""
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            ready, _, _ = select.select([fd], [], [], self.interval)
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                *lines, pending = (pending + chunk).split(b"\n")
+                batch.extend(_parse_line(line) for line in lines if line)
+            now = time.monotonic()
+            if batch and (not ready or now - last_flush >= self.interval):
+                self.on_batch(batch)
+                batch = []
+                last_flush = now
+        if pending:
+            batch.append(_parse_line(pending))
+        if batch:
+            self.on_batch(batch)
+
+
+def _parse_line(raw):
+    try:
+        return format_journal_record(json.loads(raw))
+    except ValueError:
+        return PRIORITY_INFO, raw.decode("utf-8", "replace")
@@ -0,0 +1,380 @@
+"""
+Memory-pressure guard for the local model.
+
+The local model is picked once, by RAM size. When a browser and a 4B
+model compete for memory the machine thrashes and inference drops to a
+few tokens/sec. The guard samples /proc/pressure/memory (PSI) and
+MemAvailable every few seconds — both files stay open and are re-read
+with one pread each, so a sample costs two syscalls and no process.
+
+When pressure stays high for `hold_s` it asks Ollama to unload the model
+(keep_alive 0) and steps down to the next smaller model of the
+models.yaml tier that lists it. It steps back up only after pressure has
+stayed low for the longer `recover_s` and MemAvailable leaves room for the
+bigger model, so it does not flap. The active model goes to
+~/.laia/memguard.json, which the gateway reads to reroute "local"
+requests; every transition is appended to ~/.laia/memguard.log, shown in
+the configurator's Status tab.
+
+    python3 -m laia_common.memguard watch     # the laia-memguard user service
+    python3 -m laia_common.memguard status
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from laia_common import USER_DIR, aiconfig
+
+PSI_FILE = Path("/proc/pressure/memory")
+MEMINFO_FILE = Path("/proc/meminfo")
+STATE_FILE = USER_DIR / "memguard.json"
+LOG_FILE = USER_DIR / "memguard.log"
+LOG_MAX_LINES = 200
+
+# Defaults for the config.yaml `memguard` section
+DEFAULTS = {
+    "interval_s": 2.0,
+    "high_psi": 10.0,          # PSI "some" avg10 (%) that counts as pressure
+    "low_psi": 2.0,            # ...and as calm
+    "min_available_mb": 512,   # MemAvailable below this counts as pressure
+    "hold_s": 20.0,            # pressure must last this long to step down
+    "recover_s": 120.0,        # calm must last this long to step up
+}
+
+
+@dataclass
+class Sample:
+    some_avg10: float          # % of the last 10 s some task stalled on memory; None without PSI
+    full_avg10: float          # % of the last 10 s all tasks stalled
+    available_mb: int
+    total_mb: int
+
+
+@dataclass
+class Transition:
+    at: float                  # wall clock
+    from_model: str
+    to_model: str
+    step: str                  # "down" or "up"
+    reason: str
+
+
+def parse_psi(text):
+    """(some avg10, full avg10) from /proc/pressure/memory."""
+    values = {}
+    for line in text.splitlines():
+        kind, _, rest = line.partition(" ")
+        for field in rest.split():
+            if field.startswith("avg10="):
+                values[kind] = float(field[6:])
+    return values.get("some", 0.0), values.get("full", 0.0)
+
+
+def parse_meminfo(text):
+    """(MemAvailable, MemTotal) in MB from /proc/meminfo."""
+    available = total = 0
+    for line in text.splitlines():
+        if line.startswith("MemTotal:"):
+            total = int(line.split()[1]) // 1024
+        elif line.startswith("MemAvailable:"):
+            available = int(line.split()[1]) // 1024
+            break  # MemAvailable follows MemTotal; skip the rest of the file
+    return available, total
+
+
+class ProcReader:
+    """Keeps the PSI and meminfo files open; each sample is one pread per file."""
+
+    def __init__(self, psi_path=PSI_FILE, meminfo_path=MEMINFO_FILE):
+        try:
+            self._psi = os.open(psi_path, os.O_RDONLY)
+        except OSError:
+            self._psi = None  # kernel without CONFIG_PSI (or psi=0): MemAvailable only
+        self._meminfo = os.open(meminfo_path, os.O_RDONLY)
+
+    def sample(self):
+        some = full = None
+        if self._psi is not None:
+            some, full = parse_psi(os.pread(self._psi, 4096, 0).decode())
+        available, total = parse_meminfo(os.pread(self._meminfo, 8192, 0).decode())
+        return Sample(some, full, available, total)
+
+    def close(self):
+        for fd in (self._psi, self._meminfo):
+            if fd is not None:
+                os.close(fd)
+        self._psi = self._meminfo = None
+
+
+def ladder(model, installed=None, models_file=aiconfig.MODELS_FILE):
+    """[model, smaller, ..., smallest] from the models.yaml tier listing `model`.
+
+    Models are ordered by catalog ram_gb; one the same size as `model`
+    is not a step down. With `installed` (names from /api/tags) only
+    models already pulled are used. [model] when there is nothing smaller.
+    """
+    ram = aiconfig.catalog_ram_gb(models_file)
+    if model not in ram:
+        return [model]
+    members = next((ids for ids in aiconfig.local_tiers(models_file).values() if model in ids), [])
+    if installed is not None:
+        pulled = {_base_name(m) for m in installed}
+        members = [m for m in members if _base_name(m) in pulled]
+    smaller = sorted({m for m in members if m in ram and ram[m] < ram[model]},
+                     key=lambda m: (-ram[m], m))
+    return [model, *smaller]
+
+
+def _base_name(model):
+    return model if ":" in model else f"{model}:latest"
+
+
+class MemoryGuard:
+    """Steps down/up a ladder of models with hysteresis on PSI and MemAvailable."""
+
+    def __init__(self, models, ram_gb=None, high_psi=DEFAULTS["high_psi"],
+                 low_psi=DEFAULTS["low_psi"], min_available_mb=DEFAULTS["min_available_mb"],
+                 hold_s=DEFAULTS["hold_s"], recover_s=DEFAULTS["recover_s"], clock=time.monotonic):
+        self.models = list(models)
+        self.ram_gb = ram_gb or {}
+        self.high_psi = high_psi
+        self.low_psi = low_psi
+        self.min_available_mb = min_available_mb
+        self.hold_s = hold_s
+        self.recover_s = recover_s
+        self.clock = clock
+        self.level = 0
+        self._pressure_since = None
+        self._calm_since = None
+
+    @property
+    def model(self):
+        return self.models[self.level]
+
+    def _pressure(self, s):
+        if s.some_avg10 is not None and s.some_avg10 >= self.high_psi:
+            return f"memory pressure {s.some_avg10:.1f}% (PSI some avg10)"
+        if s.available_mb < self.min_available_mb:
+            return f"only {s.available_mb} MB available"
+        return None
+
+    def _room_to_grow(self, s):
+        bigger, current = self.models[self.level - 1], self.model
+        extra_mb = max(0.0, self.ram_gb.get(bigger, 0) - self.ram_gb.get(current, 0)) * 1024
+        calm = s.some_avg10 is None or s.some_avg10 <= self.low_psi
+        return calm and s.available_mb >= self.min_available_mb + extra_mb
+
+    def update(self, sample):
+        """Feed one sample; returns a Transition when the model changes."""
+        now = self.clock()
+        reason = self._pressure(sample)
+        if reason and self.level < len(self.models) - 1:
+            self._calm_since = None
+            if self._pressure_since is None:
+                self._pressure_since = now
+            if now - self._pressure_since >= self.hold_s:
+                return self._move(+1, reason)
+            return None
+        self._pressure_since = None
+        if self.level > 0 and not reason and self._room_to_grow(sample):
+            if self._calm_since is None:
+                self._calm_since = now
+            if now - self._calm_since >= self.recover_s:
+                return self._move(-1, f"pressure gone ({sample.available_mb} MB available)")
+        else:
+            self._calm_since = None
+        return None
+
+    def _move(self, step, reason):
+        before = self.model
+        self.level += step
+        self._pressure_since = self._calm_since = None
+        return Transition(time.time(), before, self.model, "down" if step > 0 else "up", reason)
+
+
+# -- Ollama ------------------------------------------------------------------
+
+def installed_models(base, timeout=3):
+    """Names from /api/tags, or None when Ollama does not answer."""
+    try:
+        with urllib.request.urlopen(base + "/api/tags", timeout=timeout) as response:
+            return [m.get("name", "") for m in json.load(response).get("models") or []]
+    except (OSError, ValueError, urllib.error.URLError):
+        return None
+
+
+def unload(base, model, timeout=10):
+    """Ask Ollama to drop `model` from memory now (keep_alive 0)."""
+    body = json.dumps({"model": model, "keep_alive": 0}).encode()
+    request = urllib.request.Request(base + "/api/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+        return True
+    except (OSError, urllib.error.URLError):
+        return False
+
+
+# -- state shared with the gateway and the Status tab -------------------------
+
+def write_state(configured, model, path=STATE_FILE):
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"configured": configured, "model": model, "since": time.time()}, f)
+    os.replace(tmp, path)
+
+
+def read_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class StateReader:
+    """model_for() for the gateway: the guard's choice, re-read only when the file changes."""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self._mtime = None
+        self._state = {}
+
+    def state(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._mtime, self._state = None, {}
+            return self._state
+        if mtime != self._mtime:
+            self._mtime, self._state = mtime, read_state(self.path)
+        return self._state
+
+    def model_for(self, configured):
+        state = self.state()
+        if state.get("configured") == configured and state.get("model"):
+            return state["model"]
+        return configured
+
+
+def append_log(transition, path=LOG_FILE, max_lines=LOG_MAX_LINES):
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(asdict(transition)) + "\n")
+    lines = path.read_text().splitlines(keepends=True)
+    if len(lines) > max_lines:
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "w") as f:
+            f.writelines(lines[-max_lines:])
+        os.replace(tmp, path)
+
+
+def read_log(limit=20, path=LOG_FILE):
+    """The last `limit` transitions, oldest first."""
+    try:
+        lines = Path(path).read_text().splitlines()
+    except OSError:
+        return []
+    entries = []
+    for line in lines[-limit:]:
+        try:
+            entries.append(Transition(**json.loads(line)))
+        except (ValueError, TypeError):
+            continue
+    return entries
+
+
+def describe(transition):
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(transition.at))
+    arrow = "⬇" if transition.step == "down" else "⬆"
+    return f"{when}  {arrow} {transition.from_model} → {transition.to_model}  ({transition.reason})"
+
+
+# -- service -----------------------------------------------------------------
+
+def settings(config):
+    section = dict(DEFAULTS)
+    section.update({k: v for k, v in (config.get("memguard") or {}).items() if k in DEFAULTS})
+    return {k: float(v) for k, v in section.items()}
+
+
+def watch(config, state_path=STATE_FILE, log_path=LOG_FILE, reader=None, iterations=None):
+    """Sample, step the ladder and act on transitions until stopped."""
+    local = config.get("local") or {}
+    configured = local.get("model", "")
+    base = f"http://{local.get('host', '127.0.0.1')}:{local.get('port', 11434)}"
+    opts = settings(config)
+    guard = MemoryGuard([configured], aiconfig.catalog_ram_gb(), **{
+        k: opts[k] for k in ("high_psi", "low_psi", "min_available_mb", "hold_s", "recover_s")})
+    reader = reader or ProcReader()
+    have_ladder = False
+    write_state(configured, configured, state_path)
+    try:
+        while iterations is None or iterations > 0:
+            if not have_ladder and guard.level == 0:
+                # Only step to models Ollama actually has; retried until it answers
+                pulled = installed_models(base)
+                if pulled is not None:
+                    guard.models, have_ladder = ladder(configured, pulled), True
+            transition = guard.update(reader.sample())
+            if transition is not None:
+                unload(base, transition.from_model)  # either way, its memory goes to the other one
+                write_state(configured, transition.to_model, state_path)
+                append_log(transition, log_path)
+                print(describe(transition), flush=True)
+            if iterations is not None:
+                iterations -= 1
+                if not iterations:
+                    break
+            time.sleep(opts["interval_s"])
+    finally:
+        # Stopping the guard hands routing back to the configured model
+        write_state(configured, configured, state_path)
+        reader.close()
+    return guard
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-memguard", description="Local model memory guard")
+    parser.add_argument("command", nargs="?", default="status", choices=("watch", "status"))
+    args = parser.parse_args(argv)
+    config = aiconfig.load_ai_config()
+
+    if args.command == "watch":
+        if (config.get("memguard") or {}).get("enabled", True) is False:
+            print("memguard disabled in config.yaml")
+            return 0
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            watch(config)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    reader = ProcReader()
+    sample = reader.sample()
+    reader.close()
+    psi = f"{sample.some_avg10:.1f}%" if sample.some_avg10 is not None else "n/a (no PSI)"
+    print(f"Memory pressure: {psi}, {sample.available_mb} of {sample.total_mb} MB available")
+    configured = (config.get("local") or {}).get("model", "")
+    print(f"Ladder: {' → '.join(ladder(configured))}")
+    print(f"Routing local requests to: {StateReader().model_for(configured)}")
+    for entry in read_log(10):
+        print(describe(entry))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,511 @@
+"""
+LAN mirror of the Ollama model store: pull each model once per site.
+
+One LAIA host serves the models it already has; every other machine
+fetches from it instead of the public registry.
+
+The server speaks just enough of the registry protocol Ollama uses:
+
+    GET /v2/<repo>/manifests/<tag>      the stored manifest
+    GET /v2/<repo>/blobs/sha256:<hex>   a layer, with Range support
+
+Clients use the mirror named by LAIA_MIRROR or config.yaml mirror.url.
+The server also answers a UDP broadcast, but clients only look for it
+when mirror.discover is true: the mirror supplies the manifest and the
+blobs are checked against the digests in that same manifest, so those
+checks catch corruption, not a hostile mirror. A mirror is trusted as
+much as the registry, so it has to be chosen, not whoever answers first.
+
+Clients pull either way:
+
+- Writable store (install-models.sh as root, or a user OLLAMA_MODELS):
+  the blob is fetched in parallel Range chunks straight into blobs/,
+  its sha256 is checked, then the manifest is written.
+- Store owned by the Ollama service (the wizard): `ollama pull
+  --insecure <mirror>/library/<model>`, then `ollama cp` to the usual
+  name.
+
+Callers fall back to the public registry if there is no mirror or a
+pull fails.
+
+    python3 -m laia_common.mirror serve          # on the host with the models
+    python3 -m laia_common.mirror find           # the configured mirror, if any
+    python3 -m laia_common.mirror discover       # who answers the broadcast
+    python3 -m laia_common.mirror pull gemma3:4b
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from laia_common import aiconfig, ollama_store
+
+DEFAULT_PORT = 11480
+DISCOVERY_PORT = 11481
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK = 32 * 1024 * 1024
+MANIFEST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+
+_PROBE = b"LAIA-MIRROR?"
+_SEGMENT_RE = re.compile(r"^[a-z0-9][a-z0-9._-]*$")
+_DIGEST_RE = re.compile(r"^sha256:[0-9a-f]{64}$")
+_ROUTE_RE = re.compile(r"^/v2/(?P<repo>[^?]+?)/(?P<kind>manifests|blobs)/(?P<ref>[^/?]+)$")
+
+
+# What a broken transfer can raise; IncompleteRead and friends are not OSErrors
+_TRANSFER_ERRORS = (OSError, urllib.error.URLError, http.client.HTTPException)
+
+
+class MirrorError(Exception):
+    pass
+
+
+def _safe_repo(repo):
+    """Repo path segments, or None if any could escape the store."""
+    parts = repo.split("/")
+    return parts if all(_SEGMENT_RE.match(p) for p in parts) else None
+
+
+def list_models(store):
+    """Names of every model in the store's default-registry manifests."""
+    root = Path(store) / "manifests"
+    return sorted(ollama_store.model_name(p.relative_to(root))
+                  for p in root.glob(f"{ollama_store.DEFAULT_REGISTRY}/**/*") if p.is_file())
+
+
+# -- server ----------------------------------------------------------------
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LAIA-Mirror/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None, head=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _not_found(self, head):
+        self._send(404, b'{"errors":[{"code":"NOT_FOUND"}]}', head=head)
+
+    def do_HEAD(self):
+        self._route(head=True)
+
+    def do_GET(self):
+        self._route(head=False)
+
+    def _route(self, head):
+        path = urlsplit(self.path).path
+        if path in ("/v2", "/v2/"):
+            self._send(200, b"{}", head=head)
+            return
+        if path == "/laia-mirror":
+            info = {"service": "laia-mirror", "version": 1, "models": list_models(self.server.store)}
+            self._send(200, json.dumps(info).encode(), head=head)
+            return
+        match = _ROUTE_RE.match(path)
+        repo = match and _safe_repo(match["repo"])
+        if not repo:
+            self._not_found(head)
+            return
+        if match["kind"] == "manifests":
+            self._manifest(repo, match["ref"], head)
+        else:
+            self._blob(match["ref"], head)
+
+    def _manifest(self, repo, tag, head):
+        if not _SEGMENT_RE.match(tag.lower()):
+            self._not_found(head)
+            return
+        path = Path(self.server.store, "manifests", ollama_store.DEFAULT_REGISTRY, *repo, tag)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self._not_found(head)
+            return
+        digest = "sha256:" + hashlib.sha256(data).hexdigest()
+        self._send(200, data, MANIFEST_MEDIA_TYPE, {"Docker-Content-Digest": digest}, head)
+
+    def _blob(self, digest, head):
+        if not _DIGEST_RE.match(digest):
+            self._not_found(head)
+            return
+        try:
+            f = open(ollama_store.blob_path(self.server.store, digest), "rb")
+        except OSError:
+            self._not_found(head)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            status = 200
+            wanted = self.headers.get("Range")
+            if wanted:
+                match = re.match(r"^bytes=(\d*)-(\d*)$", wanted.strip())
+                if match and (match[1] or match[2]):
+                    if match[1]:
+                        start = int(match[1])
+                        end = min(int(match[2]), size - 1) if match[2] else size - 1
+                    else:  # suffix range: last N bytes
+                        start = max(0, size - int(match[2]))
+                if not match or start > end or start >= size:
+                    self._send(416, b"", headers={"Content-Range": f"bytes */{size}"}, head=head)
+                    return
+                status = 206
+            length = end - start + 1
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Docker-Content-Digest", digest)
+            self.send_header("ETag", f'"{digest}"')
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if not head and length:
+                # Zero-copy from the page cache; large models are served at wire speed
+                self.connection.sendfile(f, start, length)
+
+
+class MirrorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, store, host="0.0.0.0", port=DEFAULT_PORT, verbose=False):
+        super().__init__((host, port), MirrorHandler)
+        self.store = Path(store)
+        self.verbose = verbose
+
+
+class Beacon(threading.Thread):
+    """Answers discovery broadcasts with the mirror's HTTP port."""
+
+    def __init__(self, http_port, host="0.0.0.0", port=DISCOVERY_PORT):
+        super().__init__(name="mirror-beacon", daemon=True)
+        self.http_port = http_port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+
+    def run(self):
+        reply = json.dumps({"service": "laia-mirror", "port": self.http_port}).encode()
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(64)
+            except OSError:
+                return
+            if data == _PROBE:
+                self.sock.sendto(reply, addr)
+
+
+# -- client ----------------------------------------------------------------
+
+def discover(timeout=1.0, port=DISCOVERY_PORT, address="<broadcast>"):
+    """Base URL of the first mirror answering the broadcast, or None."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.settimeout(timeout)
+        try:
+            sock.sendto(_PROBE, (address, port))
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                sock.settimeout(max(0.01, deadline - time.monotonic()))
+                data, (host, _) = sock.recvfrom(512)
+                try:
+                    info = json.loads(data)
+                except ValueError:
+                    continue
+                if info.get("service") == "laia-mirror":
+                    return f"http://{host}:{int(info['port'])}"
+        except (OSError, KeyError, ValueError):
+            pass
+    return None
+
+
+def find_mirror(config=None, timeout=1.0):
+    """LAIA_MIRROR, then config.yaml mirror.url; None if neither is set.
+
+    A broadcast is only tried when mirror.discover is true, since any
+    machine on the LAN can answer it.
+    """
+    config = aiconfig.load_ai_config() if config is None else config
+    section = config.get("mirror") or {}
+    url = os.environ.get("LAIA_MIRROR") or section.get("url")
+    if url:
+        return url.rstrip("/")
+    if section.get("discover") is not True:
+        return None
+    return discover(timeout, int(section.get("discovery_port", DISCOVERY_PORT)))
+
+
+def _split_name(name):
+    """"gemma3:4b" → ("library/gemma3", "4b")"""
+    relpath = ollama_store.manifest_relpath(name)
+    if relpath.parts[0] != ollama_store.DEFAULT_REGISTRY:
+        raise MirrorError(f"{name} is not from the default registry")
+    return "/".join(relpath.parts[1:-1]), relpath.parts[-1]
+
+
+def _get(url, headers=None, timeout=60):
+    request = urllib.request.Request(url, headers={"User-Agent": "LAIA-Mirror/1.0", **(headers or {})})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def fetch_manifest(mirror, name):
+    """(manifest bytes, [(digest, size)]) from the mirror, digest-checked."""
+    repo, tag = _split_name(name)
+    try:
+        with _get(f"{mirror}/v2/{repo}/manifests/{tag}", {"Accept": MANIFEST_MEDIA_TYPE}) as r:
+            data = r.read()
+            claimed = r.headers.get("Docker-Content-Digest")
+    except urllib.error.HTTPError as e:
+        raise MirrorError(f"{name} is not on the mirror (HTTP {e.code})")
+    except _TRANSFER_ERRORS as e:
+        raise MirrorError(f"mirror unreachable: {getattr(e, 'reason', e)}")
+    if claimed and claimed != "sha256:" + hashlib.sha256(data).hexdigest():
+        raise MirrorError(f"manifest of {name} does not match its digest")
+    manifest = json.loads(data)
+    layers = list(manifest.get("layers") or []) + ([manifest["config"]] if manifest.get("config") else [])
+    blobs = [(layer["digest"], int(layer.get("size", 0))) for layer in layers]
+    if not all(_DIGEST_RE.match(d) for d, _ in blobs):
+        raise MirrorError(f"manifest of {name} has an invalid digest")
+    return data, blobs
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return "sha256:" + h.hexdigest()
+
+
+def _match_owner(path, like):
+    """Give files written as root to the store's owner (the ollama user)."""
+    if os.geteuid() == 0:
+        st = os.stat(like)
+        os.chown(path, st.st_uid, st.st_gid)
+
+
+def download_blob(mirror, repo, digest, size, store, workers=DEFAULT_WORKERS,
+                  chunk_size=DEFAULT_CHUNK, on_bytes=None):
+    """Fetch one blob in parallel Range chunks, verify its sha256, move into place."""
+    blobs_dir = Path(store) / "blobs"
+    final = ollama_store.blob_path(store, digest)
+    fd, tmp = tempfile.mkstemp(prefix=final.name + "-", suffix="-partial", dir=blobs_dir)
+    try:
+        os.ftruncate(fd, size)
+        url = f"{mirror}/v2/{repo}/blobs/{digest}"
+
+        def fetch(offset):
+            end = min(offset + chunk_size, size) - 1
+            for attempt in range(3):
+                got = 0
+                try:
+                    with _get(url, {"Range": f"bytes={offset}-{end}"}) as r:
+                        if r.status != 206 and not (r.status == 200 and offset == 0 and end == size - 1):
+                            raise MirrorError(f"mirror ignored the Range request (HTTP {r.status})")
+                        pos = offset
+                        for block in iter(lambda: r.read(1 << 20), b""):
+                            os.pwrite(fd, block, pos)
+                            pos += len(block)
+                            got += len(block)
+                            if on_bytes:
+                                on_bytes(len(block))
+                    if pos != end + 1:
+                        # read(n) returns short instead of raising when the mirror hangs up
+                        raise http.client.IncompleteRead(b"", end + 1 - pos)
+                    return
+                except _TRANSFER_ERRORS as e:
+                    if on_bytes and got:
+                        on_bytes(-got)  # the chunk starts over
+                    if attempt == 2:
+                        raise MirrorError(f"download of {digest} failed: {getattr(e, 'reason', e)}")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(fetch, range(0, size, chunk_size) if size else []))
+        os.close(fd)
+        fd = None
+        if _file_digest(tmp) != digest:
+            raise MirrorError(f"{digest} failed its integrity check")
+        os.chmod(tmp, 0o644)
+        _match_owner(tmp, blobs_dir)
+        os.replace(tmp, final)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        os.unlink(tmp)
+        raise
+
+
+def pull_into_store(mirror, name, store, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK,
+                    on_progress=None):
+    """Copy a model from the mirror into a writable Ollama store; returns bytes fetched."""
+    store = Path(store)
+    data, blobs = fetch_manifest(mirror, name)
+    repo, _ = _split_name(name)
+    missing = []
+    for digest, size in blobs:
+        path = ollama_store.blob_path(store, digest)
+        if not (path.is_file() and path.stat().st_size == size):
+            missing.append((digest, size))
+    total = sum(size for _, size in missing)
+    done = [0]
+    lock = threading.Lock()
+
+    def on_bytes(n):
+        with lock:
+            done[0] += n
+            if on_progress:
+                on_progress(done[0], total)
+
+    (store / "blobs").mkdir(parents=True, exist_ok=True)
+    for digest, size in missing:
+        download_blob(mirror, repo, digest, size, store, workers, chunk_size, on_bytes)
+
+    manifest = store / "manifests" / ollama_store.manifest_relpath(name)
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=manifest.parent)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    _match_owner(tmp, store)
+    os.replace(tmp, manifest)
+    return total
+
+
+def pull_with_ollama(mirror, name, timeout=3600):
+    """Pull through the Ollama daemon from the mirror, then give it its usual name."""
+    host = urlsplit(mirror).netloc
+    repo, tag = _split_name(name)
+    mirrored = f"{host}/{repo}:{tag}"
+    for cmd in (["ollama", "pull", "--insecure", mirrored], ["ollama", "cp", mirrored, name]):
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise MirrorError(f"{' '.join(cmd[:2])} failed: {e}")
+        if result.returncode != 0:
+            raise MirrorError(result.stderr.strip() or f"{' '.join(cmd[:2])} failed")
+    # Drop the mirror-named tag; the blobs stay, shared with `name`
+    subprocess.run(["ollama", "rm", mirrored], capture_output=True, timeout=60)
+
+
+def _store_writable(store):
+    return store is not None and os.access(store / "blobs" if (store / "blobs").is_dir() else store,
+                                           os.W_OK)
+
+
+def pull(name, mirror, store=None, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK,
+         on_progress=None):
+    """Install `name` from the mirror, directly if the store is writable."""
+    store = Path(store) if store else ollama_store.find_store()
+    if _store_writable(store):
+        pull_into_store(mirror, name, store, workers, chunk_size, on_progress)
+    else:
+        fetch_manifest(mirror, name)  # fail fast if the mirror lacks it
+        pull_with_ollama(mirror, name)
+
+
+def install_model(name, mirror=None, on_progress=None):
+    """Mirror first, public registry second; returns where the model came from."""
+    if mirror:
+        try:
+            pull(name, mirror, on_progress=on_progress)
+            return "mirror"
+        except (MirrorError, ValueError, *_TRANSFER_ERRORS):
+            pass
+    result = subprocess.run(["ollama", "pull", name], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise MirrorError(result.stderr.strip() or f"ollama pull {name} failed")
+    return "registry"
+
+
+def main(argv=None):
+    config = aiconfig.load_ai_config()
+    section = config.get("mirror") or {}
+    parser = argparse.ArgumentParser(prog="laia-mirror", description="LAN mirror of Ollama models")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve this machine's models to the LAN")
+    serve.add_argument("--bind", default=section.get("bind", "0.0.0.0"))
+    serve.add_argument("--port", type=int, default=int(section.get("port", DEFAULT_PORT)))
+    serve.add_argument("--discovery-port", type=int,
+                       default=int(section.get("discovery_port", DISCOVERY_PORT)))
+    serve.add_argument("--store", default=None)
+    serve.add_argument("--no-beacon", action="store_true")
+    serve.add_argument("--verbose", action="store_true")
+    find = sub.add_parser("find", help="print the URL of the mirror to use, if one is configured")
+    find.add_argument("--timeout", type=float, default=1.0)
+    probe = sub.add_parser("discover", help="print the URL of whichever mirror answers a broadcast")
+    probe.add_argument("--timeout", type=float, default=1.0)
+    get = sub.add_parser("pull", help="install models from the mirror")
+    get.add_argument("models", nargs="+")
+    get.add_argument("--mirror", default=None, help="base URL (default: the configured mirror)")
+    get.add_argument("--store", default=None)
+    get.add_argument("--workers", type=int, default=int(section.get("workers", DEFAULT_WORKERS)))
+    get.add_argument("--chunk-mb", type=int, default=int(section.get("chunk_mb", DEFAULT_CHUNK >> 20)))
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        store = Path(args.store) if args.store else ollama_store.find_store()
+        if store is None:
+            print("❌ No Ollama model store found", file=sys.stderr)
+            return 1
+        server = MirrorServer(store, args.bind, args.port, args.verbose)
+        if not args.no_beacon:
+            Beacon(server.server_port, args.bind, args.discovery_port).start()
+        print(f"LAIA mirror on http://{args.bind}:{server.server_port} serving {store} "
+              f"({len(list_models(store))} models)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command in ("find", "discover"):
+        url = (find_mirror(config, args.timeout) if args.command == "find"
+               else discover(args.timeout, int(section.get("discovery_port", DISCOVERY_PORT))))
+        if not url:
+            return 1
+        print(url)
+        return 0
+
+    mirror = (args.mirror or find_mirror(config) or "").rstrip("/")
+    if not mirror:
+        print("❌ No LAIA mirror configured (set mirror.url or LAIA_MIRROR)", file=sys.stderr)
+        return 1
+    failed = 0
+    for name in args.models:
+        start = time.monotonic()
+        try:
+            pull(name, mirror, args.store, args.workers, args.chunk_mb << 20)
+        except (MirrorError, ValueError, *_TRANSFER_ERRORS) as e:
+            print(f"❌ {name}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"✅ {name} from {mirror} in {time.monotonic() - start:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+Network exposure scanner, straight from /proc.
+
+openclaw.json `security.bind`, OLLAMA_HOST=127.0.0.1 and
+`openwebui.bind` are all meant to keep LAIA services on loopback; this
+checks what is actually listening. /proc/net/{tcp,tcp6,udp,udp6} give the
+bound sockets, /proc/<pid>/fd maps their inodes to processes, and the ufw
+rule files say whether a non-loopback listener is reachable. No `ss`,
+`netstat` or `ufw` process is started, and the inode → process map is
+cached between scans, so a scan takes a few milliseconds and the Status
+tab refreshes it continuously.
+
+A LAIA port on a non-loopback address is
+- critical when ufw is off or lets non-loopback traffic in to it;
+- a warning when ufw blocks it (one layer of protection left) or the
+  rules cannot be read (they are root-only on some systems).
+
+    python3 -m laia_common.netscan          # findings; exit 2 if any is critical
+    python3 -m laia_common.netscan --all    # every listening socket
+"""
+import argparse
+import ipaddress
+import json
+import os
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import aiconfig
+
+UFW_DIR = Path("/etc/ufw")
+UFW_DEFAULTS = Path("/etc/default/ufw")
+OPENCLAW_CONFIG = Path.home() / ".openclaw" / "openclaw.json"
+
+# Loopback-only services (config/security/ufw-rules.sh); config.yaml may move them
+OLLAMA_PORT = 11434
+OPENWEBUI_PORT = 3000
+OPENCLAW_PORT = 3101
+GATEWAY_PORT = 11500
+
+PROTOCOLS = ("tcp", "tcp6", "udp", "udp6")
+_TCP_LISTEN = "0A"
+_UDP_UNCONNECTED = "07"
+
+
+@dataclass
+class Listener:
+    proto: str             # "tcp", "tcp6", "udp", "udp6"
+    address: str
+    port: int
+    inode: int
+    uid: int
+    pid: int = None
+    process: str = ""
+
+    @property
+    def loopback(self):
+        addr = ipaddress.ip_address(self.address)
+        if addr.version == 6 and addr.ipv4_mapped:
+            addr = addr.ipv4_mapped
+        return addr.is_loopback
+
+    @property
+    def transport(self):
+        return self.proto.rstrip("6")
+
+    @property
+    def endpoint(self):
+        return f"[{self.address}]:{self.port}" if ":" in self.address else f"{self.address}:{self.port}"
+
+
+def decode_address(text):
+    """"0100007F:2CAA" → ("127.0.0.1", 11434); IPv6 is four little-endian words."""
+    addr, _, port = text.partition(":")
+    raw = bytes.fromhex(addr)
+    # The kernel prints each 32-bit word in host (little-endian) order
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, raw), int(port, 16)
+
+
+def parse_proc_net(text, proto):
+    """Listening TCP / bound UDP sockets from one /proc/net table."""
+    wanted = _TCP_LISTEN if proto.startswith("tcp") else _UDP_UNCONNECTED
+    listeners = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 10 or fields[3] != wanted:
+            continue
+        address, port = decode_address(fields[1])
+        listeners.append(Listener(proto, address, port, int(fields[9]), int(fields[7])))
+    return listeners
+
+
+def read_listeners(proc=Path("/proc")):
+    listeners = []
+    for proto in PROTOCOLS:
+        try:
+            text = (proc / "net" / proto).read_text()
+        except OSError:
+            continue  # no IPv6, for one
+        listeners.extend(parse_proc_net(text, proto))
+    return listeners
+
+
+class InodeMap:
+    """Socket inode → (pid, command), from one walk over /proc/*/fd.
+
+    Results are cached; /proc is walked again only when a socket shows up
+    that the last walk did not see. Sockets of other users' processes
+    cannot be resolved without root — they are remembered as unknown so
+    they do not trigger a walk on every scan.
+    """
+
+    def __init__(self, proc=Path("/proc")):
+        self.proc = Path(proc)
+        self._owners = {}     # inode → (pid, comm)
+        self._seen = set()    # inodes the last walk looked for
+
+    def resolve(self, inodes):
+        inodes = set(inodes)
+        if inodes - self._seen:
+            self._walk(inodes)
+        self._seen &= inodes
+        return {i: self._owners[i] for i in inodes if i in self._owners}
+
+    def _walk(self, wanted):
+        missing = set(wanted)
+        owners = {}
+        with os.scandir(self.proc) as entries:
+            for entry in entries:
+                if not missing:
+                    break
+                if not entry.name.isdigit():
+                    continue
+                fd_dir = f"{entry.path}/fd"
+                try:
+                    fds = os.listdir(fd_dir)
+                except OSError:
+                    continue  # not ours, or gone
+                for fd in fds:
+                    try:
+                        target = os.readlink(f"{fd_dir}/{fd}")
+                    except OSError:
+                        continue
+                    if target.startswith("socket:["):
+                        inode = int(target[8:-1])
+                        if inode in missing:
+                            owners[inode] = (int(entry.name), _comm(entry.path))
+                            missing.discard(inode)
+        self._owners = owners
+        self._seen = set(wanted)
+
+
+def _comm(pid_dir):
+    try:
+        with open(f"{pid_dir}/comm") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+# -- ufw -----------------------------------------------------------------------
+
+@dataclass
+class UfwRule:
+    action: str            # allow, deny, reject, limit
+    proto: str             # tcp, udp, any
+    dport: str             # "11434", "8000:8100", "80,443" or "any"
+    src: str               # "0.0.0.0/0", "127.0.0.1", "192.168.0.0/16", ...
+
+    def matches(self, port, proto):
+        if self.proto not in ("any", proto):
+            return False
+        if self.dport == "any":
+            return True
+        for part in self.dport.split(","):
+            low, _, high = part.partition(":")
+            if low.isdigit() and int(low) <= port <= int(high or low):
+                return True
+        return False
+
+    @property
+    def loopback_only(self):
+        try:
+            return ipaddress.ip_network(self.src, strict=False).subnet_of(
+                ipaddress.ip_network("127.0.0.0/8" if "." in self.src else "::1/128"))
+        except (ValueError, TypeError):
+            return False
+
+
+@dataclass
+class UfwState:
+    enabled: bool = False
+    default_incoming: str = "DROP"
+    rules: list = field(default_factory=list)
+    readable: bool = False     # user.rules could be read (root-only on some systems)
+
+    def verdict(self, port, proto):
+        """"blocked", "open", or "unknown" for traffic from off this host."""
+        if not self.enabled:
+            return "open"
+        if not self.readable:
+            return "unknown"
+        # ufw is first-match; loopback-only rules never match LAN traffic
+        for rule in self.rules:
+            if rule.matches(port, proto) and not rule.loopback_only:
+                return "open" if rule.action in ("allow", "limit") else "blocked"
+        return "open" if self.default_incoming == "ACCEPT" else "blocked"
+
+
+def parse_ufw_rules(text):
+    """Incoming rules from user.rules / user6.rules ("### tuple ###" lines)."""
+    rules = []
+    for line in text.splitlines():
+        if not line.startswith("### tuple ###"):
+            continue
+        fields = line[len("### tuple ###"):].split()
+        # Optional app names (dapp, sapp) and comment=... follow; direction is among them
+        if len(fields) < 6 or "out" in fields[6:]:
+            continue
+        action, proto, dport, _dst, _sport, src = fields[:6]
+        rules.append(UfwRule(action.split("_")[0], proto, dport, src))
+    return rules
+
+
+def _read_key(text, key):
+    for line in text.splitlines():
+        name, _, value = line.partition("=")
+        if name.strip() == key:
+            return value.strip().strip('"').strip("'")
+    return ""
+
+
+def read_ufw(ufw_dir=UFW_DIR, defaults=UFW_DEFAULTS):
+    state = UfwState()
+    try:
+        state.enabled = _read_key((Path(ufw_dir) / "ufw.conf").read_text(), "ENABLED").lower() == "yes"
+    except OSError:
+        return state
+    try:
+        state.default_incoming = _read_key(Path(defaults).read_text(), "DEFAULT_INPUT_POLICY") or "DROP"
+    except OSError:
+        pass
+    try:
+        rules = []
+        for name in ("user.rules", "user6.rules"):
+            path = Path(ufw_dir) / name
+            if path.exists():
+                rules.extend(parse_ufw_rules(path.read_text()))
+        state.rules, state.readable = rules, True
+    except OSError:
+        state.readable = False
+    return state
+
+
+# -- scan ----------------------------------------------------------------------
+
+def laia_ports(config=None, openclaw_config=OPENCLAW_CONFIG):
+    """{port: service name} of everything that should stay on loopback."""
+    config = aiconfig.load_ai_config() if config is None else config
+    ports = {
+        int((config.get("local") or {}).get("port", OLLAMA_PORT)): "Ollama",
+        int((config.get("openwebui") or {}).get("port", OPENWEBUI_PORT)): "OpenWebUI",
+        int((config.get("gateway") or {}).get("port", GATEWAY_PORT)): "LAIA gateway",
+        OPENCLAW_PORT: "OpenClaw gateway",
+    }
+    try:
+        with open(openclaw_config) as f:
+            port = (json.load(f).get("gateway") or {}).get("port")
+        if port:
+            ports[int(port)] = "OpenClaw gateway"
+    except (OSError, ValueError, TypeError, AttributeError):
+        pass
+    return ports
+
+
+@dataclass
+class Finding:
+    listener: Listener
+    service: str
+    severity: str          # "critical" or "warning"
+    message: str
+
+
+@dataclass
+class Report:
+    listeners: list
+    findings: list
+    ufw: UfwState
+    elapsed_ms: float
+
+
+class Scanner:
+    """Reusable scanner; keep one around so the inode cache pays off."""
+
+    def __init__(self, proc=Path("/proc"), ufw_dir=UFW_DIR, ufw_defaults=UFW_DEFAULTS):
+        self.proc = Path(proc)
+        self.ufw_dir = ufw_dir
+        self.ufw_defaults = ufw_defaults
+        self.inodes = InodeMap(proc)
+
+    def scan(self, ports):
+        start = time.perf_counter()
+        listeners = read_listeners(self.proc)
+        owners = self.inodes.resolve(l.inode for l in listeners)
+        for l in listeners:
+            l.pid, l.process = owners.get(l.inode, (None, ""))
+        ufw = read_ufw(self.ufw_dir, self.ufw_defaults)
+
+        findings = []
+        for l in listeners:
+            if l.port not in ports or l.loopback:
+                continue
+            service = ports[l.port]
+            who = f" ({l.process}, pid {l.pid})" if l.pid else ""
+            verdict = ufw.verdict(l.port, l.transport)
+            if verdict == "open":
+                why = "ufw is off" if not ufw.enabled else "ufw lets it in"
+                findings.append(Finding(l, service, "critical",
+                                        f"{service} reachable from the network on {l.endpoint}{who} — {why}"))
+            elif verdict == "blocked":
+                findings.append(Finding(l, service, "warning",
+                                        f"{service} listens on {l.endpoint}{who}; only ufw keeps it private"))
+            else:
+                findings.append(Finding(l, service, "warning",
+                                        f"{service} listens on {l.endpoint}{who}; ufw rules unreadable (need root)"))
+        return Report(listeners, findings, ufw, (time.perf_counter() - start) * 1000)
+
+
+def describe(finding):
+    return f"{'❌' if finding.severity == 'critical' else '⚠️'} {finding.message}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-netscan", description="LAIA network exposure scanner")
+    parser.add_argument("--all", action="store_true", help="list every listening socket")
+    args = parser.parse_args(argv)
+
+    ports = laia_ports()
+    report = Scanner().scan(ports)
+    if args.all:
+        for l in sorted(report.listeners, key=lambda l: (l.port, l.proto)):
+            owner = f"{l.process} ({l.pid})" if l.pid else "?"
+            print(f"{l.proto:5} {l.endpoint:28} {owner:24} {ports.get(l.port, '')}")
+        print()
+    for finding in report.findings:
+        print(describe(finding))
+    if not report.findings:
+        print(f"✅ LAIA services on loopback only ({', '.join(map(str, sorted(ports)))})")
+    print(f"({len(report.listeners)} sockets scanned in {report.elapsed_ms:.1f} ms)")
+    return 2 if any(f.severity == "critical" for f in report.findings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""
+Disk usage of the local Ollama model store.
+
+Ollama keeps one JSON manifest per model tag under manifests/ and the
+layers themselves, content-addressed, under blobs/. Models pulled from the
+same family share layers (templates, licences, sometimes weights), so the
+size `ollama list` shows double-counts. This module indexes blob → models
+and reports, per model, the bytes only it uses (freed by removing it) and
+the bytes it shares with others.
+
+Parsed manifests are cached in ~/.laia/cache/ollama_store.json keyed by
+path and mtime, so a re-scan only stats the manifest tree and reads what
+changed.
+
+    python3 -m laia_common.ollama_store report
+    python3 -m laia_common.ollama_store prune --unused-days 60 --dry-run
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import USER_DIR
+
+INDEX_FILE = USER_DIR / "cache" / "ollama_store.json"
+
+# Used when OLLAMA_MODELS is unset: the system service's store, then the user's
+STORE_CANDIDATES = (
+    Path("/usr/share/ollama/.ollama/models"),
+    Path.home() / ".ollama" / "models",
+)
+
+DEFAULT_REGISTRY = "registry.ollama.ai"
+WEIGHTS_MEDIA_TYPE = "application/vnd.ollama.image.model"
+
+_INDEX_VERSION = 1
+
+
+def find_store():
+    """The Ollama models directory in use, or None."""
+    env = os.environ.get("OLLAMA_MODELS")
+    if env:
+        return Path(env)
+    for path in STORE_CANDIDATES:
+        if (path / "manifests").is_dir():
+            return path
+    return None
+
+
+def model_name(relpath):
+    """manifests-relative path → the name `ollama run` accepts."""
+    parts = Path(relpath).parts
+    if len(parts) < 4:
+        return str(relpath)
+    registry, *repo, tag = parts
+    if registry == DEFAULT_REGISTRY and repo[0] == "library":
+        repo = repo[1:]
+    elif registry != DEFAULT_REGISTRY:
+        repo = [registry, *repo]
+    return f"{'/'.join(repo)}:{tag}"
+
+
+def manifest_relpath(name):
+    """Inverse of model_name(): "gemma3:1b" → registry.ollama.ai/library/gemma3/1b"""
+    repo, _, tag = name.partition(":")
+    parts = repo.split("/")
+    if len(parts) == 1:
+        parts = [DEFAULT_REGISTRY, "library", *parts]
+    elif "." not in parts[0] and ":" not in parts[0]:
+        parts = [DEFAULT_REGISTRY, *parts]
+    return Path(*parts, tag or "latest")
+
+
+def model_weights_blob(name, store=None):
+    """Path of the GGUF weights blob of an installed model, or None."""
+    store = Path(store) if store else find_store()
+    if store is None:
+        return None
+    try:
+        blobs = _parse_manifest(store / "manifests" / manifest_relpath(name))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    weights = [b for b in blobs if b[2] == WEIGHTS_MEDIA_TYPE]
+    if not weights:
+        return None
+    path = blob_path(store, max(weights, key=lambda b: b[1])[0])
+    return path if path.is_file() else None
+
+
+def blob_path(store, digest):
+    return Path(store) / "blobs" / digest.replace(":", "-")
+
+
+@dataclass
+class ModelUsage:
+    name: str
+    total: int = 0
+    unique: int = 0
+    shared: int = 0
+    last_used: float = 0.0  # atime of the weights blob; see last_used()
+    blobs: list = field(default_factory=list)
+
+
+@dataclass
+class StoreReport:
+    store: str
+    models: list
+    total_bytes: int      # distinct referenced blobs
+    orphans: list         # blob files no manifest references
+    orphan_bytes: int
+    reparsed: int         # manifests read this scan (rest came from the index)
+
+    @property
+    def shared_savings(self):
+        """Bytes saved by layer sharing versus a store without dedup."""
+        return sum(m.total for m in self.models) - self.total_bytes
+
+
+def _walk_manifests(root):
+    stack = [root]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+def _parse_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+    layers = list(manifest.get("layers") or [])
+    if manifest.get("config"):
+        layers.append(manifest["config"])
+    return [[layer["digest"], int(layer.get("size", 0)), layer.get("mediaType", "")]
+            for layer in layers if layer.get("digest")]
+
+
+def load_index(path=INDEX_FILE):
+    try:
+        with open(path) as f:
+            index = json.load(f)
+        if index.get("version") == _INDEX_VERSION:
+            return index
+    except (OSError, ValueError):
+        pass
+    return {"version": _INDEX_VERSION, "store": "", "manifests": {}}
+
+
+def save_index(index, path=INDEX_FILE):
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def last_used(store, blobs):
+    """Best guess at when a model was last loaded.
+
+    Ollama records no usage, so this is the access time of the weights
+    blob (relatime updates it at most daily; noatime mounts report the
+    pull time).
+    """
+    weights = [b for b in blobs if b[2] == WEIGHTS_MEDIA_TYPE] or blobs
+    if not weights:
+        return 0.0
+    digest = max(weights, key=lambda b: b[1])[0]
+    try:
+        st = blob_path(store, digest).stat()
+    except OSError:
+        return 0.0
+    return max(st.st_atime, st.st_mtime)
+
+
+def analyze(store=None, index_path=INDEX_FILE):
+    """Scan the store, reusing cached manifests whose mtime is unchanged."""
+    store = Path(store) if store else find_store()
+    if store is None:
+        raise FileNotFoundError("No Ollama model store found (set OLLAMA_MODELS)")
+    manifests_root = store / "manifests"
+
+    index = load_index(index_path) if index_path else {}
+    cached = index["manifests"] if index.get("store") == str(store) else {}
+    fresh = {}
+    reparsed = 0
+    for entry in _walk_manifests(manifests_root):
+        rel = os.path.relpath(entry.path, manifests_root)
+        mtime = entry.stat().st_mtime_ns
+        hit = cached.get(rel)
+        if hit and hit["mtime_ns"] == mtime:
+            fresh[rel] = hit
+            continue
+        try:
+            fresh[rel] = {"mtime_ns": mtime, "blobs": _parse_manifest(entry.path)}
+            reparsed += 1
+        except (OSError, ValueError, KeyError, TypeError):
+            continue  # partially written or foreign file
+    if index_path and (reparsed or len(fresh) != len(cached) or index.get("store") != str(store)):
+        save_index({"version": _INDEX_VERSION, "store": str(store), "manifests": fresh}, index_path)
+
+    owners = {}
+    sizes = {}
+    for rel, item in fresh.items():
+        for digest, size, _ in item["blobs"]:
+            owners.setdefault(digest, set()).add(rel)
+            sizes[digest] = size
+
+    models = []
+    for rel, item in fresh.items():
+        usage = ModelUsage(model_name(rel), blobs=item["blobs"])
+        for digest, size, _ in {b[0]: b for b in item["blobs"]}.values():
+            usage.total += size
+            if len(owners[digest]) == 1:
+                usage.unique += size
+            else:
+                usage.shared += size
+        usage.last_used = last_used(store, item["blobs"])
+        models.append(usage)
+    models.sort(key=lambda m: m.total, reverse=True)
+
+    orphans, orphan_bytes = [], 0
+    try:
+        for entry in os.scandir(store / "blobs"):
+            if not entry.name.startswith("sha256-") or "-partial" in entry.name:
+                continue  # in-progress pull
+            digest = entry.name.replace("-", ":", 1)
+            if digest not in owners and entry.is_file():
+                orphans.append(digest)
+                orphan_bytes += entry.stat().st_size
+    except FileNotFoundError:
+        pass
+
+    return StoreReport(str(store), models, sum(sizes.values()), orphans, orphan_bytes, reparsed)
+
+
+def prune_candidates(report, unused_days, now=None):
+    """Models not used for `unused_days`, oldest first."""
+    cutoff = (now or time.time()) - unused_days * 86400
+    stale = [m for m in report.models if m.last_used and m.last_used < cutoff]
+    return sorted(stale, key=lambda m: m.last_used)
+
+
+def remove_model(name, timeout=120):
+    """`ollama rm` — lets Ollama delete the layers nothing else references."""
+    result = subprocess.run(["ollama", "rm", name], capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ollama rm {name} failed")
+
+
+def human_size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+
+def _print_report(report):
+    print(f"Ollama store: {report.store}")
+    print(f"{'MODEL':40} {'TOTAL':>10} {'UNIQUE':>10} {'SHARED':>10}  LAST USED")
+    for m in report.models:
+        used = time.strftime("%Y-%m-%d", time.localtime(m.last_used)) if m.last_used else "-"
+        print(f"{m.name:40} {human_size(m.total):>10} {human_size(m.unique):>10} "
+              f"{human_size(m.shared):>10}  {used}")
+    print(f"\nOn disk: {human_size(report.total_bytes)} "
+          f"(sharing saves {human_size(report.shared_savings)})")
+    if report.orphans:
+        print(f"Unreferenced blobs: {len(report.orphans)} ({human_size(report.orphan_bytes)})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-ollama-store", description="Ollama model disk usage")
+    parser.add_argument("--store", default=None, help="models dir (default: $OLLAMA_MODELS or auto)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_p = sub.add_parser("report", help="per-model unique/shared bytes")
+    report_p.add_argument("--json", action="store_true")
+    prune_p = sub.add_parser("prune", help="remove models not used recently")
+    prune_p.add_argument("--unused-days", type=int, default=60)
+    prune_p.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        report = analyze(args.store)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "report":
+        if args.json:
+            json.dump({
+                "store": report.store,
+                "total_bytes": report.total_bytes,
+                "orphan_bytes": report.orphan_bytes,
+                "models": [{"name": m.name, "total": m.total, "unique": m.unique,
+                            "shared": m.shared, "last_used": m.last_used} for m in report.models],
+            }, sys.stdout, indent=2)
+            print()
+        else:
+            _print_report(report)
+        return 0
+
+    stale = prune_candidates(report, args.unused_days)
+    if not stale:
+        print(f"No models unused for {args.unused_days} days")
+        return 0
+    freed = 0
+    for m in stale:
+        if args.dry_run:
+            print(f"Would remove {m.name} (frees {human_size(m.unique)})")
+            continue
+        try:
+            remove_model(m.name)
+        except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"❌ {m.name}: {e}", file=sys.stderr)
+            continue
+        print(f"✅ Removed {m.name}")
+        freed += m.unique
+    if not args.dry_run:
+        print(f"Freed about {human_size(freed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
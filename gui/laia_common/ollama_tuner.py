@@ -0,0 +1,404 @@
+"""
+Ollama concurrency tuner.
+
+install-ollama.sh only sets OLLAMA_HOST, so a LAN server shared by a
+classroom runs with Ollama's defaults for parallel requests, loaded
+models, flash attention and the KV cache type. The tuner measures
+instead of guessing:
+
+1. a closed-loop load test at the current settings ("before"): N
+   clients, each sending its next request as soon as the last answers;
+2. for each candidate OLLAMA_NUM_PARALLEL (1, 2, 4, 8 — skipping levels
+   whose KV cache would not fit in RAM), a systemd drop-in, an Ollama
+   restart and a load test with that many clients;
+3. the knee: the last level that still raised aggregate tokens/sec by
+   `min_gain` while p95 latency stayed within `max_p95_factor` of a
+   single stream;
+4. the winning values in ollama.service.d/laia-tuning.conf and a final
+   "after" run under the same load as "before".
+
+If the sweep fails half way, or "after" is worse than "before", the
+previous drop-in is put back.
+
+    sudo PYTHONPATH=/usr/local/lib/laia/gui python3 -m laia_common.ollama_tuner tune
+    python3 -m laia_common.ollama_tuner tune --dry-run   # vary clients only, write nothing
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import aiconfig, gguf
+
+DROPIN_PATH = Path("/etc/systemd/system/ollama.service.d/laia-tuning.conf")
+DEFAULT_LEVELS = (1, 2, 4, 8)
+DEFAULT_DURATION = 20.0          # seconds of load per measurement
+DEFAULT_NUM_PREDICT = 128
+MAX_LOADED_MODELS = 3
+RAM_BUDGET = 0.8                 # share of MemTotal the loaded models may take
+PROMPT = "Explain in one paragraph how a printing press works."
+
+
+@dataclass
+class OllamaSettings:
+    num_parallel: int = 1
+    max_loaded_models: int = 1
+    flash_attention: bool = True
+    kv_cache_type: str = "f16"
+
+    def environment(self):
+        return {
+            "OLLAMA_NUM_PARALLEL": str(self.num_parallel),
+            "OLLAMA_MAX_LOADED_MODELS": str(self.max_loaded_models),
+            "OLLAMA_FLASH_ATTENTION": "1" if self.flash_attention else "0",
+            "OLLAMA_KV_CACHE_TYPE": self.kv_cache_type,
+        }
+
+
+def render_dropin(settings, note=""):
+    lines = ["# Written by the LAIA Ollama tuner (laia_common.ollama_tuner)"]
+    if note:
+        lines.append(f"# {note}")
+    lines.append("[Service]")
+    lines.extend(f'Environment="{k}={v}"' for k, v in settings.environment().items())
+    return "\n".join(lines) + "\n"
+
+
+def parse_dropin(text):
+    """OllamaSettings from a drop-in written by render_dropin(), or None."""
+    env = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("Environment="):
+            key, _, value = line[len("Environment="):].strip('"').partition("=")
+            env[key] = value
+    if "OLLAMA_NUM_PARALLEL" not in env:
+        return None
+    return OllamaSettings(int(env["OLLAMA_NUM_PARALLEL"]),
+                          int(env.get("OLLAMA_MAX_LOADED_MODELS", 1)),
+                          env.get("OLLAMA_FLASH_ATTENTION", "0") == "1",
+                          env.get("OLLAMA_KV_CACHE_TYPE", "f16"))
+
+
+def read_dropin(path=DROPIN_PATH):
+    try:
+        return parse_dropin(Path(path).read_text())
+    except OSError:
+        return None
+
+
+# -- load test ---------------------------------------------------------------
+
+@dataclass
+class LoadResult:
+    clients: int
+    requests: int = 0
+    errors: int = 0
+    tokens: int = 0
+    wall_s: float = 0.0
+    latencies_ms: list = field(default_factory=list, repr=False)
+
+    @property
+    def tokens_per_sec(self):
+        return self.tokens / self.wall_s if self.wall_s else 0.0
+
+    @property
+    def p50_ms(self):
+        return percentile(self.latencies_ms, 50)
+
+    @property
+    def p95_ms(self):
+        return percentile(self.latencies_ms, 95)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def generate(base, model, num_predict=DEFAULT_NUM_PREDICT, num_ctx=None, timeout=300):
+    """One non-streamed /api/generate; returns the number of tokens generated."""
+    options = {"num_predict": num_predict, "temperature": 0}
+    if num_ctx:
+        options["num_ctx"] = num_ctx
+    body = json.dumps({"model": model, "prompt": PROMPT, "stream": False, "options": options}).encode()
+    request = urllib.request.Request(base + "/api/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return int(json.load(response).get("eval_count") or 0)
+
+
+def run_load(base, model, clients, duration=DEFAULT_DURATION, num_predict=DEFAULT_NUM_PREDICT,
+             num_ctx=None):
+    """Closed loop: `clients` threads send back-to-back requests for `duration` s.
+
+    Requests started before the deadline are allowed to finish; wall time
+    runs to the last completion so tokens/sec is not inflated.
+    """
+    result = LoadResult(clients)
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+    finished = [start]
+
+    def client():
+        while time.monotonic() < deadline:
+            t0 = time.monotonic()
+            try:
+                tokens = generate(base, model, num_predict, num_ctx)
+            except (OSError, ValueError, urllib.error.URLError):
+                with lock:
+                    result.errors += 1
+                time.sleep(0.5)  # a dead server should not be hammered
+                continue
+            t1 = time.monotonic()
+            with lock:
+                result.requests += 1
+                result.tokens += tokens
+                result.latencies_ms.append((t1 - t0) * 1000)
+                finished[0] = max(finished[0], t1)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    result.wall_s = finished[0] - start
+    return result
+
+
+def find_knee(results, min_gain=0.10, max_p95_factor=3.0):
+    """The last result that still paid off; results are in increasing concurrency.
+
+    A level pays off when it had no errors, raised tokens/sec by at least
+    `min_gain` over the previous winner and kept p95 latency within
+    `max_p95_factor` times the first (single-stream) level.
+    """
+    best = results[0]
+    base_p95 = best.p95_ms or 1.0
+    for result in results[1:]:
+        if (result.errors or not result.requests
+                or result.tokens_per_sec < best.tokens_per_sec * (1 + min_gain)
+                or result.p95_ms > base_p95 * max_p95_factor):
+            break
+        best = result
+    return best
+
+
+# -- memory limits -----------------------------------------------------------
+
+def memory_plan(model, levels, num_ctx, kv_type, mem_total=None, store=None):
+    """(levels that fit in RAM, bytes one copy of the model needs per level).
+
+    Ollama gives every parallel slot its own num_ctx of KV cache, so the
+    cache grows with OLLAMA_NUM_PARALLEL. Without a readable GGUF header
+    every level is kept.
+    """
+    mem = gguf.model_fit(model, num_ctx, kv_type, store)
+    if mem is None:
+        return list(levels), {}
+    if mem_total is None:
+        mem_total = gguf.read_meminfo()[0]
+    need = {level: mem.weights + mem.overhead + mem.kv_cache * level for level in levels}
+    fitting = [level for level in levels if need[level] <= mem_total * RAM_BUDGET]
+    return fitting or list(levels)[:1], need
+
+
+def max_loaded_models(need_bytes, mem_total):
+    if not need_bytes or not mem_total:
+        return 1
+    return max(1, min(MAX_LOADED_MODELS, int(mem_total * RAM_BUDGET // need_bytes)))
+
+
+# -- applying settings ---------------------------------------------------------
+
+def wait_ready(base, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base + "/api/version", timeout=2) as response:
+                response.read()
+            return True
+        except (OSError, urllib.error.URLError):
+            time.sleep(0.5)
+    return False
+
+
+def restart_ollama(base):
+    for cmd in (["systemctl", "daemon-reload"], ["systemctl", "restart", "ollama"]):
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"{' '.join(cmd)} failed")
+    if not wait_ready(base):
+        raise RuntimeError("Ollama did not come back after the restart")
+
+
+class DropinApplier:
+    """Writes settings to the ollama.service drop-in and restarts Ollama."""
+
+    def __init__(self, base, path=DROPIN_PATH, restart=restart_ollama):
+        self.base = base
+        self.path = Path(path)
+        self.restart = restart
+        try:
+            self.previous = self.path.read_text()
+        except OSError:
+            self.previous = None
+
+    def _write(self, text):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent)
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self.path)
+
+    def apply(self, settings, note=""):
+        self._write(render_dropin(settings, note))
+        self.restart(self.base)
+
+    def restore(self):
+        if self.previous is None:
+            self.path.unlink(missing_ok=True)
+        else:
+            self._write(self.previous)
+        self.restart(self.base)
+
+
+@dataclass
+class TuneReport:
+    before: LoadResult
+    results: list
+    best: LoadResult
+    settings: OllamaSettings
+    after: LoadResult = None
+    kept: bool = False           # False when the drop-in was rolled back (or a dry run)
+
+
+def tune(base, model, levels=DEFAULT_LEVELS, duration=DEFAULT_DURATION, clients=None,
+         num_ctx=4096, kv_type="f16", applier=None, mem_total=None, on_result=None,
+         num_predict=DEFAULT_NUM_PREDICT):
+    """Measure, sweep OLLAMA_NUM_PARALLEL, pick the knee, apply it, measure again.
+
+    Without an applier only the client count varies and nothing is
+    written (the report's settings are then a suggestion).
+    """
+    on_result = on_result or (lambda label, result: None)
+    levels, need = memory_plan(model, sorted(levels), num_ctx, kv_type, mem_total)
+    clients = clients or max(levels)
+    if mem_total is None and need:
+        mem_total = gguf.read_meminfo()[0]
+
+    def measure(label, n):
+        generate(base, model, 1, num_ctx)  # load the model outside the timed run
+        result = run_load(base, model, n, duration, num_predict, num_ctx)
+        on_result(label, result)
+        return result
+
+    before = measure("before", clients)
+    try:
+        results = []
+        for level in levels:
+            if applier is not None:
+                applier.apply(OllamaSettings(level, 1, True, kv_type), "sweep in progress")
+            results.append(measure(f"parallel {level}", level))
+        best = find_knee(results)
+        settings = OllamaSettings(best.clients, max_loaded_models(need.get(best.clients), mem_total),
+                                  True, kv_type)
+        if applier is None:
+            return TuneReport(before, results, best, settings)
+        applier.apply(settings, f"knee at {best.tokens_per_sec:.1f} tok/s, p95 {best.p95_ms:.0f} ms")
+        after = measure("after", clients)
+    except BaseException:
+        if applier is not None:
+            applier.restore()
+        raise
+    kept = after.tokens_per_sec >= before.tokens_per_sec * 0.95
+    if not kept:
+        applier.restore()  # the old settings did better under the same load
+    return TuneReport(before, results, best, settings, after, kept)
+
+
+def describe(label, result):
+    return (f"{label:12} {result.tokens_per_sec:7.1f} tok/s  p50 {result.p50_ms:6.0f} ms  "
+            f"p95 {result.p95_ms:6.0f} ms  ({result.clients} clients, {result.requests} requests"
+            + (f", {result.errors} errors)" if result.errors else ")"))
+
+
+def main(argv=None):
+    config = aiconfig.load_ai_config()
+    local = config.get("local") or {}
+    num_ctx, kv_type = aiconfig.local_context(config)
+    parser = argparse.ArgumentParser(prog="laia-ollama-tune", description="Ollama concurrency tuner")
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("tune", help="load-test, find the knee, write the drop-in")
+    run.add_argument("--model", default=local.get("model", ""))
+    run.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)),
+                     help="OLLAMA_NUM_PARALLEL values to try (comma-separated)")
+    run.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per measurement")
+    run.add_argument("--clients", type=int, help="clients for the before/after runs (default: top level)")
+    run.add_argument("--kv-type", choices=sorted(gguf.KV_CACHE_BYTES), default=kv_type)
+    run.add_argument("--dry-run", action="store_true", help="vary clients only; no drop-in, no restart")
+    sub.add_parser("show", help="print the current drop-in settings")
+    args = parser.parse_args(argv)
+
+    if args.command != "tune":
+        settings = read_dropin()
+        if settings is None:
+            print(f"No tuning drop-in ({DROPIN_PATH}); Ollama runs with its defaults")
+        else:
+            for key, value in settings.environment().items():
+                print(f"{key}={value}")
+        return 0
+
+    base = f"http://{local.get('host', '127.0.0.1')}:{local.get('port', 11434)}"
+    if not args.model:
+        print("❌ No model: pass --model or set local.model in config.yaml", file=sys.stderr)
+        return 1
+    if not args.dry_run and os.geteuid() != 0:
+        print("❌ Writing the ollama.service drop-in needs root (or use --dry-run)", file=sys.stderr)
+        return 1
+    if not wait_ready(base, timeout=5):
+        print(f"❌ Ollama is not answering on {base}", file=sys.stderr)
+        return 1
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    print(f"Tuning Ollama with {args.model}: {args.duration:.0f} s per run, levels {levels}", flush=True)
+    applier = None if args.dry_run else DropinApplier(base)
+    try:
+        report = tune(base, args.model, levels, args.duration, args.clients, num_ctx, args.kv_type,
+                      applier, on_result=lambda label, r: print(describe(label, r), flush=True))
+    except (RuntimeError, OSError, urllib.error.URLError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(f"Knee: OLLAMA_NUM_PARALLEL={report.best.clients}")
+    for key, value in report.settings.environment().items():
+        print(f"  {key}={value}")
+    if report.after is None:
+        print("Dry run — nothing written")
+        return 0
+    gain = report.after.tokens_per_sec / report.before.tokens_per_sec - 1 if report.before.tokens_per_sec else 0
+    print(f"Aggregate: {report.before.tokens_per_sec:.1f} → {report.after.tokens_per_sec:.1f} tok/s "
+          f"({gain:+.0%})")
+    if not report.kept:
+        print("⚠️ Slower than before — previous settings restored")
+        return 2
+    print(f"✅ Wrote {DROPIN_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
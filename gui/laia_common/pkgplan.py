@@ -0,0 +1,572 @@
+"""
+Offline install planner for config/packages/*.list.
+
+The package lists used to be installed by one `apt-get install` after
+another, so the download size and time were only known afterwards. The
+planner reads the lists and computes the full dependency closure from the
+apt `Packages` indexes already cached in /var/lib/apt/lists — no network
+needed — against what dpkg says is installed:
+
+- Depends and Pre-Depends (and Recommends, as apt installs them by
+  default), with "|" alternatives, virtual packages and version
+  constraints compared the dpkg way;
+- download (Size) and installed (Installed-Size) totals and a time
+  estimate at a given bandwidth;
+- what is already installed, and names no configured apt source has
+  (left out of the plan, since one unknown name fails a whole
+  `apt-get install`).
+
+`install` prefetches every .deb in parallel into apt's archive cache,
+checking the SHA256 from the index, then runs a single `apt-get install`
+that finds everything already downloaded.
+
+    python3 -m laia_common.pkgplan plan base ai security
+    sudo PYTHONPATH=/opt/laia/gui python3 -m laia_common.pkgplan install base security
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from laia_common import CONFIG_DIR
+
+PACKAGE_LISTS_DIR = CONFIG_DIR / "packages"
+APT_LISTS = Path("/var/lib/apt/lists")
+APT_SOURCES = Path("/etc/apt")
+APT_ARCHIVES = Path("/var/cache/apt/archives")
+DPKG_STATUS = Path("/var/lib/dpkg/status")
+DEFAULT_WORKERS = 4
+DEFAULT_MBPS = 20.0
+
+_FIELDS = {"Package", "Version", "Architecture", "Depends", "Pre-Depends", "Recommends",
+           "Provides", "Size", "Installed-Size", "Filename", "SHA256", "Status"}
+_MACHINE_ARCH = {"x86_64": "amd64", "aarch64": "arm64", "armv7l": "armhf", "i686": "i386"}
+
+
+class PlanError(Exception):
+    pass
+
+
+# -- package lists -------------------------------------------------------------
+
+def read_list(name, lists_dir=PACKAGE_LISTS_DIR):
+    """Package names from "base", "ai", ... or a path; comments and blanks skipped."""
+    path = Path(name)
+    if not path.is_file():
+        path = Path(lists_dir) / f"{name}.list"
+    try:
+        text = path.read_text()
+    except OSError as e:
+        raise PlanError(f"cannot read package list {path}: {e.strerror}") from e
+    names = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line and line not in names:
+            names.append(line)
+    return names
+
+
+# -- Debian versions -------------------------------------------------------------
+
+def _order(c):
+    if c == "~":
+        return -1
+    if c.isdigit() or not c:
+        return 0
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+def _compare_part(a, b):
+    """dpkg's verrevcmp() on one upstream or revision string."""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i] if i < len(a) else "")
+            bc = _order(b[j] if j < len(b) else "")
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        first_diff = 0
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _split_version(version):
+    epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    return int(epoch or 0), upstream, revision
+
+
+def compare_versions(a, b):
+    """<0, 0 or >0 like `dpkg --compare-versions`."""
+    ea, ua, ra = _split_version(a)
+    eb, ub, rb = _split_version(b)
+    if ea != eb:
+        return ea - eb
+    return _compare_part(ua, ub) or _compare_part(ra, rb)
+
+
+_OPS = {
+    "<<": lambda c: c < 0, "<=": lambda c: c <= 0, "=": lambda c: c == 0,
+    ">=": lambda c: c >= 0, ">>": lambda c: c > 0, "<": lambda c: c <= 0, ">": lambda c: c >= 0,
+}
+_RELATION = re.compile(r"^([^\s(:]+)(?::\S+)?\s*(?:\(\s*(<<|<=|>=|>>|=|<|>)\s*([^)\s]+)\s*\))?")
+
+
+def satisfies(version, op, wanted):
+    return op is None or _OPS[op](compare_versions(version, wanted))
+
+
+def parse_relations(text):
+    """"a (>= 1), b | c" → [[("a", ">=", "1")], [("b", None, None), ("c", None, None)]]."""
+    groups = []
+    for group in (text or "").split(","):
+        alternatives = []
+        for alt in group.split("|"):
+            m = _RELATION.match(alt.strip())
+            if m:
+                alternatives.append(m.groups())
+        if alternatives:
+            groups.append(alternatives)
+    return groups
+
+
+# -- indexes -----------------------------------------------------------------------
+
+@dataclass
+class Package:
+    name: str
+    version: str
+    arch: str = "all"
+    depends: str = ""
+    pre_depends: str = ""
+    recommends: str = ""
+    provides: str = ""
+    size: int = 0              # .deb bytes
+    installed_size: int = 0    # bytes (the index gives KiB)
+    filename: str = ""
+    sha256: str = ""
+    base_url: str = ""
+
+    @property
+    def url(self):
+        return f"{self.base_url.rstrip('/')}/{self.filename}"
+
+    @property
+    def deb_name(self):
+        """The file name apt itself gives this .deb in its archive cache."""
+        return f"{self.name}_{self.version.replace(':', '%3a')}_{self.arch}.deb"
+
+
+def _open_index(path):
+    path = str(path)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def iter_paragraphs(stream):
+    """deb822 paragraphs as {field: value}, keeping only the fields we use."""
+    para = {}
+    for line in stream:
+        if line == "\n":
+            if para:
+                yield para
+                para = {}
+            continue
+        if line[0] in " \t":
+            continue  # continuation (descriptions, conffiles)
+        key, _, value = line.partition(":")
+        if key in _FIELDS:
+            para[key] = value.strip()
+    if para:
+        yield para
+
+
+def _package(para, base_url=""):
+    return Package(
+        para["Package"], para.get("Version", "0"), para.get("Architecture", "all"),
+        para.get("Depends", ""), para.get("Pre-Depends", ""), para.get("Recommends", ""),
+        para.get("Provides", ""), int(para.get("Size") or 0),
+        int(para.get("Installed-Size") or 0) * 1024, para.get("Filename", ""),
+        para.get("SHA256", ""), base_url,
+    )
+
+
+def native_arch():
+    try:
+        result = subprocess.run(["dpkg", "--print-architecture"], capture_output=True, text=True, timeout=5)
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    machine = platform.machine()
+    return _MACHINE_ARCH.get(machine, machine)
+
+
+def _https_hosts(sources_dir=APT_SOURCES):
+    """Mirror prefixes ("host/path") that sources.list names with https://."""
+    hosts = set()
+    files = [Path(sources_dir) / "sources.list", *sorted((Path(sources_dir) / "sources.list.d").glob("*"))]
+    for path in files:
+        try:
+            text = path.read_text()
+        except OSError:
+            continue
+        hosts.update(m.rstrip("/") for m in re.findall(r"https://(\S+)", text))
+    return hosts
+
+
+def base_url_for(list_name, https_hosts=()):
+    """"deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages" → "http://deb.debian.org/debian"."""
+    prefix = list_name.split("_dists_", 1)[0]
+    location = prefix.replace("_", "/").replace("%5f", "_")
+    scheme = "https" if location in https_hosts else "http"
+    return f"{scheme}://{location}"
+
+
+class AptIndex:
+    """Newest candidate per package name plus virtual-package providers."""
+
+    def __init__(self, arch=None):
+        self.arch = arch or native_arch()
+        self.packages = {}
+        self.providers = {}    # virtual name → [real names]
+
+    def add(self, pkg):
+        if pkg.arch not in (self.arch, "all"):
+            return
+        current = self.packages.get(pkg.name)
+        if current is None or compare_versions(pkg.version, current.version) > 0:
+            self.packages[pkg.name] = pkg
+            for group in parse_relations(pkg.provides):
+                for name, _op, _version in group:
+                    providers = self.providers.setdefault(name, [])
+                    if pkg.name not in providers:
+                        providers.append(pkg.name)
+
+    def add_file(self, path, base_url=""):
+        with _open_index(path) as stream:
+            for para in iter_paragraphs(stream):
+                if "Package" in para:
+                    self.add(_package(para, base_url))
+
+    @classmethod
+    def from_lists(cls, lists_dir=APT_LISTS, arch=None, sources_dir=APT_SOURCES):
+        index = cls(arch)
+        https = _https_hosts(sources_dir)
+        seen = set()
+        for path in sorted(Path(lists_dir).glob("*_Packages*")):
+            stem = path.name.split("_Packages")[0]
+            if path.name[len(stem):] not in ("_Packages", "_Packages.gz", "_Packages.xz") or stem in seen:
+                continue
+            if "binary-" in stem and not stem.endswith((f"binary-{index.arch}", "binary-all")):
+                continue
+            seen.add(stem)
+            index.add_file(path, base_url_for(path.name, https))
+        if not index.packages:
+            raise PlanError(f"no apt package indexes in {lists_dir} — run 'apt-get update' once")
+        return index
+
+    def candidate(self, name, op=None, version=None):
+        """A package that satisfies `name (op version)`: the real one, else a provider."""
+        pkg = self.packages.get(name)
+        if pkg is not None and satisfies(pkg.version, op, version):
+            return pkg
+        if op is None:
+            for provider in self.providers.get(name, ()):
+                return self.packages[provider]
+        return None
+
+
+def read_status(path=DPKG_STATUS):
+    """({installed name: version}, {virtual name: [installed providers]}) from dpkg."""
+    installed, provided = {}, {}
+    try:
+        stream = open(path, encoding="utf-8", errors="replace")
+    except OSError:
+        return installed, provided
+    with stream:
+        for para in iter_paragraphs(stream):
+            if para.get("Status", "").endswith(" installed") and "Package" in para:
+                installed[para["Package"]] = para.get("Version", "0")
+                for group in parse_relations(para.get("Provides", "")):
+                    for name, _op, _version in group:
+                        provided.setdefault(name, []).append(para["Package"])
+    return installed, provided
+
+
+# -- planning ------------------------------------------------------------------
+
+@dataclass
+class Plan:
+    requested: list
+    install: list = field(default_factory=list)        # Package objects, new or newer
+    already: list = field(default_factory=list)        # requested names already installed
+    missing: list = field(default_factory=list)        # requested names no source has
+    unresolved: list = field(default_factory=list)     # "pkg: dependency" nobody provides
+    recommends: bool = True
+
+    @property
+    def batch(self):
+        """The names for the single apt-get install."""
+        skip = set(self.already) | set(self.missing)
+        return [n for n in self.requested if n not in skip]
+
+    @property
+    def download_bytes(self):
+        return sum(p.size for p in self.install)
+
+    @property
+    def installed_bytes(self):
+        return sum(p.installed_size for p in self.install)
+
+    def download_seconds(self, mbps=DEFAULT_MBPS):
+        return self.download_bytes * 8 / (mbps * 1_000_000)
+
+
+def resolve(names, index, installed=None, provided=None, recommends=True):
+    """Walk the dependency closure of `names` that is not yet installed."""
+    installed = installed or {}
+    provided = provided or {}
+    plan = Plan(list(names), recommends=recommends)
+    chosen = {}          # name → Package
+    virtual = {}         # provided name → real name, for chosen packages
+
+    def is_satisfied(name, op, version):
+        if name in installed and satisfies(installed[name], op, version):
+            return True
+        if op is None and (name in provided or name in virtual):
+            return True
+        return name in chosen and satisfies(chosen[name].version, op, version)
+
+    def choose(pkg):
+        chosen[pkg.name] = pkg
+        for group in parse_relations(pkg.provides):
+            for name, _op, _version in group:
+                virtual.setdefault(name, pkg.name)
+        queue.append(pkg)
+
+    queue = []
+    for name in plan.requested:
+        if name in installed or name in provided:
+            plan.already.append(name)
+        elif name not in chosen:
+            pkg = index.candidate(name)
+            if pkg is None:
+                plan.missing.append(name)
+            elif pkg.name not in chosen:
+                choose(pkg)
+
+    while queue:
+        pkg = queue.pop(0)
+        fields = [(pkg.pre_depends, True), (pkg.depends, True)]
+        if recommends:
+            fields.append((pkg.recommends, False))
+        for text, required in fields:
+            for group in parse_relations(text):
+                if any(is_satisfied(*alt) for alt in group):
+                    continue
+                for alt in group:
+                    candidate = index.candidate(*alt)
+                    if candidate is not None:
+                        if candidate.name not in chosen:
+                            choose(candidate)
+                        break
+                else:
+                    if required:
+                        plan.unresolved.append(
+                            f"{pkg.name}: {' | '.join(a[0] for a in group)}")
+
+    plan.install = sorted(chosen.values(), key=lambda p: p.name)
+    return plan
+
+
+def plan_lists(list_names, lists_dir=APT_LISTS, status=DPKG_STATUS, arch=None, recommends=True,
+               package_lists_dir=PACKAGE_LISTS_DIR):
+    names = []
+    for list_name in list_names:
+        names.extend(n for n in read_list(list_name, package_lists_dir) if n not in names)
+    index = AptIndex.from_lists(lists_dir, arch)
+    installed, provided = read_status(status)
+    return resolve(names, index, installed, provided, recommends)
+
+
+# -- prefetch and install -------------------------------------------------------
+
+def _fetch_one(pkg, archives, chunk=1 << 16):
+    target = Path(archives) / pkg.deb_name
+    if target.exists() and target.stat().st_size == pkg.size:
+        return 0
+    partial = Path(archives) / "partial"
+    partial.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=partial, prefix=pkg.name + ".")
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out, urllib.request.urlopen(pkg.url, timeout=60) as response:
+            while True:
+                data = response.read(chunk)
+                if not data:
+                    break
+                digest.update(data)
+                out.write(data)
+        if pkg.sha256 and digest.hexdigest() != pkg.sha256:
+            raise PlanError(f"{pkg.deb_name}: SHA256 mismatch")
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return pkg.size
+
+
+def prefetch(packages, archives=APT_ARCHIVES, workers=DEFAULT_WORKERS, on_progress=None):
+    """Download .debs into apt's cache in parallel; returns {package name: error}."""
+    total = sum(p.size for p in packages)
+    done = 0
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_fetch_one, p, archives): p for p in packages}
+        for future in as_completed(futures):
+            pkg = futures[future]
+            try:
+                future.result()
+            except (OSError, PlanError, urllib.error.URLError) as e:
+                errors[pkg.name] = str(getattr(e, "reason", e))
+            done += pkg.size
+            if on_progress:
+                on_progress(done, total, pkg)
+    return errors
+
+
+def apt_install_command(plan):
+    cmd = ["apt-get", "install", "-y", "-q"]
+    if not plan.recommends:
+        cmd.append("--no-install-recommends")
+    return cmd + plan.batch
+
+
+# -- output ------------------------------------------------------------------------
+
+def _size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def _duration(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f} s"
+    return f"{seconds / 60:.0f} min"
+
+
+def summary(plan, mbps=DEFAULT_MBPS, workers=DEFAULT_WORKERS):
+    deps = len([p for p in plan.install if p.name not in set(plan.batch)])
+    lines = [
+        f"{len(plan.requested)} requested: {len(plan.already)} already installed, "
+        f"{len(plan.batch)} to install, {len(plan.missing)} not in any apt source",
+        f"{len(plan.install)} packages to download ({deps} of them dependencies)",
+        f"Download {_size(plan.download_bytes)}, installed size {_size(plan.installed_bytes)}",
+        f"≈ {_duration(plan.download_seconds(mbps))} at {mbps:g} Mbit/s "
+        f"(prefetched over {workers} parallel connections)",
+    ]
+    if plan.missing:
+        lines.append(f"⚠️ Left out (no apt source has them): {', '.join(plan.missing)}")
+    if plan.unresolved:
+        lines.append(f"⚠️ Unresolvable dependencies: {'; '.join(plan.unresolved)}")
+    if plan.batch:
+        lines.append("Command: " + " ".join(apt_install_command(plan)))
+    return lines
+
+
+def to_json(plan, mbps=DEFAULT_MBPS):
+    return {
+        "requested": plan.requested,
+        "already_installed": plan.already,
+        "missing": plan.missing,
+        "unresolved": plan.unresolved,
+        "batch": plan.batch,
+        "download_bytes": plan.download_bytes,
+        "installed_bytes": plan.installed_bytes,
+        "download_seconds": round(plan.download_seconds(mbps), 1),
+        "packages": [{"name": p.name, "version": p.version, "size": p.size, "url": p.url}
+                     for p in plan.install],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-pkgplan", description="Offline package install planner")
+    parser.add_argument("command", choices=("plan", "fetch", "install"))
+    parser.add_argument("lists", nargs="+", help="package lists: base, ai, security, ... or paths")
+    parser.add_argument("--no-recommends", action="store_true", help="like apt --no-install-recommends")
+    parser.add_argument("--mbps", type=float, default=DEFAULT_MBPS, help="bandwidth for the time estimate")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel .deb downloads")
+    parser.add_argument("--apt-lists", type=Path, default=APT_LISTS)
+    parser.add_argument("--status", type=Path, default=DPKG_STATUS)
+    parser.add_argument("--arch")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        plan = plan_lists(args.lists, args.apt_lists, args.status, args.arch, not args.no_recommends)
+    except PlanError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(to_json(plan, args.mbps), indent=2))
+    else:
+        for line in summary(plan, args.mbps, args.workers):
+            print(line)
+    if args.command == "plan":
+        return 0
+
+    if os.geteuid() != 0:
+        print("❌ Prefetching into apt's cache needs root", file=sys.stderr)
+        return 1
+
+    def progress(done, total, pkg):
+        print(f"  [{done * 100 // max(total, 1):3d}%] {pkg.deb_name}", flush=True)
+
+    errors = prefetch(plan.install, workers=args.workers, on_progress=progress)
+    for name, error in errors.items():
+        print(f"⚠️ {name}: {error} — apt-get will retry it", file=sys.stderr)
+    if args.command == "fetch" or not plan.batch:
+        return 0
+    env = dict(os.environ, DEBIAN_FRONTEND="noninteractive")
+    return subprocess.run(apt_install_command(plan), env=env).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Online provider catalog (config/ai/providers.yaml).
+
+Turns the YAML entries into ProviderSpec objects that know their API base,
+which env variable holds the key, how the key goes into the request
+headers, and the declared rate limit.
+"""
+from dataclasses import dataclass, field
+
+import yaml
+
+from laia_common import CONFIG_DIR
+
+PROVIDERS_FILE = CONFIG_DIR / "ai" / "providers.yaml"
+
+# Sections of providers.yaml that describe Ollama endpoints, not cloud APIs
+_NON_CLOUD = ("local", "lan")
+
+
+@dataclass
+class ProviderSpec:
+    id: str
+    name: str
+    api_base: str
+    api_key_env: str
+    api_key_header: str = "Authorization: Bearer"
+    rate_limit: str = ""
+    key_check_path: str = "/models"
+    latency_ms: int = 0          # typical, from the catalog
+    models: list = field(default_factory=list)
+
+    @property
+    def default_model(self):
+        """Model marked `recommended`, else the first listed."""
+        for model in self.models:
+            if model.get("recommended"):
+                return model["id"]
+        return self.models[0]["id"] if self.models else ""
+
+    def model_info(self, model_id):
+        """Catalog entry for model_id ({} if not listed)."""
+        return next((m for m in self.models if m["id"] == model_id), {})
+
+    def auth_headers(self, key):
+        """HTTP headers carrying key, following `api_key_header`.
+
+        "Authorization: Bearer" -> {"Authorization": "Bearer <key>"}
+        "x-goog-api-key"        -> {"x-goog-api-key": "<key>"}
+        """
+        name, _, scheme = self.api_key_header.partition(":")
+        scheme = scheme.strip()
+        return {name.strip(): f"{scheme} {key}" if scheme else key}
+
+    def key_vars(self, env):
+        """Env variables in env that hold keys for this provider.
+
+        The primary key is api_key_env; extra keys use numbered suffixes
+        (GROQ_API_KEY_2, GROQ_API_KEY_3, ...).
+        """
+        names = [n for n in env if n == self.api_key_env or _is_numbered(n, self.api_key_env)]
+        return sorted(names, key=lambda n: (n != self.api_key_env, len(n), n))
+
+    def next_key_var(self, env):
+        """First unused variable name for an additional key."""
+        if not env.get(self.api_key_env):
+            return self.api_key_env
+        n = 2
+        while f"{self.api_key_env}_{n}" in env:
+            n += 1
+        return f"{self.api_key_env}_{n}"
+
+
+def _is_numbered(name, base):
+    prefix = base + "_"
+    return name.startswith(prefix) and name[len(prefix):].isdigit()
+
+
+def load_providers(path=PROVIDERS_FILE):
+    """Return {provider_id: ProviderSpec} for every cloud provider in path."""
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    specs = {}
+    for pid, entry in (data.get("providers") or {}).items():
+        if pid in _NON_CLOUD or not isinstance(entry, dict) or not entry.get("api_base"):
+            continue
+        specs[pid] = ProviderSpec(
+            id=pid,
+            name=entry.get("name", pid),
+            api_base=entry["api_base"].rstrip("/"),
+            api_key_env=entry.get("api_key_env", f"{pid.upper()}_API_KEY"),
+            api_key_header=entry.get("api_key_header", "Authorization: Bearer"),
+            rate_limit=str(entry.get("rate_limit", "")),
+            key_check_path=entry.get("key_check_path", "/models"),
+            latency_ms=int(entry.get("latency_ms") or 0),
+            models=[m for m in entry.get("models") or [] if isinstance(m, dict) and m.get("id")],
+        )
+    return specs
+
+
+def online_settings(spec, key, model=None):
+    """api_keys.env entries for using spec in online mode."""
+    return {
+        "LAIA_MODE": "online",
+        "LAIA_PROVIDER": spec.id,
+        "LAIA_MODEL": model or spec.default_model,
+        "LAIA_API_BASE": spec.api_base,
+        spec.api_key_env: key,
+    }
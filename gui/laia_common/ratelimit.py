@@ -0,0 +1,237 @@
+"""
+Host-wide token-bucket rate limiter for the online providers.
+
+Each provider's `rate_limit` in providers.yaml ("30 req/min, 14400 req/day")
+becomes one token bucket per period. Bucket state lives in a small JSON
+file guarded by flock(2), so the GUIs, benchmark/test scripts and the
+gateway all draw from the same budget.
+
+Usage from Python:
+
+    limiter = RateLimiter.from_providers(load_providers())
+    if limiter.acquire("groq", deadline=time.time() + 5): ...
+    entry = limiter.choose(fallback_chain(config), deadline=time.time() + 5)
+
+Usage from shell scripts:
+
+    PYTHONPATH="$LAIA_ROOT/gui" python3 -m laia_common.ratelimit acquire groq --timeout 30
+"""
+import argparse
+import fcntl
+import json
+import math
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+_PERIODS = {
+    "s": 1, "sec": 1, "second": 1,
+    "m": 60, "min": 60, "minute": 60,
+    "h": 3600, "hour": 3600,
+    "d": 86400, "day": 86400,
+}
+
+# Providers that are never limited (local/LAN Ollama)
+UNLIMITED = ("local", "lan")
+
+# Exit code for "not acquired before the deadline" (EX_TEMPFAIL)
+EXIT_TEMPFAIL = 75
+
+
+def default_state_file():
+    override = os.environ.get("LAIA_RATELIMIT_FILE")
+    if override:
+        return Path(override)
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = Path(runtime) / "laia" if runtime else Path(f"/tmp/laia-{os.getuid()}")
+    return base / "ratelimit.json"
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds to wait from a Retry-After header: delay-seconds or an HTTP-date.
+
+    None for a missing or unparseable value; a date in the past gives 0.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        seconds = float(text)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(text).timestamp() - (time.time() if now is None else now)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    if not math.isfinite(seconds):
+        return None
+    return max(0.0, seconds)
+
+
+def parse_rate_limit(text):
+    """Return [(capacity, period_seconds)] for every "N req/<unit>" in text."""
+    limits = []
+    for count, unit in re.findall(r"(\d+)\s*req(?:uests)?\s*/\s*([a-z]+)", (text or "").lower()):
+        period = _PERIODS.get(unit.rstrip("s") if unit not in _PERIODS else unit)
+        if period and int(count) > 0:
+            limits.append((int(count), period))
+    return limits
+
+
+class RateLimiter:
+    def __init__(self, limits, path=None, clock=time.time):
+        """limits: {provider: [(capacity, period_seconds), ...]}"""
+        self.limits = {p: list(l) for p, l in limits.items() if l}
+        self.path = Path(path) if path else default_state_file()
+        self.clock = clock
+
+    @classmethod
+    def from_providers(cls, specs, path=None):
+        return cls({pid: parse_rate_limit(spec.rate_limit) for pid, spec in specs.items()}, path)
+
+    # -- shared state ------------------------------------------------------
+
+    @contextmanager
+    def _locked_state(self, write=True):
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            try:
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}  # Corrupt file: start with full buckets
+                yield state
+                if write:
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, provider, state, now):
+        """Return the provider's buckets, topped up to `now`."""
+        entry = state.setdefault(provider, {})
+        buckets = entry.setdefault("buckets", {})
+        for capacity, period in self.limits.get(provider, ()):
+            key = str(period)
+            tokens, updated = buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - updated) * capacity / period)
+            buckets[key] = (tokens, now)
+        return entry
+
+    def _wait(self, provider, entry, now):
+        wait = max(0.0, entry.get("blocked_until", 0) - now)
+        for capacity, period in self.limits.get(provider, ()):
+            tokens, _ = entry["buckets"][str(period)]
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) * period / capacity)
+        return wait
+
+    # -- public API ----------------------------------------------------------
+
+    def wait_time(self, provider):
+        """Seconds until a request to provider would be allowed (0 = now)."""
+        if provider in UNLIMITED or provider not in self.limits:
+            return 0.0
+        now = self.clock()
+        with self._locked_state(write=False) as state:
+            return self._wait(provider, self._refill(provider, state, now), now)
+
+    def try_acquire(self, provider):
+        """Take one token from every bucket if all have one; return (ok, wait)."""
+        if provider in UNLIMITED or provider not in self.limits:
+            return True, 0.0
+        now = self.clock()
+        with self._locked_state() as state:
+            entry = self._refill(provider, state, now)
+            wait = self._wait(provider, entry, now)
+            if wait > 0:
+                return False, wait
+            for key, (tokens, updated) in entry["buckets"].items():
+                entry["buckets"][key] = (tokens - 1, updated)
+            return True, 0.0
+
+    def acquire(self, provider, deadline=None, sleep=time.sleep):
+        """Block until a token is taken; give up (False) rather than pass deadline."""
+        while True:
+            ok, wait = self.try_acquire(provider)
+            if ok:
+                return True
+            if deadline is not None and self.clock() + wait > deadline:
+                return False
+            sleep(wait)
+
+    def note_rate_limited(self, provider, retry_after=None):
+        """Record a 429 so every process backs off, not just the one that saw it."""
+        now = self.clock()
+        with self._locked_state() as state:
+            entry = self._refill(provider, state, now)
+            for key, (_, updated) in entry["buckets"].items():
+                entry["buckets"][key] = (0.0, updated)
+            delay = retry_after_seconds(retry_after, now)
+            if delay:
+                entry["blocked_until"] = max(entry.get("blocked_until", 0), now + delay)
+
+    def choose(self, chain, deadline=None, sleep=time.sleep):
+        """Return the first fallback_chain entry whose budget fits the deadline.
+
+        Entries are tried in order; one that would have to wait past the
+        deadline is skipped instead of queued. Returns None if nothing fits.
+        """
+        for entry in chain:
+            provider = entry.get("provider")
+            wait = self.wait_time(provider)
+            if deadline is not None and self.clock() + wait > deadline:
+                continue
+            if self.acquire(provider, deadline, sleep=sleep):
+                return entry
+        return None
+
+
+def _limiter_from_catalog():
+    from laia_common.providers import load_providers
+    return RateLimiter.from_providers(load_providers())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-ratelimit",
+                                     description="Shared LAIA provider rate limiter")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("acquire", help="take one request token (exit 75 on timeout)")
+    p.add_argument("provider")
+    p.add_argument("--timeout", type=float, default=30.0)
+    p = sub.add_parser("wait", help="print seconds until a request is allowed")
+    p.add_argument("provider")
+    p = sub.add_parser("note-429", help="record a rate-limit response")
+    p.add_argument("provider")
+    p.add_argument("--retry-after", type=float, default=None)
+    p = sub.add_parser("choose", help="print provider and model of the first usable fallback entry")
+    p.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    limiter = _limiter_from_catalog()
+    if args.command == "acquire":
+        return 0 if limiter.acquire(args.provider, time.time() + args.timeout) else EXIT_TEMPFAIL
+    if args.command == "wait":
+        print(f"{limiter.wait_time(args.provider):.2f}")
+        return 0
+    if args.command == "note-429":
+        limiter.note_rate_limited(args.provider, args.retry_after)
+        return 0
+    from laia_common.aiconfig import fallback_chain, load_ai_config
+    entry = limiter.choose(fallback_chain(load_ai_config()), time.time() + args.timeout)
+    if entry is None:
+        return EXIT_TEMPFAIL
+    print(entry["provider"], entry.get("model", ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Online vs local vs LAN: measure this machine, then recommend a mode.
+
+All measurements run in parallel and the whole round is time-boxed
+(8 s by default); anything that has not answered by then counts as not
+viable. For each candidate it estimates time-to-first-token and
+tokens/sec:
+
+- online: round trip to every reachable provider. With a stored key a
+  tiny streamed completion gives real figures; without one, the round
+  trip is added to the catalog's typical latency and throughput.
+- local: if Ollama answers on this machine, a tiny generation on the
+  smallest pulled model (model load time is reported, not counted).
+- LAN: hosts answering on the Ollama port — the configured one plus a
+  sweep of this machine's /24 — get the same tiny generation.
+
+The recommendation is the viable candidate that would finish a typical
+reply soonest.
+
+    python3 -m laia_common.recommend
+"""
+import argparse
+import ipaddress
+import json
+import shutil
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from laia_common import providers, settings
+
+DEFAULT_TIMEOUT = 8.0
+OLLAMA_PORT = 11434
+
+# Length of the "typical reply" used to rank candidates (tokens)
+REPLY_TOKENS = 200
+# Tokens generated by each trial; enough for a stable rate, cheap on slow CPUs
+TRIAL_TOKENS = 24
+# Assumed when a provider's catalog entry has no tokens_per_sec
+UNKNOWN_ONLINE_TPS = 100.0
+# Below this, chat is too slow to be usable
+MIN_TOKENS_PER_SEC = 5.0
+
+TRIAL_PROMPT = "Count from 1 to 20, separated by spaces."
+
+
+@dataclass
+class ModeEstimate:
+    mode: str                    # "online", "local" or "lan"
+    target: str                  # provider id, or host:port for Ollama
+    model: str = ""
+    ttft_ms: float = None
+    tokens_per_sec: float = None
+    viable: bool = False
+    measured: bool = False       # False: partly catalog figures
+    detail: str = ""
+
+    def reply_seconds(self, tokens=REPLY_TOKENS):
+        """Expected time to finish a typical reply; inf if unknown."""
+        if not self.viable or self.ttft_ms is None:
+            return float("inf")
+        tps = self.tokens_per_sec or UNKNOWN_ONLINE_TPS
+        return self.ttft_ms / 1000 + tokens / tps
+
+
+def _deadline_timeout(deadline, cap=None):
+    remaining = max(0.1, deadline - time.monotonic())
+    return min(remaining, cap) if cap else remaining
+
+
+# -- online ----------------------------------------------------------------
+
+def _stream_chat(spec, key, model, timeout):
+    """(ttft_ms, tokens/sec or None) from a tiny streamed completion."""
+    body = json.dumps({
+        "model": model, "stream": True, "max_tokens": TRIAL_TOKENS, "temperature": 0,
+        "messages": [{"role": "user", "content": TRIAL_PROMPT}],
+    }).encode()
+    request = urllib.request.Request(
+        spec.api_base + "/chat/completions", data=body,
+        headers={**spec.auth_headers(key), "Content-Type": "application/json",
+                 "User-Agent": "LAIA-Setup/1.0"},
+    )
+    start = time.monotonic()
+    first = last = None
+    chunks = 0
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for raw in response:
+            line = raw.decode("utf-8", "replace").strip()
+            if not line.startswith("data:") or line == "data: [DONE]":
+                continue
+            try:
+                choices = json.loads(line[5:]).get("choices") or [{}]
+            except ValueError:
+                continue
+            if (choices[0].get("delta") or {}).get("content"):
+                last = time.monotonic()
+                first = first or last
+                chunks += 1
+    if first is None:
+        raise ValueError("no tokens in the response")
+    tps = (chunks - 1) / (last - first) if chunks > 1 and last > first else None
+    return (first - start) * 1000, tps
+
+
+def probe_online(spec, key=None, timeout=5.0, limiter=None):
+    """ModeEstimate for one provider."""
+    est = ModeEstimate("online", spec.id, model=spec.default_model)
+    if key and (limiter is None or limiter.try_acquire(spec.id)[0]):
+        try:
+            est.ttft_ms, est.tokens_per_sec = _stream_chat(spec, key, est.model, timeout)
+            est.viable = est.measured = True
+            return est
+        except (OSError, ValueError, urllib.error.URLError) as e:
+            est.detail = f"trial failed ({getattr(e, 'reason', e)}), using catalog figures"
+
+    # No usable key: any HTTP answer, even 401, proves the endpoint is reachable
+    request = urllib.request.Request(spec.api_base + spec.key_check_path,
+                                     headers={"User-Agent": "LAIA-Setup/1.0"})
+    start = time.monotonic()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read(1024)
+    except urllib.error.HTTPError:
+        pass
+    except (OSError, urllib.error.URLError) as e:
+        est.detail = f"unreachable: {getattr(e, 'reason', e)}"
+        return est
+    rtt_ms = (time.monotonic() - start) * 1000
+    est.ttft_ms = rtt_ms + spec.latency_ms
+    est.tokens_per_sec = spec.model_info(est.model).get("tokens_per_sec")
+    est.viable = True
+    est.detail = est.detail or f"round trip {rtt_ms:.0f} ms; speed from the catalog"
+    return est
+
+
+# -- Ollama (local and LAN) ------------------------------------------------
+
+def _ollama_get(base, path, timeout):
+    with urllib.request.urlopen(base + path, timeout=timeout) as response:
+        return json.load(response)
+
+
+def ollama_trial(base, model, timeout):
+    """(ttft_ms excluding model load, tokens/sec, load_ms) from a streamed generation."""
+    body = json.dumps({"model": model, "prompt": TRIAL_PROMPT, "stream": True,
+                       "options": {"num_predict": TRIAL_TOKENS, "temperature": 0}}).encode()
+    request = urllib.request.Request(base + "/api/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    start = time.monotonic()
+    first = None
+    final = {}
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            try:
+                chunk = json.loads(line)
+            except ValueError:
+                continue
+            if first is None and chunk.get("response"):
+                first = time.monotonic()
+            if chunk.get("done"):
+                final = chunk
+    if first is None or not final.get("eval_duration"):
+        raise ValueError("incomplete response from Ollama")
+    load_ms = final.get("load_duration", 0) / 1e6
+    tps = final.get("eval_count", 0) / (final["eval_duration"] / 1e9)
+    return max(0.0, (first - start) * 1000 - load_ms), tps, load_ms
+
+
+def probe_ollama(host, port=OLLAMA_PORT, mode="local", timeout=5.0):
+    """ModeEstimate for an Ollama server, trialling its smallest model."""
+    base = f"http://{host}:{port}"
+    est = ModeEstimate(mode, f"{host}:{port}")
+    try:
+        models = _ollama_get(base, "/api/tags", min(timeout, 2.0)).get("models") or []
+    except (OSError, ValueError, urllib.error.URLError):
+        if mode == "local" and shutil.which("ollama"):
+            est.detail = "Ollama is installed but not running"
+        else:
+            est.detail = "Ollama not found"
+        return est
+    if not models:
+        est.detail = "Ollama is running but no models are pulled yet"
+        return est
+    est.model = min(models, key=lambda m: m.get("size", 0))["name"]
+    try:
+        est.ttft_ms, est.tokens_per_sec, load_ms = ollama_trial(base, est.model, timeout)
+    except (OSError, ValueError, urllib.error.URLError) as e:
+        est.detail = f"trial on {est.model} failed: {getattr(e, 'reason', e)}"
+        return est
+    est.measured = True
+    est.viable = est.tokens_per_sec >= MIN_TOKENS_PER_SEC
+    est.detail = f"{est.model}, model load {load_ms / 1000:.1f} s"
+    if not est.viable:
+        est.detail += f" — too slow for chat (< {MIN_TOKENS_PER_SEC:.0f} tok/s)"
+    return est
+
+
+def _own_address():
+    """This machine's LAN address (no packet is sent)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            s.connect(("192.0.2.1", 9))  # TEST-NET-1, never routed
+            return s.getsockname()[0]
+        except OSError:
+            return None
+
+
+def _port_open(host, port, timeout):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def discover_lan_hosts(port=OLLAMA_PORT, known=(), sweep=True, timeout=0.3, max_workers=64):
+    """Hosts answering on the Ollama port: `known` ones, plus this machine's /24."""
+    candidates = [h for h in known if h]
+    own = _own_address()
+    if sweep and own and ipaddress.ip_address(own).is_private:
+        network = ipaddress.ip_network(f"{own}/24", strict=False)
+        candidates += [str(ip) for ip in network.hosts() if str(ip) != own]
+    candidates = [h for h in dict.fromkeys(candidates) if h not in ("127.0.0.1", "localhost", own)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        found = pool.map(lambda h: _port_open(h, port, timeout), candidates)
+        return [h for h, ok in zip(candidates, found) if ok]
+
+
+def probe_lan(port=OLLAMA_PORT, known=(), sweep=True, timeout=5.0):
+    """ModeEstimates for every Ollama server found on the LAN."""
+    start = time.monotonic()
+    hosts = discover_lan_hosts(port, known, sweep)
+    if not hosts:
+        return [ModeEstimate("lan", "", detail="no Ollama server found on the network")]
+    remaining = max(0.5, timeout - (time.monotonic() - start))
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        return list(pool.map(lambda h: probe_ollama(h, port, "lan", remaining), hosts))
+
+
+# -- round -----------------------------------------------------------------
+
+def measure(specs=None, env=None, config=None, timeout=DEFAULT_TIMEOUT, on_result=None,
+            limiter=None, sweep=True, local_host="127.0.0.1"):
+    """Run every probe in parallel for at most `timeout` seconds.
+
+    on_result(estimate) is called from worker threads as results arrive.
+    Returns all ModeEstimates, including non-viable ones.
+    """
+    specs = providers.load_providers() if specs is None else specs
+    env = settings.env() if env is None else env
+    config = settings.config() if config is None else config
+    deadline = time.monotonic() + timeout
+    lan = config.get("lan") or {}
+    lan_port = int(env.get("LAIA_LAN_PORT") or lan.get("port") or OLLAMA_PORT)
+    known = [env.get("LAIA_LAN_HOST"), lan.get("host")]
+
+    jobs = {}  # future → placeholder used if it misses the deadline
+    pool = ThreadPoolExecutor(max_workers=len(specs) + 2)
+
+    def submit(placeholder, fn, *args):
+        def run():
+            result = fn(*args)
+            for est in result if isinstance(result, list) else [result]:
+                if on_result:
+                    on_result(est)
+            return result
+        jobs[pool.submit(run)] = placeholder
+
+    for spec in specs.values():
+        submit(ModeEstimate("online", spec.id, model=spec.default_model), probe_online,
+               spec, env.get(spec.api_key_env), _deadline_timeout(deadline, 5.0), limiter)
+    submit(ModeEstimate("local", f"{local_host}:{OLLAMA_PORT}"), probe_ollama,
+           local_host, OLLAMA_PORT, "local", _deadline_timeout(deadline))
+    submit(ModeEstimate("lan", ""), probe_lan, lan_port, known, sweep,
+           _deadline_timeout(deadline) - 0.5)
+
+    done, _ = wait(jobs, timeout=_deadline_timeout(deadline))
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    estimates = []
+    for future, placeholder in jobs.items():
+        if future in done and future.exception() is None:
+            result = future.result()
+            estimates.extend(result if isinstance(result, list) else [result])
+        else:
+            placeholder.detail = (f"no answer within {timeout:.0f} s" if future not in done
+                                  else f"error: {future.exception()}")
+            estimates.append(placeholder)
+            if on_result:
+                on_result(placeholder)
+    return estimates
+
+
+def recommend(estimates):
+    """The viable estimate that finishes a typical reply soonest, or None."""
+    viable = [e for e in estimates if e.viable and e.ttft_ms is not None]
+    return min(viable, key=lambda e: e.reply_seconds()) if viable else None
+
+
+def best_per_mode(estimates):
+    """{mode: best estimate for that mode}, non-viable ones only if nothing else."""
+    best = {}
+    for est in estimates:
+        current = best.get(est.mode)
+        if current is None or (est.reply_seconds(), not est.viable) < \
+                (current.reply_seconds(), not current.viable):
+            best[est.mode] = est
+    return best
+
+
+def describe(est):
+    """One line: '~320 ms to first token · 560 tok/s (groq, catalog)'."""
+    if not est.viable and est.ttft_ms is None:
+        return f"❌ {est.detail}"
+    parts = [f"~{est.ttft_ms:.0f} ms to first token"]
+    if est.tokens_per_sec:
+        parts.append(f"{est.tokens_per_sec:.0f} tok/s")
+    where = est.target if est.mode != "local" else est.model
+    source = "" if est.measured else ", estimated"
+    line = " · ".join(parts) + f" ({where}{source})"
+    return line if est.viable else f"⚠️ {line} — {est.detail}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-recommend",
+                                     description="Measure online/local/LAN AI modes")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--no-sweep", action="store_true",
+                        help="only probe the configured LAN host, do not scan the /24")
+    args = parser.parse_args(argv)
+
+    estimates = measure(timeout=args.timeout, sweep=not args.no_sweep)
+    for est in sorted(estimates, key=lambda e: (e.mode, e.reply_seconds())):
+        print(f"{est.mode:7} {est.target:22} {describe(est)}")
+    best = recommend(estimates)
+    if best is None:
+        print("❌ No mode is usable right now", file=sys.stderr)
+        return 1
+    print(f"Recommended: {best.mode} ({best.target})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
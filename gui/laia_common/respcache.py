@@ -0,0 +1,207 @@
+"""
+On-disk cache of chat-completion responses.
+
+Identical requests — same provider, model, normalized messages and
+sampling parameters — are answered from a SQLite file instead of the API.
+The cache is opt-in (`cache.enabled` in config/ai/config.yaml), capped in
+size with least-recently-used eviction, and by default skips requests that
+are not deterministic (temperature > 0 without a seed) or that stream.
+
+Per-model hit/miss/byte counters are kept in the same file so the
+configurator's Status tab can show them from another process.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from laia_common import USER_DIR
+
+DEFAULT_PATH = USER_DIR / "cache" / "responses.db"
+DEFAULT_MAX_MB = 256
+
+# Request fields that change the answer and so belong in the key
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "top_k", "max_tokens", "max_completion_tokens",
+    "stop", "seed", "presence_penalty", "frequency_penalty", "response_format",
+    "tools", "tool_choice", "n",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT PRIMARY KEY,
+    provider  TEXT NOT NULL,
+    model     TEXT NOT NULL,
+    response  BLOB NOT NULL,
+    size      INTEGER NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    provider TEXT NOT NULL,
+    model    TEXT NOT NULL,
+    hits     INTEGER NOT NULL DEFAULT 0,
+    misses   INTEGER NOT NULL DEFAULT 0,
+    bytes    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, model)
+);
+"""
+
+
+def normalize_messages(messages):
+    """Keep only fields that affect the answer; trim whitespace in text."""
+    normalized = []
+    for msg in messages or []:
+        item = {"role": msg.get("role", "user")}
+        content = msg.get("content")
+        if isinstance(content, str):
+            content = "\n".join(line.rstrip() for line in content.strip().splitlines())
+        item["content"] = content
+        for field in ("name", "tool_calls", "tool_call_id"):
+            if field in msg:
+                item[field] = msg[field]
+        normalized.append(item)
+    return normalized
+
+
+def request_key(provider, body):
+    """Stable hash of (provider, model, normalized messages, sampling params)."""
+    material = {
+        "provider": provider,
+        "model": body.get("model", ""),
+        "messages": normalize_messages(body.get("messages")),
+        "params": {k: body[k] for k in SAMPLING_PARAMS if k in body},
+    }
+    blob = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def is_deterministic(body):
+    """Greedy decoding (temperature 0) or a fixed seed; single choice."""
+    if body.get("n", 1) != 1:
+        return False
+    if "seed" in body:
+        return True
+    temperature = body.get("temperature")
+    return temperature is not None and float(temperature) == 0.0
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 cache_nondeterministic=False, ttl_seconds=None):
+        self.path = Path(os.path.expanduser(str(path)))
+        self.max_bytes = max_bytes
+        self.cache_nondeterministic = cache_nondeterministic
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build from the `cache` section of config.yaml; None if disabled."""
+        section = config.get("cache") or {}
+        if not section.get("enabled"):
+            return None
+        ttl_days = section.get("ttl_days")
+        return cls(
+            path=section.get("path", DEFAULT_PATH),
+            max_bytes=int(section.get("max_mb", DEFAULT_MAX_MB)) * 1024 * 1024,
+            cache_nondeterministic=bool(section.get("cache_nondeterministic", False)),
+            ttl_seconds=float(ttl_days) * 86400 if ttl_days else None,
+        )
+
+    @contextmanager
+    def _connect(self):
+        # One connection per thread, kept open: closing the last connection
+        # checkpoints the WAL, which would cost an fsync on every lookup.
+        # WAL also lets readers (Status tab) run during writes.
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        with db:
+            yield db
+
+    def cacheable(self, body):
+        if body.get("stream"):
+            return False
+        return self.cache_nondeterministic or is_deterministic(body)
+
+    def get(self, provider, body):
+        """Return the cached response dict, or None (counted as a miss)."""
+        key = request_key(provider, body)
+        model = body.get("model", "")
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT response, size, created FROM entries WHERE key = ?",
+                             (key,)).fetchone()
+            if row and self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count(db, provider, model, misses=1)
+                return None
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self._count(db, provider, model, hits=1, nbytes=row[1])
+        return json.loads(row[0])
+
+    def put(self, provider, body, response):
+        blob = json.dumps(response, separators=(",", ":")).encode()
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_key(provider, body), provider, body.get("model", ""),
+                 blob, len(blob), now, now),
+            )
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def _count(self, db, provider, model, hits=0, misses=0, nbytes=0):
+        db.execute(
+            "INSERT INTO stats VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(provider, model) DO UPDATE SET "
+            "hits = hits + excluded.hits, misses = misses + excluded.misses, "
+            "bytes = bytes + excluded.bytes",
+            (provider, model, hits, misses, nbytes),
+        )
+
+    def stats(self):
+        """[{provider, model, hits, misses, bytes}] — bytes served from cache."""
+        with self._connect() as db:
+            rows = db.execute("SELECT provider, model, hits, misses, bytes FROM stats "
+                              "ORDER BY hits + misses DESC").fetchall()
+        return [dict(zip(("provider", "model", "hits", "misses", "bytes"), r)) for r in rows]
+
+    def size(self):
+        """(entry count, stored bytes)"""
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM stats")
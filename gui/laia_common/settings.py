@@ -0,0 +1,251 @@
+"""
+One parsed view of the LAIA settings, shared by the GUIs and the scripts.
+
+~/.laia/api_keys.env and config.yaml (config/ai/config.yaml with
+~/.laia/config.yaml merged over it) used to be read by every consumer on
+its own, by `source`, by hand-written loops, or by the GUIs on every
+refresh. Settings parses them once and keeps the result keyed by each
+file's (mtime, size, inode). Later reads cost three stat() calls until a
+file actually changes.
+
+Other processes share the parsed result through a JSON snapshot,
+~/.laia/settings.json, written with 0600 permissions because it holds
+the keys. It records the stamps of its sources, so a reader can tell
+when it is stale; the CLI then re-parses and rewrites it. Shell scripts
+use the CLI instead of sourcing the env file:
+
+    eval "$(python3 -m laia_common.settings shell)"           # export LAIA_MODE=... lines
+    python3 -m laia_common.settings get LAIA_MODE
+    python3 -m laia_common.settings get config.local.port
+    python3 -m laia_common.settings set LAIA_MODE=lan LAIA_LAN_HOST=10.0.0.5
+    printf 'GROQ_API_KEY=%s\n' "$key" | python3 -m laia_common.settings set --stdin
+
+Writes go through envfile.update_env, so only the named keys change.
+Other providers' keys and comments are kept.
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import shlex
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from laia_common import USER_DIR, aiconfig, envfile
+
+SNAPSHOT_FILE = USER_DIR / "settings.json"
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class Settings:
+    def __init__(self, keys_file=envfile.KEYS_FILE, config_file=aiconfig.AI_CONFIG_FILE,
+                 user_config=aiconfig.USER_AI_CONFIG, snapshot_file=SNAPSHOT_FILE):
+        self.keys_file = Path(keys_file)
+        self.config_file = Path(config_file)
+        self.user_config = Path(user_config) if user_config else None
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self._lock = threading.Lock()
+        self._env_stamp = self._config_stamps = ()   # never equal to a real stamp
+        self._env = {}
+        self._config = {}
+        self._exported = None
+
+    def sources(self):
+        """{path: stamp} of every file the settings come from (None if missing)."""
+        paths = [self.keys_file, self.config_file] + ([self.user_config] if self.user_config else [])
+        return {str(p): _stamp(p) for p in paths}
+
+    def _refresh(self):
+        """Re-parse whatever changed since the last call; returns the stamps."""
+        stamps = self.sources()
+        env_stamp = stamps[str(self.keys_file)]
+        config_stamps = [v for k, v in stamps.items() if k != str(self.keys_file)]
+        with self._lock:
+            if env_stamp != self._env_stamp:
+                self._env, self._env_stamp = envfile.read_env(self.keys_file), env_stamp
+            if config_stamps != self._config_stamps:
+                self._config = aiconfig.load_ai_config(self.config_file, self.user_config)
+                self._config_stamps = config_stamps
+        return stamps
+
+    def env(self):
+        """api_keys.env as {name: value} (a copy; change it with update_env)."""
+        self._refresh()
+        return dict(self._env)
+
+    def config(self):
+        """config.yaml with the user's overrides applied (a copy)."""
+        self._refresh()
+        return copy.deepcopy(self._config)
+
+    def get(self, name, default=None):
+        """An env value, or a config value by dotted path: "config.local.port"."""
+        if not name.startswith("config."):
+            return self.env().get(name, default)
+        self._refresh()
+        node = self._config
+        for part in name.split(".")[1:]:
+            if not isinstance(node, dict) or part not in node:
+                return default
+            node = node[part]
+        return copy.deepcopy(node)
+
+    def update_env(self, updates=None, remove=()):
+        """Merge keys into api_keys.env (other keys and comments stay)."""
+        for name, value in (updates or {}).items():
+            if not _NAME_RE.match(name) or "\n" in str(value):
+                raise ValueError(f"not a valid setting: {name}")
+        envfile.update_env(self.keys_file, updates, remove)
+        self.export()
+
+    # -- snapshot --------------------------------------------------------------
+
+    def export(self):
+        """Write the JSON snapshot if a source changed since it was written."""
+        stamps = self._refresh()
+        if self.snapshot_file is None or stamps == self._exported:
+            return
+        with self._lock:
+            data = {"version": 1, "sources": stamps, "env": self._env, "config": self._config}
+        self.snapshot_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".settings.", dir=self.snapshot_file.parent)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=1, default=str)
+                f.write("\n")
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.snapshot_file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._exported = stamps
+
+    def load_snapshot(self):
+        """Adopt a fresh snapshot without parsing anything; False if stale or missing."""
+        if self.snapshot_file is None:
+            return False
+        try:
+            with open(self.snapshot_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        stamps = self.sources()
+        if not isinstance(data, dict) or data.get("sources") != stamps:
+            return False
+        with self._lock:
+            self._env, self._env_stamp = dict(data.get("env") or {}), stamps[str(self.keys_file)]
+            self._config = data.get("config") or {}
+            self._config_stamps = [v for k, v in stamps.items() if k != str(self.keys_file)]
+        self._exported = stamps
+        return True
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """The process-wide Settings for the default files."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Settings()
+        return _shared
+
+
+def env():
+    return shared().env()
+
+
+def config():
+    return shared().config()
+
+
+def update_env(updates=None, remove=()):
+    shared().update_env(updates, remove)
+
+
+def shell_lines(values, array=None):
+    """`export NAME=value` lines (or `ARRAY[NAME]=value`) safe to eval."""
+    lines = []
+    for name, value in values.items():
+        if not _NAME_RE.match(name):
+            continue
+        if array:
+            lines.append(f"{array}[{name}]={shlex.quote(str(value))}")
+        else:
+            lines.append(f"export {name}={shlex.quote(str(value))}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="laia-settings", description="LAIA settings (api_keys.env + config.yaml)")
+    parser.add_argument("--keys-file", help="env file to use instead of ~/.laia/api_keys.env")
+    sub = parser.add_subparsers(dest="command")
+    get = sub.add_parser("get", help="print one value (NAME, or config.section.key)")
+    get.add_argument("name")
+    get.add_argument("--default", default=None)
+    shell = sub.add_parser("shell", help="print the env settings as lines for eval")
+    shell.add_argument("--array", help="assign into this bash associative array instead of exporting")
+    sub.add_parser("json", help="print the whole parsed view")
+    put = sub.add_parser("set", help="merge NAME=value pairs into the env file")
+    put.add_argument("pairs", nargs="*")
+    put.add_argument("--remove", action="append", default=[], help="drop this key")
+    put.add_argument("--stdin", action="store_true",
+                     help="also read NAME=value lines from stdin (keeps keys out of `ps`)")
+    args = parser.parse_args(argv)
+
+    if args.keys_file:
+        # Someone else's file: parse it directly and leave the shared snapshot alone
+        settings = Settings(keys_file=args.keys_file, snapshot_file=None)
+    else:
+        settings = Settings()
+        if not settings.load_snapshot():
+            try:
+                settings.export()
+            except OSError:
+                pass  # read-only home: still answer from the parsed files
+
+    if args.command == "get":
+        value = settings.get(args.name, args.default)
+        if value is None:
+            return 1
+        print(json.dumps(value) if isinstance(value, (dict, list)) else value)
+    elif args.command == "shell":
+        print("\n".join(shell_lines(settings.env(), args.array)))
+    elif args.command == "json":
+        print(json.dumps({"env": settings.env(), "config": settings.config()}, indent=2, default=str))
+    elif args.command == "set":
+        updates = {}
+        pairs = list(args.pairs) + (sys.stdin.read().splitlines() if args.stdin else [])
+        for pair in filter(None, pairs):
+            name, sep, value = pair.partition("=")
+            if not sep:
+                print(f"❌ Expected NAME=value, got: {pair}", file=sys.stderr)
+                return 2
+            updates[name.strip()] = value
+        try:
+            settings.update_env(updates, args.remove)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    else:
+        parser.print_help()
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Opt-in tracing for the LAIA GUIs.
+
+Set LAIA_TRACE to record a span for every subprocess, config read/write
+and GTK main-loop callback (idle/timeout sources and signal handlers):
+
+    LAIA_TRACE=1 laia-config               # → ~/.laia/traces/<prog>-<pid>.json
+    LAIA_TRACE=/tmp/cfg.json laia-config
+
+The file is Chrome trace-event JSON, written at exit; open it in
+chrome://tracing or https://ui.perfetto.dev. Callbacks that hold the GTK
+main thread for more than 16 ms (one frame) are also reported on stderr
+as they happen.
+
+When LAIA_TRACE is unset nothing is patched and `traced` returns the
+function unchanged, so there is no cost outside tracing sessions.
+"""
+import atexit
+import functools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+from laia_common import USER_DIR
+
+ENV_VAR = "LAIA_TRACE"
+TRACE_DIR = USER_DIR / "traces"
+
+# One frame at 60 Hz; a main-thread callback longer than this drops frames
+SLOW_CALLBACK_MS = 16.0
+
+# Oldest events are dropped beyond this so a long session stays bounded
+MAX_EVENTS = 200_000
+
+ENABLED = bool(os.environ.get(ENV_VAR))
+
+_events = []
+_lock = threading.Lock()
+_installed = False
+# obj → {handler: [wrapper, ...]}, so the *_by_func methods find the wrappers
+_connected = weakref.WeakKeyDictionary()
+_origin_ns = time.perf_counter_ns()
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _origin_ns) / 1000
+
+
+def record(name, cat, start_us, dur_us, **args):
+    """Add one complete ("X") event; args must be JSON-serializable."""
+    thread = threading.current_thread()
+    event = {"name": name, "cat": cat, "ph": "X", "ts": round(start_us, 1),
+             "dur": round(dur_us, 1), "pid": os.getpid(), "tid": thread.ident,
+             "args": dict(args, thread=thread.name)}
+    with _lock:
+        _events.append(event)
+        if len(_events) > MAX_EVENTS:
+            del _events[:MAX_EVENTS // 10]
+    if cat == "mainloop" and dur_us / 1000 > SLOW_CALLBACK_MS and thread is threading.main_thread():
+        print(f"[laia-trace] slow main-loop callback {name}: {dur_us / 1000:.1f} ms",
+              file=sys.stderr)
+
+
+@contextmanager
+def span(name, cat="app", **args):
+    if not ENABLED:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        record(name, cat, start, _now_us() - start, **args)
+
+
+def traced(cat, name=None):
+    """Decorator: record a span per call when tracing is enabled."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with span(label, cat):
+                return fn(*a, **kw)
+        return wrapper
+    return decorate
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def chrome_trace():
+    """{"traceEvents": [...]} with thread-name metadata for the viewer."""
+    evs = events()
+    names = {}
+    for e in evs:
+        names.setdefault(e["tid"], e["args"]["thread"])
+    meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+             "args": {"name": tname}} for tid, tname in names.items()]
+    return {"traceEvents": meta + evs, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path):
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(chrome_trace(), f)
+    return path
+
+
+def default_output():
+    value = os.environ.get(ENV_VAR, "")
+    if value and value not in ("1", "yes", "true"):
+        return Path(value).expanduser()
+    prog = Path(sys.argv[0]).stem or "python"
+    return TRACE_DIR / f"{prog}-{os.getpid()}.json"
+
+
+# -- subprocess ------------------------------------------------------------
+
+def _command_name(args):
+    if isinstance(args, (str, bytes)):
+        args = [os.fsdecode(args)]
+    text = " ".join(os.fsdecode(a) for a in args)
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+class _TracedPopen(subprocess.Popen):
+    """Popen that records launch → exit as one span, with the exit code."""
+
+    def __init__(self, args, *a, **kw):
+        self._trace_start = _now_us()
+        self._trace_name = _command_name(args)
+        self._trace_thread = threading.current_thread()
+        self._trace_done = False
+        try:
+            super().__init__(args, *a, **kw)
+        except OSError as e:
+            record(self._trace_name, "subprocess", self._trace_start,
+                   _now_us() - self._trace_start, error=type(e).__name__)
+            raise
+
+    def _trace_finish(self):
+        if self._trace_done or self.returncode is None:
+            return
+        self._trace_done = True
+        record(self._trace_name, "subprocess", self._trace_start,
+               _now_us() - self._trace_start, exit_code=self.returncode,
+               launched_by=self._trace_thread.name)
+
+    def wait(self, timeout=None):
+        try:
+            return super().wait(timeout)
+        finally:
+            self._trace_finish()
+
+    def poll(self):
+        result = super().poll()
+        self._trace_finish()
+        return result
+
+
+# -- GLib main loop ----------------------------------------------------------
+
+def _callback_name(callback):
+    owner = getattr(callback, "__self__", None)
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    if owner is not None and "." not in name:
+        name = f"{type(owner).__name__}.{name}"
+    return name
+
+
+def _wrap_callback(callback, label=None):
+    name = label or _callback_name(callback)
+
+    @functools.wraps(callback)
+    def wrapper(*a, **kw):
+        with span(name, "mainloop"):
+            return callback(*a, **kw)
+    return wrapper
+
+
+def _patch_source(module, attr, callback_index):
+    original = getattr(module, attr)
+
+    @functools.wraps(original)
+    def patched(*a, **kw):
+        a = list(a)
+        a[callback_index] = _wrap_callback(a[callback_index])
+        return original(*a, **kw)
+    setattr(module, attr, patched)
+
+
+def _patch_connect(cls):
+    """Wrap connected handlers, keeping handler_block_by_func() and friends working.
+
+    GObject matches those by the function it was given, which is now the
+    wrapper, so they are patched to look the caller's handler up first.
+    """
+    original_connect = cls.connect
+
+    def connect(obj, signal, handler, *args):
+        label = f"{type(obj).__name__}::{signal} → {_callback_name(handler)}"
+        wrapper = _wrap_callback(handler, label)
+        _connected.setdefault(obj, {}).setdefault(handler, []).append(wrapper)
+        return original_connect(obj, signal, wrapper, *args)
+    cls.connect = connect
+
+    def by_func(attr, forget=False):
+        original = getattr(cls, attr, None)
+        if original is None:
+            return
+
+        def patched(obj, func):
+            wrappers = _connected.get(obj, {}).get(func)
+            if not wrappers:
+                return original(obj, func)      # connected before install()
+            if forget:
+                _connected[obj].pop(func)
+            return sum(original(obj, w) or 0 for w in wrappers)
+        setattr(cls, attr, patched)
+
+    by_func("handler_block_by_func")
+    by_func("handler_unblock_by_func")
+    by_func("disconnect_by_func", forget=True)
+
+
+def install(GLib=None, GObject=None):
+    """Patch subprocess (and GLib sources / signal connects when given).
+
+    No-op unless LAIA_TRACE is set. Call before building any window so
+    every handler connected afterwards is wrapped.
+    """
+    global _installed
+    if not ENABLED or _installed:
+        return False
+    _installed = True
+    subprocess.Popen = _TracedPopen
+
+    if GLib is not None:
+        _patch_source(GLib, "idle_add", 0)              # (callback, *data)
+        _patch_source(GLib, "timeout_add", 1)           # (interval, callback, *data)
+        _patch_source(GLib, "timeout_add_seconds", 1)
+    if GObject is not None:
+        _patch_connect(GObject.Object)
+
+    atexit.register(_write_at_exit)
+    return True
+
+
+def _write_at_exit():
+    try:
+        path = write_chrome_trace(default_output())
+        print(f"[laia-trace] {len(_events)} spans written to {path}", file=sys.stderr)
+    except OSError as e:
+        print(f"[laia-trace] could not write trace: {e}", file=sys.stderr)
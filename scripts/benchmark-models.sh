@@ -21,6 +21,11 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
+# Shared provider rate limiter (see gui/laia_common/ratelimit.py)
+ratelimit() {
+  PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.ratelimit "$@" 2>/dev/null
+}
+
 # Color codes for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -32,15 +37,11 @@ NC='\033[0m' # No Color
 declare -A API_KEYS
 if [[ -f "${KEYS_FILE}" ]]; then
   echo "📂 Loading API keys from ${KEYS_FILE}"
-  # Source only key-like lines (VAR=value format)
-  while IFS='=' read -r key value; do
-    key="${key%%#*}" # Remove comments
-    key="${key%% }" # Trim trailing spaces
-    value="${value%% }" # Trim trailing spaces
-    [[ -n "${key}" && "${key}" != *"_"* ]] && continue
-    [[ -z "${key}" ]] && continue
-    API_KEYS["${key}"]="${value}"
-  done < "${KEYS_FILE}"
+  # Parsed by the shared settings layer (gui/laia_common/settings.py), as the GUIs do
+  if SETTINGS="$(PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.settings \
+                   --keys-file "${KEYS_FILE}" shell --array API_KEYS)"; then
+    eval "${SETTINGS}"
+  fi
   echo "✅ Loaded ${#API_KEYS[@]} API keys"
 else
   echo "⚠️  No keys file found at ${KEYS_FILE}"
@@ -65,6 +66,16 @@ test_model() {
 
   TOTAL_TESTS=$((TOTAL_TESTS + 1))
 
+  # Skip instead of collecting a 429 when the shared budget is used up
+  local rl_status=0
+  ratelimit acquire "${provider}" --timeout "${TIMEOUT}" || rl_status=$?
+  if [[ ${rl_status} -eq 75 ]]; then
+    printf "%-12s %-45s %5sms  %s %-12s %s\n" \
+      "${provider}" "${model_id:0:44}" "-" "⏱️" "RATE_LIMIT" "local budget"
+    RESULTS_JSON+="\n  \"${provider}/${model_id}:${with_key}\": {\"latency\": 0, \"status\": \"RATE_LIMIT\", \"quality\": \"unknown\"}, "
+    return
+  fi
+
   # Build headers
   declare -a HEADERS
   HEADERS+=("-H" "Content-Type: application/json")
@@ -146,6 +157,7 @@ except:
   elif [[ "${http_code}" == "429" ]]; then
     status="RATE_LIMIT"
     content="Rate limit exceeded"
+    ratelimit note-429 "${provider}" || true
   elif [[ "${http_code}" == "0" ]]; then
     status="TIMEOUT"
     latency="${TIMEOUT}000+"
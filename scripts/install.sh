@@ -37,10 +37,17 @@ section "1/5 Updating system"
 apt-get update -qq && apt-get upgrade -y -qq
 
 section "2/5 Installing base packages"
-PKGS=$(grep -v '^#' "$LAIA_DIR/config/packages/base.list" 2>/dev/null | \
-       grep -v '^$' | tr '\n' ' ')
-[[ -n "$PKGS" ]] || PKGS="ufw fail2ban apparmor apparmor-utils curl git python3"
-apt-get install -y -qq $PKGS
+# One planned batch (sizes known up front, .debs fetched in parallel) for
+# everything the later steps would otherwise apt-get one by one
+LISTS="base security"
+[[ "$NO_AI" == "false" ]] && LISTS="$LISTS ai"
+if ! PYTHONPATH="$LAIA_DIR/gui" python3 -m laia_common.pkgplan install $LISTS 2>&1 | tee -a "$LOG_FILE"; then
+  warn "Package planner unavailable — installing the base list directly"
+  PKGS=$(grep -v '^#' "$LAIA_DIR/config/packages/base.list" 2>/dev/null | \
+         grep -v '^$' | tr '\n' ' ')
+  [[ -n "$PKGS" ]] || PKGS="ufw fail2ban apparmor apparmor-utils curl git python3"
+  apt-get install -y -qq $PKGS
+fi
 
 section "3/5 Security hardening"
 bash "$LAIA_DIR/config/security/harden.sh"
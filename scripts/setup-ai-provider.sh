@@ -8,6 +8,10 @@ LAIA_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
 mkdir -p "${HOME}/.laia"
 chmod 700 "${HOME}/.laia"
 
+# Merge into api_keys.env (gui/laia_common/settings.py): keys saved for other
+# providers, and anything the GUIs wrote, are kept
+settings() { PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.settings "$@"; }
+
 # Color codes
 GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
@@ -104,7 +108,7 @@ case "$choice" in
     echo ""
     echo "Setting up local Ollama..."
     bash "$(dirname "$0")/../config/ai/install-ollama.sh" || true
-    echo "LAIA_MODE=local" > "${KEYS_FILE}"
+    settings set LAIA_MODE=local
     echo "✅ Local mode configured."
     exit 0
     ;;
@@ -132,13 +136,8 @@ for m in models[:5]: print(f'   - {m}')
       echo "    Set: OLLAMA_HOST=0.0.0.0 in the server's /etc/systemd/system/ollama.service"
     fi
 
-    {
-      echo "LAIA_MODE=lan"
-      echo "LAIA_LAN_HOST=${LAN_HOST}"
-      echo "LAIA_LAN_PORT=${LAN_PORT}"
-      echo "LAIA_LAN_MODEL=${LAN_MODEL}"
-    } > "${KEYS_FILE}"
-    chmod 600 "${KEYS_FILE}"
+    settings set LAIA_MODE=lan "LAIA_LAN_HOST=${LAN_HOST}" "LAIA_LAN_PORT=${LAN_PORT}" \
+      "LAIA_LAN_MODEL=${LAN_MODEL}"
     echo "✅ LAN remote mode configured: ${LAN_HOST}:${LAN_PORT}"
     exit 0
     ;;
@@ -194,14 +193,9 @@ else
 fi
 
 # Save config
-{
-  echo "LAIA_MODE=online"
-  echo "LAIA_PROVIDER=${PROVIDER}"
-  echo "LAIA_MODEL=${DEFAULT_MODEL}"
-  echo "LAIA_API_BASE=${API_BASE}"
-  echo "${ENV_VAR}=${api_key}"
-} > "${KEYS_FILE}"
-chmod 600 "${KEYS_FILE}"
+# The key goes in on stdin, not the command line
+printf '%s=%s\n' "${ENV_VAR}" "${api_key}" | settings set --stdin LAIA_MODE=online \
+  "LAIA_PROVIDER=${PROVIDER}" "LAIA_MODEL=${DEFAULT_MODEL}" "LAIA_API_BASE=${API_BASE}"
 
 echo ""
 echo "✅ Configuration saved to ${KEYS_FILE}"
@@ -3,21 +3,38 @@
 set -euo pipefail
 
 KEYS_FILE="${HOME}/.laia/api_keys.env"
+LAIA_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
 
 if [[ ! -f "${KEYS_FILE}" ]]; then
   echo "❌ No LAIA configuration found. Run: laia-setup or laia-config"
   exit 1
 fi
 
-source "${KEYS_FILE}"
+# Same parsed view as the GUIs (gui/laia_common/settings.py), not a raw `source`
+settings() { PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.settings "$@"; }
+if ! SETTINGS="$(settings shell)"; then
+  echo "❌ Could not read ${KEYS_FILE}"
+  exit 1
+fi
+eval "${SETTINGS}"
 
 MODE="${LAIA_MODE:-online}"
 echo "Testing LAIA AI connection (mode: ${MODE})..."
 
 case "${MODE}" in
   online)
+    # Draw from the provider budget shared by all LAIA tools (exit 75 = used up)
+    rl_status=0
+    PYTHONPATH="${LAIA_ROOT}/gui" python3 -m laia_common.ratelimit \
+      acquire "${LAIA_PROVIDER:-groq}" --timeout 30 2>/dev/null || rl_status=$?
+    if [[ ${rl_status} -eq 75 ]]; then
+      echo "⏱️  Request budget for ${LAIA_PROVIDER:-groq} is used up — try again shortly"
+      exit 1
+    fi
+    KEY_VAR="${LAIA_PROVIDER:-groq}"
+    KEY_VAR="${KEY_VAR^^}_API_KEY"
     curl -sf \
-      -H "Authorization: Bearer ${!${LAIA_PROVIDER^^}_API_KEY:-${GROQ_API_KEY:-}}" \
+      -H "Authorization: Bearer ${!KEY_VAR:-${GROQ_API_KEY:-}}" \
       -H "Content-Type: application/json" \
       -d "{\"model\":\"${LAIA_MODEL}\",\"messages\":[{\"role\":\"user\",\"content\":\"Reply with only: LAIA OK\"}],\"max_tokens\":10}" \
       "${LAIA_API_BASE}/chat/completions" \
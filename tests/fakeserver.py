@@ -0,0 +1,52 @@
+"""Loopback stub HTTP servers for the tests (not a test module itself)"""
+import http.server
+import json
+import threading
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Quiet handler with JSON helpers; subclasses add do_GET / do_POST."""
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def send_json(self, obj, status=200, content_type="application/json", headers=None):
+        """Send obj as JSON (bytes are sent as they are) with a Content-Length."""
+        data = obj if isinstance(obj, bytes) else json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """Serves `handler` on a free loopback port from a daemon thread.
+
+    Subclasses set their own state before calling super().__init__(), so
+    it is in place by the time the first request is served.
+    """
+    daemon_threads = True
+    handler = StubHandler
+
+    def __init__(self, handler=None):
+        super().__init__(("127.0.0.1", 0), handler or self.handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    @property
+    def address(self):
+        return ("127.0.0.1", self.server_port)
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Headless performance benchmark for the LAIA GUIs.
+
+Runs LaiaConfigurator and SetupWizard in-process against an isolated HOME,
+with systemctl, journalctl, ufw, ollama, openclaw, sysctl and sudo replaced
+by stubs on PATH and no provider keys stored (so nothing reaches the
+network). Measures:
+
+    configurator.first_frame_ms          construct → first paint
+    configurator.tab.<name>.first_ms     first switch to a tab → paint
+    configurator.tab.<name>.repeat_ms    later switch to the same tab
+    configurator.save_ms                 _on_save()
+    wizard.first_frame_ms
+    wizard.apply_ms                      "apply" → progress at 100%
+
+Each metric is the median over --runs fresh windows. Results are written
+as JSON; any metric above its limit in gui_bench_thresholds.json fails
+the run. Needs a display — use gui_bench.sh, which starts Xvfb or
+Broadway.
+"""
+import argparse
+import fnmatch
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent
+LAIA_ROOT = TESTS_DIR.parent
+THRESHOLDS_FILE = TESTS_DIR / "gui_bench_thresholds.json"
+
+STUBS = {
+    "systemctl": 'case "$1" in is-active) echo active ;; *) echo "stub systemctl $*" ;; esac',
+    "journalctl": 'echo \'{"__REALTIME_TIMESTAMP":"1700000000000000","_SYSTEMD_UNIT":"ollama.service",'
+                  '"PRIORITY":"6","MESSAGE":"stub journal line"}\'; '
+                  'case " $* " in *" --follow "*) exec sleep 3600 ;; esac',
+    "ufw": 'echo "Status: active"',
+    "ollama": 'echo "NAME    ID    SIZE    MODIFIED"',
+    "openclaw": 'echo "openclaw: stub"',
+    "sysctl": 'echo "$1 = 2"',
+    "sudo": 'exec "$@"',
+    "lynis": 'echo "Hardening index : 80"',
+    "xdg-open": "exit 0",
+}
+
+
+def isolate_environment(root):
+    """Fresh HOME, stub commands first on PATH, empty Ollama store."""
+    home = root / "home"
+    stubs = root / "bin"
+    for path in (home, stubs, root / "ollama" / "manifests", root / "ollama" / "blobs"):
+        path.mkdir(parents=True)
+    for name, body in STUBS.items():
+        script = stubs / name
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(0o755)
+    os.environ.update({
+        "HOME": str(home),
+        "PATH": f"{stubs}{os.pathsep}{os.environ.get('PATH', '')}",
+        "OLLAMA_MODELS": str(root / "ollama"),
+        "XDG_RUNTIME_DIR": str(root),
+        "LAIA_RATELIMIT_FILE": str(root / "ratelimit.json"),
+        "LAIA_MIRROR": "http://127.0.0.1:9",  # refused at once: models come from the ollama stub
+    })
+    os.environ.pop("LAIA_TRACE", None)
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Harness:
+    def __init__(self, Gtk, GLib):
+        self.Gtk = Gtk
+        self.GLib = GLib
+        self.frames = 0
+
+    def watch(self, window):
+        window.connect_after("draw", self._on_draw)
+
+    def _on_draw(self, *_):
+        self.frames += 1
+        return False
+
+    def pump_until(self, predicate, timeout=15.0):
+        """Run the main loop until predicate() is true; return elapsed ms."""
+        ctx = self.GLib.MainContext.default()
+        heartbeat = self.GLib.timeout_add(5, lambda: True)  # wake up to re-check
+        start = time.perf_counter()
+        try:
+            while not predicate():
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError("GUI did not reach the expected state")
+                ctx.iteration(True)
+        finally:
+            self.GLib.source_remove(heartbeat)
+        return (time.perf_counter() - start) * 1000
+
+    def next_frame(self, action):
+        """Run action() and time until the next paint."""
+        seen = self.frames
+        start = time.perf_counter()
+        action()
+        self.pump_until(lambda: self.frames > seen)
+        return (time.perf_counter() - start) * 1000
+
+    def settle(self):
+        ctx = self.GLib.MainContext.default()
+        while ctx.pending():
+            ctx.iteration(False)
+
+
+def find_notebook(Gtk, widget):
+    if isinstance(widget, Gtk.Notebook):
+        return widget
+    if isinstance(widget, Gtk.Container):
+        for child in widget.get_children():
+            found = find_notebook(Gtk, child)
+            if found:
+                return found
+    return None
+
+
+def tab_key(label):
+    """"📊 Status" → "status"."""
+    words = "".join(c if c.isalnum() or c == " " else " " for c in label).split()
+    return "_".join(words).lower() or "tab"
+
+
+def bench_configurator(h, module, samples):
+    Gtk = h.Gtk
+    start = time.perf_counter()
+    win = module.LaiaConfigurator()
+    h.watch(win)
+    win.show_all()
+    h.pump_until(lambda: h.frames > 0)
+    samples.setdefault("configurator.first_frame_ms", []).append((time.perf_counter() - start) * 1000)
+    h.settle()
+
+    notebook = find_notebook(Gtk, win)
+    pages = [(i, tab_key(notebook.get_tab_label_text(notebook.get_nth_page(i))))
+             for i in range(notebook.get_n_pages())]
+    for kind in ("first", "repeat"):
+        for i, key in pages[1:] + pages[:1]:
+            ms = h.next_frame(lambda: notebook.set_current_page(i))
+            samples.setdefault(f"configurator.tab.{key}.{kind}_ms", []).append(ms)
+            h.settle()
+
+    start = time.perf_counter()
+    win._on_save(None)
+    samples.setdefault("configurator.save_ms", []).append((time.perf_counter() - start) * 1000)
+
+    win.disconnect_by_func(Gtk.main_quit)  # no Gtk.main() running here
+    win.destroy()
+    h.settle()
+
+
+def bench_wizard(h, module, samples):
+    start = time.perf_counter()
+    wizard = module.SetupWizard()
+    h.watch(wizard)
+    wizard.show_all()
+    h.pump_until(lambda: h.frames > 0)
+    samples.setdefault("wizard.first_frame_ms", []).append((time.perf_counter() - start) * 1000)
+    h.settle()
+
+    wizard.mode = "local"  # writes api_keys.env only; no network
+    start = time.perf_counter()
+    wizard.emit("apply")
+    h.pump_until(lambda: wizard.progress.get_fraction() >= 1.0
+                 or wizard.status_label.get_text().startswith("Error"))
+    if wizard.status_label.get_text().startswith("Error"):
+        raise RuntimeError(f"wizard apply failed: {wizard.status_label.get_text()}")
+    samples.setdefault("wizard.apply_ms", []).append((time.perf_counter() - start) * 1000)
+
+    wizard.disconnect_by_func(h.Gtk.main_quit)
+    wizard.destroy()
+    h.settle()
+
+
+def summarize(samples):
+    return {name: {"median": round(statistics.median(v), 2), "max": round(max(v), 2), "runs": len(v)}
+            for name, v in sorted(samples.items())}
+
+
+def check_thresholds(metrics, thresholds):
+    """[(metric, median, limit)] for every metric over its limit."""
+    failures = []
+    for name, stats in metrics.items():
+        limits = [limit for pattern, limit in thresholds.items() if fnmatch.fnmatchcase(name, pattern)]
+        if limits and stats["median"] > min(limits):
+            failures.append((name, stats["median"], min(limits)))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless LAIA GUI benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default="gui-bench-results.json")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS_FILE))
+    parser.add_argument("--no-fail", action="store_true", help="report regressions but exit 0")
+    args = parser.parse_args(argv)
+    output = Path(args.output).resolve()
+
+    with tempfile.TemporaryDirectory(prefix="laia-bench-") as tmp:
+        isolate_environment(Path(tmp))
+
+        import gi
+        gi.require_version("Gtk", "3.0")
+        from gi.repository import GLib, Gtk
+
+        configurator = load_module("laia_configurator", LAIA_ROOT / "gui" / "laia-configurator" / "main.py")
+        wizard = load_module("laia_wizard", LAIA_ROOT / "gui" / "laia-setup-wizard" / "wizard.py")
+
+        h = Harness(Gtk, GLib)
+        samples = {}
+        for _ in range(args.runs):
+            bench_configurator(h, configurator, samples)
+            bench_wizard(h, wizard, samples)
+
+    metrics = summarize(samples)
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    failures = check_thresholds(metrics, thresholds)
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "gtk": f"{Gtk.get_major_version()}.{Gtk.get_minor_version()}.{Gtk.get_micro_version()}",
+        "backend": os.environ.get("GDK_BACKEND", "x11"),
+        "metrics": metrics,
+        "regressions": [{"metric": m, "median": v, "limit": lim} for m, v, lim in failures],
+    }
+    output.write_text(json.dumps(result, indent=2) + "\n")
+
+    for name, stats in metrics.items():
+        print(f"  {name:45} {stats['median']:9.1f} ms (max {stats['max']:.1f})")
+    print(f"Results: {output}")
+    for name, value, limit in failures:
+        print(f"❌ {name}: {value:.1f} ms > {limit} ms")
+    return 1 if failures and not args.no_fail else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+#!/usr/bin/env bash
+# Headless GUI performance benchmark (see gui_bench.py)
+# Usage: bash tests/gui_bench.sh [--broadway] [gui_bench.py options]
+#   Needs: python3-gi gir1.2-gtk-3.0 gir1.2-notify-0.7 python3-yaml, and xvfb
+#   (or libgtk-3-bin for --broadway)
+set -euo pipefail
+
+TESTS_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+if [[ "${1:-}" == "--broadway" ]]; then
+    shift
+    broadwayd :5 &>/dev/null &
+    BROADWAY_PID=$!
+    trap 'kill $BROADWAY_PID 2>/dev/null || true' EXIT
+    sleep 1
+    export GDK_BACKEND=broadway BROADWAY_DISPLAY=:5
+    RUN=()
+else
+    if ! command -v xvfb-run &>/dev/null; then
+        echo "❌ xvfb-run not found: apt-get install xvfb (or use --broadway)"
+        exit 1
+    fi
+    RUN=(xvfb-run -a -s "-screen 0 1280x800x24")
+fi
+
+# Private session bus so the save notification does not wait on a missing D-Bus
+if command -v dbus-run-session &>/dev/null; then
+    RUN+=(dbus-run-session --)
+fi
+
+"${RUN[@]}" python3 "$TESTS_DIR/gui_bench.py" "$@"
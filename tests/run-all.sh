@@ -39,6 +39,10 @@ run_test "Documentation complete"  "$TESTS_DIR/test_docs.sh"
 run_test "No secrets committed"    "$TESTS_DIR/test_no_secrets.sh"
 run_test "i18n / licenses"         "$TESTS_DIR/test_licenses.sh"
 
+echo ""
+echo "── Python ──"
+run_test "GUI helper unit tests"   "$TESTS_DIR/test_python_units.sh"
+
 echo ""
 echo "═══════════════════════"
 echo "Results: ${PASS} passed | ${FAIL} failed | ${SKIP} skipped"
@@ -0,0 +1,105 @@
+"""Tests for the AppArmor profile inspector (apparmor.py) on a fake securityfs"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import apparmor  # noqa: E402
+
+NOW = 1_800_000_000.0
+
+
+def audit_record(verdict, profile, ts, cursor):
+    return {
+        "__CURSOR": cursor,
+        "__REALTIME_TIMESTAMP": str(int(ts * 1e6)),
+        "MESSAGE": f'audit: type=1400 audit({ts}:1): apparmor="{verdict}" operation="open" '
+                   f'profile="{profile}" name="/etc/shadow" pid=42 comm="ollama"',
+    }
+
+
+class InspectTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.sfs = self.tmp / "securityfs"
+        self.etc = self.tmp / "apparmor.d"
+        self.sfs.mkdir()
+        self.etc.mkdir()
+        (self.sfs / "profiles").write_text(
+            "/usr/sbin/cupsd (enforce)\nollama (enforce)\nopenclaw (complain)\nopenclaw//null-x (complain)\n")
+        entry = self.sfs / "policy" / "profiles" / "ollama.3"
+        entry.mkdir(parents=True)
+        (entry / "name").write_text("ollama\n")
+        os.utime(entry, (NOW, NOW))
+        for name in ("ollama", "openclaw"):
+            shutil.copy(apparmor.SHIPPED_DIR / name, self.etc / name)
+        os.utime(self.etc / "ollama", (NOW - 60, NOW - 60))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def inspect(self, audit=None):
+        statuses = apparmor.inspect(self.sfs, apparmor.SHIPPED_DIR, self.etc, audit)
+        return {s.name: s for s in statuses}
+
+    def test_modes_and_load_time(self):
+        self.assertEqual(apparmor.read_loaded(self.sfs)["openclaw//null-x"], "complain")
+        st = self.inspect()
+        self.assertEqual((st["ollama"].mode, st["openclaw"].mode), ("enforce", "complain"))
+        self.assertEqual(st["ollama"].loaded_at, NOW)
+        self.assertEqual(st["ollama"].stale, "")
+        self.assertIn("⚠️ complain", apparmor.describe(st["openclaw"]))
+
+    def test_staleness(self):
+        os.utime(self.etc / "ollama", (NOW + 60, NOW + 60))
+        self.assertEqual(self.inspect()["ollama"].stale, "edited since it was loaded")
+        with open(self.etc / "openclaw", "a") as f:
+            f.write("# local tweak\n")
+        self.assertEqual(self.inspect()["openclaw"].stale, "installed copy differs from LAIA's")
+
+    def test_not_loaded_and_not_installed(self):
+        (self.sfs / "profiles").write_text("openclaw (enforce)\n")
+        (self.etc / "openclaw").unlink()
+        st = self.inspect()
+        self.assertFalse(st["ollama"].loaded)
+        self.assertTrue(apparmor.describe(st["openclaw"]).startswith("❌ not installed"))
+
+    def test_unreadable_securityfs_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            apparmor.inspect(self.tmp / "missing", apparmor.SHIPPED_DIR, self.etc)
+
+
+class AuditCounterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = lambda: NOW
+        self.path = Path(self.tmp.name) / "audit.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_counts_window_hats_and_cursor(self):
+        counter = apparmor.AuditCounter(self.path, clock=self.clock)
+        self.assertIn("--since=-24h", counter.journal_command())
+        counter.add_records([
+            audit_record("DENIED", "ollama", NOW - 100, "c1"),
+            audit_record("DENIED", "ollama", NOW - 3 * 86400, "c2"),  # outside the window
+            audit_record("ALLOWED", "openclaw//null-x", NOW - 50, "c3"),
+            {"__CURSOR": "c4", "MESSAGE": "unrelated kernel line"},
+        ])
+        counter.prune()
+        counter.save()
+        self.assertEqual(counter.counts("ollama"), (1, 0))
+        self.assertEqual(counter.counts("openclaw"), (0, 1))
+
+        resumed = apparmor.AuditCounter(self.path, clock=self.clock)
+        self.assertIn("--after-cursor=c4", resumed.journal_command())
+        resumed.add_records([audit_record("DENIED", "ollama", NOW - 10, "c5")])
+        self.assertEqual(resumed.counts("ollama"), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
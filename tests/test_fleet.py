@@ -0,0 +1,141 @@
+"""Tests for fleet drift detection and push (fleet.py) over the local transport"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import fleet  # noqa: E402
+
+OPENCLAW = json.dumps({"security": {"bind": "loopback", "exec": {"ask": "always"}}}, indent=2).encode() + b"\n"
+CONFIG = b"mode: lan\nlan:\n  hosts: [\"192.168.1.20\"]\n"
+
+
+class CountingTransport(fleet.LocalTransport):
+    """Local transport that records how many hosts run at once."""
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def run(self, script, data=b""):
+        cls = CountingTransport
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(0.05)
+            return super().run(script, data)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+class FleetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.desired_dir = self.root / "desired"
+        self.desired_dir.mkdir()
+        (self.desired_dir / "openclaw.json").write_bytes(OPENCLAW)
+        (self.desired_dir / "config.yaml").write_bytes(CONFIG)
+        self.desired = fleet.load_desired(self.desired_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def home(self, name, openclaw=None, config=None):
+        home = self.root / name
+        if openclaw is not None:
+            (home / ".openclaw").mkdir(parents=True)
+            (home / ".openclaw" / "openclaw.json").write_bytes(openclaw)
+        if config is not None:
+            (home / ".laia").mkdir(parents=True)
+            (home / ".laia" / "config.yaml").write_bytes(config)
+        home.mkdir(exist_ok=True)
+        return home
+
+    def test_status_reports_drift_without_writing(self):
+        homes = [self.home("a", OPENCLAW, CONFIG), self.home("b", b"{}\n", CONFIG), self.home("c")]
+        transports = [fleet.LocalTransport(f"local:{h}", h) for h in homes]
+        reports = fleet.run_fleet(transports, self.desired)
+        self.assertEqual([r.target for r in reports], [t.target for t in transports])
+        self.assertEqual(reports[0].drifted, [])
+        self.assertEqual([(f.name, f.status) for f in reports[1].drifted], [("openclaw.json", "drift")])
+        self.assertEqual({f.status for f in reports[2].drifted}, {"missing"})
+        self.assertEqual((homes[1] / ".openclaw" / "openclaw.json").read_bytes(), b"{}\n")
+        self.assertIn("1 in sync, 2 drifted, 0 pushed, 0 failed", fleet.summary(reports))
+
+    def test_push_writes_only_changed_files_atomically(self):
+        home = self.home("a", b"{}\n", CONFIG)
+        target = home / ".openclaw" / "openclaw.json"
+        target.chmod(0o600)
+        config_mtime = (home / ".laia" / "config.yaml").stat().st_mtime_ns
+        [report] = fleet.run_fleet([fleet.LocalTransport("a", home)], self.desired, push=True)
+        self.assertEqual([f.name for f in report.pushed], ["openclaw.json"])
+        self.assertFalse(report.failed)
+        self.assertEqual(target.read_bytes(), OPENCLAW)
+        self.assertEqual(target.stat().st_mode & 0o777, 0o600)
+        self.assertEqual((home / ".openclaw" / "openclaw.json.bak").read_bytes(), b"{}\n")
+        self.assertEqual(sorted(os.listdir(home / ".openclaw")), ["openclaw.json", "openclaw.json.bak"])
+        self.assertEqual((home / ".laia" / "config.yaml").stat().st_mtime_ns, config_mtime)
+        [again] = fleet.run_fleet([fleet.LocalTransport("a", home)], self.desired)
+        self.assertEqual(again.drifted, [])
+
+    def test_push_creates_missing_files(self):
+        home = self.home("fresh")
+        [report] = fleet.run_fleet([fleet.LocalTransport("fresh", home)], self.desired, push=True)
+        self.assertEqual(len(report.pushed), 2)
+        self.assertEqual((home / ".laia" / "config.yaml").read_bytes(), CONFIG)
+
+    def test_bounded_concurrency_and_failed_hosts(self):
+        homes = [self.home(f"h{i}", OPENCLAW, CONFIG) for i in range(6)]
+        transports = [CountingTransport(f"h{i}", h) for i, h in enumerate(homes)]
+        transports.append(fleet.SSHTransport("broken", "nobody@127.0.0.1", timeout=1))
+        transports[-1].argv = lambda script: ["sh", "-c", "echo 'Permission denied (publickey)' >&2; exit 255"]
+        seen = []
+        reports = fleet.run_fleet(transports, self.desired, workers=2, on_report=lambda r: seen.append(r.target))
+        self.assertLessEqual(CountingTransport.peak, 2)
+        self.assertEqual(sorted(seen), sorted(t.target for t in transports))
+        self.assertEqual(reports[-1].error, "Permission denied (publickey)")
+        self.assertTrue(fleet.describe(reports[-1]).startswith("❌ broken"))
+        self.assertIn("6 in sync, 0 drifted, 0 pushed, 1 failed", fleet.summary(reports))
+
+    def test_snapshot_copies_this_hosts_files(self):
+        home = self.home("me", OPENCLAW)
+        files = {name: str(home / path[2:]) for name, path in fleet.MANAGED_FILES.items()}
+        out = self.root / "snap"
+        self.assertEqual(fleet.snapshot(out, files), ["openclaw.json"])
+        self.assertEqual(fleet.load_desired(out, files), {"openclaw.json": OPENCLAW})
+
+
+class TargetTest(unittest.TestCase):
+    def test_parse_targets(self):
+        ssh = fleet.parse_target("ssh://admin@10.0.0.5:2222")
+        self.assertEqual((ssh.destination, ssh.port), ("admin@10.0.0.5", 2222))
+        self.assertEqual(ssh.argv("true")[-2:], ["admin@10.0.0.5", "sh -c true"])
+        self.assertIn("BatchMode=yes", ssh.argv("true"))
+        self.assertEqual(fleet.parse_target("laia-02").destination, "laia-02")
+        box = fleet.parse_target("podman:laia-test")
+        self.assertEqual(box.argv("true"), ["podman", "exec", "-i", "laia-test", "sh", "-c", "true"])
+        self.assertEqual(fleet.parse_target("local:/tmp/x").home, "/tmp/x")
+        with self.assertRaises(ValueError):
+            fleet.parse_target("two words")
+
+    def test_shell_paths(self):
+        self.assertEqual(fleet._shell_path("~/.laia/my config.yaml"), "\"$HOME\"/'.laia/my config.yaml'")
+        self.assertEqual(fleet._shell_path("/opt/laia/config/ai/config.yaml"), "/opt/laia/config/ai/config.yaml")
+
+    def test_settings(self):
+        opts = fleet.settings({"fleet": {"hosts": ["a", "docker:b"], "workers": 3,
+                                         "files": {"models.yaml": "/opt/laia/config/ai/models.yaml"}}})
+        self.assertEqual(opts["hosts"], ["a", "docker:b"])
+        self.assertEqual(opts["workers"], 3)
+        self.assertEqual(set(opts["files"]), {"openclaw.json", "config.yaml", "models.yaml"})
+
+
+if __name__ == "__main__":
+    unittest.main()
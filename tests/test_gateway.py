@@ -0,0 +1,316 @@
+"""Offline tests for the loopback gateway (gateway.py) against stub upstreams"""
+import http.client
+import json
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import aiclient, aiconfig, envfile, gateway, providers, ratelimit  # noqa: E402
+
+
+class _Handler(StubHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.read_json()
+        self.server.requests.append((self.path, body, dict(self.headers)))
+        self.server.connections.add(self.client_address)
+        time.sleep(self.server.delay)
+        if self.server.events is not None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, event in enumerate(self.server.events):
+                if i == 1:
+                    self.server.release.wait(5)  # hold the rest until the test has the first
+                data = f"data: {event}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_json({"choices": [{"message": {"role": "assistant", "content": "ok"}}],
+                        "model": body["model"], "usage": {"completion_tokens": 12}},
+                       self.server.status,
+                       headers={"Retry-After": self.server.retry_after} if self.server.retry_after else None)
+
+
+class FakeUpstream(StubServer):
+    """OpenAI-compatible stub; `status`, `delay` and SSE `events` are tunable."""
+    handler = _Handler
+
+    def __init__(self, status=200, delay=0.0, events=None, retry_after=None):
+        self.status = status
+        self.retry_after = retry_after
+        self.delay = delay
+        self.events = events
+        self.release = threading.Event()
+        self.requests = []
+        self.connections = set()
+        super().__init__()
+
+    @property
+    def base(self):
+        return self.url + "/v1"
+
+
+class GarbledHandler(socketserver.StreamRequestHandler):
+    """Answers with something that is not an HTTP status line (BadStatusLine)."""
+
+    def handle(self):
+        self.rfile.readline()
+        self.wfile.write(b"garbage\r\n\r\n")
+
+
+class TruncatedHandler(socketserver.StreamRequestHandler):
+    """Sends half a body, then hangs up (IncompleteRead); SSE when the path says so."""
+
+    def handle(self):
+        path = self.rfile.readline().split()[1]
+        length = 0
+        for line in iter(self.rfile.readline, b"\r\n"):   # read the whole request, or the
+            if line.lower().startswith(b"content-length:"):  # early close resets the upload
+                length = int(line.split(b":")[1])
+        self.rfile.read(length)
+        if path.startswith(b"/sse"):
+            self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Transfer-Encoding: chunked\r\n\r\n"
+                             b"f\r\ndata: {\"a\":1}\n\n\r\n")
+        else:
+            self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: 100\r\n\r\n{\"choices\": [")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fast = gateway.Route("a", "http://a/v1", "m-a", ewma_ms=300)
+        self.slow = gateway.Route("b", "http://b/v1", "m-b", ewma_ms=100)
+        self.router = gateway.Router([self.fast, self.slow], failure_threshold=2,
+                                     cooldown=30, clock=self.clock)
+
+    def names(self, model=""):
+        return [r.name for r in self.router.candidates(model)[0]]
+
+    def test_orders_by_latency_and_errors(self):
+        self.assertEqual(self.names(), ["b/m-b", "a/m-a"])
+        for _ in range(5):
+            self.router.record_success(self.fast, 50)
+        self.assertEqual(self.names(), ["a/m-a", "b/m-b"])
+        self.router.record_failure(self.fast)  # error rate outweighs the latency edge
+        self.assertEqual(self.names(), ["b/m-b", "a/m-a"])
+
+    def test_breaker_opens_then_half_opens(self):
+        self.router.record_failure(self.slow)
+        self.router.record_failure(self.slow)
+        self.assertEqual(self.names(), ["a/m-a"])
+        self.clock.now += 31
+        self.assertIn("b/m-b", self.names())           # probe allowed...
+        self.assertEqual(self.names(), ["a/m-a"])      # ...but only once
+        self.router.record_success(self.slow, 100)
+        self.assertEqual(self.names(), ["b/m-b", "a/m-a"])
+
+    def test_explicit_model_pins_route(self):
+        routes, override = self.router.candidates("m-a")
+        self.assertEqual(([r.name for r in routes], override), (["a/m-a"], False))
+
+
+class GatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.upstreams = []
+        self.server = None
+
+    def tearDown(self):
+        for upstream in self.upstreams:
+            upstream.release.set()
+            upstream.close()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def start(self, *specs):
+        routes = []
+        for i, kwargs in enumerate(specs):
+            upstream = FakeUpstream(**kwargs)
+            self.upstreams.append(upstream)
+            routes.append(gateway.Route(f"p{i}", upstream.base, f"model-{i}",
+                                        {"Authorization": f"Bearer key{i}"}, ewma_ms=100 * (i + 1)))
+        self.router = gateway.Router(routes)
+        self.server = gateway.GatewayServer(gateway.Gateway(self.router), port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def post(self, body, conn=None):
+        conn = conn or http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+        conn.request("POST", "/v1/chat/completions", json.dumps(body),
+                     {"Content-Type": "application/json"})
+        return conn, conn.getresponse()
+
+    def test_fails_over_and_substitutes_model(self):
+        self.start({"status": 503}, {})
+        _, response = self.post({"model": "auto", "messages": [{"role": "user", "content": "hi"}]})
+        reply = json.loads(response.read())
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("X-LAIA-Route"), "p1/model-1")
+        self.assertEqual(reply["model"], "model-1")
+        path, _, headers = self.upstreams[1].requests[0]
+        self.assertEqual(path, "/v1/chat/completions")
+        self.assertEqual(headers["Authorization"], "Bearer key1")
+        self.assertEqual(self.router.routes[0].failures, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.start({"status": 400}, {})
+        _, response = self.post({"messages": []})
+        response.read()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.upstreams[1].requests, [])
+
+    def test_all_down_returns_503(self):
+        self.start({"status": 500})
+        _, response = self.post({"messages": []})
+        self.assertEqual(response.status, 503)
+        self.assertIn("HTTP 500", json.loads(response.read())["error"]["message"])
+
+    def test_streams_without_buffering(self):
+        self.start({"events": ['{"delta":"a"}', '{"delta":"b"}', "[DONE]"]})
+        _, response = self.post({"messages": [], "stream": True})
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        first = response.read1(65536)
+        self.assertIn(b'"a"', first)  # arrived while the upstream still holds the rest
+        self.upstreams[0].release.set()
+        rest = response.read()
+        self.assertIn(b"[DONE]", first + rest)
+
+    def test_upstream_connections_are_reused(self):
+        self.start({})
+        conn = None
+        for _ in range(3):
+            conn, response = self.post({"messages": []}, conn)
+            response.read()
+        self.assertEqual(len(self.upstreams[0].requests), 3)
+        self.assertEqual(len(self.upstreams[0].connections), 1)
+
+    def test_garbled_upstream_fails_over(self):
+        self.start({})
+        garbled = socketserver.TCPServer(("127.0.0.1", 0), GarbledHandler)
+        threading.Thread(target=garbled.serve_forever, daemon=True).start()
+        self.addCleanup(garbled.server_close)
+        self.addCleanup(garbled.shutdown)
+        self.router.routes.insert(0, gateway.Route("bad", f"http://127.0.0.1:{garbled.server_address[1]}/v1",
+                                                   "model-bad", ewma_ms=1))
+        _, response = self.post({"messages": []})
+        response.read()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("X-LAIA-Route"), "p0/model-0")
+        self.assertEqual(self.router.routes[0].failures, 1)
+
+    def add_truncated_route(self, path="/v1"):
+        truncated = socketserver.ThreadingTCPServer(("127.0.0.1", 0), TruncatedHandler)
+        threading.Thread(target=truncated.serve_forever, daemon=True).start()
+        self.addCleanup(truncated.server_close)
+        self.addCleanup(truncated.shutdown)
+        self.router.routes.insert(0, gateway.Route("cut", f"http://127.0.0.1:{truncated.server_address[1]}{path}",
+                                                   "model-cut", ewma_ms=1))
+
+    def test_truncated_body_fails_over(self):
+        self.start({})
+        self.add_truncated_route()
+        _, response = self.post({"messages": []})
+        self.assertEqual(json.loads(response.read())["model"], "model-0")
+        self.assertEqual(response.getheader("X-LAIA-Route"), "p0/model-0")
+        self.assertEqual(self.router.routes[0].failures, 1)
+
+    def test_truncated_stream_ends_with_an_error_event(self):
+        self.start({})
+        self.add_truncated_route("/sse")
+        _, response = self.post({"messages": [], "stream": True})
+        text = response.read().decode()         # a complete chunked body, not a hang
+        self.assertIn('data: {"a":1}', text)
+        self.assertIn("laia_gateway_upstream_error", text)
+        deadline = time.monotonic() + 5
+        while not self.router.routes[0].failures and time.monotonic() < deadline:
+            time.sleep(0.01)  # recorded after the stream is closed
+        self.assertEqual(self.router.routes[0].failures, 1)
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+        conn.request("GET", "/health")
+        self.assertEqual(conn.getresponse().status, 200)   # handler thread survived
+
+    def test_retry_after_date_does_not_break_the_reply(self):
+        self.start({"status": 429, "retry_after": "Wed, 21 Oct 2015 07:28:00 GMT"}, {})
+        limits = []
+        self.server.gateway.limiter = types.SimpleNamespace(
+            try_acquire=lambda p: (True, 0.0), note_rate_limited=lambda p, r: limits.append(r))
+        _, response = self.post({"messages": []})
+        response.read()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(limits, ["Wed, 21 Oct 2015 07:28:00 GMT"])
+        with tempfile.TemporaryDirectory() as tmp:
+            limiter = ratelimit.RateLimiter({"p0": [(100, 60)]}, Path(tmp) / "state.json")
+            limiter.note_rate_limited("p0", "Wed, 21 Oct 2099 07:28:00 GMT")
+            self.assertGreater(limiter.wait_time("p0"), 86400)
+            limiter.note_rate_limited("p0", "not a date")      # ignored, not raised
+
+    def test_traffic_is_recorded_as_history(self):
+        self.start({"status": 503}, {})
+        recorded = []
+        self.server.gateway.history_store = types.SimpleNamespace(record_many=recorded.append)
+        self.post({"messages": []})[1].read()
+        deadline = time.monotonic() + 5
+        while len(recorded) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)  # recorded after the reply is sent
+        self.assertEqual(recorded[0], {"provider.p0.up": 0.0})
+        self.assertEqual(recorded[1]["provider.p1.up"], 1.0)
+        self.assertGreater(recorded[1]["provider.p1.tokens_per_sec"], 0)
+
+    def test_health_reports_routes(self):
+        self.start({})
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+        conn.request("GET", "/health")
+        routes = json.loads(conn.getresponse().read())["routes"]
+        self.assertEqual(routes[0]["route"], "p0/model-0")
+        self.assertEqual(routes[0]["circuit"], "closed")
+
+
+class BuildRoutesTest(unittest.TestCase):
+    def test_mode_first_then_chain_with_keys(self):
+        config = aiconfig.load_ai_config(user_path=None)
+        specs = providers.load_providers()
+        env = {"LAIA_MODE": "online", "LAIA_PROVIDER": "groq", "GROQ_API_KEY": "gsk_test"}
+        names = [r.name for r in gateway.build_routes(config, env, specs)]
+        self.assertEqual(names[0], f"groq/{config['online']['model']}")
+        self.assertIn("local/gemma3:1b", names)
+        self.assertFalse(any(n.startswith("openrouter/") for n in names))  # no key
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_switch_from_online_to_local_uses_the_local_model(self):
+        config = aiconfig.load_ai_config(user_path=None)
+        specs = providers.load_providers()
+        with tempfile.TemporaryDirectory() as tmp:
+            keys = Path(tmp) / "api_keys.env"
+            envfile.update_env(keys, providers.online_settings(specs["groq"], "gsk_test"))
+            envfile.update_env(keys, {"LAIA_MODE": "local"})   # what the wizard does for local
+            env = envfile.read_env(keys)
+        self.assertEqual(env["LAIA_MODEL"], specs["groq"].default_model)   # still there
+        endpoint = aiclient.resolve_endpoint(env, config, specs)
+        self.assertEqual((endpoint.provider, endpoint.model), ("local", config["local"]["model"]))
+        self.assertEqual(gateway.build_routes(config, env, specs)[0].name,
+                         f"local/{config['local']['model']}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Tests for the GGUF header reader (gguf.py) on synthetic GGUF fixtures"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import gguf, ollama_store  # noqa: E402
+
+Q4_K, F32 = 12, 0
+
+
+def _str(s):
+    data = s.encode()
+    return struct.pack("<Q", len(data)) + data
+
+
+def _value(v):
+    if isinstance(v, bool):
+        return struct.pack("<I?", 7, v)
+    if isinstance(v, int):
+        return struct.pack("<IQ", 10, v) if v > 0xFFFFFFFF else struct.pack("<II", 4, v)
+    if isinstance(v, float):
+        return struct.pack("<If", 6, v)
+    if isinstance(v, str):
+        return struct.pack("<I", 8) + _str(v)
+    if isinstance(v, list):
+        if v and isinstance(v[0], str):
+            return struct.pack("<IIQ", 9, 8, len(v)) + b"".join(_str(x) for x in v)
+        return struct.pack("<IIQ", 9, 5, len(v)) + b"".join(struct.pack("<i", x) for x in v)
+    raise TypeError(v)
+
+
+def write_gguf(path, metadata, tensors, data_size=0):
+    """tensors: [(name, dims, ggml type)]; data_size pads the file (sparse)."""
+    out = [b"GGUF", struct.pack("<IQQ", 3, len(tensors), len(metadata))]
+    for key, value in metadata.items():
+        out.append(_str(key) + _value(value))
+    for name, dims, ttype in tensors:
+        out.append(_str(name) + struct.pack("<I", len(dims))
+                   + b"".join(struct.pack("<Q", d) for d in dims) + struct.pack("<IQ", ttype, 0))
+    header = b"".join(out)
+    with open(path, "wb") as f:
+        f.write(header)
+        if data_size:
+            f.truncate(len(header) + data_size)
+    return len(header)
+
+
+LLAMA_META = {
+    "general.architecture": "llama",
+    "general.file_type": 15,
+    "llama.block_count": 32,
+    "llama.embedding_length": 4096,
+    "llama.context_length": 8192,
+    "llama.attention.head_count": 32,
+    "llama.attention.head_count_kv": 8,
+    "tokenizer.ggml.tokens": [f"tok{i}" for i in range(5000)],
+}
+
+
+class ReadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "model.gguf"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_metadata_params_and_weights(self):
+        write_gguf(self.path, LLAMA_META, [
+            ("token_embd.weight", [4096, 1000], Q4_K),
+            ("output_norm.weight", [4096], F32),
+        ])
+        info = gguf.read_gguf(self.path)
+        self.assertEqual((info.arch, info.quantization, info.context_length), ("llama", "Q4_K_M", 8192))
+        self.assertEqual(info.n_params, 4096 * 1000 + 4096)
+        self.assertEqual(info.weight_bytes, 4096 * 1000 // 256 * 144 + 4096 * 4)
+        self.assertIsInstance(info.metadata["tokenizer.ggml.tokens"], gguf.SkippedArray)
+        self.assertEqual(info.metadata["tokenizer.ggml.tokens"].count, 5000)
+
+    def test_kv_cache_uses_gqa_heads(self):
+        write_gguf(self.path, LLAMA_META, [])
+        info = gguf.read_gguf(self.path)
+        # 32 layers * 8 kv heads * (128 + 128) * 2 bytes per token
+        self.assertEqual(gguf.kv_cache_bytes(info, 4096), 4096 * 32 * 8 * 256 * 2)
+        self.assertEqual(gguf.kv_cache_bytes(info, 4096, "q8_0"), 4096 * 32 * 8 * 256 * 34 // 32)
+        self.assertEqual(gguf.estimate(info, num_ctx=100000).num_ctx, 8192)  # capped at training ctx
+
+    def test_per_layer_head_counts(self):
+        meta = dict(LLAMA_META, **{"llama.block_count": 3, "llama.attention.head_count_kv": [8, 0, 4]})
+        write_gguf(self.path, meta, [])
+        self.assertEqual(gguf.kv_cache_bytes(gguf.read_gguf(self.path), 10), 10 * 12 * 256 * 2)
+
+    def test_multi_gb_file_reads_only_header(self):
+        header = write_gguf(self.path, LLAMA_META, [("w", [4096, 4096], Q4_K)], data_size=6 << 30)
+        start = time.perf_counter()
+        info = gguf.read_gguf(self.path)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertGreater(os.path.getsize(self.path), 6 << 30)
+        self.assertLess(header, 1 << 20)
+        self.assertEqual(info.n_params, 4096 * 4096)
+
+    def test_unknown_tensor_type_falls_back_to_file_size(self):
+        header = write_gguf(self.path, {"general.architecture": "x"}, [("w", [10], 999)], data_size=1000)
+        aligned = -(-header // 32) * 32
+        self.assertEqual(gguf.read_gguf(self.path).weight_bytes, header + 1000 - aligned)
+
+    def test_rejects_non_gguf_and_truncated(self):
+        self.path.write_bytes(b"not a model")
+        with self.assertRaises(gguf.GGUFError):
+            gguf.read_gguf(self.path)
+        write_gguf(self.path, LLAMA_META, [])
+        data = self.path.read_bytes()
+        self.path.write_bytes(data[:200])
+        with self.assertRaises(gguf.GGUFError):
+            gguf.read_gguf(self.path)
+
+    def test_fit_verdict(self):
+        gb = 1024 ** 3
+        self.assertEqual(gguf.fit_verdict(3 * gb, 8 * gb, 4 * gb), "fits")
+        self.assertEqual(gguf.fit_verdict(6 * gb, 8 * gb, 4 * gb), "tight")
+        self.assertEqual(gguf.fit_verdict(8 * gb, 8 * gb, 4 * gb), "no")
+
+
+class OllamaBlobTest(unittest.TestCase):
+    def test_model_fit_from_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = Path(tmp)
+            (store / "blobs").mkdir()
+            weights = store / "w.gguf"
+            write_gguf(weights, LLAMA_META, [("w", [4096, 256], Q4_K)])
+            digest = "sha256:" + hashlib.sha256(weights.read_bytes()).hexdigest()
+            weights.rename(ollama_store.blob_path(store, digest))
+            manifest = store / "manifests" / ollama_store.manifest_relpath("llama3.1:8b")
+            manifest.parent.mkdir(parents=True)
+            manifest.write_text(json.dumps({"layers": [
+                {"digest": digest, "size": 1, "mediaType": ollama_store.WEIGHTS_MEDIA_TYPE}]}))
+
+            mem = gguf.model_fit("llama3.1:8b", num_ctx=2048, store=store)
+            self.assertEqual(mem.weights, 4096 * 256 // 256 * 144)
+            self.assertEqual(mem.kv_cache, 2048 * 32 * 8 * 256 * 2)
+            self.assertIsNone(gguf.model_fit("missing:1b", store=store))
+
+
+if __name__ == "__main__":
+    unittest.main()
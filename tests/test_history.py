@@ -0,0 +1,125 @@
+"""Tests for the round-robin status history (history.py)"""
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import history, keycheck  # noqa: E402
+
+T0 = 1_800_000_000  # a multiple of 3600, so every archive slot starts here
+
+
+class MetricHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = history.MetricHistory(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rollups_keep_mean_min_max(self):
+        for i, value in enumerate((1.0, 0.0, 1.0, 1.0, 1.0, 1.0)):
+            self.store.record("service.ollama", value, T0 + i * 10)
+        raw = self.store.series("service.ollama", "raw", now=T0 + 50)
+        self.assertEqual(len(raw), 6)
+        self.assertEqual(raw[1], (T0 + 10, 0.0, 0.0, 0.0))
+        minute = self.store.series("service.ollama", "minute", now=T0 + 50)
+        self.assertEqual(len(minute), 1)
+        ts, mean, lo, hi = minute[0]
+        self.assertEqual((ts, lo, hi), (T0, 0.0, 1.0))
+        self.assertAlmostEqual(mean, 5 / 6)
+
+    def test_ring_wraps_and_drops_stale_slots(self):
+        step, slots = history.ARCHIVES["raw"]
+        for i in range(slots + 20):
+            self.store.record("m", float(i), T0 + i * step)
+        now = T0 + (slots + 19) * step
+        raw = self.store.series("m", "raw", now=now)
+        self.assertEqual(len(raw), slots)
+        self.assertEqual(raw[0][1], 20.0)
+        self.assertEqual(raw[-1][1], float(slots + 19))
+        self.assertEqual([p[0] for p in raw], sorted(p[0] for p in raw))
+        # An hour later every raw slot is older than the window
+        self.assertEqual(self.store.series("m", "raw", now=now + slots * step), [])
+        self.assertEqual(len(self.store.series("m", "raw", span=60, now=now)), 7)
+
+    def test_file_size_is_fixed(self):
+        self.store.record("provider.groq.latency_ms", 150, T0)
+        path = self.store.path("provider.groq.latency_ms")
+        size = path.stat().st_size
+        self.assertEqual(size, history.FILE_SIZE)
+        for i in range(2000):
+            self.store.record("provider.groq.latency_ms", 150 + i, T0 + i * 3600)
+        self.assertEqual(path.stat().st_size, size)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+        self.assertEqual(self.store.metrics(), ["provider.groq.latency_ms"])
+
+    def test_foreign_file_is_reset(self):
+        path = self.store.path("m")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"not a history file")
+        self.assertEqual(self.store.series("m", now=T0), [])
+        self.store.record("m", 2.0, T0)
+        self.assertEqual(self.store.series("m", now=T0), [(T0, 2.0, 2.0, 2.0)])
+
+
+class ProbeTest(unittest.TestCase):
+    def test_firewall_from_ufw_conf(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".conf") as f:
+            f.write("# comment\nENABLED=yes\nLOGLEVEL=low\n")
+            f.flush()
+            self.assertEqual(history.probe_firewall(f.name), {"firewall.ufw": 1.0})
+        self.assertEqual(history.probe_firewall("/nonexistent/ufw.conf"), {})
+
+    def test_provider_probe_respects_rate_limit(self):
+        spec = types.SimpleNamespace(id="groq")
+        check = lambda s, k: {"status": keycheck.STATUS_VALID, "latency_ms": 120}  # noqa: E731
+        limited = types.SimpleNamespace(try_acquire=lambda p: (False, 5.0))
+        self.assertEqual(history.probe_provider(spec, "k", limited, check), {})
+        self.assertEqual(history.probe_provider(spec, "k", None, check),
+                         {"provider.groq.up": 1.0, "provider.groq.latency_ms": 120})
+
+    def test_ollama_probe_never_generates(self):
+        seen = []
+
+        class Handler(StubHandler):
+            def do_GET(self):
+                seen.append(self.path)
+                self.send_json({"version": "0.6.0"} if self.path == "/api/version"
+                               else {"models": [{"name": "gemma3:1b"}]})
+
+            do_POST = do_GET
+
+        server = StubServer(Handler)
+        try:
+            samples = history.probe_ollama(server.url)
+        finally:
+            server.close()
+        self.assertEqual(sorted(seen), ["/api/ps", "/api/version"])
+        self.assertEqual((samples["ollama.up"], samples["ollama.loaded_models"]), (1.0, 1.0))
+        self.assertNotIn("ollama.tokens_per_sec", samples)
+        self.assertEqual(history.probe_ollama("http://127.0.0.1:9"), {"ollama.up": 0.0})
+
+    def test_traffic_replaces_provider_probes(self):
+        self.assertEqual(history.traffic_samples("local", True, 50, 2.0),
+                         {"provider.local.up": 1.0, "ollama.tokens_per_sec": 25.0})
+        self.assertEqual(history.traffic_samples("groq", False, 50, 2.0), {"provider.groq.up": 0.0})
+        with tempfile.TemporaryDirectory() as tmp:
+            store = history.MetricHistory(tmp)
+            self.assertTrue(history.provider_probe_due(store, "groq", now=T0))
+            store.record_many(history.traffic_samples("groq", True), T0)
+            self.assertFalse(history.provider_probe_due(store, "groq", now=T0 + 60))
+            self.assertTrue(history.provider_probe_due(store, "groq", now=T0 + history.PROVIDER_PROBE_SECONDS + 10))
+
+    def test_format_value(self):
+        self.assertEqual(history.format_value("service.ufw", 1.0), "up")
+        self.assertEqual(history.format_value("service.ufw", 0.5), "up 50%")
+        self.assertEqual(history.format_value("ollama.tokens_per_sec", 12.34), "12.3 tok/s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""Tests for the checkpointed install DAG runner (installdag.py)"""
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import installdag  # noqa: E402
+from laia_common.installdag import Step  # noqa: E402
+
+
+class Recorder:
+    """Callable steps that log their runs and track concurrency."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = []
+        self.active = {}
+        self.peak = {}
+
+    def step(self, name, seconds=0.05, fail=False, group="", **kwargs):
+        def run(progress):
+            with self.lock:
+                self.runs.append(name)
+                self.active[group] = self.active.get(group, 0) + 1
+                self.peak[group] = max(self.peak.get(group, 0), self.active[group])
+            try:
+                progress(0.5, "halfway")
+                time.sleep(seconds)
+                if fail:
+                    raise RuntimeError(f"{name} broke")
+            finally:
+                with self.lock:
+                    self.active[group] -= 1
+        return Step(name, run, group=group, **kwargs)
+
+
+class GraphTest(unittest.TestCase):
+    def test_order_and_errors(self):
+        steps = [Step("c", "", deps=("a", "b")), Step("a", ""), Step("b", "", deps=("a",))]
+        self.assertEqual(installdag.topo_order(steps), ["a", "b", "c"])
+        with self.assertRaisesRegex(installdag.DagError, "cycle"):
+            installdag.topo_order([Step("a", "", deps=("b",)), Step("b", "", deps=("a",))])
+        with self.assertRaisesRegex(installdag.DagError, "unknown"):
+            installdag.topo_order([Step("a", "", deps=("x",))])
+        with self.assertRaisesRegex(installdag.DagError, "duplicate"):
+            installdag.topo_order([Step("a", ""), Step("a", "")])
+
+
+class RunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = Path(self.tmp.name) / "state.json"
+        self.log = Path(self.tmp.name) / "logs" / "install.log"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_independent_steps_run_in_parallel(self):
+        rec = Recorder()
+        steps = [rec.step("ollama", 0.3), rec.step("venv", 0.3),
+                 rec.step("service", 0.01, deps=("ollama", "venv"))]
+        events = []
+        start = time.monotonic()
+        result = installdag.Runner(steps, on_event=events.append).run()
+        self.assertTrue(result.ok)
+        self.assertLess(time.monotonic() - start, 0.55)
+        self.assertEqual(rec.runs[-1], "service")
+        self.assertEqual(rec.peak[""], 2)
+        self.assertEqual(events[-1].overall, 1.0)
+        overall = [e.overall for e in events]
+        self.assertEqual(overall, sorted(overall))
+        self.assertEqual({e.kind for e in events}, {"start", "progress", "done"})
+
+    def test_group_limit(self):
+        rec = Recorder()
+        steps = [rec.step("ollama", 0.01)] + [rec.step(f"model {i}", 0.1, group="pull", deps=("ollama",))
+                                              for i in range(5)]
+        result = installdag.Runner(steps, workers=8, limits={"pull": 2}).run()
+        self.assertTrue(result.ok)
+        self.assertEqual(rec.peak["pull"], 2)
+
+    def test_failure_blocks_dependents_and_rerun_resumes(self):
+        rec = Recorder()
+        flaky = {"fail": True}
+
+        def steps():
+            return [rec.step("ollama"), rec.step("venv"),
+                    rec.step("model a", deps=("ollama",)),
+                    rec.step("model b", deps=("ollama",), fail=flaky["fail"]),
+                    rec.step("service", deps=("model b", "venv"))]
+
+        result = installdag.Runner(steps(), self.state, log_path=self.log).run()
+        self.assertFalse(result.ok)
+        self.assertEqual(result.failed, ["model b"])
+        self.assertEqual(result.status["service"], "blocked")
+        self.assertEqual(result.status["model a"], "done")
+        self.assertEqual(result.errors["model b"], "model b broke")
+        log = self.log.read_text()
+        self.assertIn("❌ model b: model b broke", log)
+        self.assertIn("⏸ service skipped — needs model b", log)
+
+        rec.runs.clear()
+        flaky["fail"] = False
+        events = []
+        result = installdag.Runner(steps(), self.state, on_event=events.append).run()
+        self.assertTrue(result.ok)
+        self.assertEqual(sorted(rec.runs), ["model b", "service"])
+        self.assertEqual(sorted(e.step for e in events if e.kind == "cached"), ["model a", "ollama", "venv"])
+
+    def test_check_and_uncheckpointed_steps(self):
+        rec = Recorder()
+        steps = [rec.step("probe", checkpoint=False), rec.step("model", deps=("probe",), check=lambda: True)]
+        installdag.Runner(steps, self.state).run()
+        installdag.Runner(steps, self.state).run()
+        self.assertEqual(rec.runs, ["probe", "probe"])
+        self.assertEqual(installdag.read_state(self.state), {})
+
+    def test_check_overrides_a_stale_checkpoint(self):
+        rec = Recorder()
+        present = {"model": False}
+
+        def steps():
+            return [rec.step("model", check=lambda: present["model"])]
+
+        self.assertTrue(installdag.Runner(steps(), self.state).run().ok)
+        self.assertIn("model", installdag.read_state(self.state))
+        present["model"] = True
+        self.assertEqual(installdag.Runner(steps(), self.state).run().status["model"], "cached")
+        present["model"] = False                     # removed since it was installed
+        self.assertEqual(installdag.Runner(steps(), self.state).run().status["model"], "done")
+        self.assertEqual(rec.runs, ["model", "model"])
+
+    def test_command_steps_stream_output_and_fingerprint_scripts(self):
+        script = Path(self.tmp.name) / "step.sh"
+        script.write_text("echo one\necho two\n")
+        events = []
+
+        def run():
+            return installdag.Runner([Step("cmd", ["sh", script])], self.state, on_event=events.append).run()
+
+        self.assertTrue(run().ok)
+        self.assertEqual([e.message for e in events if e.kind == "output"], ["one", "two"])
+        events.clear()
+        self.assertEqual(run().status["cmd"], "cached")
+        script.write_text("echo changed\nexit 3\n")
+        result = run()
+        self.assertEqual(result.errors["cmd"], "exit status 3: changed")
+        self.assertNotIn("cmd", installdag.read_state(self.state))
+
+
+class AiStackTest(unittest.TestCase):
+    def test_graph(self):
+        models = installdag.stack_models(args=["--minimal"])
+        self.assertEqual(models, ["gemma3:1b"])
+        steps = installdag.ai_stack_steps(["gemma3:1b", "phi4-mini"])
+        order = installdag.topo_order(steps)
+        self.assertLess(order.index("ollama"), order.index("model phi4-mini"))
+        self.assertLess(order.index("openwebui-venv"), order.index("openwebui-service"))
+        by_name = {s.name: s for s in steps}
+        self.assertEqual(by_name["openwebui-venv"].deps, ())       # runs beside the Ollama install
+        self.assertEqual(by_name["model gemma3:1b"].group, "pull")
+        for step in steps:
+            self.assertTrue(Path(step.run[1]).is_file(), step.run)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for gui/laia_common/keycheck.py"""
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import keycheck  # noqa: E402
+from laia_common.providers import ProviderSpec  # noqa: E402
+from laia_common.ratelimit import RateLimiter  # noqa: E402
+
+
+class _AuthHandler(StubHandler):
+    def do_GET(self):
+        self.send_json({}, 200 if self.headers.get("Authorization") == "Bearer good" else 401)
+
+
+class KeyCheckTest(unittest.TestCase):
+    def test_check_key_against_fake_api(self):
+        server = StubServer(_AuthHandler)
+        try:
+            spec = ProviderSpec("fake", "Fake", server.url + "/v1", "FAKE_API_KEY")
+            self.assertEqual(keycheck.check_key(spec, "good")["status"], keycheck.STATUS_VALID)
+            self.assertEqual(keycheck.check_key(spec, "bad")["status"], keycheck.STATUS_INVALID)
+        finally:
+            server.close()
+
+    def test_validate_all_parallel_paced_and_cached(self):
+        specs = {
+            "a": ProviderSpec("a", "A", "http://a", "A_API_KEY", rate_limit="1 req/sec"),
+            "b": ProviderSpec("b", "B", "http://b", "B_API_KEY"),
+        }
+        env = {"A_API_KEY": "1", "A_API_KEY_2": "2", "B_API_KEY": "3"}
+        calls = []
+
+        def fake_check(spec, key):
+            calls.append((spec.id, key, time.monotonic()))
+            return {"status": keycheck.STATUS_VALID, "detail": "OK", "latency_ms": 1,
+                    "checked_at": time.time()}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "checks.json"
+            limiter = RateLimiter.from_providers(specs, Path(tmp) / "ratelimit.json")
+            results = keycheck.validate_all(specs, env, cache_path=cache, check=fake_check,
+                                            limiter=limiter)
+            self.assertEqual(set(results), set(env))
+            a_times = sorted(t for pid, _, t in calls if pid == "a")
+            self.assertGreaterEqual(a_times[1] - a_times[0], 0.9)
+
+            again = keycheck.validate_all(specs, env, cache_path=cache, check=fake_check,
+                                          limiter=limiter)
+            self.assertEqual(len(calls), 3)  # served from cache
+            self.assertTrue(all(r["cached"] for r in again.values()))
+            self.assertNotIn("1", cache.read_text().split('"'))  # keys are never stored
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Tests for the LAN Ollama pool (lanpool.py) and its use by the gateway"""
+import http.client
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import aiconfig, gateway, lanpool, settings  # noqa: E402
+
+
+class _Handler(StubHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_json({"models": [{"name": m} for m in self.server.loaded]})
+
+    def do_POST(self):
+        self.read_json()
+        self.server.chats += 1
+        self.send_json({"choices": [{"message": {"content": self.server.name}}]})
+
+
+class FakeOllama(StubServer):
+    """/api/ps lists `loaded`; /v1/chat/completions answers with the server's name."""
+    handler = _Handler
+
+    def __init__(self, name, loaded=()):
+        self.name = name
+        self.loaded = list(loaded)
+        self.chats = 0
+        super().__init__()
+
+
+class ConfigTest(unittest.TestCase):
+    def test_parse_and_format(self):
+        self.assertEqual(lanpool.parse_host("10.0.0.5"), ("10.0.0.5", 11434))
+        self.assertEqual(lanpool.parse_host(" box:8080 "), ("box", 8080))
+        self.assertEqual(lanpool.parse_host("[fe80::1]:9000"), ("fe80::1", 9000))
+        self.assertEqual(lanpool.format_host("fe80::1", 9000), "[fe80::1]:9000")
+
+    def test_hosts_list_overrides_single_host(self):
+        config = {"lan": {"host": "old", "port": 11434,
+                          "hosts": ["a", "b:1234", {"host": "c"}, "a:11434"]}}
+        self.assertEqual(lanpool.hosts_from_config(config, {"LAIA_LAN_HOST": "env"}),
+                         [("a", 11434), ("b", 1234), ("c", 11434)])
+        self.assertEqual(lanpool.hosts_from_config({"lan": {"host": "old", "hosts": []}},
+                                                   {"LAIA_LAN_HOST": "env", "LAIA_LAN_PORT": "99"}),
+                         [("env", 99)])
+        self.assertEqual(lanpool.hosts_from_config({}), [])
+
+    def test_removing_the_single_host_empties_the_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            system, user = Path(tmp) / "config.yaml", Path(tmp) / "user.yaml"
+            system.write_text('lan:\n  host: "old"\n  port: 11434\n  hosts: []\n')
+            env = {"LAIA_LAN_HOST": "10.0.0.5", "LAIA_LAN_PORT": "11434"}
+            config = aiconfig.load_ai_config(system, user)
+            self.assertEqual(lanpool.remove_host(("10.0.0.5", 11434), config, env, user),
+                             ["LAIA_LAN_HOST", "LAIA_LAN_PORT"])
+            env = {}
+            config = aiconfig.load_ai_config(system, user)
+            self.assertEqual(lanpool.hosts_from_config(config, env), [("old", 11434)])
+            self.assertEqual(lanpool.remove_host(("old", 11434), config, env, user), [])
+            self.assertEqual(lanpool.hosts_from_config(aiconfig.load_ai_config(system, user), env), [])
+
+    def test_cli_remove_empties_the_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            system, user, keys = Path(tmp) / "config.yaml", Path(tmp) / "user.yaml", Path(tmp) / "keys.env"
+            system.write_text('lan:\n  host: "10.0.0.7"\n  port: 11434\n  hosts: []\n')
+            keys.write_text("LAIA_MODE=lan\nLAIA_LAN_HOST=10.0.0.8\nGROQ_API_KEY=gsk\n")
+            store = settings.Settings(keys, system, user, snapshot_file=None)
+            out = io.StringIO()
+            with mock.patch.object(settings, "shared", return_value=store), redirect_stdout(out):
+                self.assertEqual(lanpool.main(["remove", "10.0.0.8"]), 0)    # from LAIA_LAN_HOST
+                self.assertEqual(lanpool.main(["remove", "10.0.0.7"]), 0)    # from lan.host
+            self.assertEqual(out.getvalue().splitlines(), ["✅ LAN pool: 10.0.0.7:11434", "✅ LAN pool: empty"])
+            self.assertEqual(lanpool.hosts_from_config(store.config(), store.env()), [])
+            self.assertEqual(store.env(), {"LAIA_MODE": "lan", "GROQ_API_KEY": "gsk"})
+
+
+class RoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.pool = lanpool.LanPool([("a", 1), ("b", 1), ("c", 1)], sticky_ttl=60,
+                                    max_parallel=2, clock=lambda: self.now)
+        self.a, self.b, self.c = self.pool.hosts
+
+    def test_prefers_loaded_model_then_least_busy(self):
+        self.b.loaded = ("gemma3:4b",)
+        self.assertIs(self.pool.acquire("gemma3:4b"), self.b)
+        self.assertIs(self.pool.acquire("gemma3:4b"), self.b)
+        # b is at max_parallel: an idle cold host beats queueing
+        self.assertIs(self.pool.acquire("gemma3:4b"), self.a)
+        self.assertIs(self.pool.acquire("phi4-mini"), self.c)
+        self.pool.release(self.b)
+        self.assertEqual(self.b.active, 1)
+
+    def test_latest_tag_matches(self):
+        self.c.loaded = ("llama3.2:latest",)
+        self.assertIs(self.pool.acquire("llama3.2"), self.c)
+
+    def test_sessions_stick_until_host_fails_or_ttl(self):
+        first = self.pool.acquire("m", session="chat-1")
+        for _ in range(3):
+            self.pool.acquire("m")  # first is now the busiest host...
+        self.assertIs(self.pool.acquire("m", session="chat-1"), first)  # ...but the session stays
+        self.pool.release(first, ok=False)
+        self.pool.release(first, ok=False)
+        self.assertFalse(first.healthy)
+        self.assertIsNot(self.pool.acquire("m", session="chat-1"), first)
+        self.now += 61
+        self.pool.acquire("m")
+        self.assertNotIn("chat-1", self.pool._sessions)
+
+    def test_all_down(self):
+        for host in self.pool.hosts:
+            host.healthy = False
+        self.assertIsNone(self.pool.acquire("m"))
+
+
+class HealthAndGatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.warm = FakeOllama("warm", loaded=["gemma3:4b"])
+        self.cold = FakeOllama("cold")
+        self.pool = lanpool.LanPool([self.cold.address, self.warm.address, ("127.0.0.1", 9)],
+                                    fail_threshold=1, timeout=1)
+
+    def tearDown(self):
+        for server in (self.warm, self.cold):
+            server.close()
+
+    def test_health_check_reads_api_ps(self):
+        self.pool.refresh()
+        cold, warm, dead = self.pool.hosts
+        self.assertEqual(warm.loaded, ("gemma3:4b",))
+        self.assertTrue(cold.healthy and warm.healthy)
+        self.assertFalse(dead.healthy)
+        self.assertTrue(dead.detail)
+
+    def test_gateway_routes_lan_through_pool(self):
+        self.pool.refresh()
+        route = gateway.Route("lan", "http://unused:1/v1", "gemma3:4b")
+        gw = gateway.Gateway(gateway.Router([route]), lan_pool=self.pool)
+        server = gateway.GatewayServer(gw, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            def ask(session=None):
+                conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+                headers = {"Content-Type": "application/json"}
+                if session:
+                    headers["X-LAIA-Session"] = session
+                conn.request("POST", "/v1/chat/completions", json.dumps(
+                    {"model": "auto", "messages": [{"role": "user", "content": "hi"}]}), headers)
+                reply = json.loads(conn.getresponse().read())
+                conn.close()
+                return reply["choices"][0]["message"]["content"]
+
+            self.assertEqual(ask(), "warm")
+            # Pin a session on the cold host, then keep it there
+            self.pool._sessions["s1"] = (self.pool.hosts[0], self.pool.clock() + 60)
+            self.assertEqual([ask("s1") for _ in range(3)], ["cold"] * 3)
+            self.assertTrue(all(h.active == 0 for h in self.pool.hosts))
+
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+            conn.request("GET", "/health")
+            health = json.loads(conn.getresponse().read())
+            conn.close()
+            self.assertEqual(len(health["lan_hosts"]), 3)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
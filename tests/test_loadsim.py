@@ -0,0 +1,113 @@
+"""Tests for the multi-user load simulator (loadsim.py) against its stub server"""
+import csv
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import loadsim  # noqa: E402
+
+FAST = [
+    loadsim.Profile("chat", weight=3, turns=(1, 3), prompt_words=(5, 30), max_tokens=8, think_s=0.02),
+    loadsim.Profile("essay", weight=1, turns=(1, 1), prompt_words=(200, 400), max_tokens=12, think_s=0.02),
+]
+
+
+class StubTest(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def stub(self, **kwargs):
+        server = loadsim.StubServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server
+
+    def test_streams_both_apis(self):
+        server = self.stub(token_ms=2)
+        for api, url in (("ollama", server.base), ("openai", server.base + "/v1")):
+            record = loadsim.Target(url, api, "m").chat([{"role": "user", "content": "hi there"}], 5,
+                                                        loadsim.RequestRecord("t", 0, 2))
+            self.assertEqual(record.error, "", api)
+            self.assertEqual(record.tokens, 5)
+            self.assertEqual(len(record.itl_ms), 4)
+            self.assertEqual(record.text, "tok0 tok1 tok2 tok3 tok4 ")
+            self.assertLessEqual(record.ttft_ms, record.e2e_ms)
+            self.assertEqual(record.prefill_ms is not None, api == "ollama")
+
+    def test_errors_are_recorded(self):
+        server = self.stub()
+        record = loadsim.Target(server.base + "/nowhere", "ollama", "m").chat(
+            [{"role": "user", "content": "x"}], 3, loadsim.RequestRecord("t", 0, 1))
+        self.assertIn("Not Found", record.error)
+
+    def test_poisson_step_with_conversations(self):
+        server = self.stub(slots=4, token_ms=1)
+        sim = loadsim.Simulator(loadsim.Target(server.base, "ollama", "m"), FAST, seed=7)
+        step = sim.run_step(1200, 1.0)      # 20 conversations/s on average
+        summary = step.summary()
+        self.assertGreater(step.sessions, 8)
+        self.assertLess(step.sessions, 40)
+        self.assertEqual(summary["errors"], 0)
+        self.assertGreaterEqual(summary["requests"], step.sessions)
+        self.assertGreater(max(r.turn for r in step.records), 0)          # multi-turn sessions ran
+        self.assertEqual({r.tokens for r in step.records if r.profile == "chat"}, {8})
+        self.assertTrue(all(r.queue_ms is not None for r in step.records))
+        self.assertGreater(summary["tokens_per_sec"], 0)
+        self.assertGreaterEqual(summary["peak_active"], 1)
+        self.assertLessEqual(summary["ttft_ms"]["p50"], summary["ttft_ms"]["p99"])
+
+    def test_one_slot_queues(self):
+        server = self.stub(slots=1, token_ms=3, contention=0)
+        sim = loadsim.Simulator(loadsim.Target(server.base + "/v1", "openai", "m"), FAST[:1], seed=1)
+        sim.calibrate()
+        self.assertIsNotNone(sim.baseline_ttft_ms)
+        summary = sim.run_step(1800, 0.6).summary()
+        self.assertEqual(summary["errors"], 0)
+        # Replies take ~24 ms and arrive every ~33 ms, so some wait behind others
+        self.assertGreater(summary["queue_ms"]["p99"], 5)
+
+    def test_cli_writes_json_and_csv(self):
+        server = self.stub(slots=2, token_ms=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            profiles = Path(tmp) / "profiles.yaml"
+            profiles.write_text("- {name: quick, turns: [1, 2], prompt_words: [3, 9], max_tokens: 4, think_s: 0.01}\n")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = loadsim.main(["run", "--url", server.base, "--model", "m", "--rates", "300,900",
+                                     "--duration", "0.4", "--seed", "3", "--profiles", str(profiles),
+                                     "--json", f"{tmp}/r.json", "--csv", f"{tmp}/r.csv"])
+            self.assertEqual(code, 0)
+            self.assertIn("Sustains 900 conversations/min", out.getvalue())
+            data = json.loads(Path(f"{tmp}/r.json").read_text())
+            self.assertEqual([s["rate_per_min"] for s in data["steps"]], [300, 900])
+            self.assertEqual(data["profiles"][0]["turns"], [1, 2])
+            with open(f"{tmp}/r.csv") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(list(rows[0]), loadsim.CSV_FIELDS)
+            self.assertGreater(float(rows[1]["tokens_per_sec"]), 0)
+
+
+class SustainableRateTest(unittest.TestCase):
+    def step(self, rate, p95, errors=0):
+        return {"rate_per_min": rate, "requests": 10, "errors": errors, "ttft_ms": {"p95": p95}}
+
+    def test_stops_at_first_miss(self):
+        steps = [self.step(2, 300), self.step(5, 900), self.step(10, 4000), self.step(20, 800)]
+        self.assertEqual(loadsim.sustainable_rate(steps, 1000)["rate_per_min"], 5)
+        self.assertIsNone(loadsim.sustainable_rate([self.step(2, 100, errors=1)], 1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for gui/laia_common/logbuffer.py"""
+import re
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import logbuffer  # noqa: E402
+
+
+def lines(n, start=0):
+    return [(6, f"line {i} ollama ready" if i % 10 == 0 else f"line {i}") for i in range(start, start + n)]
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_evicts_oldest_by_memory(self):
+        buf = logbuffer.LogRingBuffer(max_bytes=20_000)
+        buf.extend(lines(1000))
+        self.assertLessEqual(buf.nbytes, 20_000)
+        self.assertGreater(buf.first_seq, 0)
+        self.assertEqual(buf.next_seq, 1000)
+        self.assertIsNone(buf.get(0))
+        self.assertEqual(buf.get(999), (6, "line 999"))
+
+    def test_seq_survives_clear(self):
+        buf = logbuffer.LogRingBuffer()
+        buf.extend(lines(5))
+        buf.clear()
+        self.assertEqual(buf.extend(lines(1)), 5)
+
+
+class FilterTest(unittest.TestCase):
+    def test_substring_is_case_insensitive(self):
+        self.assertTrue(logbuffer.LogFilter("OLLAMA").matches("ollama started"))
+        self.assertFalse(logbuffer.LogFilter("denied").matches("ollama started"))
+
+    def test_regex_and_invalid_regex(self):
+        self.assertTrue(logbuffer.LogFilter(r"line \d+0 ", regex=True).matches("line 10 ollama"))
+        with self.assertRaises(re.error):
+            logbuffer.LogFilter("(", regex=True)
+
+    def test_narrows(self):
+        ab = logbuffer.LogFilter("ab")
+        self.assertTrue(logbuffer.LogFilter("abc").narrows(ab))
+        self.assertFalse(logbuffer.LogFilter("a").narrows(ab))
+        self.assertTrue(ab.narrows(logbuffer.LogFilter("")))
+        self.assertFalse(logbuffer.LogFilter("abc", regex=True).narrows(ab))
+
+
+class FilteredIndexTest(unittest.TestCase):
+    def test_scan_then_catch_up_and_evict(self):
+        buf = logbuffer.LogRingBuffer(max_bytes=50_000)
+        buf.extend(lines(500))
+        flt = logbuffer.LogFilter("ready")
+        index = logbuffer.FilteredIndex(flt)
+
+        first_seq, entries = buf.snapshot()
+        seqs = logbuffer.scan(first_seq, entries, flt)
+        buf.extend(lines(500, start=500))  # arrives while "scanning"
+        index.replace(seqs, first_seq + len(entries), buf)
+
+        expected = [s for s in range(buf.first_seq, buf.next_seq) if s % 10 == 0]
+        self.assertEqual(index.seqs, expected)
+
+    def test_refine_matches_scan(self):
+        buf = logbuffer.LogRingBuffer()
+        buf.extend(lines(2000))
+        first_seq, entries = buf.snapshot()
+        broad = logbuffer.scan(first_seq, entries, logbuffer.LogFilter("line 1"))
+        narrow = logbuffer.LogFilter("line 15")
+        self.assertEqual(logbuffer.refine(broad, first_seq, entries, narrow),
+                         logbuffer.scan(first_seq, entries, narrow))
+
+    def test_cancelled_scan_returns_none(self):
+        cancelled = threading.Event()
+        cancelled.set()
+        self.assertIsNone(logbuffer.scan(0, lines(10), logbuffer.LogFilter("x"), cancelled))
+
+
+class JournalRecordTest(unittest.TestCase):
+    def test_format_record(self):
+        priority, text = logbuffer.format_journal_record({
+            "__REALTIME_TIMESTAMP": "1700000000000000",
+            "SYSLOG_IDENTIFIER": "ollama",
+            "_PID": "42",
+            "PRIORITY": "3",
+            "MESSAGE": [104, 105],
+        })
+        self.assertEqual(priority, 3)
+        self.assertTrue(text.endswith("ollama[42]: hi"))
+
+    def test_command_lists_units(self):
+        cmd = logbuffer.JournalFollower(lambda b: None, units=("ollama",)).command()
+        self.assertIn("--unit=ollama", cmd)
+        self.assertIn("--output=json", cmd)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Tests for the memory-pressure guard (memguard.py)"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import aiconfig, memguard  # noqa: E402
+
+PSI = """some avg10=12.50 avg60=4.10 avg300=1.00 total=123456
+full avg10=3.20 avg60=1.00 avg300=0.20 total=23456
+"""
+MEMINFO = """MemTotal:        8388608 kB
+MemFree:          204800 kB
+MemAvailable:    1048576 kB
+Buffers:           10240 kB
+"""
+
+
+def sample(psi=0.0, available=4096):
+    return memguard.Sample(psi, 0.0, available, 8192)
+
+
+class ReaderTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(memguard.parse_psi(PSI), (12.5, 3.2))
+        self.assertEqual(memguard.parse_meminfo(MEMINFO), (1024, 8192))
+
+    def test_reader_rereads_open_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            psi, meminfo = Path(tmp) / "memory", Path(tmp) / "meminfo"
+            psi.write_text(PSI)
+            meminfo.write_text(MEMINFO)
+            reader = memguard.ProcReader(psi, meminfo)
+            self.assertEqual(reader.sample(), memguard.Sample(12.5, 3.2, 1024, 8192))
+            psi.write_text(PSI.replace("12.50", "00.50"))  # same inode, rewritten in place
+            self.assertEqual(reader.sample().some_avg10, 0.5)
+            reader.close()
+
+            no_psi = memguard.ProcReader(Path(tmp) / "missing", meminfo)
+            self.assertIsNone(no_psi.sample().some_avg10)
+            no_psi.close()
+
+
+class LadderTest(unittest.TestCase):
+    def test_steps_down_the_models_yaml_tier(self):
+        self.assertEqual(memguard.ladder("gemma3:4b"), ["gemma3:4b", "llama3.2:3b", "gemma3:1b"])
+        self.assertEqual(memguard.ladder("gemma3:1b"), ["gemma3:1b"])
+        self.assertEqual(memguard.ladder("unknown:7b"), ["unknown:7b"])
+
+    def test_only_installed_models(self):
+        self.assertEqual(memguard.ladder("gemma3:4b", installed=["gemma3:4b", "gemma3:1b"]),
+                         ["gemma3:4b", "gemma3:1b"])
+
+
+class GuardTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.guard = memguard.MemoryGuard(["gemma3:4b", "gemma3:1b"], aiconfig.catalog_ram_gb(),
+                                          hold_s=20, recover_s=120, clock=lambda: self.now)
+
+    def feed(self, s, seconds, step=2):
+        transitions = []
+        for _ in range(int(seconds / step)):
+            self.now += step
+            t = self.guard.update(s)
+            if t:
+                transitions.append(t)
+        return transitions
+
+    def test_sustained_pressure_steps_down(self):
+        self.assertEqual(self.feed(sample(psi=30), 10), [])  # a spike is not enough
+        self.assertEqual(self.feed(sample(), 2), [])         # ...and resets the hold
+        self.assertEqual(self.feed(sample(psi=30), 18), [])
+        [down] = self.feed(sample(psi=30), 4)
+        self.assertEqual((down.from_model, down.to_model, down.step), ("gemma3:4b", "gemma3:1b", "down"))
+        self.assertIn("PSI", down.reason)
+        self.assertEqual(self.feed(sample(psi=30), 60), [])  # already at the bottom
+
+    def test_low_memavailable_counts_as_pressure(self):
+        [down] = self.feed(sample(available=300), 22)
+        self.assertIn("300 MB", down.reason)
+
+    def test_hysteresis_on_the_way_up(self):
+        self.feed(sample(psi=30), 22)
+        self.assertEqual(self.guard.model, "gemma3:1b")
+        # Between the thresholds: neither pressure nor calm
+        self.assertEqual(self.feed(sample(psi=5), 300), [])
+        # Calm, but not enough memory for the 3 GB bigger model
+        self.assertEqual(self.feed(sample(psi=0, available=2048), 300), [])
+        self.assertEqual(self.feed(sample(psi=0), 100), [])
+        [up] = self.feed(sample(psi=0), 22)
+        self.assertEqual((up.to_model, up.step), ("gemma3:4b", "up"))
+
+
+class _Handler(StubHandler):
+    def do_GET(self):
+        self.send_json({"models": [{"name": "gemma3:4b"}, {"name": "gemma3:1b"}]})
+
+    def do_POST(self):
+        body = self.read_json()
+        if body.get("keep_alive") == 0:
+            self.server.unloaded.append(body["model"])
+        self.send_json({"done": True})
+
+
+class FakeOllama(StubServer):
+    handler = _Handler
+
+    def __init__(self):
+        self.unloaded = []
+        super().__init__()
+
+
+class ScriptedReader:
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def sample(self):
+        return self.samples.pop(0)
+
+    def close(self):
+        pass
+
+
+class WatchTest(unittest.TestCase):
+    def test_unloads_and_publishes_the_smaller_model(self):
+        server = FakeOllama()
+        config = {"local": {"host": "127.0.0.1", "port": server.server_port, "model": "gemma3:4b"},
+                  "memguard": {"interval_s": 0, "hold_s": 0}}
+        with tempfile.TemporaryDirectory() as tmp:
+            state, log = Path(tmp) / "memguard.json", Path(tmp) / "memguard.log"
+            seen = []
+            real_write = memguard.write_state
+
+            def spy(configured, model, path):
+                real_write(configured, model, path)
+                seen.append(memguard.StateReader(path).model_for("gemma3:4b"))
+
+            memguard.write_state = spy
+            try:
+                memguard.watch(config, state, log, ScriptedReader([sample(psi=50)]), iterations=1)
+            finally:
+                memguard.write_state = real_write
+                server.close()
+            self.assertEqual(server.unloaded, ["gemma3:4b"])
+            self.assertEqual(seen, ["gemma3:4b", "gemma3:1b", "gemma3:4b"])  # reset on exit
+            [entry] = memguard.read_log(path=log)
+            self.assertEqual(entry.to_model, "gemma3:1b")
+            self.assertIn("⬇ gemma3:4b → gemma3:1b", memguard.describe(entry))
+
+    def test_state_reader_only_overrides_its_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "memguard.json"
+            reader = memguard.StateReader(path)
+            self.assertEqual(reader.model_for("gemma3:4b"), "gemma3:4b")
+            memguard.write_state("gemma3:4b", "gemma3:1b", path)
+            self.assertEqual(reader.model_for("gemma3:4b"), "gemma3:1b")
+            self.assertEqual(reader.model_for("phi4-mini"), "phi4-mini")
+
+    def test_log_is_capped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "memguard.log"
+            for i in range(12):
+                memguard.append_log(memguard.Transition(i, "a", "b", "down", str(i)), log, max_lines=5)
+            self.assertEqual([e.reason for e in memguard.read_log(path=log)], ["7", "8", "9", "10", "11"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""LAN model mirror (mirror.py): a server process and this process as client, on loopback"""
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+from fakeserver import StubHandler, StubServer
+
+GUI_DIR = Path(__file__).resolve().parent.parent / "gui"
+sys.path.insert(0, str(GUI_DIR))
+from laia_common import mirror, ollama_store  # noqa: E402
+
+
+def add_model(store, name, layers):
+    """Write blobs + manifest for `name`; returns {digest: bytes}."""
+    blobs = {}
+    entries = []
+    for media_type, data in layers:
+        digest = "sha256:" + hashlib.sha256(data).hexdigest()
+        path = ollama_store.blob_path(store, digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        blobs[digest] = data
+        entries.append({"mediaType": media_type, "digest": digest, "size": len(data)})
+    manifest = store / "manifests" / ollama_store.manifest_relpath(name)
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps({"schemaVersion": 2, "config": entries[-1], "layers": entries[:-1]}))
+    return blobs
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MirrorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.source = Path(cls.tmp.name) / "source"
+        cls.weights = os.urandom(3 * 1024 * 1024 + 17)
+        cls.blobs = add_model(cls.source, "gemma3:1b", [
+            (ollama_store.WEIGHTS_MEDIA_TYPE, cls.weights),
+            ("application/vnd.ollama.image.template", b"{{ .Prompt }}"),
+            ("application/vnd.docker.container.image.v1+json", b'{"model_format":"gguf"}'),
+        ])
+        add_model(cls.source, "tampered:1b", [(ollama_store.WEIGHTS_MEDIA_TYPE, b"original weights"),
+                                              ("application/vnd.docker.container.image.v1+json", b"{}")])
+        digest = "sha256:" + hashlib.sha256(b"original weights").hexdigest()
+        ollama_store.blob_path(cls.source, digest).write_bytes(b"poisoned weights")
+
+        cls.discovery_port = free_udp_port()
+        cls.server = subprocess.Popen(
+            [sys.executable, "-m", "laia_common.mirror", "serve", "--bind", "127.0.0.1", "--port", "0",
+             "--discovery-port", str(cls.discovery_port), "--store", str(cls.source)],
+            env=dict(os.environ, PYTHONPATH=str(GUI_DIR)), stdout=subprocess.PIPE, text=True)
+        banner = cls.server.stdout.readline()
+        cls.url = banner.split()[3]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait(10)
+        cls.server.stdout.close()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.dest = Path(tempfile.mkdtemp(dir=self.tmp.name))
+
+    def test_discovery(self):
+        self.assertEqual(mirror.discover(2.0, self.discovery_port, "127.0.0.1"), self.url)
+        self.assertIsNone(mirror.discover(0.2, free_udp_port(), "127.0.0.1"))
+
+    def test_find_mirror_broadcasts_only_when_opted_in(self):
+        env = {k: v for k, v in os.environ.items() if k != "LAIA_MIRROR"}
+        with mock.patch.dict(os.environ, env, clear=True), \
+                mock.patch.object(mirror, "discover", return_value=self.url) as probe:
+            self.assertIsNone(mirror.find_mirror({}))
+            self.assertIsNone(mirror.find_mirror({"mirror": {"url": ""}}))
+            probe.assert_not_called()
+            self.assertEqual(mirror.find_mirror({"mirror": {"url": self.url + "/"}}), self.url)
+            self.assertEqual(mirror.find_mirror({"mirror": {"discover": True}}), self.url)
+            probe.assert_called_once()
+
+    def test_parallel_chunked_pull(self):
+        seen = []
+        mirror.pull_into_store(self.url, "gemma3:1b", self.dest, workers=4, chunk_size=256 * 1024,
+                               on_progress=lambda done, total: seen.append((done, total)))
+        for digest, data in self.blobs.items():
+            self.assertEqual(ollama_store.blob_path(self.dest, digest).read_bytes(), data)
+        self.assertEqual(ollama_store.model_weights_blob("gemma3:1b", self.dest).stat().st_size,
+                         len(self.weights))
+        self.assertEqual(seen[-1][0], seen[-1][1])
+        self.assertEqual(list((self.dest / "blobs").glob("*-partial")), [])
+        # Second pull finds every blob in place
+        self.assertEqual(mirror.pull_into_store(self.url, "gemma3:1b", self.dest), 0)
+
+    def test_range_requests(self):
+        digest = next(d for d, data in self.blobs.items() if data == self.weights)
+        request = urllib.request.Request(f"{self.url}/v2/library/gemma3/blobs/{digest}",
+                                         headers={"Range": "bytes=100-199"})
+        with urllib.request.urlopen(request) as r:
+            self.assertEqual(r.status, 206)
+            self.assertEqual(r.read(), self.weights[100:200])
+            self.assertEqual(r.headers["Content-Range"], f"bytes 100-199/{len(self.weights)}")
+        request.headers["Range"] = f"bytes={len(self.weights)}-"
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(request)
+        self.assertEqual(cm.exception.code, 416)
+
+    def truncating_proxy(self, failures):
+        """Proxy to the mirror that hangs up halfway through the first `failures` blob replies."""
+        upstream, left = self.url, [failures]
+
+        class Handler(StubHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                headers = {k: v for k, v in self.headers.items() if k.lower() in ("range", "accept")}
+                with urllib.request.urlopen(urllib.request.Request(upstream + self.path, headers=headers)) as r:
+                    status, reply, data = r.status, dict(r.headers), r.read()
+                cut = "/blobs/" in self.path and left[0] > 0
+                if cut:
+                    left[0] -= 1
+                self.send_response(status)
+                for name in ("Content-Type", "Content-Range", "Docker-Content-Digest"):
+                    if name in reply:
+                        self.send_header(name, reply[name])
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data[:len(data) // 2] if cut else data)
+                self.close_connection = cut
+
+        server = StubServer(Handler)
+        self.addCleanup(server.close)
+        return server.url
+
+    def test_truncated_transfer_is_retried(self):
+        seen = []
+        mirror.pull_into_store(self.truncating_proxy(2), "gemma3:1b", self.dest, workers=1,
+                               chunk_size=1024 * 1024, on_progress=lambda done, total: seen.append((done, total)))
+        for digest, data in self.blobs.items():
+            self.assertEqual(ollama_store.blob_path(self.dest, digest).read_bytes(), data)
+        self.assertEqual(seen[-1][0], seen[-1][1])
+
+    def test_truncated_mirror_falls_back_to_the_registry(self):
+        proxy = self.truncating_proxy(1000)
+        pulled = subprocess.CompletedProcess(["ollama"], 0, "", "")
+        with mock.patch.object(mirror.ollama_store, "find_store", return_value=self.dest), \
+                mock.patch.object(mirror.subprocess, "run", return_value=pulled) as run:
+            self.assertEqual(mirror.install_model("gemma3:1b", proxy), "registry")
+        run.assert_called_once_with(["ollama", "pull", "gemma3:1b"], capture_output=True, text=True)
+
+    def test_integrity_check_rejects_corrupt_blob(self):
+        with self.assertRaises(mirror.MirrorError):
+            mirror.pull_into_store(self.url, "tampered:1b", self.dest)
+        self.assertEqual([p.name for p in (self.dest / "blobs").iterdir()
+                          if p.stat().st_size == len(b"poisoned weights")], [])
+        self.assertFalse((self.dest / "manifests").exists())
+
+    def test_only_store_content_is_served(self):
+        for path in ("/v2/library/../../etc/manifests/passwd", "/v2/library/gemma3/blobs/sha256:..",
+                     "/v2/library/missing/manifests/latest"):
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(self.url + path)
+            self.assertEqual(cm.exception.code, 404, path)
+        with self.assertRaises(mirror.MirrorError):
+            mirror.fetch_manifest(self.url, "missing:7b")
+        with urllib.request.urlopen(self.url + "/laia-mirror") as r:
+            self.assertIn("gemma3:1b", json.load(r)["models"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Tests for the /proc network exposure scanner (netscan.py)"""
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import netscan  # noqa: E402
+
+HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+TCP = HEADER + (
+    "   0: 00000000:2CAA 00000000:0000 0A 00000000:00000000 00:00000000 00000000   998        0 1001 1\n"
+    "   1: 0100007F:0BB8 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 1002 1\n"
+    "   2: 0100007F:2CAA 0100007F:99AA 01 00000000:00000000 00:00000000 00000000  1000        0 1003 1\n"
+)
+TCP6 = HEADER + (
+    "   0: 00000000000000000000000000000000:0C1D 00000000000000000000000000000000:0000 0A "
+    "00000000:00000000 00:00000000 00000000  1000        0 1004 1\n"
+    "   1: 00000000000000000000000001000000:2CEC 00000000000000000000000000000000:0000 0A "
+    "00000000:00000000 00:00000000 00000000  1000        0 1005 1\n"
+)
+UDP = HEADER + (
+    "   0: 0101A8C0:2CEB 00000000:0000 07 00000000:00000000 00:00000000 00000000  1000        0 1006 2\n"
+)
+UFW_RULES = """*filter
+### RULES ###
+
+### tuple ### limit tcp 22 0.0.0.0/0 any 0.0.0.0/0 in
+-A ufw-user-input -p tcp --dport 22 -j ufw-user-limit
+
+### tuple ### allow any 11434 0.0.0.0/0 any 127.0.0.1 in comment=4f6c6c616d61
+### tuple ### allow tcp 3101 0.0.0.0/0 any 192.168.0.0/16 in
+### tuple ### allow tcp 8000:8100 0.0.0.0/0 any 0.0.0.0/0 out
+### END RULES ###
+"""
+
+
+def fake_proc(root, pids):
+    """A /proc with net tables and, per pid, fd symlinks to socket inodes."""
+    (root / "net").mkdir(parents=True)
+    (root / "net" / "tcp").write_text(TCP)
+    (root / "net" / "tcp6").write_text(TCP6)
+    (root / "net" / "udp").write_text(UDP)
+    (root / "self").mkdir()
+    for pid, (comm, inodes) in pids.items():
+        fd = root / str(pid) / "fd"
+        fd.mkdir(parents=True)
+        (root / str(pid) / "comm").write_text(comm + "\n")
+        for n, inode in enumerate(inodes):
+            os.symlink(f"socket:[{inode}]", fd / str(n + 3))
+        os.symlink("/dev/null", fd / "0")
+    return root
+
+
+def fake_ufw(root, enabled=True, rules=UFW_RULES, policy="DROP"):
+    ufw = root / "ufw"
+    ufw.mkdir()
+    (ufw / "ufw.conf").write_text(f"ENABLED={'yes' if enabled else 'no'}\nLOGLEVEL=medium\n")
+    if rules is not None:
+        (ufw / "user.rules").write_text(rules)
+    defaults = root / "default-ufw"
+    defaults.write_text(f'DEFAULT_INPUT_POLICY="{policy}"\n')
+    return ufw, defaults
+
+
+PORTS = {11434: "Ollama", 3000: "OpenWebUI", 3101: "OpenClaw gateway", 11500: "LAIA gateway"}
+
+
+class ParseTest(unittest.TestCase):
+    def test_addresses(self):
+        self.assertEqual(netscan.decode_address("0100007F:2CAA"), ("127.0.0.1", 11434))
+        self.assertEqual(netscan.decode_address("00000000000000000000000001000000:0050"), ("::1", 80))
+        self.assertEqual(netscan.decode_address("0000000000000000FFFF00000100007F:0050"),
+                         ("::ffff:127.0.0.1", 80))
+
+    def test_only_listening_sockets(self):
+        listeners = netscan.parse_proc_net(TCP, "tcp")
+        self.assertEqual([(l.address, l.port, l.inode) for l in listeners],
+                         [("0.0.0.0", 11434, 1001), ("127.0.0.1", 3000, 1002)])
+        self.assertEqual([l.loopback for l in listeners], [False, True])
+        self.assertTrue(netscan.Listener("tcp6", "::ffff:127.0.0.1", 1, 0, 0).loopback)
+
+    def test_ufw_rules(self):
+        rules = netscan.parse_ufw_rules(UFW_RULES)
+        self.assertEqual([r.dport for r in rules], ["22", "11434", "3101"])
+        self.assertTrue(rules[1].loopback_only)
+        self.assertFalse(rules[2].loopback_only)
+        state = netscan.UfwState(True, "DROP", rules, True)
+        self.assertEqual(state.verdict(11434, "tcp"), "blocked")  # loopback rule, then default deny
+        self.assertEqual(state.verdict(3101, "tcp"), "open")
+        self.assertEqual(state.verdict(22, "tcp"), "open")
+        self.assertEqual(netscan.UfwState(True, "ACCEPT", [], True).verdict(3000, "tcp"), "open")
+        self.assertEqual(netscan.UfwState(False).verdict(3000, "tcp"), "open")
+        self.assertEqual(netscan.UfwState(True).verdict(3000, "tcp"), "unknown")
+
+
+class ScanTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.proc = fake_proc(self.root / "proc", {
+            412: ("ollama", [1001, 1003]),
+            977: ("node", [1002, 1004]),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def findings(self, **ufw):
+        scanner = netscan.Scanner(self.proc, *fake_ufw(self.root, **ufw))
+        return {f.service: f for f in scanner.scan(PORTS).findings}
+
+    def test_flags_laia_ports_off_loopback(self):
+        found = self.findings()
+        self.assertEqual(set(found), {"Ollama", "OpenClaw gateway"})  # OpenWebUI is on 127.0.0.1
+        self.assertEqual(found["Ollama"].severity, "warning")         # ufw default deny still holds
+        self.assertIn("ollama, pid 412", found["Ollama"].message)
+        self.assertEqual(found["OpenClaw gateway"].severity, "critical")  # LAN allow rule
+        self.assertIn("node, pid 977", found["OpenClaw gateway"].message)
+
+    def test_firewall_off_is_critical(self):
+        found = self.findings(enabled=False)
+        self.assertEqual({f.severity for f in found.values()}, {"critical"})
+
+    def test_unreadable_rules(self):
+        found = self.findings(rules=None)
+        self.assertEqual(found["Ollama"].severity, "warning")  # no user.rules: default deny applies
+        (self.root / "ufw").rename(self.root / "ufw-old")
+        ufw, defaults = fake_ufw(self.root)
+        (ufw / "user.rules").chmod(0)
+        if os.access(ufw / "user.rules", os.R_OK):
+            self.skipTest("running as root")
+        scanner = netscan.Scanner(self.proc, ufw, defaults)
+        self.assertEqual({f.severity for f in scanner.scan(PORTS).findings}, {"warning"})
+
+    def test_inode_cache_walks_proc_only_for_new_sockets(self):
+        scanner = netscan.Scanner(self.proc, *fake_ufw(self.root))
+        walks = []
+        original = scanner.inodes._walk
+        scanner.inodes._walk = lambda wanted: (walks.append(set(wanted)), original(wanted))
+        scanner.scan(PORTS)
+        scanner.scan(PORTS)
+        self.assertEqual(len(walks), 1)
+        with open(self.proc / "net" / "udp", "a") as f:
+            f.write("   1: 00000000:2CF0 00000000:0000 07 00000000:00000000 00:00000000 00000000"
+                    "  1000        0 1007 2\n")
+        scanner.scan(PORTS)
+        self.assertEqual(len(walks), 2)
+
+
+class LiveTest(unittest.TestCase):
+    def test_finds_own_socket_in_real_proc(self):
+        sock = socket.socket()
+        sock.bind(("0.0.0.0", 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                ufw, defaults = fake_ufw(Path(tmp), enabled=False)
+                report = netscan.Scanner(ufw_dir=ufw, ufw_defaults=defaults).scan({port: "Test"})
+        finally:
+            sock.close()
+        [finding] = report.findings
+        self.assertEqual(finding.listener.pid, os.getpid())
+        self.assertEqual(finding.severity, "critical")
+        self.assertLess(report.elapsed_ms, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
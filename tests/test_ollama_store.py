@@ -0,0 +1,123 @@
+"""Tests for the Ollama blob store analyzer (ollama_store.py) on a synthetic store"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import ollama_store  # noqa: E402
+
+WEIGHTS = ollama_store.WEIGHTS_MEDIA_TYPE
+
+
+def digest(name):
+    return "sha256:" + hashlib.sha256(name.encode()).hexdigest()
+
+
+class StoreFixture:
+    def __init__(self, root):
+        self.root = Path(root)
+        (self.root / "blobs").mkdir(parents=True)
+
+    def blob(self, name, size):
+        d = digest(name)
+        ollama_store.blob_path(self.root, d).write_bytes(b"\0" * size)
+        return d, size
+
+    def model(self, path, layers, media=None):
+        manifest = {
+            "schemaVersion": 2,
+            "config": {"digest": layers[0][0], "size": layers[0][1]},
+            "layers": [{"digest": d, "size": s, "mediaType": media or WEIGHTS} for d, s in layers[1:]],
+        }
+        target = self.root / "manifests" / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(manifest))
+        return target
+
+
+class AnalyzeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = StoreFixture(Path(self.tmp.name) / "models")
+        self.index = Path(self.tmp.name) / "index.json"
+        shared = self.store.blob("license", 100)
+        self.store.model("registry.ollama.ai/library/gemma3/1b",
+                         [self.store.blob("cfg-a", 10), shared, self.store.blob("w-a", 1000)])
+        self.store.model("registry.ollama.ai/library/gemma3/4b",
+                         [self.store.blob("cfg-b", 20), shared, self.store.blob("w-b", 4000)])
+        self.store.model("hf.co/bartowski/phi/latest",
+                         [self.store.blob("cfg-c", 30), self.store.blob("w-c", 500)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyze(self):
+        return ollama_store.analyze(self.store.root, self.index)
+
+    def test_unique_and_shared_bytes(self):
+        report = self.analyze()
+        by_name = {m.name: m for m in report.models}
+        self.assertEqual(list(by_name), ["gemma3:4b", "gemma3:1b", "hf.co/bartowski/phi:latest"])
+        self.assertEqual((by_name["gemma3:1b"].unique, by_name["gemma3:1b"].shared), (1010, 100))
+        self.assertEqual(by_name["hf.co/bartowski/phi:latest"].total, 530)
+        self.assertEqual(report.total_bytes, 10 + 20 + 30 + 100 + 1000 + 4000 + 500)
+        self.assertEqual(report.shared_savings, 100)
+
+    def test_incremental_rescan_reads_only_changed_manifests(self):
+        self.assertEqual(self.analyze().reparsed, 3)
+        self.assertEqual(self.analyze().reparsed, 0)
+        manifest = self.store.model("registry.ollama.ai/library/gemma3/1b",
+                                    [self.store.blob("cfg-a2", 10), self.store.blob("w-a", 1000)])
+        future = time.time() + 5
+        os.utime(manifest, (future, future))
+        report = self.analyze()
+        self.assertEqual(report.reparsed, 1)
+        self.assertEqual(report.orphans, [digest("cfg-a")])  # no longer referenced
+        gemma4b = next(m for m in report.models if m.name == "gemma3:4b")
+        self.assertEqual(gemma4b.shared, 0)  # licence now only in 4b
+
+    def test_removed_manifest_drops_model_and_partial_blobs_ignored(self):
+        self.analyze()
+        (self.store.root / "manifests/hf.co/bartowski/phi/latest").unlink()
+        (self.store.root / "blobs" / "sha256-deadbeef-partial").write_bytes(b"x")
+        report = self.analyze()
+        self.assertEqual(len(report.models), 2)
+        self.assertEqual(sorted(report.orphans), sorted([digest("cfg-c"), digest("w-c")]))
+        self.assertEqual(report.orphan_bytes, 530)
+
+    def test_prune_candidates_use_weights_atime(self):
+        old = time.time() - 90 * 86400
+        os.utime(ollama_store.blob_path(self.store.root, digest("w-b")), (old, old))
+        stale = ollama_store.prune_candidates(self.analyze(), unused_days=60)
+        self.assertEqual([m.name for m in stale], ["gemma3:4b"])
+
+    def test_large_store_rescan_is_fast(self):
+        for i in range(300):
+            self.store.model(f"registry.ollama.ai/library/m{i}/latest",
+                             [(digest(f"c{i}"), 10), (digest(f"w{i}"), 7 << 30)])
+        self.analyze()
+        start = time.perf_counter()
+        report = self.analyze()
+        self.assertEqual(report.reparsed, 0)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class NameTest(unittest.TestCase):
+    def test_model_names(self):
+        self.assertEqual(ollama_store.model_name("registry.ollama.ai/library/llama3.2/3b"), "llama3.2:3b")
+        self.assertEqual(ollama_store.model_name("registry.ollama.ai/user/tool/latest"), "user/tool:latest")
+
+    def test_manifest_relpath_round_trips(self):
+        for name in ("gemma3:1b", "user/tool:latest", "hf.co/bartowski/phi:q4"):
+            self.assertEqual(ollama_store.model_name(ollama_store.manifest_relpath(name)), name)
+        self.assertEqual(str(ollama_store.manifest_relpath("phi4-mini")),
+                         "registry.ollama.ai/library/phi4-mini/latest")
+
+
+if __name__ == "__main__":
+    unittest.main()
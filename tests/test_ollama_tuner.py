@@ -0,0 +1,169 @@
+"""Tests for the Ollama concurrency tuner (ollama_tuner.py) against a stub server"""
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import ollama_tuner  # noqa: E402
+
+
+class _Handler(StubHandler):
+    def do_GET(self):
+        self.send_json({"version": "0.0.0"})
+
+    def do_POST(self):
+        body = self.read_json()
+        with self.server.slots:
+            time.sleep(self.server.step)
+        self.send_json({"done": True, "eval_count": min(10, body["options"]["num_predict"])})
+
+
+class StubOllama(StubServer):
+    """Generates 10 tokens per request in `step` s, `slots` requests at a time.
+
+    Slots follow OLLAMA_NUM_PARALLEL, but the "hardware" runs at most
+    `cores` in parallel, so beyond that throughput stays flat.
+    """
+    handler = _Handler
+
+    def __init__(self, cores=4, step=0.02):
+        self.cores = cores
+        self.step = step
+        self.set_parallel(1)
+        super().__init__()
+
+    def set_parallel(self, n):
+        self.parallel = n
+        self.slots = threading.Semaphore(min(n, self.cores))
+
+
+def result(clients, tps, p95):
+    r = ollama_tuner.LoadResult(clients, requests=10, tokens=int(tps * 10), wall_s=10.0)
+    r.latencies_ms = [p95] * 10
+    return r
+
+
+class KneeTest(unittest.TestCase):
+    def test_stops_when_throughput_flattens(self):
+        results = [result(1, 20, 500), result(2, 38, 550), result(4, 60, 800), result(8, 62, 1500)]
+        self.assertEqual(ollama_tuner.find_knee(results).clients, 4)
+
+    def test_stops_when_p95_explodes(self):
+        results = [result(1, 20, 500), result(2, 38, 600), result(4, 70, 2000)]
+        self.assertEqual(ollama_tuner.find_knee(results).clients, 2)
+
+    def test_errors_disqualify(self):
+        bad = result(2, 90, 500)
+        bad.errors = 1
+        self.assertEqual(ollama_tuner.find_knee([result(1, 20, 500), bad]).clients, 1)
+
+    def test_percentile(self):
+        self.assertEqual(ollama_tuner.percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(ollama_tuner.percentile([7], 50), 7)
+        self.assertEqual(ollama_tuner.percentile([], 95), 0.0)
+
+
+class DropinTest(unittest.TestCase):
+    def test_round_trip(self):
+        settings = ollama_tuner.OllamaSettings(4, 2, True, "q8_0")
+        text = ollama_tuner.render_dropin(settings, "knee")
+        self.assertIn('Environment="OLLAMA_NUM_PARALLEL=4"', text)
+        self.assertEqual(ollama_tuner.parse_dropin(text), settings)
+        self.assertIsNone(ollama_tuner.parse_dropin("[Service]\n"))
+
+    def test_memory_plan_drops_levels_that_do_not_fit(self):
+        class Mem:
+            weights, overhead, kv_cache = 2 << 30, 256 << 20, 512 << 20
+
+        original = ollama_tuner.gguf.model_fit
+        ollama_tuner.gguf.model_fit = lambda *a: Mem
+        try:
+            levels, need = ollama_tuner.memory_plan("m", [1, 2, 4, 8], 4096, "f16", mem_total=6 << 30)
+        finally:
+            ollama_tuner.gguf.model_fit = original
+        self.assertEqual(levels, [1, 2, 4])
+        self.assertEqual(ollama_tuner.max_loaded_models(need[1], 6 << 30), 1)
+        self.assertEqual(ollama_tuner.max_loaded_models(need[1], 64 << 30), ollama_tuner.MAX_LOADED_MODELS)
+
+
+class TuneTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubOllama()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "ollama.service.d" / "laia-tuning.conf"
+
+    def tearDown(self):
+        self.server.close()
+        self.tmp.cleanup()
+
+    def restart(self, base):
+        settings = ollama_tuner.read_dropin(self.path)
+        self.server.set_parallel(settings.num_parallel if settings else 1)
+
+    def test_closed_loop_load(self):
+        self.server.set_parallel(4)
+        r = ollama_tuner.run_load(self.server.url, "m", 4, duration=0.3)
+        self.assertGreater(r.requests, 20)
+        self.assertEqual(r.tokens, r.requests * 10)
+        self.assertEqual(r.errors, 0)
+        self.assertGreater(r.tokens_per_sec, 0)
+
+    def test_sweep_finds_the_hardware_limit_and_writes_it(self):
+        applier = ollama_tuner.DropinApplier(self.server.url, self.path, self.restart)
+        seen = []
+        report = ollama_tuner.tune(self.server.url, "no-such-model", levels=(1, 2, 4, 8), duration=0.4,
+                                   kv_type="q8_0", applier=applier,
+                                   on_result=lambda label, r: seen.append(label))
+        self.assertEqual(seen, ["before", "parallel 1", "parallel 2", "parallel 4", "parallel 8", "after"])
+        self.assertEqual(report.best.clients, 4)
+        self.assertTrue(report.kept)
+        self.assertEqual(ollama_tuner.read_dropin(self.path), report.settings)
+        self.assertEqual(self.server.parallel, 4)
+        self.assertGreater(report.after.tokens_per_sec, report.before.tokens_per_sec * 2)
+
+    def test_failed_sweep_restores_previous_dropin(self):
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text(ollama_tuner.render_dropin(ollama_tuner.OllamaSettings(2)))
+        applier = ollama_tuner.DropinApplier(self.server.url, self.path, self.restart)
+        calls = []
+
+        def flaky_restart(base):
+            calls.append(base)
+            if len(calls) == 2:
+                raise RuntimeError("ollama did not come back")
+            self.restart(base)
+
+        applier.restart = flaky_restart
+        with self.assertRaises(RuntimeError):
+            ollama_tuner.tune(self.server.url, "m", levels=(1, 2), duration=0.1, applier=applier)
+        self.assertEqual(ollama_tuner.read_dropin(self.path).num_parallel, 2)
+        self.assertEqual(self.server.parallel, 2)
+
+    def test_failed_after_run_restores_previous_dropin(self):
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text(ollama_tuner.render_dropin(ollama_tuner.OllamaSettings(2)))
+        applier = ollama_tuner.DropinApplier(self.server.url, self.path, self.restart)
+
+        def on_result(label, result):
+            if label == "after":
+                raise KeyboardInterrupt  # e.g. Ctrl-C during the final benchmark
+
+        with self.assertRaises(KeyboardInterrupt):
+            ollama_tuner.tune(self.server.url, "m", levels=(1, 4), duration=0.1, applier=applier,
+                              on_result=on_result)
+        self.assertEqual(ollama_tuner.read_dropin(self.path).num_parallel, 2)
+        self.assertEqual(self.server.parallel, 2)
+
+    def test_dry_run_writes_nothing(self):
+        report = ollama_tuner.tune(self.server.url, "m", levels=(1, 2), duration=0.1)
+        self.assertIsNone(report.after)
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+"""Tests for the offline package planner (pkgplan.py) against fixture apt indexes"""
+import gzip
+import hashlib
+import http.server
+import sys
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+
+from fakeserver import StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import pkgplan  # noqa: E402
+
+DEB = b"!<arch>\nfake deb payload\n"
+DEB_SHA = hashlib.sha256(DEB).hexdigest()
+
+MAIN = f"""Package: curl
+Version: 7.88.1-10
+Architecture: amd64
+Depends: libc6 (>= 2.34), libcurl4 (= 7.88.1-10), zlib1g
+Recommends: ca-certificates
+Size: {len(DEB)}
+Installed-Size: 500
+Filename: pool/main/c/curl/curl_7.88.1-10_amd64.deb
+SHA256: {DEB_SHA}
+Description: command line tool for transferring data with URL syntax
+ curl is a command line tool for transferring data with URL syntax.
+
+Package: libcurl4
+Version: 7.88.1-10
+Architecture: amd64
+Depends: libc6 (>= 2.17), libssl3 (>= 3.0.0) | libssl1.1
+Size: 400000
+Installed-Size: 1000
+Filename: pool/main/c/curl/libcurl4_7.88.1-10_amd64.deb
+
+Package: libcurl4
+Version: 7.74.0-1
+Architecture: amd64
+Depends: libc6
+Size: 1
+Installed-Size: 1
+Filename: pool/main/c/curl/libcurl4_7.74.0-1_amd64.deb
+
+Package: libssl3
+Version: 3.0.11-1
+Architecture: amd64
+Pre-Depends: libc6 (>= 2.34)
+Size: 2000000
+Installed-Size: 6000
+Filename: pool/main/o/openssl/libssl3_3.0.11-1_amd64.deb
+
+Package: ca-certificates
+Version: 20230311
+Architecture: all
+Depends: openssl (>= 1.1.1), debconf (>= 0.5) | debconf-2.0
+Size: 150000
+Installed-Size: 400
+Filename: pool/main/c/ca-certificates/ca-certificates_20230311_all.deb
+
+Package: openssl
+Version: 3.0.11-1
+Architecture: amd64
+Depends: libc6 (>= 2.34), libssl3 (>= 3.0.9)
+Size: 1400000
+Installed-Size: 2300
+Filename: pool/main/o/openssl/openssl_3.0.11-1_amd64.deb
+
+Package: mawk
+Version: 1.3.4.20200120-3.1
+Architecture: amd64
+Provides: awk
+Size: 100000
+Installed-Size: 200
+Filename: pool/main/m/mawk/mawk_1.3.4.20200120-3.1_amd64.deb
+
+Package: gawk-user
+Version: 1:1.0-1
+Architecture: amd64
+Depends: awk, nonexistent-lib
+Size: 5000
+Installed-Size: 10
+Filename: pool/main/g/gawk-user/gawk-user_1.0-1_amd64.deb
+
+Package: curl
+Version: 7.88.1-10
+Architecture: i386
+Size: 999999999
+Filename: pool/main/c/curl/curl_7.88.1-10_i386.deb
+"""
+
+UPDATES = """Package: zlib1g
+Version: 1:1.2.13.dfsg-1
+Architecture: amd64
+Pre-Depends: libc6 (>= 2.14)
+Size: 90000
+Installed-Size: 160
+Filename: pool/main/z/zlib/zlib1g_1.2.13.dfsg-1_amd64.deb
+"""
+
+STATUS = """Package: libc6
+Status: install ok installed
+Version: 2.36-9
+Architecture: amd64
+
+Package: debconf
+Status: install ok installed
+Version: 1.5.82
+Provides: debconf-2.0
+
+Package: zlib1g
+Status: deinstall ok config-files
+Version: 1:1.2.11.dfsg-1
+
+Package: git
+Status: install ok installed
+Version: 1:2.39.2-1.1
+"""
+
+
+class VersionTest(unittest.TestCase):
+    def test_dpkg_ordering(self):
+        cases = [("1.0", "1.0", 0), ("1.0~rc1", "1.0", -1), ("1.0", "1.0+b1", -1),
+                 ("1:0.1", "2.0", 1), ("2.36-9", "2.34", 1), ("1.10", "1.9", 1),
+                 ("7.88.1-10", "7.88.1-9", 1), ("1.0a", "1.0", 1), ("1.001", "1.1", 0)]
+        for a, b, sign in cases:
+            result = pkgplan.compare_versions(a, b)
+            self.assertEqual((result > 0) - (result < 0), sign, f"{a} vs {b}")
+
+    def test_relations(self):
+        self.assertEqual(pkgplan.parse_relations("libc6 (>= 2.34), libssl3 | libssl1.1, perl:any"), [
+            [("libc6", ">=", "2.34")],
+            [("libssl3", None, None), ("libssl1.1", None, None)],
+            [("perl", None, None)],
+        ])
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.lists = root / "lists"
+        self.lists.mkdir()
+        (self.lists / "deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages").write_text(MAIN)
+        with gzip.open(self.lists / "deb.debian.org_debian_dists_bookworm-updates_main_binary-amd64_Packages.gz",
+                       "wt") as f:
+            f.write(UPDATES)
+        (self.lists / "deb.debian.org_debian_dists_bookworm_main_i18n_Translation-en").write_text("x")
+        self.status = root / "status"
+        self.status.write_text(STATUS)
+        self.package_lists = root / "packages"
+        self.package_lists.mkdir()
+        (self.package_lists / "base.list").write_text("# tools\ncurl\ngit   # already here\n\nno-such-pkg\n")
+        (self.package_lists / "extra.list").write_text("curl\ngawk-user\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def plan(self, *lists, recommends=True):
+        return pkgplan.plan_lists(lists or ("base",), self.lists, self.status, "amd64", recommends,
+                                  self.package_lists)
+
+    def test_closure_sizes_and_batch(self):
+        plan = self.plan()
+        self.assertEqual(plan.already, ["git"])
+        self.assertEqual(plan.missing, ["no-such-pkg"])
+        self.assertEqual(plan.batch, ["curl"])
+        self.assertEqual([p.name for p in plan.install],
+                         ["ca-certificates", "curl", "libcurl4", "libssl3", "openssl", "zlib1g"])
+        by_name = {p.name: p for p in plan.install}
+        self.assertEqual(by_name["libcurl4"].version, "7.88.1-10")   # newest; "=" constraint holds
+        self.assertEqual(by_name["zlib1g"].version, "1:1.2.13.dfsg-1")  # from the .gz index
+        self.assertEqual(by_name["curl"].url,
+                         "http://deb.debian.org/debian/pool/main/c/curl/curl_7.88.1-10_amd64.deb")
+        self.assertEqual(plan.download_bytes, sum(p.size for p in plan.install))
+        self.assertEqual(plan.installed_bytes, (500 + 1000 + 6000 + 400 + 2300 + 160) * 1024)
+        self.assertEqual(plan.unresolved, [])
+        self.assertEqual(pkgplan.apt_install_command(plan), ["apt-get", "install", "-y", "-q", "curl"])
+
+    def test_without_recommends(self):
+        plan = self.plan(recommends=False)
+        self.assertEqual([p.name for p in plan.install], ["curl", "libcurl4", "libssl3", "zlib1g"])
+        self.assertIn("--no-install-recommends", pkgplan.apt_install_command(plan))
+
+    def test_virtual_packages_and_unresolvable_deps(self):
+        plan = self.plan("extra")
+        names = {p.name for p in plan.install}
+        self.assertIn("mawk", names)           # provides awk
+        self.assertEqual(plan.unresolved, ["gawk-user: nonexistent-lib"])
+        self.assertEqual(plan.batch, ["curl", "gawk-user"])
+
+    def test_summary_and_missing_indexes(self):
+        text = "\n".join(pkgplan.summary(self.plan(), mbps=8))
+        self.assertIn("1 already installed, 1 to install, 1 not in any apt source", text)
+        self.assertIn("no-such-pkg", text)
+        with self.assertRaises(pkgplan.PlanError):
+            pkgplan.plan_lists(["base"], Path(self.tmp.name) / "empty", self.status, "amd64",
+                               package_lists_dir=self.package_lists)
+
+    def test_repo_lists_parse(self):
+        for name in ("base", "ai", "optional-dev", "security"):
+            names = pkgplan.read_list(name)
+            self.assertTrue(names)
+            self.assertTrue(all(" " not in n for n in names))
+
+
+class PrefetchTest(unittest.TestCase):
+    def test_parallel_prefetch_verifies_checksums(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mirror = Path(tmp) / "mirror"
+            (mirror / "pool").mkdir(parents=True)
+            (mirror / "pool" / "good.deb").write_bytes(DEB)
+            (mirror / "pool" / "bad.deb").write_bytes(DEB + b"tampered")
+            handler = partial(_QuietHandler, directory=str(mirror))
+            server = StubServer(handler)
+            base = server.url
+            good = pkgplan.Package("good", "1:1.0-1", "amd64", size=len(DEB), filename="pool/good.deb",
+                                   sha256=DEB_SHA, base_url=base)
+            bad = pkgplan.Package("bad", "1.0", "all", size=len(DEB) + 8, filename="pool/bad.deb",
+                                  sha256=DEB_SHA, base_url=base)
+            gone = pkgplan.Package("gone", "1.0", "all", size=1, filename="pool/gone.deb", base_url=base)
+            archives = Path(tmp) / "archives"
+            seen = []
+            try:
+                errors = pkgplan.prefetch([good, bad, gone], archives, workers=3,
+                                          on_progress=lambda done, total, p: seen.append(p.name))
+            finally:
+                server.close()
+            self.assertEqual((archives / "good_1%3a1.0-1_amd64.deb").read_bytes(), DEB)
+            self.assertEqual(set(errors), {"bad", "gone"})
+            self.assertIn("SHA256", errors["bad"])
+            self.assertFalse((archives / "bad_1.0_all.deb").exists())
+            self.assertEqual(list((archives / "partial").iterdir()), [])
+            self.assertEqual(sorted(seen), ["bad", "gone", "good"])
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests for gui/laia_common/providers.py and envfile.py"""
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import envfile, providers  # noqa: E402
+
+
+class ProviderCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.specs = providers.load_providers()
+
+    def test_loads_cloud_providers_only(self):
+        self.assertEqual(set(self.specs), {"groq", "openrouter", "huggingface", "mistral", "google"})
+
+    def test_provider_aware_settings(self):
+        env = providers.online_settings(self.specs["mistral"], "k")
+        self.assertEqual(env["LAIA_API_BASE"], "https://api.mistral.ai/v1")
+        self.assertEqual(env["MISTRAL_API_KEY"], "k")
+        self.assertEqual(env["LAIA_MODEL"], "open-mistral-7b")
+        self.assertNotIn("GROQ_API_KEY", env)
+
+    def test_auth_headers(self):
+        self.assertEqual(self.specs["groq"].auth_headers("k"), {"Authorization": "Bearer k"})
+        self.assertEqual(self.specs["google"].auth_headers("k"), {"x-goog-api-key": "k"})
+
+    def test_numbered_key_vars(self):
+        groq = self.specs["groq"]
+        env = {"GROQ_API_KEY": "a", "GROQ_API_KEY_2": "b", "GROQ_API_KEY_OLD": "c"}
+        self.assertEqual(groq.key_vars(env), ["GROQ_API_KEY", "GROQ_API_KEY_2"])
+        self.assertEqual(groq.next_key_var(env), "GROQ_API_KEY_3")
+        self.assertEqual(groq.next_key_var({}), "GROQ_API_KEY")
+
+
+class EnvFileTest(unittest.TestCase):
+    def test_update_merges_and_keeps_other_keys(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "laia" / "api_keys.env"
+            path.parent.mkdir()
+            path.write_text("# keys\nLAIA_MODE=local\nGROQ_API_KEY=\"g\"\n")
+            envfile.update_env(path, {"LAIA_MODE": "online", "MISTRAL_API_KEY": "m"})
+            self.assertEqual(envfile.read_env(path),
+                             {"LAIA_MODE": "online", "GROQ_API_KEY": "g", "MISTRAL_API_KEY": "m"})
+            self.assertTrue(path.read_text().startswith("# keys\n"))
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_missing_file_reads_empty(self):
+        self.assertEqual(envfile.read_env("/nonexistent/api_keys.env"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
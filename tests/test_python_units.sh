@@ -0,0 +1,5 @@
+#!/usr/bin/env bash
+# Unit tests for the shared GUI helpers (gui/laia_common)
+LAIA_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+cd "$LAIA_ROOT" || exit 1
+python3 -m unittest discover -s tests -p 'test_*.py'
@@ -0,0 +1,90 @@
+"""Tests for gui/laia_common/ratelimit.py"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+GUI_DIR = Path(__file__).resolve().parent.parent / "gui"
+sys.path.insert(0, str(GUI_DIR))
+from laia_common import ratelimit  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_catalog_formats(self):
+        self.assertEqual(ratelimit.parse_rate_limit("30 req/min, 14400 req/day"),
+                         [(30, 60), (14400, 86400)])
+        self.assertEqual(ratelimit.parse_rate_limit("1 req/sec (free tier)"), [(1, 1)])
+        self.assertEqual(ratelimit.parse_rate_limit("Varies by model"), [])
+
+    def test_retry_after_seconds_or_http_date(self):
+        now = 1_800_000_000  # Fri, 15 Jan 2027 08:00:00 GMT
+        self.assertEqual(ratelimit.retry_after_seconds("120"), 120.0)
+        self.assertEqual(ratelimit.retry_after_seconds(30), 30.0)
+        self.assertEqual(ratelimit.retry_after_seconds("Fri, 15 Jan 2027 08:01:30 GMT", now), 90.0)
+        self.assertEqual(ratelimit.retry_after_seconds("Fri, 15 Jan 2027 07:00:00 GMT", now), 0.0)
+        for bad in (None, "", "soon", "nan", "inf"):
+            self.assertIsNone(ratelimit.retry_after_seconds(bad, now), bad)
+
+
+class LimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "rl.json"
+        self.clock = FakeClock()
+        self.limiter = ratelimit.RateLimiter({"groq": [(2, 60), (3, 86400)], "or": [(1, 1)]},
+                                             self.path, clock=self.clock)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_minute_bucket_refills(self):
+        self.assertTrue(self.limiter.try_acquire("groq")[0])
+        self.assertTrue(self.limiter.try_acquire("groq")[0])
+        ok, wait = self.limiter.try_acquire("groq")
+        self.assertFalse(ok)
+        self.assertAlmostEqual(wait, 30.0)
+        self.clock.now += 30
+        self.assertTrue(self.limiter.try_acquire("groq")[0])
+        # Day bucket (3/day) is now empty even though minutes pass
+        self.clock.now += 120
+        self.assertGreater(self.limiter.wait_time("groq"), 3600)
+
+    def test_choose_skips_provider_past_deadline(self):
+        chain = [{"provider": "groq", "model": "a"}, {"provider": "or", "model": "b"},
+                 {"provider": "local", "model": "c"}]
+        self.limiter.note_rate_limited("groq", retry_after=120)
+        deadline = self.clock.now + 5
+        self.assertEqual(self.limiter.choose(chain, deadline, sleep=self.clock.sleep)["model"], "b")
+        self.assertEqual(self.limiter.choose(chain, deadline, sleep=self.clock.sleep)["model"], "b")
+        self.assertEqual(self.clock.now, 1001.0)  # waited 1 s for "or" instead of 120 s for groq
+        self.assertFalse(self.limiter.acquire("groq", deadline, sleep=self.clock.sleep))
+
+    def test_unparseable_retry_after_is_ignored(self):
+        self.limiter.note_rate_limited("or", retry_after="whenever")
+        self.assertAlmostEqual(self.limiter.wait_time("or"), 1.0)   # bucket emptied, no block
+
+    def test_budget_is_shared_across_processes(self):
+        env = dict(os.environ, PYTHONPATH=str(GUI_DIR), LAIA_RATELIMIT_FILE=str(self.path))
+        code = ("import sys; from laia_common.ratelimit import RateLimiter as R;"
+                "sys.exit(0 if R({'p': [(1, 3600)]}).try_acquire('p')[0] else 1)")
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], env=env).returncode, 0)
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], env=env).returncode, 1)
+        local = ratelimit.RateLimiter({"p": [(1, 3600)]}, self.path)
+        self.assertGreater(local.wait_time("p"), 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Offline tests for the mode recommender (recommend.py) against a stub server"""
+import json
+import sys
+import time
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import providers, recommend  # noqa: E402
+
+
+class _Handler(StubHandler):
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        if self.path == "/api/tags":
+            self.send_json({"models": [{"name": n, "size": s} for n, s in self.server.models]})
+        else:
+            self.send_json({"error": "missing key"}, 401)
+
+    def do_POST(self):
+        body = self.read_json()
+        time.sleep(self.server.delay)
+        if self.path == "/api/generate":
+            self.server.generated.append(body["model"])
+            lines = [{"response": "1", "done": False}, {"response": " 2", "done": False},
+                     {"done": True, "eval_count": 24, "eval_duration": 800_000_000,
+                      "load_duration": 2_000_000_000}]
+            self.send_json(b"".join(json.dumps(c).encode() + b"\n" for c in lines),
+                           content_type="application/x-ndjson")
+        else:
+            events = [{"choices": [{"delta": {"content": w}}]} for w in ("1", " 2", " 3")]
+            data = b"".join(b"data: " + json.dumps(e).encode() + b"\n\n" for e in events)
+            self.send_json(data + b"data: [DONE]\n\n", content_type="text/event-stream")
+
+
+class OllamaAndProvider(StubServer):
+    """Answers like Ollama (/api/*) and an OpenAI-style provider (/v1/*)."""
+    handler = _Handler
+
+    def __init__(self, models=(("big:7b", 4_000_000_000), ("tiny:1b", 800_000_000)), delay=0.0):
+        self.models = models
+        self.delay = delay
+        self.generated = []
+        super().__init__()
+
+
+def spec_for(server, latency_ms=100, tps=None, pid="stub"):
+    models = [{"id": "m", "recommended": True, **({"tokens_per_sec": tps} if tps else {})}]
+    return providers.ProviderSpec(id=pid, name=pid, api_base=f"http://127.0.0.1:{server.address[1]}/v1",
+                                  api_key_env="STUB_API_KEY", latency_ms=latency_ms, models=models)
+
+
+class ProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = OllamaAndProvider()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_ollama_trial_uses_smallest_model_and_excludes_load(self):
+        est = recommend.probe_ollama("127.0.0.1", self.server.address[1])
+        self.assertEqual(self.server.generated, ["tiny:1b"])
+        self.assertTrue(est.viable and est.measured)
+        self.assertAlmostEqual(est.tokens_per_sec, 30.0)
+        self.assertGreaterEqual(est.ttft_ms, 0)
+        self.assertIn("model load 2.0 s", est.detail)
+
+    def test_ollama_without_models_is_not_viable(self):
+        self.server.models = ()
+        est = recommend.probe_ollama("127.0.0.1", self.server.address[1])
+        self.assertFalse(est.viable)
+        self.assertIn("no models", est.detail)
+
+    def test_online_without_key_uses_round_trip_and_catalog(self):
+        est = recommend.probe_online(spec_for(self.server, latency_ms=150, tps=500))
+        self.assertTrue(est.viable)
+        self.assertFalse(est.measured)
+        self.assertGreaterEqual(est.ttft_ms, 150)
+        self.assertEqual(est.tokens_per_sec, 500)
+
+    def test_online_with_key_streams_a_trial(self):
+        est = recommend.probe_online(spec_for(self.server), key="k")
+        self.assertTrue(est.viable and est.measured)
+        self.assertIsNotNone(est.ttft_ms)
+
+    def test_unreachable_provider(self):
+        spec = providers.ProviderSpec(id="gone", name="Gone", api_base="http://127.0.0.1:9/v1",
+                                      api_key_env="GONE_API_KEY")
+        est = recommend.probe_online(spec, timeout=1)
+        self.assertFalse(est.viable)
+        self.assertTrue(recommend.describe(est).startswith("❌ unreachable"))
+
+
+class MeasureTest(unittest.TestCase):
+    def test_time_box_and_recommendation(self):
+        fast, slow = OllamaAndProvider(), OllamaAndProvider(delay=3)
+        try:
+            specs = {"fast": spec_for(fast, 50, 400, "fast"), "slow": spec_for(slow, 50, 400, "slow")}
+            start = time.monotonic()
+            estimates = recommend.measure(specs, env={}, config={}, timeout=1.5, sweep=False,
+                                          local_host="127.0.0.2")
+            self.assertLess(time.monotonic() - start, 2.5)
+        finally:
+            for server in (fast, slow):
+                server.close()
+        by_target = {e.target: e for e in estimates if e.mode == "online"}
+        self.assertTrue(by_target["fast"].viable)
+        self.assertFalse(by_target["slow"].viable)
+        self.assertIn("no answer within", by_target["slow"].detail)
+        best = recommend.recommend(estimates)
+        self.assertEqual((best.mode, best.target), ("online", "fast"))
+
+    def test_ranking_weighs_throughput(self):
+        snappy_but_slow = recommend.ModeEstimate("local", "a", ttft_ms=50, tokens_per_sec=8, viable=True)
+        steady = recommend.ModeEstimate("online", "b", ttft_ms=400, tokens_per_sec=300, viable=True)
+        self.assertIs(recommend.recommend([snappy_but_slow, steady]), steady)
+        self.assertIsNone(recommend.recommend([recommend.ModeEstimate("lan", "")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
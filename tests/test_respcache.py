@@ -0,0 +1,101 @@
+"""Offline tests for the response cache (respcache.py) in front of aiclient.py"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from fakeserver import StubHandler, StubServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gui"))
+from laia_common import aiclient, aiconfig, respcache  # noqa: E402
+
+
+class _Handler(StubHandler):
+    def do_POST(self):
+        body = self.read_json()
+        self.server.requests += 1
+        self.send_json({"choices": [{"message": {"role": "assistant",
+                                                 "content": f"echo {body['messages'][-1]['content']}"}}],
+                        "model": body["model"]})
+
+
+class FakeUpstream(StubServer):
+    """OpenAI-compatible stub that counts the requests it answers."""
+    handler = _Handler
+
+    def __init__(self):
+        self.requests = 0
+        super().__init__()
+
+    @property
+    def base(self):
+        return self.url + "/v1"
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = respcache.ResponseCache(Path(self.tmp.name) / "r.db")
+        self.upstream = FakeUpstream()
+        self.endpoint = aiclient.Endpoint("fake", self.upstream.base, model="m1")
+
+    def tearDown(self):
+        self.upstream.close()
+        self.tmp.cleanup()
+
+    def ask(self, content, **params):
+        body = {"messages": [{"role": "user", "content": content}], "temperature": 0, **params}
+        return aiclient.chat_completion(self.endpoint, body, cache=self.cache)
+
+    def test_identical_requests_hit_cache(self):
+        first = self.ask("hello")
+        second = self.ask("  hello \n")  # normalized to the same key
+        self.assertEqual(self.upstream.requests, 1)
+        self.assertNotIn("laia_cache", first)
+        self.assertEqual(second["laia_cache"], "hit")
+        self.assertEqual(second["choices"], first["choices"])
+        stats = self.cache.stats()[0]
+        self.assertEqual((stats["model"], stats["hits"], stats["misses"]), ("m1", 1, 1))
+        self.assertGreater(stats["bytes"], 0)
+
+    def test_sampling_params_are_part_of_key(self):
+        self.ask("hello", max_tokens=5)
+        self.ask("hello", max_tokens=6)
+        self.assertEqual(self.upstream.requests, 2)
+
+    def test_nondeterministic_and_streaming_skip_cache(self):
+        self.ask("hi", temperature=0.7)
+        self.ask("hi", temperature=0.7)
+        self.assertEqual(self.upstream.requests, 2)
+        self.assertFalse(self.cache.cacheable({"temperature": 0, "stream": True}))
+        self.assertTrue(self.cache.cacheable({"temperature": 0.7, "seed": 1}))
+        self.assertEqual(self.cache.stats(), [])
+
+    def test_lru_eviction_respects_cap(self):
+        cache = respcache.ResponseCache(Path(self.tmp.name) / "small.db", max_bytes=400)
+        body = lambda i: {"model": "m", "messages": [{"role": "user", "content": str(i)}]}
+        for i in range(5):
+            cache.put("p", body(i), {"text": "x" * 100})
+            if i == 1:
+                cache.get("p", body(0))  # touch 0, so 1 is now least recently used
+        count, stored = cache.size()
+        self.assertLessEqual(stored, 400)
+        self.assertIsNotNone(cache.get("p", body(4)))
+        self.assertIsNone(cache.get("p", body(1)))
+        self.assertLess(count, 5)
+
+
+class ConfigTest(unittest.TestCase):
+    def test_disabled_by_default_and_user_override(self):
+        self.assertIsNone(respcache.ResponseCache.from_config(aiconfig.load_ai_config(user_path=None)))
+        with tempfile.TemporaryDirectory() as tmp:
+            user = Path(tmp) / "config.yaml"
+            aiconfig.set_user_option("cache", "enabled", True, user_path=user)
+            aiconfig.set_user_option("cache", "path", str(Path(tmp) / "c.db"), user_path=user)
+            config = aiconfig.load_ai_config(user_path=user)
+            self.assertEqual(config["cache"]["max_mb"], 256)  # system value kept
+            self.assertIsInstance(respcache.ResponseCache.from_config(config), respcache.ResponseCache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Tests for the shared, mtime-cached settings layer (settings.py)"""
+import io
+import json
+import os
+import shlex
+import stat
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+GUI = Path(__file__).resolve().parent.parent / "gui"
+sys.path.insert(0, str(GUI))
+from laia_common import aiconfig, envfile, settings  # noqa: E402
+
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.keys = root / "api_keys.env"
+        self.keys.write_text("# LAIA keys\nLAIA_MODE=online\nGROQ_API_KEY=gsk_one\n")
+        self.config = root / "config.yaml"
+        self.config.write_text("local:\n  port: 11434\n  model: gemma3:1b\n")
+        self.user = root / "user.yaml"
+        self.user.write_text("local:\n  model: phi4-mini\n")
+        self.snapshot = root / "settings.json"
+        self.settings = self.make()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self):
+        return settings.Settings(keys_file=self.keys, config_file=self.config,
+                                 user_config=self.user, snapshot_file=self.snapshot)
+
+    def touch(self, path, text):
+        path.write_text(text)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def test_parses_once_until_a_file_changes(self):
+        with mock.patch.object(envfile, "read_env", wraps=envfile.read_env) as read_env, \
+                mock.patch.object(aiconfig, "load_ai_config", wraps=aiconfig.load_ai_config) as load:
+            for _ in range(5):
+                self.assertEqual(self.settings.env()["GROQ_API_KEY"], "gsk_one")
+                self.assertEqual(self.settings.config()["local"]["model"], "phi4-mini")
+            self.assertEqual((read_env.call_count, load.call_count), (1, 1))
+            self.touch(self.keys, "LAIA_MODE=local\n")
+            self.assertEqual(self.settings.env(), {"LAIA_MODE": "local"})
+            self.assertEqual((read_env.call_count, load.call_count), (2, 1))
+            self.touch(self.user, "local:\n  model: qwen3:4b\n")
+            self.assertEqual(self.settings.get("config.local.model"), "qwen3:4b")
+            self.assertEqual((read_env.call_count, load.call_count), (2, 2))
+
+    def test_get_and_copies(self):
+        self.assertEqual(self.settings.get("LAIA_MODE"), "online")
+        self.assertEqual(self.settings.get("config.local.port"), 11434)
+        self.assertEqual(self.settings.get("config.local.nope", "x"), "x")
+        self.assertEqual(self.settings.get("config.local.port.deeper"), None)
+        self.settings.config()["local"]["port"] = 1
+        self.settings.env()["LAIA_MODE"] = "lan"
+        self.assertEqual(self.settings.get("config.local.port"), 11434)
+        self.assertEqual(self.settings.get("LAIA_MODE"), "online")
+
+    def test_update_merges_and_exports(self):
+        self.settings.update_env({"LAIA_MODE": "lan", "LAIA_LAN_HOST": "10.0.0.5"})
+        text = self.keys.read_text()
+        self.assertIn("# LAIA keys", text)
+        self.assertIn("GROQ_API_KEY=gsk_one", text)
+        self.assertEqual(self.settings.get("LAIA_LAN_HOST"), "10.0.0.5")
+        self.assertEqual(stat.S_IMODE(self.snapshot.stat().st_mode), 0o600)
+        data = json.loads(self.snapshot.read_text())
+        self.assertEqual(data["env"]["LAIA_MODE"], "lan")
+        self.assertEqual(data["config"]["local"]["port"], 11434)
+        self.settings.update_env(remove=["GROQ_API_KEY"])
+        self.assertNotIn("GROQ_API_KEY", self.settings.env())
+        for bad in ({"BAD NAME": "x"}, {"OK": "two\nlines"}):
+            with self.assertRaises(ValueError):
+                self.settings.update_env(bad)
+
+    def test_snapshot_is_adopted_only_while_fresh(self):
+        self.assertFalse(self.make().load_snapshot())
+        self.settings.export()
+        reader = self.make()
+        with mock.patch.object(envfile, "read_env") as read_env:
+            self.assertTrue(reader.load_snapshot())
+            self.assertEqual(reader.get("GROQ_API_KEY"), "gsk_one")
+            self.assertEqual(reader.get("config.local.model"), "phi4-mini")
+            read_env.assert_not_called()
+        self.touch(self.keys, "LAIA_MODE=local\n")
+        self.assertFalse(self.make().load_snapshot())
+
+    def test_shell_lines_quote_values(self):
+        values = {"LAIA_MODE": "online", "KEY": "a'b $c", "not-a-name": "x"}
+        self.assertEqual(settings.shell_lines(values),
+                         ["export LAIA_MODE=online", "export KEY='a'\"'\"'b $c'"])
+        self.assertEqual(settings.shell_lines({"K": "v w"}, array="API_KEYS"), ["API_KEYS[K]='v w'"])
+
+
+class CliTest(unittest.TestCase):
+    def test_shell_array_from_keys_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            keys = Path(tmp) / "keys.env"
+            keys.write_text('GROQ_API_KEY="gsk $x"\n')
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = settings.main(["--keys-file", str(keys), "shell", "--array", "API_KEYS"])
+            self.assertEqual(code, 0)
+            script = f"declare -A API_KEYS\neval {shlex.quote(out.getvalue())}\nprintf %s \"${{API_KEYS[GROQ_API_KEY]}}\""
+            self.assertEqual(subprocess.run(["bash", "-c", script], capture_output=True, text=True).stdout,
+                             "gsk $x")
+
+    def test_set_reads_stdin(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            keys = Path(tmp) / "keys.env"
+            keys.write_text("OTHER=1\n")
+            with mock.patch.object(sys, "stdin", io.StringIO("GROQ_API_KEY=gsk_two\n")):
+                code = settings.main(["--keys-file", str(keys), "set", "--stdin", "LAIA_MODE=online"])
+            self.assertEqual(code, 0)
+            self.assertEqual(envfile.read_env(keys),
+                             {"OTHER": "1", "LAIA_MODE": "online", "GROQ_API_KEY": "gsk_two"})
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(settings.main(["--keys-file", str(keys), "get", "MISSING"]), 1)
+                self.assertEqual(settings.main(["--keys-file", str(keys), "set", "novalue"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
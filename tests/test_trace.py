@@ -0,0 +1,103 @@
+"""Tests for opt-in GUI tracing (trace.py), run in a child process with LAIA_TRACE set"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+GUI_DIR = Path(__file__).resolve().parent.parent / "gui"
+sys.path.insert(0, str(GUI_DIR))
+from laia_common import trace  # noqa: E402
+
+# Stands in for a GUI: fake GLib/GObject (no GTK here) that run callbacks at once
+SCRIPT = textwrap.dedent("""
+    import subprocess, threading, time, types
+    from laia_common import envfile, trace
+
+    class Object:
+        # Matches handlers by identity, as GObject does
+        def connect(self, signal, handler, *args):
+            self.funcs = getattr(self, "funcs", []) + [handler]
+            self.handler = lambda: handler(self, *args)
+
+        def handler_block_by_func(self, func):
+            if not any(f is func for f in self.funcs):
+                raise TypeError(f"nothing connected to {func}")
+            return 1
+
+        handler_unblock_by_func = handler_block_by_func
+
+        def disconnect_by_func(self, func):
+            self.handler_block_by_func(func)
+            self.funcs = [f for f in self.funcs if f is not func]
+    GObject = types.SimpleNamespace(Object=Object)
+    GLib = types.SimpleNamespace(idle_add=lambda cb, *a: cb(*a),
+                                 timeout_add=lambda ms, cb, *a: cb(*a),
+                                 timeout_add_seconds=lambda s, cb, *a: cb(*a))
+    assert trace.install(GLib, GObject)
+
+    def slow_refresh():
+        time.sleep(0.03)
+        return False
+
+    GLib.idle_add(slow_refresh)
+    button = Object()
+    button.connect("clicked", lambda b: None)
+    button.handler()
+
+    class Window:
+        def on_toggled(self, switch):
+            pass
+    window = Window()
+    switch = Object()
+    switch.connect("notify::active", window.on_toggled)
+    assert switch.handler_block_by_func(window.on_toggled) == 1     # a fresh bound method
+    switch.handler_unblock_by_func(window.on_toggled)
+    switch.disconnect_by_func(window.on_toggled)
+    assert switch.funcs == []
+    subprocess.run(["sh", "-c", "exit 3"])
+    threading.Thread(target=lambda: subprocess.run(["true"]), name="worker").start()
+    envfile.read_env("/nonexistent/api_keys.env")
+""")
+
+
+class TraceTest(unittest.TestCase):
+    def run_traced(self, env_value):
+        env = dict(os.environ, PYTHONPATH=str(GUI_DIR), LAIA_TRACE=env_value)
+        return subprocess.run([sys.executable, "-c", SCRIPT], env=env,
+                              capture_output=True, text=True, timeout=30)
+
+    def test_spans_exported_as_chrome_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "trace.json"
+            result = self.run_traced(str(out))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            events = json.loads(out.read_text())["traceEvents"]
+            self.assertEqual(out.stat().st_mode & 0o777, 0o600)
+
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        shell = spans["sh -c exit 3"]
+        self.assertEqual((shell["cat"], shell["args"]["exit_code"]), ("subprocess", 3))
+        self.assertEqual(spans["true"]["args"]["thread"], "worker")
+        self.assertGreaterEqual(spans["slow_refresh"]["dur"], 30000)
+        self.assertEqual(spans["slow_refresh"]["cat"], "mainloop")
+        self.assertTrue(any(n.startswith("Object::clicked") for n in spans))
+        self.assertEqual(spans["read_env"]["cat"], "config")
+        self.assertTrue(any(e["ph"] == "M" and e["args"]["name"] == "worker" for e in events))
+        self.assertIn("slow main-loop callback slow_refresh", result.stderr)
+        self.assertNotIn("Object::clicked", result.stderr)  # fast handler, no warning
+
+    def test_disabled_by_default(self):
+        if trace.ENABLED:
+            self.skipTest("LAIA_TRACE is set in this environment")
+        self.assertFalse(trace.install())
+        fn = lambda: None  # noqa: E731
+        self.assertIs(trace.traced("config")(fn), fn)
+        self.assertEqual(subprocess.Popen.__name__, "Popen")
+
+
+if __name__ == "__main__":
+    unittest.main()